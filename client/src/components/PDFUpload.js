@@ -2,6 +2,8 @@ import React, { useState } from "react";
 import axios from "axios";
 import "./PDFUpload.css";
 
+const CONVERSION_POLL_INTERVAL_MS = 2000;
+
 const PDFUpload = () => {
   const [file, setFile] = useState(null);
   const [isUploading, setIsUploading] = useState(false);
@@ -10,6 +12,7 @@ const PDFUpload = () => {
   const [error, setError] = useState(null);
   const [success, setSuccess] = useState(null);
   const [isInserting, setIsInserting] = useState(false);
+  const [queuePosition, setQueuePosition] = useState(null);
 
   const handleFileChange = (event) => {
     const selectedFile = event.target.files[0];
@@ -22,6 +25,23 @@ const PDFUpload = () => {
     }
   };
 
+  const waitForConversion = async (jobId) => {
+    for (;;) {
+      await new Promise((resolve) =>
+        setTimeout(resolve, CONVERSION_POLL_INTERVAL_MS)
+      );
+      const { data: job } = await axios.get(
+        `/api/pdf-upload/status/${jobId}`
+      );
+      setQueuePosition(job.queuePosition);
+
+      if (job.status === "succeeded") return job.result;
+      if (job.status === "failed") {
+        return { success: false, error: job.error || "PDF conversion failed." };
+      }
+    }
+  };
+
   const handleUpload = async () => {
     if (!file) {
       setError("Please select a PDF file");
@@ -47,13 +67,21 @@ const PDFUpload = () => {
         },
       });
 
-      setConversionResult(response.data);
+      // Conversion runs in the server queue; wait for the preview
+      const result = await waitForConversion(response.data.jobId);
+      if (!result.success) {
+        setError(result.error || "PDF conversion failed.");
+        return;
+      }
+
+      setConversionResult(result);
       setSuccess("PDF converted successfully! Review the preview below.");
     } catch (err) {
       setError(err.response?.data?.error || "Upload failed. Please try again.");
     } finally {
       setIsUploading(false);
       setUploadProgress(0);
+      setQueuePosition(null);
     }
   };
 
@@ -65,7 +93,7 @@ const PDFUpload = () => {
 
     try {
       const response = await axios.post("/api/pdf-upload/confirm", {
-        conversionData: conversionResult.conversionData,
+        conversionId: conversionResult.conversionId,
       });
 
       setSuccess(
@@ -135,7 +163,11 @@ const PDFUpload = () => {
             >
               {isUploading ? (
                 <>
-                  <span>Converting... {uploadProgress}%</span>
+                  <span>
+                    {queuePosition
+                      ? `Queued for conversion (position ${queuePosition})...`
+                      : `Converting... ${uploadProgress}%`}
+                  </span>
                   <div className="progress-bar">
                     <div
                       className="progress-fill"
@@ -157,14 +189,12 @@ const PDFUpload = () => {
                 <strong>Status:</strong>
                 <span
                   className={
-                    conversionResult.conversionData.conversionResult.validation
-                      .is_valid
+                    conversionResult.validation?.is_valid
                       ? "valid"
                       : "invalid"
                   }
                 >
-                  {conversionResult.conversionData.conversionResult.validation
-                    .is_valid
+                  {conversionResult.validation?.is_valid
                     ? "✓ Valid"
                     : "✗ Invalid"}
                 </span>
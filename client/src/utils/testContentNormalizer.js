@@ -34,6 +34,18 @@ const normalizeOptions = (options) => {
     .filter(Boolean);
 };
 
+// Questions that share an option list name it in option_pool; the list is
+// kept once per passage or part in option_pools (see server option_pools.py)
+const withPooledOptions = (questions, pools) =>
+  asArray(questions).map((question) => {
+    if (!question || !question.option_pool) return question;
+    const { option_pool: poolId, ...rest } = question;
+    const pool = pools && pools[poolId];
+    return pool && !asArray(question.options).length
+      ? { ...rest, options: pool }
+      : rest;
+  });
+
 const normalizeListeningQuestion = (question, index) => {
   const normalized = {
     ...question,
@@ -362,7 +374,9 @@ const normalizeReadingQuestion = (question, index) => {
 };
 
 const normalizeReadingPassage = (passage, index) => {
-  const questions = asArray(passage.questions).map(normalizeReadingQuestion);
+  const questions = withPooledOptions(passage.questions, passage.option_pools).map(
+    normalizeReadingQuestion
+  );
   const contentCandidates = [
     passage.formatted_content,
     passage.content,
@@ -415,7 +429,9 @@ export const normalizeTestContent = (content) => {
     sections: asArray(resolvedContent.sections).map((section) => {
       if (section.type === "listening") {
         const parts = asArray(section.parts).map((part, index) => {
-          const questions = asArray(part.questions).map(normalizeListeningQuestion);
+          const questions = withPooledOptions(part.questions, part.option_pools).map(
+            normalizeListeningQuestion
+          );
           return {
             ...part,
             part_number: Number.parseInt(part?.part_number, 10) || index + 1,
@@ -363,6 +363,11 @@ const setupDatabase = async () => {
       { name: "content_html_listening", type: "LONGTEXT" },
       { name: "content_html_reading", type: "LONGTEXT" },
       { name: "content_html_writing", type: "LONGTEXT" },
+      // Compressed content JSON (utils/contentBlob.js); replaces content_json
+      // once scripts/migrateContentBlobs.js has trained a dictionary
+      { name: "content_blob", type: "LONGBLOB" },
+      // Duration and seek table of the listening audio (utils/audioIndex.js)
+      { name: "audio_index_json", type: "LONGTEXT" },
     ];
 
     for (const column of materialSetColumns) {
@@ -388,6 +393,15 @@ const setupDatabase = async () => {
       }
     }
 
+    await connection.execute(`
+      CREATE TABLE IF NOT EXISTS content_dictionaries (
+        id CHAR(16) PRIMARY KEY,
+        dictionary BLOB NOT NULL,
+        sample_count INT NOT NULL,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+      )
+    `);
+
     await connection.execute(`
       CREATE TABLE IF NOT EXISTS test_material_set_images (
         id INT AUTO_INCREMENT PRIMARY KEY,
@@ -491,14 +505,62 @@ const setupDatabase = async () => {
         is_correct BOOLEAN,
         submitted_at DATETIME DEFAULT CURRENT_TIMESTAMP,
         created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        updated_at DATETIME(3) NOT NULL DEFAULT CURRENT_TIMESTAMP(3) ON UPDATE CURRENT_TIMESTAMP(3),
         FOREIGN KEY (session_id) REFERENCES test_sessions(id) ON DELETE CASCADE,
         FOREIGN KEY (participant_id) REFERENCES test_participants(id) ON DELETE CASCADE,
         KEY idx_session_participant (session_id, participant_id),
         KEY idx_section_type (section_type),
+        KEY idx_answers_updated (updated_at, id),
         UNIQUE KEY unique_answer (participant_id, section_type, question_number)
       )
     `);
 
+    // Answers are upserted, so item statistics follow updated_at, not the id
+    try {
+      await connection.execute(`
+        ALTER TABLE participant_answers
+        ADD COLUMN updated_at DATETIME(3) NOT NULL DEFAULT CURRENT_TIMESTAMP(3) ON UPDATE CURRENT_TIMESTAMP(3)
+      `);
+    } catch (err) {
+      if (err.code !== "ER_DUP_FIELDNAME") {
+        throw err;
+      }
+    }
+
+    try {
+      await connection.execute(`
+        CREATE INDEX idx_answers_updated ON participant_answers (updated_at, id)
+      `);
+    } catch (err) {
+      if (err.code !== "ER_DUP_KEYNAME") {
+        throw err;
+      }
+    }
+
+    // Near-miss gap-fill answers flagged by pdf_converter/answer_matching.py
+    await connection.execute(`
+      CREATE TABLE IF NOT EXISTS answer_review_flags (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        participant_answer_id INT NOT NULL,
+        session_id INT NOT NULL,
+        participant_id INT NOT NULL,
+        section_type ENUM('listening', 'reading') NOT NULL,
+        question_number INT NOT NULL,
+        user_answer LONGTEXT,
+        correct_answer LONGTEXT,
+        edit_distance INT NOT NULL,
+        status ENUM('pending', 'accepted', 'rejected') DEFAULT 'pending',
+        reviewed_by INT,
+        reviewed_at DATETIME,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (participant_answer_id) REFERENCES participant_answers(id) ON DELETE CASCADE,
+        FOREIGN KEY (session_id) REFERENCES test_sessions(id) ON DELETE CASCADE,
+        FOREIGN KEY (reviewed_by) REFERENCES users(id) ON DELETE SET NULL,
+        UNIQUE KEY unique_flag (participant_answer_id),
+        KEY idx_session_status (session_id, status)
+      )
+    `);
+
     // Table for writing essay submissions
     await connection.execute(`
       CREATE TABLE IF NOT EXISTS writing_submissions (
@@ -569,6 +631,16 @@ const setupDatabase = async () => {
       }
     }
 
+    // Examiner aids computed by pdf_converter/writing_analytics.py
+    await connection.execute(`
+      CREATE TABLE IF NOT EXISTS writing_submission_analytics (
+        submission_id INT PRIMARY KEY,
+        analytics LONGTEXT NOT NULL,
+        analyzed_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (submission_id) REFERENCES writing_submissions(id) ON DELETE CASCADE
+      )
+    `);
+
     // ==================== COURSE CENTER TABLES ====================
 
     // Table for course centers (managed by users with role='center')
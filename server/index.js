@@ -13,6 +13,7 @@ const dashboardRoute = require("./routes/dashboard");
 const testSessionsRoute = require("./routes/testSessions");
 const pdfUploadRoute = require("./routes/pdf-upload");
 const materialsRoute = require("./routes/materials");
+const { conversionQueue } = require("./utils/conversionQueue");
 
 const cors = require("cors");
 
@@ -47,6 +48,10 @@ app.use(
   })
 );
 
+// PDF upload routes only take ids (the PDF goes through multer), so they get a
+// small limit; material-set saves carry whole content_html/content_json bodies
+app.use("/api/pdf-upload", express.json({ limit: "1mb" }));
+app.use("/api/pdf-upload", express.urlencoded({ limit: "1mb", extended: true }));
 app.use(express.json({ limit: "50mb" }));
 app.use(express.urlencoded({ limit: "50mb", extended: true }));
 app.use("/uploads", express.static(path.join(__dirname, "uploads")));
@@ -68,6 +73,11 @@ const ENV = process.env.NODE_ENV || "development";
 app.listen(PORT, () => {
   console.log(`Server running on port ${PORT} (${ENV})`);
 
+  // Resume conversion jobs left queued or running by the previous process
+  conversionQueue
+    .start()
+    .catch((err) => console.error("Conversion queue failed to start:", err));
+
   // DB init happens AFTER server is alive
   setupDatabase()
     .then(() => {
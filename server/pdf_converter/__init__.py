@@ -1,20 +1,45 @@
 """
 PDF Converter Package
 IELTS Cambridge PDF to JSON conversion system
+
+Exports are resolved lazily on first access, so importing the package does
+not load PyMuPDF, the converters, the validator or the inserter.
 """
 
-from .ielts_pdf_converter import IELTSPDFConverter, convert_pdf_to_json
-from .json_validator import validate_and_normalize_json, IELTSJSONValidator
-from .database_inserter import insert_test_from_json, TestDatabaseInserter
+import importlib
 
 __version__ = "1.0.0"
 __author__ = "CD Mock Development Team"
 
 __all__ = [
     "IELTSPDFConverter",
-    "convert_pdf_to_json",
     "validate_and_normalize_json",
     "IELTSJSONValidator",
     "insert_test_from_json",
     "TestDatabaseInserter"
 ]
+
+# Exported name -> submodule that defines it
+_LAZY_EXPORTS = {
+    "validate_and_normalize_json": ".json_validator",
+    "IELTSJSONValidator": ".json_validator",
+    "insert_test_from_json": ".database_inserter",
+    "TestDatabaseInserter": ".database_inserter",
+}
+
+
+def __getattr__(name):
+    if name == "IELTSPDFConverter":
+        # Same selection as the Node entry point: v4, or v3 if v4 is missing
+        from .node_interface import load_converter
+        value = load_converter()[0]
+    elif name in _LAZY_EXPORTS:
+        value = getattr(importlib.import_module(_LAZY_EXPORTS[name], __name__), name)
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -0,0 +1,166 @@
+"""
+Spelling-Tolerant Matching for IELTS Gap-Fill Answers
+Classifies a session's listening/reading answers against the answer key as
+exact, within one edit of an accepted spelling ("near") or wrong, so that
+near-misses can be flagged for examiner review instead of being found by
+reading every row. Scores are not changed here.
+"""
+
+import json
+import re
+import sys
+import time
+from typing import Dict, Any, Tuple, Optional, Iterable
+
+from item_statistics import normalize_answer
+
+# Edits allowed between an answer and an accepted spelling for a flag
+MAX_EDITS = 1
+
+# Shorter keys are exact-only: one edit turns most short words into others
+MIN_TOLERANT_LENGTH = 4
+
+# Keys made of words only; numbers, times and codes (1200, 10.30, SM174AU)
+# are exact-only, since one edit there is a different answer
+TOLERANT_KEY = re.compile(r"^[A-Z][A-Z' -]*[A-Z]$")
+
+EXACT = "exact"
+NEAR = "near"
+WRONG = "wrong"
+BLANK = "blank"
+
+
+def levenshtein(a: str, b: str) -> int:
+    """Edit distance (insertions, deletions, substitutions) between two strings"""
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (char_a != char_b),
+            ))
+        previous = current
+    return previous[-1]
+
+
+class AnswerKeyIndex:
+    """Accepted spellings of every question in an answer key"""
+
+    def __init__(self, answer_key: Dict[str, Any]):
+        answers = answer_key.get("answers", answer_key) if isinstance(answer_key, dict) else {}
+        self.keys: Dict[Tuple[str, int], str] = {}
+        # Questions whose key accepts answers within MAX_EDITS
+        self.tolerant = set()
+
+        for section in ("listening", "reading"):
+            for item in answers.get(section) or []:
+                try:
+                    question = int(item.get("question"))
+                except (TypeError, ValueError):
+                    continue
+                key = normalize_answer(item.get("answer"))
+                if not key:
+                    continue
+                self.keys[(section, question)] = key
+                if self._tolerant(key):
+                    self.tolerant.add((section, question))
+
+    @staticmethod
+    def _tolerant(key: str) -> bool:
+        return bool(TOLERANT_KEY.match(key)) and len(key.replace(" ", "")) >= MIN_TOLERANT_LENGTH
+
+    def classify(self, section: str, question: int, answer: str) -> Tuple[str, Optional[int]]:
+        """Status of a normalized answer and its distance to the closest accepted spelling"""
+        if not answer:
+            return BLANK, None
+        key = self.keys.get((section, question))
+        if key is None:
+            return WRONG, None
+        if answer == key:
+            return EXACT, 0
+        # Lengths bound the distance from below; skip the full comparison
+        # when they alone rule the answer out
+        if (section, question) in self.tolerant and abs(len(answer) - len(key)) <= MAX_EDITS:
+            distance = levenshtein(answer, key)
+            if distance <= MAX_EDITS:
+                return NEAR, distance
+        return WRONG, None
+
+
+def classify_answers(rows: Iterable[Dict[str, Any]], answer_key: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Classify participant_answers rows ({"id", "participant_id",
+    "section_type", "question_number", "user_answer"}) against a key.
+
+    Each distinct answer to a question is classified once, however many
+    candidates gave it. Returns the near-miss flags, counts per status and
+    a per-question summary of the questions that have flags.
+    """
+    started = time.perf_counter()
+    index = AnswerKeyIndex(answer_key)
+    seen: Dict[Tuple[str, int, str], Tuple[str, Optional[int]]] = {}
+    counts = {EXACT: 0, NEAR: 0, WRONG: 0, BLANK: 0}
+    flags = []
+    questions: Dict[Tuple[str, int], Dict[str, Any]] = {}
+
+    for row in rows:
+        section = str(row.get("section_type") or "")
+        try:
+            question = int(row.get("question_number"))
+        except (TypeError, ValueError):
+            continue
+        answer = normalize_answer(row.get("user_answer"))
+
+        memo_key = (section, question, answer)
+        status = seen.get(memo_key)
+        if status is None:
+            status = seen[memo_key] = index.classify(section, question, answer)
+        status, distance = status
+        counts[status] += 1
+
+        if status == NEAR:
+            flags.append({
+                "answer_id": row.get("id"),
+                "participant_id": row.get("participant_id"),
+                "section_type": section,
+                "question_number": question,
+                "user_answer": row.get("user_answer"),
+                "correct_answer": index.keys[(section, question)],
+                "edit_distance": distance,
+            })
+            summary = questions.setdefault((section, question), {
+                "section_type": section,
+                "question_number": question,
+                "correct_answer": index.keys[(section, question)],
+                "flags": 0,
+                "spellings": {},
+            })
+            summary["flags"] += 1
+            summary["spellings"][answer] = summary["spellings"].get(answer, 0) + 1
+
+    return {
+        "flags": flags,
+        "counts": counts,
+        "questions": [questions[key] for key in sorted(questions)],
+        "distinct_answers": len(seen),
+        "took_ms": round((time.perf_counter() - started) * 1000, 1),
+    }
+
+
+if __name__ == "__main__":
+    # Called from Node.js:
+    #   python answer_matching.py classify < batch.json
+    #   batch: {"answer_key": {...}, "answers": [participant_answers rows]}
+    command = sys.argv[1] if len(sys.argv) > 1 else ""
+
+    if command == "classify":
+        batch = json.load(sys.stdin)
+        output = classify_answers(batch.get("answers") or [], batch.get("answer_key") or {})
+    else:
+        output = {"success": False, "errors": ["Usage: answer_matching.py classify < batch.json"]}
+
+    print(json.dumps(output, ensure_ascii=False, separators=(",", ":")))
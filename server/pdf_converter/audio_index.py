@@ -0,0 +1,338 @@
+"""
+Header-Only Audio Indexer for Listening Files
+Reads MP3 frame headers, WAV chunk headers or Ogg page headers - never the
+audio itself - to get the exact duration of a listening file and a table of
+byte offsets at fixed time steps, so clients can start playback at any time
+(or at a part) with an HTTP range request instead of buffering the file.
+"""
+
+import json
+import mmap
+import os
+import struct
+import sys
+from typing import Dict, List, Any, Tuple, Optional
+
+# Seconds between seek table entries. A player seeking to time t starts at
+# entry t // SEEK_INTERVAL and decodes forward, so a coarse table (240
+# entries for a 40-minute recording) costs at most a few seconds of reading
+SEEK_INTERVAL = 10
+
+# Index layout version, stored with the index
+INDEX_VERSION = 2
+
+# Frames in a row that must parse before a resync is trusted
+RESYNC_CONFIRM_FRAMES = 3
+
+MPEG_VERSIONS = {0: 2.5, 2: 2, 3: 1}
+MPEG_LAYERS = {1: 3, 2: 2, 3: 1}
+MPEG_SAMPLE_RATES = {
+    1: (44100, 48000, 32000),
+    2: (22050, 24000, 16000),
+    2.5: (11025, 12000, 8000),
+}
+# kbit/s by (MPEG-1 or not, layer); index 0 is free format, which is not indexed
+MPEG_BITRATES = {
+    (True, 1): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (True, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (True, 3): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (False, 1): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (False, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (False, 3): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+
+OGG_PAGE_HEADER = struct.Struct("<4sBBqIIIB")
+
+
+class AudioIndexError(ValueError):
+    """Raised when a file is not a supported or readable audio format"""
+
+
+def _parse_mp3_header(data, offset: int) -> Optional[Tuple[int, int, int, int, int, int]]:
+    """
+    Parse the 4-byte frame header at `offset`.
+
+    Returns (frame length, samples per frame, sample rate, channels,
+    version code, layer) or None if the bytes are not a usable header.
+    """
+    if offset + 4 > len(data) or data[offset] != 0xFF or data[offset + 1] & 0xE0 != 0xE0:
+        return None
+    b1, b2, b3 = data[offset + 1], data[offset + 2], data[offset + 3]
+    version = MPEG_VERSIONS.get((b1 >> 3) & 3)
+    layer = MPEG_LAYERS.get((b1 >> 1) & 3)
+    bitrate_index = b2 >> 4
+    rate_index = (b2 >> 2) & 3
+    if version is None or layer is None or bitrate_index in (0, 15) or rate_index == 3:
+        return None
+
+    bitrate = MPEG_BITRATES[(version == 1, layer)][bitrate_index] * 1000
+    sample_rate = MPEG_SAMPLE_RATES[version][rate_index]
+    padding = (b2 >> 1) & 1
+    if layer == 1:
+        samples = 384
+        length = (12 * bitrate // sample_rate + padding) * 4
+    elif layer == 2 or version == 1:
+        samples = 1152
+        length = 144 * bitrate // sample_rate + padding
+    else:
+        samples = 576
+        length = 72 * bitrate // sample_rate + padding
+    channels = 1 if b3 >> 6 == 3 else 2
+    return length, samples, sample_rate, channels, (b1 >> 3) & 3, layer
+
+
+def _skip_id3v2(data) -> int:
+    """Offset of the first byte after any leading ID3v2 tags"""
+    offset = 0
+    while data[offset:offset + 3] == b"ID3" and offset + 10 <= len(data):
+        size = 0
+        for byte in data[offset + 6:offset + 10]:
+            size = (size << 7) | (byte & 0x7F)
+        footer = 10 if data[offset + 5] & 0x10 else 0
+        offset += 10 + size + footer
+    return offset
+
+
+def _resync(data, offset: int, version: Optional[int], layer: Optional[int]) -> int:
+    """Offset of the next run of frames matching the stream, or -1"""
+    while True:
+        offset = data.find(b"\xff", offset)
+        if offset < 0:
+            return -1
+        position, confirmed = offset, 0
+        while confirmed < RESYNC_CONFIRM_FRAMES:
+            header = _parse_mp3_header(data, position)
+            if header is None or (version is not None and header[4:] != (version, layer)):
+                break
+            position += header[0]
+            confirmed += 1
+            if position >= len(data):
+                confirmed = RESYNC_CONFIRM_FRAMES
+        if confirmed == RESYNC_CONFIRM_FRAMES:
+            return offset
+        offset += 1
+
+
+def _lame_gapless(data, offset: int, header: Tuple[int, ...]) -> Optional[Tuple[int, int]]:
+    """
+    (encoder delay, padding) in samples if the frame at `offset` is a
+    Xing/Info tag frame - (0, 0) when it carries no LAME extension - or None
+    for an audio frame.
+    """
+    mono = header[3] == 1
+    side_info = (17 if mono else 32) if header[4] == 3 else (9 if mono else 17)
+    tag = offset + 4 + side_info
+    if data[tag:tag + 4] not in (b"Xing", b"Info"):
+        return None if data[offset + 36:offset + 40] != b"VBRI" else (0, 0)
+
+    flags = struct.unpack_from(">I", data, tag + 4)[0]
+    extension = tag + 8 + 4 * bool(flags & 1) + 4 * bool(flags & 2) + 100 * bool(flags & 4) + 4 * bool(flags & 8)
+    if data[extension:extension + 4] not in (b"LAME", b"Lavf", b"Lavc") or extension + 24 > offset + header[0]:
+        return 0, 0
+    packed = int.from_bytes(data[extension + 21:extension + 24], "big")
+    return packed >> 12, packed & 0xFFF
+
+
+def _seek_points(seek_offsets: List[int], next_point: int, end_sample: int,
+                 rate: int, offset: int) -> int:
+    """Point every seek time that falls before `end_sample` at `offset`"""
+    while next_point * SEEK_INTERVAL * rate < end_sample:
+        seek_offsets.append(offset)
+        next_point += 1
+    return next_point
+
+
+def index_mp3(data) -> Dict[str, Any]:
+    start = _skip_id3v2(data)
+    first = _parse_mp3_header(data, start)
+    if first is None:
+        start = _resync(data, start, None, None)
+        first = _parse_mp3_header(data, start) if start >= 0 else None
+    if first is None:
+        raise AudioIndexError("No MPEG audio frames found")
+
+    _, _, sample_rate, channels, version, layer = first
+    delay = padding = 0
+    gapless = _lame_gapless(data, start, first)
+    if gapless is not None:
+        # The tag frame decodes to silence that is not part of the recording
+        delay, padding = gapless
+        start += first[0]
+
+    seek_offsets: List[int] = []
+    next_point = frames = samples = 0
+    offset = audio_start = start
+    audio_end = start
+    size = len(data)
+    while offset < size:
+        header = _parse_mp3_header(data, offset)
+        if header is not None and header[4:] == (version, layer) and offset + header[0] > size:
+            break  # truncated last frame
+        if header is None or header[4:] != (version, layer):
+            offset = _resync(data, offset + 1, version, layer)
+            if offset < 0:
+                break
+            continue
+        frames += 1
+        samples += header[1]
+        next_point = _seek_points(seek_offsets, next_point, samples - delay, sample_rate, offset)
+        offset += header[0]
+        audio_end = offset
+
+    if frames == 0:
+        raise AudioIndexError("No MPEG audio frames found")
+    total = max(samples - delay - padding, 0)
+    duration = total / sample_rate
+    return {
+        "format": "mp3",
+        "sample_rate": sample_rate,
+        "channels": channels,
+        "duration": round(duration, 3),
+        "bitrate": round((audio_end - audio_start) * 8 / duration) if duration else 0,
+        "frames": frames,
+        "header_bytes": 0,
+        "audio_start": audio_start,
+        "audio_end": audio_end,
+        "seek_offsets": seek_offsets,
+    }
+
+
+def index_wav(data) -> Dict[str, Any]:
+    if data[:4] != b"RIFF" or data[8:12] != b"WAVE":
+        raise AudioIndexError("Not a RIFF/WAVE file")
+
+    fmt = None
+    offset = 12
+    while offset + 8 <= len(data):
+        chunk_id = bytes(data[offset:offset + 4])
+        chunk_size = struct.unpack_from("<I", data, offset + 4)[0]
+        body = offset + 8
+        if chunk_id == b"fmt ":
+            fmt = struct.unpack_from("<HHIIH", data, body)
+        elif chunk_id == b"data":
+            if fmt is None:
+                raise AudioIndexError("WAV data chunk before fmt chunk")
+            _, channels, sample_rate, byte_rate, block_align = fmt
+            # Streaming writers leave the size at 0 or 0xFFFFFFFF
+            data_size = min(chunk_size or len(data), len(data) - body)
+            frames = data_size // block_align
+            seek_offsets = [
+                body + min(point * SEEK_INTERVAL * sample_rate, frames - 1) * block_align
+                for point in range(-(-frames // (SEEK_INTERVAL * sample_rate)))
+            ]
+            return {
+                "format": "wav",
+                "sample_rate": sample_rate,
+                "channels": channels,
+                "duration": round(frames / sample_rate, 3),
+                "bitrate": byte_rate * 8,
+                "frames": frames,
+                "header_bytes": body,
+                "audio_start": body,
+                "audio_end": body + frames * block_align,
+                "seek_offsets": seek_offsets,
+            }
+        offset = body + chunk_size + (chunk_size & 1)
+    raise AudioIndexError("WAV file has no data chunk")
+
+
+def index_ogg(data) -> Dict[str, Any]:
+    """Vorbis or Opus: the first logical stream of the file"""
+    serial = codec = None
+    sample_rate = channels = pre_skip = 0
+    header_bytes = None
+    seek_offsets: List[int] = []
+    next_point = pages = 0
+    last_granule = 0
+    audio_end = 0
+    offset = 0
+    size = len(data)
+
+    while offset + OGG_PAGE_HEADER.size <= size:
+        if data[offset:offset + 4] != b"OggS":
+            offset = data.find(b"OggS", offset + 1)
+            if offset < 0:
+                break
+            continue
+        _, _, _, granule, page_serial, _, _, segments = OGG_PAGE_HEADER.unpack_from(data, offset)
+        body = offset + OGG_PAGE_HEADER.size + segments
+        page_end = body + sum(data[offset + OGG_PAGE_HEADER.size:body])
+        if page_end > size:
+            break
+
+        if serial is None:
+            serial = page_serial
+            if data[body:body + 7] == b"\x01vorbis":
+                codec = "vorbis"
+                channels = data[body + 11]
+                sample_rate = struct.unpack_from("<I", data, body + 12)[0]
+            elif data[body:body + 8] == b"OpusHead":
+                codec = "opus"
+                channels = data[body + 9]
+                pre_skip = struct.unpack_from("<H", data, body + 10)[0]
+                sample_rate = 48000  # Opus granules always count 48 kHz samples
+            else:
+                raise AudioIndexError("Ogg stream is neither Vorbis nor Opus")
+        elif page_serial == serial and granule > 0:
+            if header_bytes is None:
+                # Codec header pages come first and carry granule 0
+                header_bytes = offset
+            pages += 1
+            next_point = _seek_points(seek_offsets, next_point, granule - pre_skip, sample_rate, offset)
+            last_granule = granule
+            audio_end = page_end
+        offset = page_end
+
+    if not sample_rate or not pages:
+        raise AudioIndexError("No Ogg audio pages found")
+    total = max(last_granule - pre_skip, 0)
+    duration = total / sample_rate
+    return {
+        "format": f"ogg/{codec}",
+        "sample_rate": sample_rate,
+        "channels": channels,
+        "duration": round(duration, 3),
+        "bitrate": round((audio_end - header_bytes) * 8 / duration) if duration else 0,
+        "frames": pages,
+        "header_bytes": header_bytes,
+        "audio_start": header_bytes,
+        "audio_end": audio_end,
+        "seek_offsets": seek_offsets,
+    }
+
+
+def index_audio_bytes(data) -> Dict[str, Any]:
+    """Index an in-memory or memory-mapped file, detecting the format"""
+    if data[:4] == b"RIFF":
+        index = index_wav(data)
+    elif data[:4] == b"OggS":
+        index = index_ogg(data)
+    else:
+        index = index_mp3(data)
+    index.update({"version": INDEX_VERSION, "size": len(data), "seek_interval": SEEK_INTERVAL})
+    return index
+
+
+def index_audio_file(path: str) -> Dict[str, Any]:
+    """Index a file on disk; only the pages holding headers are read"""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            raise AudioIndexError("Audio file is empty")
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            return index_audio_bytes(data)
+
+
+if __name__ == "__main__":
+    # Called from Node.js:
+    #   python audio_index.py index <audio file>
+    command = sys.argv[1] if len(sys.argv) > 1 else ""
+
+    if command == "index" and len(sys.argv) > 2:
+        try:
+            output = index_audio_file(sys.argv[2])
+        except (AudioIndexError, OSError, struct.error) as e:
+            output = {"success": False, "errors": [str(e)]}
+    else:
+        output = {"success": False, "errors": ["Usage: audio_index.py index <file>"]}
+
+    print(json.dumps(output, ensure_ascii=False, separators=(",", ":")))
@@ -0,0 +1,206 @@
+"""
+Compressed Content Blobs for Material Sets
+test_material_sets.content_json holds the full test JSON (50-80 KB a set),
+read and parsed on every participant fetch. Sets share most of their bytes:
+the keys, question types, instruction wording and option lists repeat from
+one set to the next. A dictionary trained on the stored sets primes the
+compressor with those bytes, so each set only pays for what is its own.
+
+Blob layout (big-endian), shared with server/utils/contentBlob.js:
+
+    offset  size
+    0       4     magic b"IELC"
+    4       1     format version (1)
+    5       1     codec (1 = raw DEFLATE with a preset dictionary)
+    6       8     dictionary id (first 8 bytes of the dictionary's SHA-256)
+    14      4     length of the JSON in bytes
+    18      4     CRC32 of the JSON
+    22      ...   compressed JSON
+
+zstd with a trained dictionary was the first choice, but it is not available
+to both the converter and the Node server without native modules; DEFLATE
+preset dictionaries (zlib) are. The codec byte leaves room for it.
+
+Usage:
+    python content_blob.py train --output content.dict sample1.json sample2.json ...
+    python content_blob.py pack --dictionary content.dict test.json test.blob
+    python content_blob.py unpack --dictionary content.dict test.blob test.json
+"""
+
+import argparse
+import hashlib
+import json
+import struct
+import sys
+import zlib
+from collections import Counter
+from typing import Dict, List, Any, Iterator, Union
+
+MAGIC = b"IELC"
+FORMAT_VERSION = 1
+CODEC_DEFLATE_DICT = 1
+HEADER = struct.Struct(">4sBB8sII")
+
+# DEFLATE can only reach back 32 KB, so a larger dictionary is never used
+DICTIONARY_SIZE = 32 * 1024
+# Fragments shorter than this cost more to reference than to spell out
+MIN_FRAGMENT_BYTES = 6
+
+
+class ContentBlobError(ValueError):
+    """A blob that cannot be read: bad header, unknown dictionary or corrupt data"""
+
+
+def _compact(value: Any) -> str:
+    # Same separators as JSON.stringify, which wrote the stored content
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+def _fragments(node: Any) -> Iterator[str]:
+    """Pieces of the serialized JSON that can repeat across sets"""
+    if isinstance(node, dict):
+        for key, value in node.items():
+            yield _compact(key) + ":"
+            if isinstance(value, (dict, list)):
+                yield from _fragments(value)
+            else:
+                yield _compact(key) + ":" + _compact(value)
+    elif isinstance(node, list):
+        for item in node:
+            if isinstance(item, (dict, list)):
+                yield from _fragments(item)
+            else:
+                yield _compact(item)
+
+
+def train_dictionary(samples: List[Union[str, bytes]], size: int = DICTIONARY_SIZE) -> bytes:
+    """
+    Build a preset dictionary from stored content JSON.
+
+    Fragments ("type":"gap_fill", instruction sentences, option lists) are
+    scored by how many sets contain them times their length; the best ones
+    are packed in, with the most valuable last, where DEFLATE reaches them
+    with the shortest distances.
+    """
+    counts: Counter = Counter()
+    for sample in samples:
+        counts.update(set(_fragments(json.loads(sample))))
+
+    # With several samples, a fragment must repeat to earn its place
+    min_sets = 2 if len(samples) > 1 else 1
+    scored = sorted(
+        (
+            (sets * len(encoded), encoded)
+            for fragment, sets in counts.items()
+            if sets >= min_sets
+            for encoded in [fragment.encode("utf-8")]
+            if len(encoded) >= MIN_FRAGMENT_BYTES
+        ),
+        reverse=True,
+    )
+
+    picked, total = [], 0
+    for _, fragment in scored:
+        if total + len(fragment) > size:
+            continue
+        picked.append(fragment)
+        total += len(fragment)
+    return b"".join(reversed(picked))
+
+
+def dictionary_id(dictionary: bytes) -> str:
+    """Hex id stored in every blob made with the dictionary"""
+    return hashlib.sha256(dictionary).digest()[:8].hex()
+
+
+def is_blob(data: bytes) -> bool:
+    return data[:len(MAGIC)] == MAGIC
+
+
+def pack(content: Union[Dict[str, Any], str, bytes], dictionary: bytes) -> bytes:
+    """Compress content JSON (object, or already serialized) into a blob"""
+    if isinstance(content, dict):
+        content = _compact(content)
+    raw = content.encode("utf-8") if isinstance(content, str) else content
+
+    compressor = zlib.compressobj(level=9, wbits=-15, zdict=dictionary)
+    payload = compressor.compress(raw) + compressor.flush()
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, CODEC_DEFLATE_DICT,
+                         bytes.fromhex(dictionary_id(dictionary)), len(raw), zlib.crc32(raw))
+    return header + payload
+
+
+def unpack(blob: bytes, dictionaries: Dict[str, bytes]) -> bytes:
+    """
+    The JSON bytes of a blob.
+
+    dictionaries maps dictionary id -> dictionary bytes.
+    Raises ContentBlobError when the blob cannot be read.
+    """
+    if len(blob) < HEADER.size or not is_blob(blob):
+        raise ContentBlobError("Not a content blob")
+    _, version, codec, dict_id, length, checksum = HEADER.unpack_from(blob)
+    if version != FORMAT_VERSION or codec != CODEC_DEFLATE_DICT:
+        raise ContentBlobError(f"Unsupported content blob version {version}, codec {codec}")
+    dictionary = dictionaries.get(dict_id.hex())
+    if dictionary is None:
+        raise ContentBlobError(f"Unknown content dictionary {dict_id.hex()}")
+
+    try:
+        decompressor = zlib.decompressobj(wbits=-15, zdict=dictionary)
+        raw = decompressor.decompress(blob[HEADER.size:]) + decompressor.flush()
+    except zlib.error as e:
+        raise ContentBlobError(f"Corrupt content blob: {e}")
+    if len(raw) != length or zlib.crc32(raw) != checksum:
+        raise ContentBlobError("Content blob checksum mismatch")
+    return raw
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Train dictionaries and pack material content blobs")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    train = commands.add_parser("train", help="Train a dictionary from content JSON files")
+    train.add_argument("samples", nargs="+")
+    train.add_argument("--output", required=True)
+    train.add_argument("--size", type=int, default=DICTIONARY_SIZE)
+
+    for name in ("pack", "unpack"):
+        command = commands.add_parser(name)
+        command.add_argument("input")
+        command.add_argument("output")
+        command.add_argument("--dictionary", required=True)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "train":
+        samples = []
+        for path in args.samples:
+            with open(path, "rb") as f:
+                samples.append(f.read())
+        dictionary = train_dictionary(samples, args.size)
+        with open(args.output, "wb") as f:
+            f.write(dictionary)
+        print(json.dumps({"id": dictionary_id(dictionary), "bytes": len(dictionary)}))
+        return 0
+
+    with open(args.dictionary, "rb") as f:
+        dictionary = f.read()
+    with open(args.input, "rb") as f:
+        data = f.read()
+    try:
+        if args.command == "pack":
+            # Re-serialize so the blob holds the compact form the server stores
+            result = pack(json.loads(data), dictionary)
+        else:
+            result = unpack(data, {dictionary_id(dictionary): dictionary})
+    except (ContentBlobError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    with open(args.output, "wb") as f:
+        f.write(result)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
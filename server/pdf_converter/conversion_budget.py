@@ -0,0 +1,114 @@
+"""
+Conversion Time and Memory Budgets
+A budget carries a wall-clock deadline and a memory ceiling for one
+conversion. The converter checks it between stages (pages, sections,
+questions); when it runs out, the stage in progress is abandoned and the
+sections finished so far are returned with the result marked incomplete.
+
+Checks are cooperative, so they only help if no single step can run away:
+the extractors' patterns are written to scan in linear time.
+"""
+
+import os
+import sys
+import time
+from typing import Dict, Any, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Stay below the 2-minute python-shell timeout in routes/materials.js so a
+# partial result is returned instead of the process being killed.
+DEFAULT_TIME_BUDGET_SECONDS = 90.0
+DEFAULT_MEMORY_LIMIT_MB = 1024
+
+
+class BudgetExceeded(Exception):
+    """Raised at a checkpoint once the deadline or memory ceiling is passed"""
+
+    def __init__(self, reason: str, stage: str, detail: str = ""):
+        super().__init__(reason, stage, detail)
+        self.reason = reason  # "time" or "memory"
+        self.stage = stage
+        self.detail = detail
+
+    def __str__(self):
+        return f"{self.reason} budget exceeded during {self.stage}" + (f" ({self.detail})" if self.detail else "")
+
+
+def current_memory_mb() -> Optional[float]:
+    """Resident memory of this process in MB (None if it cannot be read)"""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    if resource is None:
+        return None
+    # Peak rather than current RSS; kilobytes on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+class ConversionBudget:
+    """Deadline and memory ceiling shared by every stage of one conversion"""
+
+    def __init__(self, time_budget_seconds: Optional[float] = DEFAULT_TIME_BUDGET_SECONDS,
+                 memory_limit_mb: Optional[float] = DEFAULT_MEMORY_LIMIT_MB,
+                 deadline: Optional[float] = None):
+        self.time_budget_seconds = time_budget_seconds
+        self.memory_limit_mb = memory_limit_mb
+        # Absolute time.time() value, so the budget can be handed to worker processes
+        if deadline is None and time_budget_seconds:
+            deadline = time.time() + time_budget_seconds
+        self.deadline = deadline
+        self.exceeded: Optional[BudgetExceeded] = None
+
+    @classmethod
+    def from_env(cls) -> "ConversionBudget":
+        """PDF_TIME_BUDGET_SECONDS / PDF_MEMORY_LIMIT_MB (0 disables a limit)"""
+        seconds = float(os.environ.get("PDF_TIME_BUDGET_SECONDS", DEFAULT_TIME_BUDGET_SECONDS))
+        memory = float(os.environ.get("PDF_MEMORY_LIMIT_MB", DEFAULT_MEMORY_LIMIT_MB))
+        return cls(seconds or None, memory or None)
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left before the deadline (None when unbounded)"""
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.time())
+
+    def check(self, stage: str) -> None:
+        """Raise BudgetExceeded if the deadline or the memory ceiling was passed"""
+        if self.exceeded is not None:
+            # Once exhausted, every later stage stops immediately
+            raise BudgetExceeded(self.exceeded.reason, stage, self.exceeded.detail)
+
+        if self.deadline is not None and time.time() > self.deadline:
+            detail = f"{self.time_budget_seconds:g}s" if self.time_budget_seconds else "deadline passed"
+            self.exceeded = BudgetExceeded("time", stage, detail)
+            raise self.exceeded
+
+        if self.memory_limit_mb is not None:
+            memory_mb = current_memory_mb()
+            if memory_mb is not None and memory_mb > self.memory_limit_mb:
+                self.exceeded = BudgetExceeded("memory", stage, f"{memory_mb:.0f}MB > {self.memory_limit_mb:g}MB")
+                raise self.exceeded
+
+    def record(self, error: BudgetExceeded) -> None:
+        """Remember a budget failure raised elsewhere (e.g. in a worker process)"""
+        if self.exceeded is None:
+            self.exceeded = error
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "time_budget_seconds": self.time_budget_seconds,
+            "memory_limit_mb": self.memory_limit_mb,
+            "exceeded": None if self.exceeded is None else {
+                "reason": self.exceeded.reason,
+                "stage": self.exceeded.stage,
+                "detail": self.exceeded.detail,
+            },
+        }
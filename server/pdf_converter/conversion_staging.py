@@ -0,0 +1,108 @@
+"""
+Server-side Staging Store for Conversion Results
+An upload is converted first and inserted into the database only after an
+admin confirms the preview. The full result is kept here in the meantime,
+keyed by a conversion id, so the browser only ever sees the preview and the
+id and /confirm loads the result from disk instead of receiving it back.
+
+Each entry is a file under server/data/conversion-staging/ holding two
+lines of compact JSON, a small header and the result:
+
+    {"id": ..., "created_at": ..., "expires_at": ..., "owner": ..., "pdf_path": ...}
+    {...node_interface result...}
+
+Sweeping only reads the header line, never the (multi-megabyte) result.
+
+Entries expire after PDF_STAGING_TTL_SECONDS (default one hour). Expired
+entries, and the uploaded PDFs they own, are swept whenever a new result is
+staged; Node (utils/conversionStaging.js) refuses expired entries on read.
+"""
+
+import json
+import os
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, List, Any, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STAGING_DIR = Path(__file__).resolve().parent.parent / "data" / "conversion-staging"
+DEFAULT_TTL_SECONDS = 3600
+
+
+def staging_ttl_seconds() -> int:
+    """TTL from PDF_STAGING_TTL_SECONDS, or the default"""
+    try:
+        return int(os.environ.get("PDF_STAGING_TTL_SECONDS", DEFAULT_TTL_SECONDS))
+    except ValueError:
+        return DEFAULT_TTL_SECONDS
+
+
+def build_preview(test_data: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Summary shown to the admin before confirming"""
+    test_data = test_data or {}
+    test_info = test_data.get("test_info", {})
+    sections = test_data.get("sections", [])
+    return {
+        "testName": test_info.get("title"),
+        "testType": test_info.get("test_type"),
+        "sections": len(sections),
+        "sectionTypes": [section.get("type") for section in sections],
+        "questions": test_info.get("total_questions", 0),
+        # Only what the preview shows: metadata also holds the server-side
+        # PDF path (source) and the instruction index
+        "metadata": {"validation": test_data.get("metadata", {}).get("validation")},
+    }
+
+
+def stage_result(result: Dict[str, Any], pdf_path: Optional[str] = None, owner: Optional[str] = None,
+                 staging_dir: Optional[str] = None, ttl_seconds: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Store a conversion result and return the entry's header.
+
+    Returns:
+        {"id", "created_at", "expires_at", "owner", "pdf_path"}
+    """
+    directory = Path(staging_dir) if staging_dir else DEFAULT_STAGING_DIR
+    directory.mkdir(parents=True, exist_ok=True)
+    now = time.time()
+    sweep_expired(directory, now)
+
+    header = {
+        "id": uuid.uuid4().hex,
+        "created_at": now,
+        "expires_at": now + (ttl_seconds if ttl_seconds is not None else staging_ttl_seconds()),
+        "owner": owner,
+        "pdf_path": pdf_path,
+    }
+    entry_path = directory / f"{header['id']}.json"
+    tmp_path = entry_path.with_suffix(".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(json.dumps(header, ensure_ascii=False, separators=(",", ":")) + "\n")
+        json.dump(result, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp_path, entry_path)
+    return header
+
+
+def sweep_expired(staging_dir: Optional[Path] = None, now: Optional[float] = None) -> List[str]:
+    """Delete expired entries and their uploaded PDFs; returns the removed ids"""
+    directory = Path(staging_dir) if staging_dir else DEFAULT_STAGING_DIR
+    now = time.time() if now is None else now
+    removed = []
+    for entry_path in directory.glob("*.json"):
+        try:
+            with open(entry_path, "r", encoding="utf-8") as f:
+                entry = json.loads(f.readline())
+            if entry.get("expires_at", 0) > now:
+                continue
+            pdf_path = entry.get("pdf_path")
+            if pdf_path and os.path.exists(pdf_path):
+                os.remove(pdf_path)
+            os.remove(entry_path)
+            removed.append(entry_path.stem)
+        except (OSError, ValueError) as e:
+            # Another process may be writing or sweeping the same entry
+            logger.warning(f"Could not sweep staged conversion {entry_path.name}: {e}")
+    return removed
@@ -0,0 +1,459 @@
+"""
+Round-trip Accuracy and Speed Harness for the v3 and v4 Converters
+Renders the canonical content JSONs (mock_1, mock_2, mock_3) into IELTS-style
+PDFs with PyMuPDF, runs both converters on each PDF and compares what they
+extract with the JSON the PDF was rendered from:
+
+- per-section precision/recall on question ids, option labels and types
+- wall time and peak memory per converter (each run in its own process)
+
+Usage:
+    python converter_benchmark.py                  # all fixtures, table output
+    python converter_benchmark.py --json report.json
+    python converter_benchmark.py --fail-if-worse  # exit 1 if v4 loses to v3
+"""
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import textwrap
+import time
+from pathlib import Path
+from typing import Dict, List, Any, Tuple, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from option_pools import resolve_options
+
+SERVER_DIR = Path(__file__).resolve().parent.parent
+DEFAULT_FIXTURES = [
+    SERVER_DIR / "uploads" / "mock_1.json",
+    SERVER_DIR / "uploads" / "mock_2.json",
+    SERVER_DIR.parent / "client" / "src" / "pages" / "mock_3.json",
+]
+
+CONVERTER_MODULES = {
+    "v3": "ielts_pdf_converter",
+    "v4": "ielts_pdf_converter_v4",
+}
+
+# The fixtures and the converters name question types differently; both
+# sides are reduced to these families before comparing.
+TYPE_FAMILIES = {
+    "gap_fill": "completion",
+    "fill_blank": "completion",
+    "summary_completion": "completion",
+    "sentence_completion": "completion",
+    "flowchart_completion": "completion",
+    "form_completion": "completion",
+    "table_complete": "completion",
+    "flow_chart": "completion",
+    "diagram_label": "completion",
+    "summary": "completion",
+    "true_false_ng": "judgement",
+    "true_false_not_given": "judgement",
+    "yes_no_ng": "judgement",
+    "multiple_choice": "multiple_choice",
+    "matching": "matching",
+    "paragraph_matching": "matching",
+    "heading_matching": "matching",
+    "short_answer": "short_answer",
+}
+JUDGEMENT_OPTIONS = {"TRUE", "FALSE", "NOT GIVEN", "YES", "NO"}
+OPTION_LABEL_PATTERN = re.compile(r'^([A-H])\s+(.*)$', re.DOTALL)
+
+# Page geometry (A4, points)
+PAGE_WIDTH, PAGE_HEIGHT = 595, 842
+MARGIN = 50
+FONT_SIZE = 10
+LINE_HEIGHT = 13
+WRAP_WIDTH = 95
+
+
+def type_family(question_type: Optional[str]) -> str:
+    return TYPE_FAMILIES.get(question_type or "", "other")
+
+
+def option_key(label: Optional[str], text: str) -> str:
+    """TRUE/FALSE/... compare by text, lettered options by their letter"""
+    text = (text or "").strip()
+    if text.upper() in JUDGEMENT_OPTIONS:
+        return text.upper()
+    return (label or "").upper()
+
+
+# ---------------------------------------------------------------------------
+# Rendering
+# ---------------------------------------------------------------------------
+
+class _PageWriter:
+    """Writes wrapped lines top to bottom, starting new pages as needed"""
+
+    def __init__(self, doc):
+        self.doc = doc
+        self.page = None
+        self.y = PAGE_HEIGHT
+
+    def new_page(self) -> None:
+        self.page = self.doc.new_page(width=PAGE_WIDTH, height=PAGE_HEIGHT)
+        self.y = MARGIN
+
+    def line(self, text: str = "", indent: int = 0) -> None:
+        for piece in textwrap.wrap(text, WRAP_WIDTH - indent // 5) or [""]:
+            if self.page is None or self.y > PAGE_HEIGHT - MARGIN:
+                self.new_page()
+            if piece:
+                self.page.insert_text((MARGIN + indent, self.y), piece, fontsize=FONT_SIZE, fontname="helv")
+            self.y += LINE_HEIGHT
+
+    def block(self, text: str, indent: int = 0) -> None:
+        for paragraph in (text or "").split("\n"):
+            self.line(paragraph.strip(), indent)
+
+
+def _question_text(question: Dict[str, Any]) -> str:
+    return question.get("question") or question.get("statement") or question.get("prompt") or ""
+
+
+def _option_lines(options: List[Any]) -> List[Tuple[str, str]]:
+    """(label, text) for each option string, lettering unlabeled options"""
+    lines = []
+    for index, option in enumerate(options or []):
+        option = str(option)
+        labeled = OPTION_LABEL_PATTERN.match(option)
+        if option.upper() in JUDGEMENT_OPTIONS:
+            continue
+        if labeled:
+            lines.append((labeled.group(1), labeled.group(2)))
+        else:
+            lines.append((chr(ord("A") + index), option))
+    return lines
+
+
+def _render_questions(writer: _PageWriter, questions: List[Dict[str, Any]]) -> None:
+    """Questions as printed in the books: shared instructions once, then items"""
+    ids = [q["id"] for q in questions if isinstance(q, dict) and "id" in q]
+    if ids:
+        writer.line(f"Questions {min(ids)}-{max(ids)}")
+
+    last_instruction = None
+    last_pool = None
+    for question in questions:
+        if not isinstance(question, dict):
+            continue
+        instruction = question.get("instruction") or question.get("matching_instruction")
+        if question.get("type") in ("true_false_ng", "yes_no_ng") and not instruction:
+            words = ("TRUE", "FALSE") if question["type"] == "true_false_ng" else ("YES", "NO")
+            instruction = f"Write {words[0]}, {words[1]} or NOT GIVEN."
+        if instruction and instruction != last_instruction:
+            writer.line()
+            writer.block(instruction)
+            last_instruction = instruction
+
+        pool = question.get("matching_options")
+        if pool and pool != last_pool:
+            for label, text in _option_lines(pool):
+                writer.line(f"{label}  {text}", indent=10)
+            last_pool = pool
+
+        text = _question_text(question)
+        number = str(question["id"])
+        if not re.search(rf'\b{number}\b', text):
+            text = f"{number}  {text}"
+        writer.line(text)
+        for label, option_text in _option_lines(question.get("options")):
+            writer.line(f"{label}  {option_text}", indent=20)
+
+
+def render_test_pdf(content: Dict[str, Any], pdf_path: str) -> None:
+    """Render a content JSON into an IELTS-style PDF (listening, reading, writing)"""
+    import fitz  # PyMuPDF
+
+    doc = fitz.open()
+    writer = _PageWriter(doc)
+    sections = {section.get("type"): section for section in content.get("sections", [])}
+
+    writer.new_page()
+    writer.line(content.get("test_info", {}).get("title") or "IELTS Practice Test")
+
+    listening = sections.get("listening")
+    if listening:
+        for part in listening.get("parts", []):
+            writer.new_page()
+            writer.line(f"PART {part.get('part_number')}")
+            writer.block(part.get("instructions", ""))
+            writer.block(part.get("context", ""))
+            _render_questions(writer, part.get("questions", []))
+
+    reading = sections.get("reading")
+    if reading:
+        for passage in reading.get("passages", []):
+            writer.new_page()
+            writer.line(f"READING PASSAGE {passage.get('passage_number')}")
+            writer.line(passage.get("title", ""))
+            writer.block(passage.get("formatted_content") or passage.get("content", ""))
+            writer.new_page()
+            _render_questions(writer, passage.get("questions", []))
+
+    writing = sections.get("writing")
+    if writing:
+        for task in writing.get("tasks", []):
+            writer.new_page()
+            writer.line(f"WRITING TASK {task.get('task_number')}")
+            writer.block(task.get("instructions", ""))
+            graph_title = (task.get("graph_data") or {}).get("title")
+            if graph_title:
+                writer.line(graph_title)
+            for prompt in task.get("questions", []) or []:
+                writer.block(prompt if isinstance(prompt, str) else json.dumps(prompt))
+            writer.block(task.get("requirements", ""))
+
+    doc.save(pdf_path)
+    doc.close()
+
+
+# ---------------------------------------------------------------------------
+# Scoring
+# ---------------------------------------------------------------------------
+
+def _section_questions(section: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Questions of a section in either converter's layout"""
+    questions = list(section.get("questions", []) or [])
+    for group in (section.get("parts", []) or []) + (section.get("passages", []) or []):
+        questions.extend(group.get("questions", []) or [])
+    return [q for q in questions if isinstance(q, dict)]
+
+
+def expected_questions(content: Dict[str, Any]) -> Dict[str, Dict[int, Dict[str, Any]]]:
+    """section type -> question id -> {"type", "options"} from a content JSON"""
+    expected: Dict[str, Dict[int, Dict[str, Any]]] = {}
+    for section in content.get("sections", []):
+        if section.get("type") not in ("listening", "reading"):
+            continue
+        items = expected.setdefault(section["type"], {})
+        for question in _section_questions(section):
+            options = {
+                option.upper() for option in map(str, question.get("options") or [])
+                if option.upper() in JUDGEMENT_OPTIONS
+            }
+            options.update(label for label, _ in _option_lines(question.get("options")))
+            items[question["id"]] = {"type": type_family(question.get("type")), "options": options}
+    return expected
+
+
+def extracted_questions(test_data: Dict[str, Any]) -> Dict[str, Dict[int, Dict[str, Any]]]:
+    """section type -> question id -> {"type", "options"} from converter output"""
+    extracted: Dict[str, Dict[int, Dict[str, Any]]] = {}
+    for section in (test_data or {}).get("sections", []):
+        if section.get("type") not in ("listening", "reading"):
+            continue
+        items = extracted.setdefault(section["type"], {})
+        # Question numbers do not repeat within a section, so neither do pool ids
+        pools = {}
+        for group in (section.get("parts", []) or []) + (section.get("passages", []) or []):
+            pools.update(group.get("option_pools") or {})
+        for question in _section_questions(section):
+            q_id = question.get("id", question.get("question_id"))
+            if not isinstance(q_id, int) or q_id in items:
+                continue
+            options = {
+                option_key(option.get("label"), option.get("text", ""))
+                for option in resolve_options(question, pools) or []
+                if isinstance(option, dict)
+            }
+            items[q_id] = {"type": type_family(question.get("type")), "options": options - {""}}
+    return extracted
+
+
+def _precision_recall(found: set, expected: set) -> Dict[str, Any]:
+    hits = len(found & expected)
+    return {
+        "precision": round(hits / len(found), 4) if found else None,
+        "recall": round(hits / len(expected), 4) if expected else None,
+        "hits": hits,
+        "found": len(found),
+        "expected": len(expected),
+    }
+
+
+def score_sections(expected: Dict[str, Dict[int, Dict[str, Any]]],
+                   extracted: Dict[str, Dict[int, Dict[str, Any]]]) -> Dict[str, Dict[str, Any]]:
+    """Per-section precision/recall on question ids, option labels and types"""
+    scores = {}
+    for section_type, expected_items in expected.items():
+        found_items = extracted.get(section_type, {})
+        scores[section_type] = {
+            "questions": _precision_recall(set(found_items), set(expected_items)),
+            "options": _precision_recall(
+                {(q_id, key) for q_id, item in found_items.items() for key in item["options"]},
+                {(q_id, key) for q_id, item in expected_items.items() for key in item["options"]},
+            ),
+            "types": _precision_recall(
+                {(q_id, item["type"]) for q_id, item in found_items.items()},
+                {(q_id, item["type"]) for q_id, item in expected_items.items()},
+            ),
+        }
+    return scores
+
+
+# ---------------------------------------------------------------------------
+# Running the converters
+# ---------------------------------------------------------------------------
+
+def _peak_memory_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024, 1)
+
+
+def run_converter_in_process(version: str, pdf_path: str) -> Dict[str, Any]:
+    """Convert one PDF with one converter in this process (called in a child)"""
+    sys.path.insert(0, str(Path(__file__).resolve().parent))
+    started = time.perf_counter()
+    module = __import__(CONVERTER_MODULES[version])
+    imported = time.perf_counter()
+    test_data, confidence = module.IELTSPDFConverter(pdf_path).convert()
+    finished = time.perf_counter()
+    return {
+        "test_data": test_data,
+        "confidence": confidence,
+        "import_seconds": round(imported - started, 4),
+        "convert_seconds": round(finished - imported, 4),
+        "peak_memory_mb": _peak_memory_mb(),
+    }
+
+
+def run_converter(version: str, pdf_path: str, timeout: int = 300) -> Dict[str, Any]:
+    """Run a converter in a fresh process so wall time and peak memory are its own"""
+    started = time.perf_counter()
+    # No span cache: the second converter would otherwise read the first one's
+    # table and skip extraction, and runs would fill server/data/spans
+    completed = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--run-one", version, pdf_path],
+        capture_output=True, text=True, encoding="utf-8", timeout=timeout,
+        env={**os.environ, "PDF_SPAN_CACHE": "0"},
+    )
+    wall_seconds = round(time.perf_counter() - started, 4)
+    if completed.returncode != 0:
+        return {"error": (completed.stderr or "converter failed").strip().splitlines()[-1],
+                "wall_seconds": wall_seconds}
+    run = json.loads(completed.stdout)
+    run["wall_seconds"] = wall_seconds
+    return run
+
+
+def benchmark(fixtures: List[Path], versions: List[str], work_dir: str) -> Dict[str, Any]:
+    """Render every fixture, run every converter and score the results"""
+    report = {"fixtures": [], "summary": {}}
+    totals = {version: {"hits": 0, "found": 0, "expected": 0, "type_hits": 0,
+                        "convert_seconds": 0.0, "peak_memory_mb": 0.0} for version in versions}
+
+    for fixture in fixtures:
+        with open(fixture, "r", encoding="utf-8") as f:
+            content = json.load(f)
+        pdf_path = os.path.join(work_dir, f"{fixture.stem}.pdf")
+        render_test_pdf(content, pdf_path)
+        expected = expected_questions(content)
+
+        entry = {"fixture": str(fixture), "pdf": pdf_path, "converters": {}}
+        for version in versions:
+            run = run_converter(version, pdf_path)
+            result = {key: value for key, value in run.items() if key != "test_data"}
+            if "error" not in run:
+                scores = score_sections(expected, extracted_questions(run["test_data"]))
+                result["sections"] = scores
+                total = totals[version]
+                for section_scores in scores.values():
+                    questions, types = section_scores["questions"], section_scores["types"]
+                    total["found"] += questions["found"]
+                    total["expected"] += questions["expected"]
+                    total["hits"] += questions["hits"]
+                    total["type_hits"] += types["hits"]
+                total["convert_seconds"] += run["convert_seconds"]
+                total["peak_memory_mb"] = max(total["peak_memory_mb"], run["peak_memory_mb"] or 0)
+            entry["converters"][version] = result
+        report["fixtures"].append(entry)
+
+    for version, total in totals.items():
+        report["summary"][version] = {
+            "question_precision": round(total["hits"] / total["found"], 4) if total["found"] else None,
+            "question_recall": round(total["hits"] / total["expected"], 4) if total["expected"] else None,
+            "type_recall": round(total["type_hits"] / total["expected"], 4) if total["expected"] else None,
+            "convert_seconds": round(total["convert_seconds"], 4),
+            "peak_memory_mb": total["peak_memory_mb"],
+        }
+    return report
+
+
+def _format_score(score: Dict[str, Any]) -> str:
+    def pct(value):
+        return "  -  " if value is None else f"{value:5.1%}"
+    return f"P {pct(score['precision'])} R {pct(score['recall'])}"
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    for entry in report["fixtures"]:
+        print(f"\n{Path(entry['fixture']).name}")
+        for version, result in entry["converters"].items():
+            if "error" in result:
+                print(f"  {version}: FAILED - {result['error']}")
+                continue
+            print(f"  {version}: wall {result['wall_seconds']:.2f}s, convert {result['convert_seconds']:.2f}s, "
+                  f"peak {result['peak_memory_mb']} MB")
+            for section_type, scores in result["sections"].items():
+                print(f"    {section_type:<10} questions {_format_score(scores['questions'])} | "
+                      f"options {_format_score(scores['options'])} | types {_format_score(scores['types'])}")
+
+    print("\nSummary")
+    for version, summary in report["summary"].items():
+        print(f"  {version}: " + ", ".join(f"{key}={value}" for key, value in summary.items()))
+
+
+def v4_is_worse(report: Dict[str, Any]) -> bool:
+    """Gate: v4 must match v3 on question recall and type recall"""
+    v3, v4 = report["summary"].get("v3"), report["summary"].get("v4")
+    if not v3 or not v4:
+        return False
+    return any((v4[key] or 0) < (v3[key] or 0) for key in ("question_recall", "type_recall"))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 4 and sys.argv[1] == "--run-one":
+        # Child process: print the run as JSON for the parent
+        print(json.dumps(run_converter_in_process(sys.argv[2], sys.argv[3]), ensure_ascii=False))
+        sys.exit(0)
+
+    parser = argparse.ArgumentParser(description="Compare the v3 and v4 PDF converters on rendered fixtures")
+    parser.add_argument("fixtures", nargs="*", help="content JSON files (default: mock_1, mock_2, mock_3)")
+    parser.add_argument("--converters", default="v3,v4", help="comma-separated converter versions")
+    parser.add_argument("--output-dir", help="keep the rendered PDFs in this directory")
+    parser.add_argument("--json", dest="json_path", help="write the full report to this file")
+    parser.add_argument("--fail-if-worse", action="store_true", help="exit 1 if v4 scores below v3")
+    args = parser.parse_args()
+
+    fixtures = [Path(p) for p in args.fixtures] or DEFAULT_FIXTURES
+    versions = [v.strip() for v in args.converters.split(",") if v.strip()]
+
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+        report = benchmark(fixtures, versions, args.output_dir)
+    else:
+        with tempfile.TemporaryDirectory(prefix="ielts_benchmark_") as work_dir:
+            report = benchmark(fixtures, versions, work_dir)
+
+    print_report(report)
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+    if args.fail_if_worse and v4_is_worse(report):
+        print("\nv4 scores below v3 - keep the current default converter")
+        sys.exit(1)
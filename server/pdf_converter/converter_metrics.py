@@ -0,0 +1,347 @@
+"""
+Converter Metrics in Prometheus Text Format
+Node runs one converter process per upload, so the counters and histograms
+live in server/data/converter_metrics.sqlite (override with PDF_METRICS_PATH)
+and every conversion adds its sample there:
+
+- conversions by outcome (success, incomplete, failed, crashed)
+- pages and pages per second
+- latency of each stage (convert, images, duplicates, validate, output)
+- incremental cache hits (unchanged), partial hits and misses
+- time the job waited in the conversion queue (PDF_QUEUE_WAIT_MS, set by Node)
+- peak resident memory, including section extractor processes
+
+The store is rendered in the Prometheus text exposition format. Set
+PDF_METRICS_TEXTFILE to a *.prom path in the node_exporter textfile
+collector directory and it is rewritten after every conversion, or run
+`serve` for a local /metrics endpoint. PDF_METRICS=0 turns recording off.
+
+Usage:
+    python converter_metrics.py render
+    python converter_metrics.py export /var/lib/node_exporter/ielts_converter.prom
+    python converter_metrics.py serve --port 9464
+    python converter_metrics.py record-crash timeout
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Tuple
+
+DEFAULT_STORE_PATH = Path(__file__).resolve().parent.parent / "data" / "converter_metrics.sqlite"
+PREFIX = "ielts_converter_"
+
+SECONDS_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+QUEUE_WAIT_BUCKETS = (0.1, 0.5, 1, 5, 15, 30, 60, 120, 300, 600)
+PAGES_PER_SECOND_BUCKETS = (0.5, 1, 2, 5, 10, 20, 50, 100)
+MEMORY_BUCKETS = tuple(mb * 1024 * 1024 for mb in (64, 128, 256, 512, 1024, 2048, 4096))
+
+# name -> (type, help, buckets)
+METRICS = {
+    "conversions_total": ("counter", "Conversions by outcome and converter version", None),
+    "crashes_total": ("counter", "Converter runs that ended without a result, by reason", None),
+    "pages_total": ("counter", "PDF pages converted", None),
+    "conversion_seconds": ("histogram", "Wall time of a whole conversion", SECONDS_BUCKETS),
+    "stage_seconds": ("histogram", "Wall time of each conversion stage", SECONDS_BUCKETS),
+    "pages_per_second": ("histogram", "Pages converted per second of conversion time", PAGES_PER_SECOND_BUCKETS),
+    "cache_requests_total": ("counter", "Incremental conversion cache lookups by result", None),
+    "queue_wait_seconds": ("histogram", "Time a job waited in the conversion queue", QUEUE_WAIT_BUCKETS),
+    "peak_memory_bytes": ("histogram", "Peak resident memory of a conversion", MEMORY_BUCKETS),
+    "peak_memory_bytes_max": ("gauge", "Largest peak resident memory seen", None),
+    "last_conversion_timestamp_seconds": ("gauge", "Unix time the last conversion finished", None),
+}
+
+# incremental_conversion stats["mode"] -> cache result
+CACHE_RESULTS = {"unchanged": "hit", "incremental": "partial", "full": "miss"}
+
+
+def _store_path(path: Optional[str] = None) -> str:
+    return path or os.environ.get("PDF_METRICS_PATH") or str(DEFAULT_STORE_PATH)
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(labels: Optional[Dict[str, Any]]) -> str:
+    return ",".join(f'{key}="{_escape(value)}"' for key, value in sorted((labels or {}).items()))
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(int(value)) if float(value).is_integer() and abs(value) < 1e15 else repr(float(value))
+
+
+def peak_memory_bytes() -> Optional[int]:
+    """Peak RSS of this process or of its largest child (section extractor pool)"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    unit = 1 if sys.platform == "darwin" else 1024
+    peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+               resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    return peak * unit
+
+
+class MetricsStore:
+    """
+    Series kept in SQLite: counters and histogram buckets are added to,
+    gauges are set (or raised to a maximum). Each conversion is written in
+    one transaction, so concurrent converter processes do not lose updates.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        import sqlite3
+
+        self.path = _store_path(path)
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(self.path, timeout=30)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS series ("
+            " name TEXT NOT NULL, labels TEXT NOT NULL, le TEXT NOT NULL DEFAULT '',"
+            " value REAL NOT NULL, PRIMARY KEY (name, labels, le))"
+        )
+        self.db.commit()
+        self._pending: List[Tuple[str, str, str, float, str]] = []
+
+    def inc(self, name: str, labels: Optional[Dict[str, Any]] = None, amount: float = 1):
+        self._pending.append((PREFIX + name, _labels(labels), "", amount, "add"))
+
+    def set(self, name: str, value: float, labels: Optional[Dict[str, Any]] = None):
+        self._pending.append((PREFIX + name, _labels(labels), "", value, "set"))
+
+    def set_max(self, name: str, value: float, labels: Optional[Dict[str, Any]] = None):
+        self._pending.append((PREFIX + name, _labels(labels), "", value, "max"))
+
+    def observe(self, name: str, value: float, labels: Optional[Dict[str, Any]] = None):
+        buckets = METRICS[name][2]
+        label_text = _labels(labels)
+        # Every bucket is written, so a series never lacks a bucket after its first sample
+        for bound in buckets + (float("inf"),):
+            self._pending.append((PREFIX + name + "_bucket", label_text, _format_value(bound),
+                                  1 if value <= bound else 0, "add"))
+        self._pending.append((PREFIX + name + "_sum", label_text, "", value, "add"))
+        self._pending.append((PREFIX + name + "_count", label_text, "", 1, "add"))
+
+    def commit(self):
+        updates = {
+            "add": "value + excluded.value",
+            "set": "excluded.value",
+            "max": "MAX(value, excluded.value)",
+        }
+        with self.db:
+            for name, labels, le, value, mode in self._pending:
+                self.db.execute(
+                    "INSERT INTO series (name, labels, le, value) VALUES (?, ?, ?, ?) "
+                    f"ON CONFLICT (name, labels, le) DO UPDATE SET value = {updates[mode]}",
+                    (name, labels, le, value),
+                )
+        self._pending = []
+
+    def render(self) -> str:
+        """All series in the Prometheus text exposition format"""
+        rows = self.db.execute("SELECT name, labels, le, value FROM series").fetchall()
+        by_family: Dict[str, List[Tuple[str, str, str, float]]] = {}
+        for name, labels, le, value in rows:
+            family = name[len(PREFIX):]
+            for suffix in ("_bucket", "_sum", "_count"):
+                base = family[:-len(suffix)]
+                if family.endswith(suffix) and METRICS.get(base, ("",))[0] == "histogram":
+                    family = base
+                    break
+            by_family.setdefault(family, []).append((name, labels, le, value))
+
+        lines = []
+        for family, (kind, help_text, _) in METRICS.items():
+            if family not in by_family:
+                continue
+            lines.append(f"# HELP {PREFIX}{family} {help_text}")
+            lines.append(f"# TYPE {PREFIX}{family} {kind}")
+            suffix_order = {"_bucket": 0, "_sum": 1, "_count": 2}
+            series = sorted(by_family[family], key=lambda row: (
+                row[1],
+                suffix_order.get(row[0][len(PREFIX + family):], 0),
+                float("inf") if row[2] == "+Inf" else float(row[2] or 0),
+            ))
+            for name, labels, le, value in series:
+                if le:
+                    labels = f'{labels},le="{le}"' if labels else f'le="{le}"'
+                lines.append(f"{name}{{{labels}}} {_format_value(value)}" if labels
+                             else f"{name} {_format_value(value)}")
+        return "\n".join(lines) + "\n" if lines else ""
+
+    def export(self, textfile: str):
+        """Write the textfile so node_exporter never reads a partial file"""
+        temp_path = f"{textfile}.tmp{os.getpid()}"
+        with open(temp_path, "w", encoding="utf-8", newline="\n") as f:
+            f.write(self.render())
+        os.replace(temp_path, textfile)
+
+    def close(self):
+        self.db.close()
+
+
+class ConversionMetrics:
+    """
+    Measurements of one conversion, collected by node_interface and written
+    to the store once the result has been handed to Node.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+        self.pages = 0
+        self.converter = "unknown"
+        self.cache_result: Optional[str] = None
+
+    @contextmanager
+    def stage(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - started
+
+    def outcome(self, output: Dict[str, Any]) -> str:
+        if not output.get("success"):
+            return "failed"
+        return "incomplete" if output.get("incomplete") else "success"
+
+    def record(self, output: Dict[str, Any], store: Optional[MetricsStore] = None):
+        """Add this conversion to the store and refresh the textfile, if any"""
+        if os.environ.get("PDF_METRICS") == "0":
+            return
+        elapsed = time.perf_counter() - self.started
+        own_store = store is None
+        store = store or MetricsStore()
+        try:
+            store.inc("conversions_total", {"outcome": self.outcome(output), "converter": self.converter})
+            store.observe("conversion_seconds", elapsed)
+            for stage, seconds in self.stages.items():
+                store.observe("stage_seconds", seconds, {"stage": stage})
+            if self.pages:
+                store.inc("pages_total", amount=self.pages)
+                convert_seconds = self.stages.get("convert") or elapsed
+                store.observe("pages_per_second", self.pages / convert_seconds if convert_seconds else 0)
+            if self.cache_result:
+                store.inc("cache_requests_total", {"cache": "incremental", "result": self.cache_result})
+
+            queue_wait_ms = os.environ.get("PDF_QUEUE_WAIT_MS")
+            if queue_wait_ms:
+                try:
+                    store.observe("queue_wait_seconds", max(float(queue_wait_ms), 0) / 1000)
+                except ValueError:
+                    pass
+
+            peak = peak_memory_bytes()
+            if peak:
+                store.observe("peak_memory_bytes", peak)
+                store.set_max("peak_memory_bytes_max", peak)
+            store.set("last_conversion_timestamp_seconds", round(time.time(), 3))
+            store.commit()
+
+            textfile = os.environ.get("PDF_METRICS_TEXTFILE")
+            if textfile:
+                store.export(textfile)
+        finally:
+            if own_store:
+                store.close()
+
+
+def record_crash(reason: str, store: Optional[MetricsStore] = None):
+    """
+    Count a converter run that never produced a result (timeout, crash,
+    unreadable output). Called by Node, since the process could not record it.
+    """
+    own_store = store is None
+    store = store or MetricsStore()
+    try:
+        store.inc("conversions_total", {"outcome": "crashed", "converter": "unknown"})
+        store.inc("crashes_total", {"reason": reason})
+        store.commit()
+        textfile = os.environ.get("PDF_METRICS_TEXTFILE")
+        if textfile:
+            store.export(textfile)
+    finally:
+        if own_store:
+            store.close()
+
+
+def serve(host: str, port: int, path: Optional[str] = None):
+    """Local /metrics endpoint; the store is rendered on every scrape"""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            store = MetricsStore(path)
+            try:
+                body = store.render().encode("utf-8")
+            finally:
+                store.close()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Converter metrics in Prometheus text format")
+    parser.add_argument("--store", help="metrics store (default: PDF_METRICS_PATH or server/data)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("render", help="print the metrics")
+    commands.add_parser("export", help="write a node_exporter textfile").add_argument("textfile")
+    serve_parser = commands.add_parser("serve", help="serve /metrics")
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=9464)
+    commands.add_parser("record-crash", help="count a run without a result").add_argument("reason")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == "serve":
+            serve(args.host, args.port, args.store)
+            return 0
+        else:
+            store = MetricsStore(args.store)
+            try:
+                if args.command == "record-crash":
+                    record_crash(args.reason, store)
+                    output = {"success": True}
+                elif args.command == "render":
+                    sys.stdout.write(store.render())
+                    return 0
+                else:
+                    store.export(args.textfile)
+                    output = {"success": True, "textfile": args.textfile}
+            finally:
+                store.close()
+    except Exception as e:
+        print(json.dumps({"success": False, "errors": [str(e)]}))
+        return 1
+
+    print(json.dumps(output, ensure_ascii=False, separators=(",", ":")))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
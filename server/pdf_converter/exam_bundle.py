@@ -0,0 +1,248 @@
+"""
+Packed Exam Bundles for Material Sets
+Serving a material set reads content_json (or content_blob), the image asset
+rows and the audio metadata from MySQL, then rebuilds the same response for
+every candidate. A bundle holds those responses, ready to send, in a single
+file per set, together with the answer key; images stay under /uploads, where
+the content's URLs point. Readers map the file and hand out slices of it, so
+exam-day reads no longer load or rebuild content from the database; only the
+participant access check still queries it.
+
+Bundle layout (big-endian), shared with server/utils/examBundle.js:
+
+    offset  size
+    0       4     magic b"IELB"
+    4       2     format version (1)
+    6       2     entry count
+    8       8     reserved
+    16      64*n  entry table, one row per entry:
+                    44  name (UTF-8, NUL padded)
+                    2   media type (MEDIA_TYPES index)
+                    2   reserved
+                    8   offset of the data from the start of the file
+                    4   length of the data in bytes
+                    4   CRC32 of the data
+    ...           entry data, each starting on an 8-byte boundary
+
+Entries with identical data share one copy. Names used by the server:
+"meta", "content", "content/listening", "content/reading", "content/writing",
+"answers" and "audio".
+
+Usage:
+    python exam_bundle.py pack output.bundle < manifest.json
+    python exam_bundle.py list set.bundle
+    python exam_bundle.py get set.bundle content > content.json
+    python exam_bundle.py verify set.bundle
+"""
+
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+import zlib
+from typing import Dict, List, Any, Optional, Tuple
+
+MAGIC = b"IELB"
+FORMAT_VERSION = 1
+HEADER = struct.Struct(">4sHH8x")
+ENTRY = struct.Struct(">44sHxxQII")
+MAX_NAME_BYTES = 44
+ALIGNMENT = 8
+
+# Index = media type code in the entry table
+MEDIA_TYPES = (
+    "application/octet-stream",
+    "application/json",
+    "image/png",
+    "image/jpeg",
+    "image/webp",
+    "image/gif",
+    "image/svg+xml",
+)
+
+
+class ExamBundleError(ValueError):
+    """A bundle that cannot be written or read: bad header, entry or checksum"""
+
+
+def _media_code(media_type: Optional[str]) -> int:
+    try:
+        return MEDIA_TYPES.index(media_type or "application/octet-stream")
+    except ValueError:
+        return 0
+
+
+def pack(entries: List[Tuple[str, str, bytes]]) -> bytes:
+    """
+    Build a bundle from (name, media type, data) entries.
+    """
+    if len(entries) > 0xFFFF:
+        raise ExamBundleError("Too many bundle entries")
+
+    names = set()
+    table_end = HEADER.size + ENTRY.size * len(entries)
+    data_offset = -(-table_end // ALIGNMENT) * ALIGNMENT
+    rows = []
+    blobs = []
+    stored: Dict[bytes, Tuple[int, int]] = {}
+
+    for name, media_type, data in entries:
+        encoded = name.encode("utf-8")
+        if not encoded or len(encoded) > MAX_NAME_BYTES or name in names:
+            raise ExamBundleError(f"Invalid or duplicate entry name: {name!r}")
+        names.add(name)
+
+        digest = hashlib.sha256(data).digest()
+        if digest not in stored:
+            stored[digest] = (data_offset, zlib.crc32(data))
+            padding = -len(data) % ALIGNMENT
+            blobs.append(data + b"\0" * padding)
+            data_offset += len(data) + padding
+        offset, crc = stored[digest]
+        rows.append(ENTRY.pack(encoded, _media_code(media_type), offset, len(data), crc))
+
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, len(entries)) + b"".join(rows)
+    header += b"\0" * (-len(header) % ALIGNMENT)
+    return header + b"".join(blobs)
+
+
+class ExamBundle:
+    """
+    Read-only view of a bundle file. The file is memory-mapped and entries
+    are returned as memoryview slices of the mapping, without copying.
+    """
+
+    def __init__(self, path: str):
+        self._file = open(path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ExamBundleError("Bundle file is empty")
+        self._view = memoryview(self._map)
+        self.entries = self._read_table()
+
+    def _read_table(self) -> Dict[str, Dict[str, Any]]:
+        if len(self._map) < HEADER.size:
+            raise ExamBundleError("Bundle header is truncated")
+        magic, version, count = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            raise ExamBundleError("Not an exam bundle")
+        if version != FORMAT_VERSION:
+            raise ExamBundleError(f"Unsupported bundle version {version}")
+        if HEADER.size + ENTRY.size * count > len(self._map):
+            raise ExamBundleError("Bundle entry table is truncated")
+
+        entries = {}
+        for row in range(count):
+            name, media, offset, length, crc = ENTRY.unpack_from(self._map, HEADER.size + ENTRY.size * row)
+            if offset + length > len(self._map):
+                raise ExamBundleError(f"Bundle entry {row} points past the end of the file")
+            entries[name.rstrip(b"\0").decode("utf-8")] = {
+                "media_type": MEDIA_TYPES[media] if media < len(MEDIA_TYPES) else MEDIA_TYPES[0],
+                "offset": offset,
+                "length": length,
+                "crc32": crc,
+            }
+        return entries
+
+    def get(self, name: str) -> Optional[memoryview]:
+        entry = self.entries.get(name)
+        if entry is None:
+            return None
+        return self._view[entry["offset"]:entry["offset"] + entry["length"]]
+
+    def json(self, name: str) -> Any:
+        data = self.get(name)
+        return None if data is None else json.loads(bytes(data))
+
+    def verify(self) -> List[str]:
+        """Names of the entries whose data does not match its checksum"""
+        return [name for name, entry in self.entries.items() if zlib.crc32(self.get(name)) != entry["crc32"]]
+
+    def close(self):
+        """Close the mapping; slices returned by get() must be released first"""
+        self._view.release()
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def pack_manifest(manifest: Dict[str, Any]) -> bytes:
+    """
+    Pack a manifest sent by the server: {"entries": [{"name", "media_type",
+    "text" | "path"}]}. Text is stored as UTF-8; paths are read as files.
+    """
+    entries = []
+    for entry in manifest.get("entries") or []:
+        if entry.get("path") is not None:
+            with open(entry["path"], "rb") as f:
+                data = f.read()
+        else:
+            data = str(entry.get("text") or "").encode("utf-8")
+        entries.append((str(entry.get("name") or ""), entry.get("media_type"), data))
+    return pack(entries)
+
+
+def write_bundle(path: str, data: bytes):
+    """Write a bundle so that readers never see a partly written file"""
+    temp_path = f"{path}.tmp{os.getpid()}"
+    with open(temp_path, "wb") as f:
+        f.write(data)
+    os.replace(temp_path, path)
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Pack and read material set bundles")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    pack_parser = commands.add_parser("pack", help="pack a manifest read from stdin")
+    pack_parser.add_argument("output")
+
+    for command in ("list", "verify"):
+        commands.add_parser(command).add_argument("bundle")
+
+    get_parser = commands.add_parser("get", help="write one entry to stdout")
+    get_parser.add_argument("bundle")
+    get_parser.add_argument("name")
+
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == "pack":
+            data = pack_manifest(json.load(sys.stdin))
+            write_bundle(args.output, data)
+            with ExamBundle(args.output) as bundle:
+                output = {"size": len(data), "entries": len(bundle.entries)}
+        else:
+            with ExamBundle(args.bundle) as bundle:
+                if args.command == "list":
+                    output = bundle.entries
+                elif args.command == "verify":
+                    corrupt = bundle.verify()
+                    output = {"valid": not corrupt, "corrupt_entries": corrupt}
+                else:
+                    data = bundle.get(args.name)
+                    if data is None:
+                        raise ExamBundleError(f"No entry named {args.name!r}")
+                    with data:
+                        sys.stdout.buffer.write(data)
+                    return 0
+    except (ExamBundleError, OSError, json.JSONDecodeError) as e:
+        print(json.dumps({"success": False, "errors": [str(e)]}))
+        return 1
+
+    print(json.dumps(output, ensure_ascii=False, separators=(",", ":")))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
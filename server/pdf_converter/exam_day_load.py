@@ -0,0 +1,582 @@
+"""
+Exam-Day Load Generator for the Session Endpoints
+Replays candidate timelines against a local server - check-in, polling
+can-start until the admin starts the session, fetching the content,
+heartbeats through each section and the three submissions - and reports
+p50/p95/p99 latency and the error rate per endpoint. A second mode drives
+each endpoint alone at doubling concurrency to find where it saturates.
+
+Runs offline with the standard library only. Against a real server it seeds
+its own session through the admin API; with --stand-in it starts a local
+stand-in that answers the same routes, spending each route's sequence of
+database queries on a pool of 10 connections as db.js does, so the harness
+and the shape of the results can be checked without MySQL.
+
+Usage:
+    python exam_day_load.py exam-day --stand-in --candidates 300
+    python exam_day_load.py exam-day --base-url http://localhost:4000 \\
+        --admin-phone 998901234567 --admin-password secret --test-id 2
+    python exam_day_load.py saturate --stand-in --max-concurrency 256
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from typing import Dict, List, Any, Tuple, Optional
+from urllib.parse import urlsplit, quote
+
+# Endpoint labels used in reports, in timeline order
+CHECK_IN = "check-in-participant"
+CAN_START = "can-start"
+CONTENT = "materials content"
+HEARTBEAT = "participant-activity"
+SUBMIT_LISTENING = "submit-listening"
+SUBMIT_READING = "submit-reading"
+SUBMIT_WRITING = "submit-writing"
+ENDPOINTS = (CHECK_IN, CAN_START, CONTENT, HEARTBEAT, SUBMIT_LISTENING, SUBMIT_READING, SUBMIT_WRITING)
+
+# Section lengths in minutes (admin start-all defaults); --time-scale divides them
+SECTION_MINUTES = {"listening": 40, "reading": 60, "writing": 60}
+# Client cadences, kept real so each candidate sends what a browser tab does
+HEARTBEAT_SECONDS = 30
+CAN_START_POLL_SECONDS = 5
+REQUEST_TIMEOUT = 30.0
+
+# Saturation search: each level runs this long, and a level saturates the
+# endpoint when it adds less than this much throughput over the last one
+SATURATION_LEVEL_SECONDS = 5.0
+SATURATION_MIN_GAIN = 0.10
+
+# Stand-in: database pool size (db.js connectionLimit) and time per query
+STAND_IN_POOL_SIZE = 10
+STAND_IN_QUERY_MS = 1.0
+# Sequential queries each route runs (routes/testSessions.js, routes/materials.js)
+STAND_IN_QUERIES = {
+    CHECK_IN: 3,
+    CAN_START: 1,
+    CONTENT: 4,
+    HEARTBEAT: 1,
+    SUBMIT_LISTENING: 46,
+    SUBMIT_READING: 46,
+    SUBMIT_WRITING: 3,
+}
+
+ESSAY_WORDS = (
+    "the chart shows that the number of people who travelled by train rose steadily "
+    "while car use fell over the period and in my opinion governments should invest "
+    "more in public transport because it reduces pollution and congestion in cities"
+).split()
+
+
+class HttpConnection:
+    """
+    Minimal keep-alive HTTP/1.1 client over asyncio streams; one per
+    simulated candidate, like one browser tab.
+    """
+
+    def __init__(self, base_url: str):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname or "127.0.0.1"
+        self.port = parts.port or (443 if parts.scheme == "https" else 80)
+        self.ssl = parts.scheme == "https"
+        self.reader: Optional[asyncio.StreamReader] = None
+        self.writer: Optional[asyncio.StreamWriter] = None
+
+    async def request(self, method: str, path: str, body: Any = None,
+                      headers: Optional[Dict[str, str]] = None) -> Tuple[int, Any]:
+        try:
+            return await asyncio.wait_for(self._request(method, path, body, headers), REQUEST_TIMEOUT)
+        except BaseException:
+            await self.close()
+            raise
+
+    async def _request(self, method, path, body, headers) -> Tuple[int, Any]:
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port, ssl=self.ssl)
+
+        payload = b"" if body is None else json.dumps(body).encode("utf-8")
+        lines = [f"{method} {path} HTTP/1.1", f"Host: {self.host}:{self.port}", "Connection: keep-alive",
+                 f"Content-Length: {len(payload)}"]
+        if body is not None:
+            lines.append("Content-Type: application/json")
+        lines.extend(f"{name}: {value}" for name, value in (headers or {}).items())
+        self.writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + payload)
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionError("Connection closed by server")
+        status = int(status_line.split()[1])
+        response_headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            response_headers[name.strip().lower()] = value.strip()
+
+        if response_headers.get("transfer-encoding", "").lower() == "chunked":
+            chunks = []
+            while True:
+                size = int((await self.reader.readline()).split(b";")[0], 16)
+                if size == 0:
+                    await self.reader.readline()
+                    break
+                chunks.append(await self.reader.readexactly(size))
+                await self.reader.readline()
+            data = b"".join(chunks)
+        else:
+            data = await self.reader.readexactly(int(response_headers.get("content-length", 0)))
+
+        if response_headers.get("connection", "").lower() == "close":
+            await self.close()
+        try:
+            return status, json.loads(data) if data else None
+        except ValueError:
+            return status, None
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+            self.reader = None
+
+
+class LatencyRecorder:
+    """Latency samples and errors per endpoint"""
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = {endpoint: [] for endpoint in ENDPOINTS}
+        self.errors: Dict[str, int] = {endpoint: 0 for endpoint in ENDPOINTS}
+        self.started = time.perf_counter()
+
+    async def call(self, connection: HttpConnection, endpoint: str, method: str, path: str,
+                   body: Any = None, headers: Optional[Dict[str, str]] = None) -> Tuple[int, Any]:
+        started = time.perf_counter()
+        try:
+            status, data = await connection.request(method, path, body, headers)
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError, IndexError):
+            status, data = 0, None
+        self.samples[endpoint].append(time.perf_counter() - started)
+        if not 200 <= status < 300:
+            self.errors[endpoint] += 1
+        return status, data
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        elapsed = time.perf_counter() - self.started
+        report = {}
+        for endpoint in ENDPOINTS:
+            samples = sorted(self.samples[endpoint])
+            if not samples:
+                continue
+            report[endpoint] = {
+                "requests": len(samples),
+                "errors": self.errors[endpoint],
+                "error_rate": round(self.errors[endpoint] / len(samples), 4),
+                "p50_ms": round(percentile(samples, 50) * 1000, 1),
+                "p95_ms": round(percentile(samples, 95) * 1000, 1),
+                "p99_ms": round(percentile(samples, 99) * 1000, 1),
+                "max_ms": round(samples[-1] * 1000, 1),
+                "requests_per_s": round(len(samples) / elapsed, 1) if elapsed else 0,
+            }
+        return report
+
+
+def percentile(sorted_samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile of already sorted samples"""
+    rank = max(1, -(-len(sorted_samples) * pct // 100))
+    return sorted_samples[int(rank) - 1]
+
+
+def _answers(rng: random.Random) -> Dict[str, str]:
+    choices = ["A", "B", "C", "D", "TRUE", "FALSE", "NOT GIVEN", "river", "1200", "tunnels"]
+    return {str(question): rng.choice(choices) for question in range(1, 41)}
+
+
+def _essay(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(ESSAY_WORDS) for _ in range(words))
+
+
+class ExamDay:
+    """A seeded session and the timelines of its candidates"""
+
+    def __init__(self, args: argparse.Namespace, recorder: LatencyRecorder):
+        self.args = args
+        self.recorder = recorder
+        self.started = asyncio.Event()
+        self.rng = random.Random(args.seed)
+
+    def _scaled(self, seconds: float) -> float:
+        return seconds / self.args.time_scale
+
+    async def seed(self) -> Dict[str, Any]:
+        """Create a session with the candidates through the admin API"""
+        admin = HttpConnection(self.args.base_url)
+        try:
+            status, login = await admin.request("POST", "/api/users/login", {
+                "phone_number": self.args.admin_phone, "password": self.args.admin_password})
+            if status != 200 or not login or not login.get("token"):
+                raise RuntimeError(f"Admin login failed ({status})")
+            self.auth = {"Authorization": f"Bearer {login['token']}"}
+
+            status, session = await admin.request("POST", "/api/admin/sessions", {
+                "test_id": self.args.test_id,
+                "session_date": time.strftime("%Y-%m-%d %H:%M:%S"),
+                "location": "Load test",
+            }, self.auth)
+            if status != 201:
+                raise RuntimeError(f"Session creation failed ({status}): {session}")
+
+            names = [{"full_name": f"Load Candidate {number:04d}"} for number in range(self.args.candidates)]
+            status, registered = await admin.request(
+                "POST", f"/api/admin/sessions/{session['sessionId']}/register-participants",
+                {"participants": names}, self.auth)
+            if status not in (200, 201):
+                raise RuntimeError(f"Registration failed ({status}): {registered}")
+            return {"session_id": session["sessionId"], "participants": registered.get("registered") or []}
+        finally:
+            await admin.close()
+
+    async def start_session(self, session_id: int):
+        """What the admin does once the room has checked in"""
+        admin = HttpConnection(self.args.base_url)
+        try:
+            status, _ = await admin.request("PATCH", f"/api/admin/sessions/{session_id}/start-all", {}, self.auth)
+            if status != 200:
+                raise RuntimeError(f"start-all failed ({status})")
+        finally:
+            await admin.close()
+        self.started.set()
+
+    async def _section(self, connection: HttpConnection, code: str, screen: str):
+        """Heartbeats through one section, with the odd monitoring event"""
+        deadline = time.perf_counter() + self._scaled(SECTION_MINUTES[screen] * 60)
+        while time.perf_counter() < deadline:
+            await asyncio.sleep(min(HEARTBEAT_SECONDS, max(deadline - time.perf_counter(), 0)))
+            body = {"participant_id_code": code, "current_screen": screen}
+            if self.rng.random() < 0.05:
+                body["event_type"] = self.rng.choice(["tab_switch", "focus_lost"])
+            await self.recorder.call(connection, HEARTBEAT, "POST", "/api/test-sessions/participant-activity", body)
+
+    async def candidate(self, participant: Dict[str, Any], arrival: float):
+        rng = random.Random(participant["participant_id_code"])
+        code = participant["participant_id_code"]
+        name = participant["full_name"]
+        connection = HttpConnection(self.args.base_url)
+        await asyncio.sleep(arrival)
+        try:
+            status, checked_in = await self.recorder.call(
+                connection, CHECK_IN, "POST", "/api/test-sessions/check-in-participant",
+                {"participant_id_code": code, "full_name": name})
+            if status != 200:
+                return
+            participant_id = checked_in["participant"]["id"]
+            set_id = checked_in["participant"]["test_materials_id"]
+
+            while True:
+                status, start = await self.recorder.call(
+                    connection, CAN_START, "GET",
+                    f"/api/test-sessions/participant/{quote(code)}/can-start?full_name={quote(name)}")
+                if status == 200 and start and start.get("can_start"):
+                    break
+                try:
+                    await asyncio.wait_for(self.started.wait(), CAN_START_POLL_SECONDS * rng.uniform(0.8, 1.2))
+                except asyncio.TimeoutError:
+                    pass
+
+            content_headers = {"x-participant-id-code": code}
+            for section, endpoint, field in (
+                ("listening", SUBMIT_LISTENING, "listening_answers"),
+                ("reading", SUBMIT_READING, "reading_answers"),
+            ):
+                await self.recorder.call(connection, CONTENT, "GET",
+                                         f"/api/materials/sets/{set_id}/content?section_type={section}",
+                                         headers=content_headers)
+                await self._section(connection, code, section)
+                await self.recorder.call(connection, endpoint, "POST", f"/api/test-sessions/{endpoint}",
+                                         {"participant_id": participant_id, "full_name": name, field: _answers(rng)})
+
+            await self.recorder.call(connection, CONTENT, "GET",
+                                     f"/api/materials/sets/{set_id}/content?section_type=writing",
+                                     headers=content_headers)
+            await self._section(connection, code, "writing")
+            task_1, task_2 = _essay(rng, rng.randint(140, 220)), _essay(rng, rng.randint(240, 330))
+            await self.recorder.call(connection, SUBMIT_WRITING, "POST", "/api/test-sessions/submit-writing", {
+                "participant_id": participant_id,
+                "participant_id_code": code,
+                "full_name": name,
+                "writing_answers": {"1": task_1, "2": task_2},
+                "task_1_word_count": len(task_1.split()),
+                "task_2_word_count": len(task_2.split()),
+            })
+        finally:
+            await connection.close()
+
+    async def run(self) -> Dict[str, Any]:
+        seeded = await self.seed()
+        participants = seeded["participants"]
+        arrivals = sorted(self.rng.uniform(0, self.args.ramp) for _ in participants)
+        tasks = [asyncio.ensure_future(self.candidate(participant, arrival))
+                 for participant, arrival in zip(participants, arrivals)]
+
+        # Check-in window, then the admin starts everyone who is in
+        await asyncio.sleep(self.args.ramp + 1)
+        await self.start_session(seeded["session_id"])
+        await asyncio.gather(*tasks)
+        return {
+            "mode": "exam-day",
+            "session_id": seeded["session_id"],
+            "candidates": len(participants),
+            "time_scale": self.args.time_scale,
+            "endpoints": self.recorder.summary(),
+        }
+
+
+async def saturate(args: argparse.Namespace) -> Dict[str, Any]:
+    """
+    Drive each endpoint alone with closed-loop workers at 1, 2, 4, ...
+    concurrent requests; the saturation level is the first that no longer
+    adds SATURATION_MIN_GAIN throughput.
+    """
+    recorder = LatencyRecorder()
+    exam = ExamDay(args, recorder)
+    seeded = await exam.seed()
+    await exam.start_session(seeded["session_id"])
+    participants = seeded["participants"]
+
+    # Every candidate checks in once so submissions and content reads are valid
+    connection = HttpConnection(args.base_url)
+    identities = []
+    for participant in participants:
+        status, checked_in = await connection.request("POST", "/api/test-sessions/check-in-participant", {
+            "participant_id_code": participant["participant_id_code"], "full_name": participant["full_name"]})
+        if status == 200:
+            identities.append((participant, checked_in["participant"]))
+    await connection.close()
+    if not identities:
+        raise RuntimeError("No candidate could check in")
+
+    def request_for(endpoint: str, worker: int) -> Tuple[str, str, Any, Optional[Dict[str, str]]]:
+        participant, checked_in = identities[worker % len(identities)]
+        code, name = participant["participant_id_code"], participant["full_name"]
+        rng = random.Random(worker)
+        if endpoint == CHECK_IN:
+            return "POST", "/api/test-sessions/check-in-participant", {"participant_id_code": code, "full_name": name}, None
+        if endpoint == CAN_START:
+            return "GET", f"/api/test-sessions/participant/{quote(code)}/can-start?full_name={quote(name)}", None, None
+        if endpoint == CONTENT:
+            return ("GET", f"/api/materials/sets/{checked_in['test_materials_id']}/content?section_type=reading",
+                    None, {"x-participant-id-code": code})
+        if endpoint == HEARTBEAT:
+            return "POST", "/api/test-sessions/participant-activity", {"participant_id_code": code, "current_screen": "reading"}, None
+        if endpoint == SUBMIT_WRITING:
+            return "POST", "/api/test-sessions/submit-writing", {
+                "participant_id": checked_in["id"], "participant_id_code": code, "full_name": name,
+                "writing_answers": {"1": _essay(rng, 160), "2": _essay(rng, 260)},
+                "task_1_word_count": 160, "task_2_word_count": 260}, None
+        field = "listening_answers" if endpoint == SUBMIT_LISTENING else "reading_answers"
+        return "POST", f"/api/test-sessions/{endpoint}", {
+            "participant_id": checked_in["id"], "full_name": name, field: _answers(rng)}, None
+
+    report = {}
+    for endpoint in args.endpoints or ENDPOINTS:
+        levels = []
+        concurrency = 1
+        while concurrency <= args.max_concurrency:
+            level_recorder = LatencyRecorder()
+            deadline = time.perf_counter() + args.level_seconds
+
+            async def worker(number: int):
+                worker_connection = HttpConnection(args.base_url)
+                method, path, body, headers = request_for(endpoint, number)
+                try:
+                    while time.perf_counter() < deadline:
+                        await level_recorder.call(worker_connection, endpoint, method, path, body, headers)
+                finally:
+                    await worker_connection.close()
+
+            await asyncio.gather(*(worker(number) for number in range(concurrency)))
+            stats = level_recorder.summary()[endpoint]
+            levels.append({"concurrency": concurrency, **stats})
+            concurrency *= 2
+
+        saturation = levels[-1]["concurrency"]
+        for previous, current in zip(levels, levels[1:]):
+            if current["requests_per_s"] < previous["requests_per_s"] * (1 + SATURATION_MIN_GAIN):
+                saturation = previous["concurrency"]
+                break
+        report[endpoint] = {"saturates_at": saturation, "levels": levels}
+    return {"mode": "saturate", "endpoints": report}
+
+
+class StandInServer:
+    """
+    Local stand-in for the Node server: the routes the load generator uses,
+    each spending its sequence of queries on a pool of STAND_IN_POOL_SIZE
+    connections. State is kept in memory.
+    """
+
+    def __init__(self, query_ms: float = STAND_IN_QUERY_MS, pool_size: int = STAND_IN_POOL_SIZE):
+        self.query_seconds = query_ms / 1000
+        self.pool = asyncio.Semaphore(pool_size)
+        self.participants: Dict[str, Dict[str, Any]] = {}
+        self.started_sessions = set()
+        self.next_id = 1
+        self.content = json.dumps({"content_format": "json", "content": {"sections": [
+            {"type": "reading", "passages": [{"content": _essay(random.Random(0), 900)}]}]}}).encode("utf-8")
+
+    async def _queries(self, count: int):
+        for _ in range(count):
+            async with self.pool:
+                await asyncio.sleep(self.query_seconds)
+
+    async def _route(self, method: str, path: str, body: Any) -> Tuple[int, Any]:
+        route, _, query = path.partition("?")
+        segments = route.strip("/").split("/")
+
+        if route == "/api/users/login":
+            return 200, {"token": "stand-in"}
+        if route == "/api/admin/sessions" and method == "POST":
+            session_id = self.next_id
+            self.next_id += 1
+            return 201, {"sessionId": session_id, "test_materials_id": 1}
+        if route.endswith("/register-participants"):
+            session_id = int(segments[3])
+            registered = []
+            for person in body.get("participants") or []:
+                code = f"P{self.next_id:06d}"
+                self.participants[code] = {"id": self.next_id, "session_id": session_id,
+                                           "full_name": person["full_name"], "entered": False}
+                registered.append({"id": self.next_id, "participant_id_code": code, "full_name": person["full_name"]})
+                self.next_id += 1
+            return 201, {"registered": registered}
+        if route.endswith("/start-all"):
+            session_id = int(segments[3])
+            self.started_sessions.add(session_id)
+            return 200, {"updated_count": sum(1 for p in self.participants.values() if p["session_id"] == session_id)}
+
+        if route == "/api/test-sessions/check-in-participant":
+            await self._queries(STAND_IN_QUERIES[CHECK_IN])
+            participant = self.participants.get(body.get("participant_id_code"))
+            if participant is None:
+                return 404, {"error": "Participant not found"}
+            participant["entered"] = True
+            return 200, {"participant": {"id": participant["id"], "test_materials_id": 1,
+                                         "session_id": participant["session_id"]}}
+        if route.endswith("/can-start"):
+            await self._queries(STAND_IN_QUERIES[CAN_START])
+            participant = self.participants.get(segments[3])
+            if participant is None:
+                return 404, {"error": "Participant not found"}
+            started = participant["session_id"] in self.started_sessions and participant["entered"]
+            return 200, {"can_start": started, "test_started": started}
+        if route.startswith("/api/materials/sets/") and route.endswith("/content"):
+            await self._queries(STAND_IN_QUERIES[CONTENT])
+            return 200, self.content
+        if route == "/api/test-sessions/participant-activity":
+            await self._queries(STAND_IN_QUERIES[HEARTBEAT] + (3 if body.get("event_type") else 0))
+            return 200, {"success": True}
+        for endpoint in (SUBMIT_LISTENING, SUBMIT_READING, SUBMIT_WRITING):
+            if route == f"/api/test-sessions/{endpoint}":
+                await self._queries(STAND_IN_QUERIES[endpoint])
+                return 200, {"message": "Submitted"}
+        return 404, {"error": "Not found"}
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, _ = request_line.decode("latin-1").split(" ", 2)
+                length = 0
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    if name.strip().lower() == "content-length":
+                        length = int(value)
+                raw = await reader.readexactly(length) if length else b""
+                status, data = await self._route(method, path, json.loads(raw) if raw else {})
+                payload = data if isinstance(data, bytes) else json.dumps(data).encode("utf-8")
+                writer.write(f"HTTP/1.1 {status} X\r\nContent-Type: application/json\r\n"
+                             f"Content-Length: {len(payload)}\r\nConnection: keep-alive\r\n\r\n".encode("latin-1") + payload)
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, port: int = 0) -> str:
+        self.server = await asyncio.start_server(self.handle, "127.0.0.1", port, backlog=4096)
+        return f"http://127.0.0.1:{self.server.sockets[0].getsockname()[1]}"
+
+
+def _print_table(report: Dict[str, Any]):
+    if report["mode"] == "exam-day":
+        print(f"{'endpoint':<24}{'requests':>9}{'errors':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}")
+        for endpoint, stats in report["endpoints"].items():
+            print(f"{endpoint:<24}{stats['requests']:>9}{stats['errors']:>8}{stats['p50_ms']:>9}"
+                  f"{stats['p95_ms']:>9}{stats['p99_ms']:>9}{stats['max_ms']:>9}")
+    else:
+        for endpoint, result in report["endpoints"].items():
+            print(f"{endpoint}: saturates at {result['saturates_at']} concurrent requests")
+            for level in result["levels"]:
+                print(f"  {level['concurrency']:>5}  {level['requests_per_s']:>8} req/s  "
+                      f"p95 {level['p95_ms']:>7} ms  errors {level['error_rate']:.1%}")
+
+
+async def _main(args: argparse.Namespace) -> Dict[str, Any]:
+    stand_in = None
+    if args.stand_in:
+        stand_in = StandInServer(args.stand_in_query_ms)
+        args.base_url = await stand_in.start()
+    try:
+        if args.command == "exam-day":
+            return await ExamDay(args, LatencyRecorder()).run()
+        return await saturate(args)
+    finally:
+        if stand_in is not None:
+            stand_in.server.close()
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Exam-day load generator for the session endpoints")
+    parser.add_argument("command", choices=["exam-day", "saturate"])
+    parser.add_argument("--base-url", default="http://127.0.0.1:4000")
+    parser.add_argument("--stand-in", action="store_true", help="run against a local in-memory stand-in")
+    parser.add_argument("--stand-in-query-ms", type=float, default=STAND_IN_QUERY_MS)
+    parser.add_argument("--admin-phone", default="")
+    parser.add_argument("--admin-password", default="")
+    parser.add_argument("--test-id", type=int, default=2)
+    parser.add_argument("--candidates", type=int, default=200)
+    parser.add_argument("--ramp", type=float, default=10.0, help="seconds over which candidates arrive")
+    parser.add_argument("--time-scale", type=float, default=120.0,
+                        help="divide section lengths by this (120: a 160-minute exam in 80 s); "
+                             "heartbeats and can-start polls keep their 30 s and 5 s cadence")
+    parser.add_argument("--max-concurrency", type=int, default=128)
+    parser.add_argument("--level-seconds", type=float, default=SATURATION_LEVEL_SECONDS)
+    parser.add_argument("--endpoints", nargs="*", choices=ENDPOINTS)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", help="also write the report to this file")
+    args = parser.parse_args(argv)
+
+    try:
+        report = asyncio.run(_main(args))
+    except (RuntimeError, OSError) as e:
+        print(json.dumps({"success": False, "errors": [str(e)]}))
+        return 1
+
+    _print_table(report)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,9 +5,13 @@ Properly extracts ALL test content: all passages, all questions, options, and de
 
 import re
 import json
-import fitz  # PyMuPDF
 from typing import Dict, List, Any, Tuple, Optional
 
+try:
+    from .pdf_spans import load_span_table
+except ImportError:  # loaded from this directory (node_interface, scripts)
+    from pdf_spans import load_span_table
+
 
 class IELTSPDFConverter:
     """
@@ -31,21 +35,11 @@ class IELTSPDFConverter:
             raise Exception(f"PDF conversion failed: {str(e)}")
 
     def _extract_text(self) -> None:
-        """Extract all text from PDF"""
+        """Extract all text from PDF (through its span table, see pdf_spans.py)"""
         try:
-            doc = fitz.open(self.pdf_path)
-            full_text = []
-            
-            for page_num, page in enumerate(doc):
-                text = page.get_text()
-                self.text_by_page.append({
-                    'page': page_num + 1,
-                    'content': text
-                })
-                full_text.append(text)
-            
-            self.text_full = "\n".join(full_text)
-            doc.close()
+            with load_span_table(self.pdf_path) as table:
+                self.text_by_page = table.text_by_page
+                self.text_full = table.text
         except Exception as e:
             raise Exception(f"Text extraction failed: {str(e)}")
 
@@ -9,25 +9,126 @@ Properly structures extraction to match IELTS format:
 
 import re
 import json
-import fitz  # PyMuPDF
+import os
 from typing import Dict, List, Any, Tuple, Optional
 
+from conversion_budget import BudgetExceeded, ConversionBudget
+from instruction_index import InstructionIndex, build_index
+from layout_profiles import LayoutProfile, fingerprint_text, get_profile, select_profile
+from option_pools import judgement_options, resolve_options, share_option_pools
+from paragraph_segments import paragraph_reference, segment_passage
+from pdf_spans import load_span_table
+from question_classifier import classify_listening_question, classify_reading_question
+
+# Section extractors in output order. They only read self.text_full, so they
+# can run independently of each other.
+SECTION_EXTRACTORS = (
+    "_extract_listening_section",
+    "_extract_reading_section",
+    "_extract_writing_section",
+    "_extract_speaking_section",
+)
+
+
+# A line starting with a question number: "12", "12.", "12)" followed by space or end
+NUMBERED_HEAD_PATTERN = re.compile(r'\s*(\d{1,2})\s*[.\)]*(?=\s|$)')
+
+
+def _run_section_extractor(text: str, pdf_path: str, profile_name: str,
+                           method_name: str, deadline: Optional[float] = None,
+                           memory_limit_mb: Optional[float] = None) -> Optional[Dict[str, Any]]:
+    """Process-pool worker: run one extractor over the extracted text
+
+    Raises BudgetExceeded (pickled back to the parent) once the shared
+    deadline or the memory ceiling is passed.
+    """
+    budget = None
+    if deadline is not None or memory_limit_mb is not None:
+        budget = ConversionBudget(None, memory_limit_mb, deadline=deadline)
+    converter = IELTSPDFConverter(pdf_path, profile=get_profile(profile_name), budget=budget)
+    converter.text_full = text
+    converter._check_budget(method_name)
+    return getattr(converter, method_name)()
+
+
+def _section_type(method_name: str) -> str:
+    """'_extract_reading_section' -> 'reading'"""
+    return method_name.split("_")[2]
+
 
 class IELTSPDFConverter:
     """
     Extracts complete IELTS test content following proper IELTS structure.
     """
 
-    def __init__(self, pdf_path: str):
+    def __init__(self, pdf_path: str, parallel_sections: bool = False,
+                 profile: Optional[LayoutProfile] = None,
+                 budget: Optional[ConversionBudget] = None):
         self.pdf_path = pdf_path
+        self.parallel_sections = parallel_sections
+        # Optional deadline / memory ceiling; without one the conversion is unbounded
+        self.budget = budget
+        self.incomplete_sections = []
         self.text_full = ""
         self.text_by_page = []
-        self.artifact_patterns = [
-            r'@EnglishSchoolbyRM\s*\d+',  # Remove artifact watermarks
-            r'@EnglishSchoolbyRM',
-            r'©\s*British\s+Council',
-            r'Page\s+\d+',
-        ]
+        # Layout profile is picked from a fingerprint during text extraction
+        # unless one is forced by the caller
+        self.profile = None
+        self.artifact_patterns = []
+        # Instruction blocks ("Questions 14-20 ...") and numbered question
+        # blocks, indexed on first use
+        self.instruction_index = None
+        self._numbered_blocks = None
+        if profile:
+            self._apply_profile(profile)
+
+    def _apply_profile(self, profile: LayoutProfile) -> None:
+        self.profile = profile
+        self.artifact_patterns = profile.artifact_patterns
+
+    def _ensure_profile(self) -> LayoutProfile:
+        """Fingerprint already extracted text when no profile was picked yet"""
+        if self.profile is None:
+            self._apply_profile(select_profile(fingerprint_text(self.text_by_page)))
+        return self.profile
+
+    def _ensure_instruction_index(self) -> InstructionIndex:
+        """Index every instruction block of the extracted text (one scan)"""
+        if self.instruction_index is None:
+            self.instruction_index = build_index(self.text_full)
+        return self.instruction_index
+
+    def _check_budget(self, stage: str) -> None:
+        if self.budget is not None:
+            self.budget.check(stage)
+
+    def _run_section(self, method_name: str) -> Optional[Dict[str, Any]]:
+        """Run one section extractor; a section cut off by the budget is left out"""
+        try:
+            self._check_budget(method_name)
+            return getattr(self, method_name)()
+        except BudgetExceeded as e:
+            self._mark_incomplete(method_name, e)
+        except MemoryError:
+            self._mark_incomplete(method_name, BudgetExceeded("memory", method_name, "MemoryError"))
+        return None
+
+    def _mark_incomplete(self, method_name: str, error: BudgetExceeded) -> None:
+        if self.budget is not None:
+            self.budget.record(error)
+        section_type = _section_type(method_name)
+        if section_type not in self.incomplete_sections:
+            self.incomplete_sections.append(section_type)
+
+    def _record_budget(self, test_data: Dict[str, Any]) -> None:
+        """Mark a result whose sections were cut off by the budget"""
+        if not self.incomplete_sections:
+            return
+        metadata = test_data["metadata"]
+        metadata["incomplete"] = True
+        metadata["incomplete_sections"] = list(self.incomplete_sections)
+        if self.budget is not None:
+            metadata["budget"] = self.budget.to_dict()
 
     def convert(self) -> Tuple[Dict[str, Any], float]:
         """Convert PDF to structured test JSON"""
@@ -39,22 +140,27 @@ class IELTSPDFConverter:
         except Exception as e:
             raise Exception(f"PDF conversion failed: {str(e)}")
 
+    def _keep_extracting(self) -> bool:
+        try:
+            self._check_budget("text_extraction")
+            return True
+        except BudgetExceeded:
+            # Keep the pages read so far; every section will be marked incomplete
+            return False
+
     def _extract_text(self) -> None:
-        """Extract all text from PDF"""
+        """
+        Extract all text from PDF
+
+        Goes through the PDF's span table (pdf_spans.py), so a PDF that was
+        extracted before is read back from the cache without PyMuPDF.
+        """
         try:
-            doc = fitz.open(self.pdf_path)
-            full_text = []
-            
-            for page_num, page in enumerate(doc):
-                text = page.get_text()
-                self.text_by_page.append({
-                    'page': page_num + 1,
-                    'content': text
-                })
-                full_text.append(text)
-            
-            self.text_full = "\n".join(full_text)
-            doc.close()
+            with load_span_table(self.pdf_path, keep_going=self._keep_extracting) as table:
+                if self.profile is None:
+                    self._apply_profile(select_profile(table.fingerprint()))
+                self.text_by_page = table.text_by_page
+                self.text_full = table.text
         except Exception as e:
             raise Exception(f"Text extraction failed: {str(e)}")
 
@@ -64,6 +170,7 @@ class IELTSPDFConverter:
             return text
         
         # Remove known artifacts
+        self._ensure_profile()
         for pattern in self.artifact_patterns:
             text = re.sub(pattern, '', text, flags=re.IGNORECASE)
         
@@ -109,11 +216,14 @@ class IELTSPDFConverter:
         
         NOTE: Sections can appear in any order in the PDF
         """
+        profile = self._ensure_profile()
         test_data = {
             "metadata": {
                 "source": self.pdf_path,
                 "extraction_method": "ielts_structured_extraction_v4",
-                "total_pages": len(self.text_by_page)
+                "layout_profile": profile.name,
+                "total_pages": len(self.text_by_page),
+                "instruction_blocks": self._ensure_instruction_index().to_list()
             },
             "test_info": {
                 "title": self._extract_test_title(),
@@ -126,24 +236,23 @@ class IELTSPDFConverter:
 
         # Extract each major section following IELTS structure
         # Process in this order: Listening, Reading, Writing (order independent of PDF order)
-        listening_section = self._extract_listening_section()
-        if listening_section:
-            test_data["sections"].append(listening_section)
-
-        reading_section = self._extract_reading_section()
-        if reading_section:
-            test_data["sections"].append(reading_section)
+        if self.parallel_sections:
+            sections = self._run_section_extractors_parallel()
+        else:
+            sections = [self._run_section(name) for name in SECTION_EXTRACTORS]
 
-        writing_section = self._extract_writing_section()
-        if writing_section:
-            test_data["sections"].append(writing_section)
+        for section in sections:
+            if section:
+                test_data["sections"].append(section)
 
-        speaking_section = self._extract_speaking_section()
-        if speaking_section:
-            test_data["sections"].append(speaking_section)
+        self._update_test_info(test_data)
+        self._record_budget(test_data)
+        return test_data
 
-        # Count sections and questions
+    def _update_test_info(self, test_data: Dict[str, Any]) -> None:
+        """Recount sections and questions in test_info"""
         test_data["test_info"]["num_sections"] = len(test_data["sections"])
+        test_data["test_info"]["total_questions"] = 0
         for section in test_data["sections"]:
             if section.get("type") == "reading":
                 for passage in section.get("passages", []):
@@ -155,45 +264,69 @@ class IELTSPDFConverter:
                 for task in section.get("tasks", []):
                     test_data["test_info"]["total_questions"] += len(task.get("questions", []))
 
-        return test_data
+    def _run_section_extractors_parallel(self) -> List[Optional[Dict[str, Any]]]:
+        """Run the section extractors concurrently in a process pool
+
+        Every extractor searches the whole text for its section, so each task
+        gets the full text (a few hundred KB at most). Results are collected
+        in SECTION_EXTRACTORS order so the output is identical to the
+        sequential path. Workers get the same absolute
+        deadline and memory ceiling as this process. Falls back to sequential
+        extraction if the pool cannot be started or there is only one CPU.
+        """
+        workers = min(len(SECTION_EXTRACTORS), os.cpu_count() or 1)
+        if not self.text_full or workers < 2:
+            return [self._run_section(name) for name in SECTION_EXTRACTORS]
+
+        # Imported here: the pool machinery is only needed on this path and
+        # adds noticeably to the converter's startup time
+        from concurrent.futures import ProcessPoolExecutor
+
+        deadline = self.budget.deadline if self.budget else None
+        memory_limit_mb = self.budget.memory_limit_mb if self.budget else None
+
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = [
+                    pool.submit(_run_section_extractor, self.text_full, self.pdf_path, self.profile.name, name,
+                                deadline, memory_limit_mb)
+                    for name in SECTION_EXTRACTORS
+                ]
+                sections = []
+                for name, future in zip(SECTION_EXTRACTORS, futures):
+                    try:
+                        sections.append(future.result())
+                    except BudgetExceeded as e:
+                        self._mark_incomplete(name, e)
+                        sections.append(None)
+                    except MemoryError:
+                        self._mark_incomplete(name, BudgetExceeded("memory", name, "MemoryError"))
+                        sections.append(None)
+                return sections
+        except (OSError, RuntimeError):
+            # e.g. process creation not permitted in this environment
+            return [self._run_section(name) for name in SECTION_EXTRACTORS]
 
     def _extract_reading_section(self) -> Optional[Dict[str, Any]]:
         """Extract Reading section with 3 passages
         
-        IELTS Reading has 3 passages with 13 questions each (total 40).
+        IELTS Reading has 3 passages and 40 questions.
         The PDF structure has:
         - Passage content (pages 2-3, 6-7, 10-11)
         - Questions listed separately (pages 7-9, 10-12, 13-16)
-        - Question ranges: 1-13, 14-26, 27-40 for passages 1, 2, 3
+        - Question ranges from the instruction index ("... based on Reading
+          Passage 2", or the question headers after each passage); the
+          profile's ranges (1-13, 14-26, 27-40) are the fallback
         """
         passages = []
         
-        # Define reading passages with their markers and question ranges
-        reading_passages = [
-            {
-                'passage_num': 1,
-                'title_marker': r'Tunnelling\s+under\s+the\s+Thames',
-                'q_start': 1,
-                'q_end': 13,
-            },
-            {
-                'passage_num': 2,
-                'title_marker': r"Children.*?comprehension\s+of\s+television",
-                'q_start': 14,
-                'q_end': 26,
-            },
-            {
-                'passage_num': 3,
-                'title_marker': r'BUSINESS\s+INNOVATION',
-                'q_start': 27,
-                'q_end': 40,
-            },
-        ]
+        # Reading passages with their markers come from the layout profile
+        reading_passages = self._ensure_profile().reading_passages
+        instruction_index = self._ensure_instruction_index()
         
         for passage_info in reading_passages:
+            self._check_budget("reading_passages")
             passage_num = passage_info['passage_num']
-            q_start = passage_info['q_start']
-            q_end = passage_info['q_end']
             title_marker = passage_info['title_marker']
             
             # Find passage content by title
@@ -213,7 +346,7 @@ class IELTSPDFConverter:
             content_end = len(self.text_full)
             
             # Find where questions start (either "Questions" marker or next passage)
-            if passage_num < 3:
+            if passage_num < len(reading_passages):
                 next_title_marker = reading_passages[passage_num]['title_marker']
                 next_match = re.search(next_title_marker, self.text_full[content_start:], re.IGNORECASE | re.DOTALL)
                 if next_match:
@@ -221,30 +354,54 @@ class IELTSPDFConverter:
             
             passage_content = self.text_full[content_start:content_end]
             
+            # Instruction blocks between this passage and the next; the last
+            # passage runs to the end of the text, which may hold other sections
+            passage_blocks = instruction_index.within(title_start, content_end)
+            
+            # Question range: stated by the passage intro, else the question
+            # headers up to the next passage, else the profile's range
+            q_start, q_end = (
+                instruction_index.passage_ranges.get(passage_num)
+                or (passage_blocks.question_range() if content_end < len(self.text_full) else None)
+                or (passage_info['q_start'], passage_info['q_end'])
+            )
+            
             # Extract questions for this passage (questions are on separate pages)
-            questions = self._extract_all_reading_questions_by_range(q_start, q_end)
+            questions = self._extract_all_reading_questions_by_range(q_start, q_end, passage_blocks)
+            # Lists shared by a group of questions are stored once per passage
+            option_pools = share_option_pools(questions)
             
+            # Paragraphs are split from the line layout, before cleaning joins the lines
             if not questions and passage_content.strip():
                 # Only content, no questions - still create passage
-                content_text = self._clean_text(passage_content)
+                content_text, paragraphs = segment_passage(passage_content, self._clean_text)
             elif questions:
                 # Extract just the passage content (before any "Questions" marker)
                 questions_marker = f'Questions {q_start}'
                 q_marker_idx = passage_content.find(questions_marker)
                 if q_marker_idx > 0:
                     passage_content = passage_content[:q_marker_idx]
-                content_text = self._clean_text(passage_content)
+                content_text, paragraphs = segment_passage(passage_content, self._clean_text)
             else:
-                content_text = ""
+                content_text, paragraphs = "", []
+            
+            # Heading questions point at the paragraph they name ("Paragraph C")
+            for question in questions:
+                label = paragraph_reference(question["text"], paragraphs)
+                if label:
+                    question["paragraph"] = label
             
             if content_text or questions:
                 passage = {
                     "passage_number": passage_num,
                     "title": passage_title,
                     "content": content_text,
+                    "paragraph_spans": paragraphs,
                     "questions": questions,
                     "total_questions": len(questions)
                 }
+                if option_pools:
+                    passage["option_pools"] = option_pools
                 passages.append(passage)
         
         if not passages:
@@ -261,13 +418,16 @@ class IELTSPDFConverter:
             "total_questions": total_questions
         }
 
-    def _extract_all_reading_questions_by_range(self, q_start: int, q_end: int) -> List[Dict[str, Any]]:
+    def _extract_all_reading_questions_by_range(self, q_start: int, q_end: int,
+                                                instruction_index: Optional[InstructionIndex] = None) -> List[Dict[str, Any]]:
         """Extract reading questions by searching full text for question markers
         
         CRITICAL: Filter out instruction text like "You should spend about 20 minutes..."
         Also avoid matching question numbers from wrong sections (listening, headers, etc).
         Strategy: Look for the pattern "Q_NUM.) TEXT" which is typical for question sections,
         and reject patterns that belong to different sections.
+        
+        instruction_index holds the passage's instruction blocks (task kind, word limit).
         """
         questions = []
         
@@ -290,13 +450,17 @@ class IELTSPDFConverter:
             r'^\s*(?:WRITING|SPEAKING)',  # Other sections
         ]
         
+        # Every "q_num. text" block of the document, found in one scan
+        numbered_blocks = self._numbered_block_index()
+        if instruction_index is None:
+            instruction_index = InstructionIndex([], {})
+        
         # More robust: find each individual question by its number within reading context
         for q_num in range(q_start, q_end + 1):
-            # Look for the question number at start of line
-            # Pattern: number + optional parenthesis/dot + text
-            q_pattern = rf'(?:^|\n)\s*{q_num}\s*[.\)]*\s+([^\n]+(?:\n(?!\s*{q_num+1}\s*[.\)]|\s*[A-H]\s*[\)\.])(?!\s*(?:PART|Questions|PASSAGE|READING|WRITING))[\s]*[^\n]*)*)'
+            self._check_budget("reading_questions")
             
-            matches = list(re.finditer(q_pattern, self.text_full, re.MULTILINE | re.IGNORECASE))
+            # Blocks starting with the question number at start of line
+            matches = numbered_blocks.get(q_num)
             
             if not matches:
                 continue
@@ -305,7 +469,7 @@ class IELTSPDFConverter:
             best_match = None
             
             for match in reversed(matches):  # Start from end to prefer questions section over passage header
-                q_text_candidate = match.group(1).strip() if match.lastindex and match.lastindex >= 1 else match.group(0).strip()
+                q_text_candidate = match.strip()
                 q_text_candidate = re.sub(rf'^\s*{q_num}\s*[.\)]*\s*', '', q_text_candidate)
                 
                 # Check if this looks like a real question or wrong section
@@ -332,7 +496,7 @@ class IELTSPDFConverter:
                 best_match = matches[-1]
             
             # Extract text from best match
-            q_text = best_match.group(1).strip() if best_match.lastindex and best_match.lastindex >= 1 else best_match.group(0).strip()
+            q_text = best_match.strip()
             q_text = re.sub(rf'^\s*{q_num}\s*[.\)]*\s*', '', q_text)
             q_text = self._clean_text(q_text)
             
@@ -341,16 +505,98 @@ class IELTSPDFConverter:
                 q_type = self._determine_reading_question_type(q_text)
                 options = self._extract_multiple_choice_options(q_text)
                 
+                # The instruction block settles what the question text alone cannot
+                block = instruction_index.for_question(q_num)
+                if block and block["task"] and q_type == "open_question":
+                    q_type = block["task"]
+                if block and not options and block["task"] == "true_false_ng":
+                    options = judgement_options(block["options"])
+                
                 question = {
                     "id": q_num,
                     "text": q_text,
                     "type": q_type,
                     "options": options if options else None
                 }
+                if block and block["max_words"]:
+                    question["max_words"] = block["max_words"]
                 questions.append(question)
         
         return self._deduplicate_questions(sorted(questions, key=lambda x: x["id"]))
 
+    def _numbered_block_index(self) -> Dict[int, List[str]]:
+        """Every "n. text" block of the document, by question number
+
+        A block starts on a line beginning with the question number (optionally
+        followed by "." or ")") and runs on until a line that starts the next
+        question, an option label ("A)", "b.") or a section header. Blank lines
+        inside a block are kept; a line inside a block for n does not start
+        another block for n.
+
+        The document is scanned once for all question numbers instead of once
+        per question. The equivalent single regex needed nested quantifiers
+        that backtrack badly on malformed text.
+        """
+        if self._numbered_blocks is not None:
+            return self._numbered_blocks
+        
+        lines = self.text_full.split('\n')
+        blocks: Dict[int, List[str]] = {}
+        resume_at: Dict[int, int] = {}  # q_num -> first line not inside its last block
+        
+        for index, line in enumerate(lines):
+            head = NUMBERED_HEAD_PATTERN.match(line)
+            if not head:
+                continue
+            q_num = int(head.group(1))
+            if index < resume_at.get(q_num, 0):
+                continue
+            block, resume_at[q_num] = self._read_numbered_block(lines, index + 1, line[head.end():], q_num)
+            if block is not None:
+                blocks.setdefault(q_num, []).append(block)
+        
+        self._numbered_blocks = blocks
+        return blocks
+
+    def _read_numbered_block(self, lines: List[str], index: int, first_line: str,
+                             q_num: int) -> Tuple[Optional[str], int]:
+        """Read one block whose head line ends before lines[index]
+
+        Returns (block text or None at end of text, index after the block).
+        """
+        stop_pattern = re.compile(
+            rf'\s*(?:{q_num + 1}\s*[.\)]|[A-H]\s*[\)\.]|PART|Questions|PASSAGE|READING|WRITING)',
+            re.IGNORECASE
+        )
+        
+        # Text starts after the number, or on the next non-blank line
+        if not first_line.strip():
+            while index < len(lines) and not lines[index].strip():
+                index += 1
+            if index == len(lines):
+                return None, index
+            first_line = lines[index]
+            index += 1
+        block = [first_line]
+        
+        # Continuation lines (blank lines are only kept if more text follows)
+        pending_blank = []
+        while index < len(lines):
+            line = lines[index]
+            if not line.strip():
+                pending_blank.append(line)
+            elif stop_pattern.match(line):
+                break
+            else:
+                block.extend(pending_blank)
+                block.append(line)
+                pending_blank = []
+            index += 1
+        if index == len(lines):
+            block.extend(pending_blank)
+        
+        return '\n'.join(block), index
+
     def _extract_reading_passage_by_range(self, passage_num: int, q_start: int, q_end: int) -> Optional[Dict[str, Any]]:
         """DEPRECATED: Replaced by improved _extract_reading_section and _extract_all_reading_questions_by_range"""
         pass
@@ -376,70 +622,19 @@ class IELTSPDFConverter:
         pass
 
     def _determine_reading_question_type(self, text: str) -> str:
-        """Determine the type of reading question with improved accuracy"""
-        text_lower = text.lower()
-        
-        # TRUE/FALSE/NOT GIVEN - highest priority
-        if re.search(r'\bTRUE\b.*\bFALSE\b.*\bNOT\s+GIVEN\b', text_lower) or \
-           re.search(r'TRUE\s*(?:/|or)\s*FALSE\s*(?:/|or)\s*NOT\s*GIVEN', text_lower):
-            return "true_false_ng"
-        
-        # MATCHING - look for options A-H or I-VIII
-        if re.search(r'match.*?[A-H]|[A-H].*?match', text_lower, re.DOTALL) or \
-           re.search(r'Roman numerals|[I-V]{2,}|(?:^|\s)[A-H]\s+(?:has|is|was|provides|shows)', text_lower):
-            return "matching"
-        
-        # MULTIPLE CHOICE - look for A) B) C) or A. B. C. etc.
-        if re.search(r'[A-D]\s*[\)\.]\s+', text) or \
-           re.search(r'(?:choose|select|which|what).{0,50}[A-D]\s*[\)\.]\s+', text_lower):
-            return "multiple_choice"
-        
-        # HEADING MATCHING - specific for reading
-        if re.search(r'heading|correspond|match.*?heading', text_lower):
-            return "heading_matching"
-        
-        # SENTENCE COMPLETION / GAP FILL
-        if re.search(r'complete.*?sentence|fill.*?blank|gap|blank|incomplete|\.{3,}', text_lower):
-            return "gap_fill"
-        
-        # SUMMARY/NOTE COMPLETION
-        if re.search(r'complet.*?summar|complet.*?notes|note.{0,30}form|form.{0,30}blank', text_lower):
-            return "summary_completion"
-        
-        # SHORT ANSWER
-        if re.search(r'answer.*?question|short answer|answer.{0,30}word', text_lower):
-            return "short_answer"
-        
-        return "open_question"
+        """Determine the type of reading question (single scan, see question_classifier)"""
+        return classify_reading_question(text)
 
     def _determine_listening_question_type(self, text: str) -> str:
-        """Determine listening question type with improved accuracy"""
-        text_lower = text.lower()
-        
-        # MULTIPLE CHOICE - options A, B, C
-        if re.search(r'[A-C]\s*[\)\.]\s+[A-Z]', text) or \
-           re.search(r'which|what|who.{0,50}[A-C]\s*[\)\.]\s+', text_lower):
-            return "multiple_choice"
-        
-        # MATCHING
-        if re.search(r'match|[A-H]\s+(?:supports|provides|has)', text_lower):
-            return "matching"
-        
-        # GAP FILL - look for blanks/dots/underscores
-        if re.search(r'[…\.\-_]+|blank|fill|gap|complete', text_lower):
-            return "gap_fill"
-        
-        # TABLE/FORM COMPLETION
-        if re.search(r'table|form|fill.*?box|complet.*?table', text_lower):
-            return "form_completion"
-        
-        return "open_question"
+        """Determine listening question type (single scan, see question_classifier)"""
+        return classify_listening_question(text)
 
     def _extract_listening_section(self) -> Optional[Dict[str, Any]]:
         """Extract Listening section with 4 parts"""
         parts = []
         
         for part_num in range(1, 5):
+            self._check_budget("listening_parts")
             part = self._extract_listening_part(part_num)
             if part:
                 parts.append(part)
@@ -461,10 +656,10 @@ class IELTSPDFConverter:
     def _extract_listening_part(self, part_num: int) -> Optional[Dict[str, Any]]:
         """Extract a single listening part"""
         
-        # Find part header - try multiple patterns  
+        # Find part header using the profile's header rules
         part_patterns = [
-            rf'(?:^|\n)\s*PART\s+{part_num}(?:\s|:|\.)',
-            rf'(?:^|\n)\s*Part\s+{part_num}(?:\s|:|\.)',
+            pattern.format(part_num=part_num)
+            for pattern in self._ensure_profile().part_header_patterns
         ]
         
         part_match = None
@@ -494,29 +689,43 @@ class IELTSPDFConverter:
         
         part_section_text = self.text_full[part_start:part_end]
         
+        # Instruction blocks of this part: question numbers and word limits
+        part_blocks = self._ensure_instruction_index().within(part_start, part_end)
+        
         # For Part 1, extract table-based questions
         if part_num == 1:
-            questions = self._extract_listening_part1_table_questions(part_section_text)
+            questions = self._extract_listening_part1_table_questions(part_section_text, part_blocks)
         # For Part 4, extract note-based questions (use dot pattern like 31., 32., etc.)
         elif part_num == 4:
-            questions = self._extract_listening_part4_note_questions(part_section_text)
+            questions = self._extract_listening_part4_note_questions(part_section_text, part_blocks)
         else:
             # Parts 2 & 3: standard question extraction
-            questions = self._extract_listening_questions(part_section_text)
+            questions = self._extract_listening_questions(part_section_text, part_blocks)
         
         if not questions:
             return None
         
-        return {
+        part = {
             "part_number": part_num,
             "title": f"Part {part_num}",
             "questions": self._deduplicate_questions(sorted(questions, key=lambda x: x["id"])),
             "total_questions": len(questions),
             "description": self._extract_part_description(part_section_text)
         }
+        # Lists shared by a group of questions are stored once per part
+        option_pools = share_option_pools(part["questions"])
+        if option_pools:
+            part["option_pools"] = option_pools
+        return part
+
+    def _extract_listening_part1_table_questions(self, part_text: str,
+                                                 instruction_index: Optional[InstructionIndex] = None) -> List[Dict[str, Any]]:
+        """Extract Part 1 questions from table structure
 
-    def _extract_listening_part1_table_questions(self, part_text: str) -> List[Dict[str, Any]]:
-        """Extract Part 1 questions from table structure"""
+        Question numbers and word limits come from the part's instruction
+        blocks; without any, the profile's Part 1 window is used.
+        """
+        instruction_index = instruction_index or InstructionIndex([], {})
         questions = []
         
         # Part 1 has questions numbered 1-10 embedded in a data table
@@ -524,6 +733,7 @@ class IELTSPDFConverter:
         # The problem is they're in a table, so numbers are often preceded by description
         
         extracted_lines = {}  # Map question number to its text
+        part_first, part_last = instruction_index.question_range() or self._ensure_profile().listening_ranges[0]
         
         # Strategy: Find any line containing "digit ........" or "digit £" pattern
         # Look for patterns like: "garage has 1….", "3 £ ..", "4 … Road", etc.
@@ -539,8 +749,8 @@ class IELTSPDFConverter:
             except:
                 continue
             
-            # Only accept Part 1 questions (1-10)
-            if q_num < 1 or q_num > 10:
+            # Only accept Part 1 questions (usually 1-10)
+            if q_num < part_first or q_num > part_last:
                 continue
             
             # Skip if we already have this question
@@ -568,7 +778,7 @@ class IELTSPDFConverter:
                 extracted_lines[q_num] = cleaned
         
         # Second pass: If we're missing Q1-Q10, try alternative patterns
-        for q_num in range(1, 11):
+        for q_num in range(part_first, part_last + 1):
             if q_num not in extracted_lines:
                 # Try pattern: line containing the number followed by dots/blanks
                 alt_pattern = rf'(?:^|\n)[^\n]*?{q_num}\s*(?:[…\.\-£€$•][^\n]*)?'
@@ -593,12 +803,13 @@ class IELTSPDFConverter:
             if len(q_text.strip()) < 2:
                 continue
             
-            # All Part 1 questions are gap-fill
+            # All Part 1 questions are gap-fill; the word limit comes from
+            # their instruction block
             question = {
                 "id": q_num,
                 "text": q_text,
                 "type": "gap_fill",
-                "max_words": 2 if q_num <= 7 else 1,
+                "max_words": instruction_index.max_words(q_num),
                 "options": None
             }
             
@@ -606,13 +817,16 @@ class IELTSPDFConverter:
         
         return questions
 
-    def _extract_listening_part4_note_questions(self, part_text: str) -> List[Dict[str, Any]]:
+    def _extract_listening_part4_note_questions(self, part_text: str,
+                                                instruction_index: Optional[InstructionIndex] = None) -> List[Dict[str, Any]]:
         """Extract Part 4 questions from note-taking format (uses numbered dots like 31., 32., etc.)"""
+        instruction_index = instruction_index or InstructionIndex([], {})
         questions = []
         
         # Part 4 uses pattern: "31 ……………  (description)"
         # Look for: number + dots/blanks + optional context
         question_pattern = r'(\d+)\s*[…\.]+[^\n]*'
+        part_first, part_last = instruction_index.question_range() or self._ensure_profile().listening_ranges[3]
         
         for match in re.finditer(question_pattern, part_text):
             q_num_str = match.group(1)
@@ -621,8 +835,8 @@ class IELTSPDFConverter:
             except:
                 continue
             
-            # Part 4: Questions 31-40
-            if q_num < 31 or q_num > 40:
+            # Part 4: usually Questions 31-40
+            if q_num < part_first or q_num > part_last:
                 continue
             
             # Get full line context
@@ -656,7 +870,7 @@ class IELTSPDFConverter:
                 "id": q_num,
                 "text": q_text,
                 "type": "gap_fill",
-                "max_words": 1,  # Part 4 typically allows 1 word only
+                "max_words": instruction_index.max_words(q_num),
                 "options": None
             }
             
@@ -664,8 +878,10 @@ class IELTSPDFConverter:
         
         return questions
 
-    def _extract_listening_questions(self, part_text: str) -> List[Dict[str, Any]]:
+    def _extract_listening_questions(self, part_text: str,
+                                     instruction_index: Optional[InstructionIndex] = None) -> List[Dict[str, Any]]:
         """Extract listening questions from part text (Parts 2-3)"""
+        instruction_index = instruction_index or InstructionIndex([], {})
         questions = []
         
         # Pattern to find question numbers and their content
@@ -679,6 +895,7 @@ class IELTSPDFConverter:
         # - ((?:[^\n]*(?:\n(?!PART|Questions?|Choose|Answer|For|Select|\s*\d+\s+))?)*) : Content including multi-line
         #   but stops when next instruction/section starts
         question_pattern = r'(?:^|\n)\s*(\d+)\s+((?:[^\n]+(?:\n(?!\s*(?:PART|Questions?|Choose|Answer|For|Select|\s*\d+\s+))[^\n]+)?)*)'
+        part_first, part_last = instruction_index.question_range() or (1, 40)
         
         for match in re.finditer(question_pattern, part_text, re.MULTILINE | re.IGNORECASE):
             q_num_str = match.group(1)
@@ -687,8 +904,8 @@ class IELTSPDFConverter:
             except:
                 continue
             
-            # Validate reasonable question number for listening (1-40)
-            if q_num < 1 or q_num > 40:
+            # Validate question number against this part's range
+            if q_num < part_first or q_num > part_last:
                 continue
             
             q_text = match.group(2).strip()
@@ -703,8 +920,11 @@ class IELTSPDFConverter:
             
             q_text = self._clean_text(q_text)
             
-            # Determine question type
+            # Determine question type (the instruction block decides when the text cannot)
             q_type = self._determine_listening_question_type(q_text)
+            block = instruction_index.for_question(q_num)
+            if block and block["task"] and q_type == "open_question":
+                q_type = block["task"]
             
             # Extract options for multiple choice questions
             options = self._extract_multiple_choice_options(q_text)
@@ -715,26 +935,13 @@ class IELTSPDFConverter:
                 "type": q_type,
                 "options": options if options else None
             }
+            if block and block["max_words"]:
+                question["max_words"] = block["max_words"]
             
             questions.append(question)
         
         return questions
 
-    def _determine_listening_question_type(self, text: str) -> str:
-        """Determine listening question type"""
-        text_lower = text.lower()
-        
-        if re.search(r'[A-D]\s+', text):
-            return "multiple_choice"
-        
-        if re.search(r'match|matching', text_lower):
-            return "matching"
-        
-        if re.search(r'[…\.]|blank|gap|fill|complete', text_lower):
-            return "gap_fill"
-        
-        return "open_question"
-
     def _extract_writing_section(self) -> Optional[Dict[str, Any]]:
         """Extract Writing section with 2 tasks"""
         tasks = []
@@ -991,7 +1198,7 @@ class IELTSPDFConverter:
                         # These types should have options
                         if q_type in ["multiple_choice", "matching", "true_false_ng"]:
                             total_with_options_possible += 1
-                            if q.get("options"):
+                            if resolve_options(q, passage.get("option_pools")):
                                 questions_with_options += 1
             elif section.get("type") == "listening":
                 for part in section.get("parts", []):
@@ -1000,7 +1207,7 @@ class IELTSPDFConverter:
                         # Listening matching should have structured options
                         if q_type in ["multiple_choice", "matching"]:
                             total_with_options_possible += 1
-                            if q.get("options"):
+                            if resolve_options(q, part.get("option_pools")):
                                 questions_with_options += 1
         
         # Only score this if there are questions that should have options
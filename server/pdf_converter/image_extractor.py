@@ -0,0 +1,293 @@
+"""
+Embedded Image Extraction for IELTS PDFs
+Pulls Writing Task 1 charts and listening maps/diagrams out of the PDF,
+deduplicates them by xref and content hash, and writes normalized images plus
+thumbnails into uploads/material-images so they can fill image_placeholder_key
+slots without a manual upload.
+"""
+
+import hashlib
+import re
+from pathlib import Path
+from typing import Dict, List, Any, Tuple, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_OUTPUT_DIR = Path(__file__).resolve().parent.parent / "uploads" / "material-images" / "extracted"
+DEFAULT_URL_PREFIX = "/uploads/material-images/extracted"
+
+# Images smaller than this (in either dimension) are icons, bullets or logos
+MIN_IMAGE_SIDE = 120
+# An image drawn on more than this share of pages is a watermark or page decoration
+REPEATED_IMAGE_RATIO = 0.3
+THUMBNAIL_MAX_WIDTH = 320
+
+# Listening parts only get a visual slot when the part is a map/plan/diagram
+# labelling task ("Label the map below", "Look at the floor plan")
+LISTENING_VISUAL_PATTERN = re.compile(
+    r'\b(?:label|look\s+at|complete)\s+the\s+(?:map|(?:floor\s+)?plan|diagram)\b'
+    r'|\b(?:map|plan|diagram)\s+below\b',
+    re.IGNORECASE
+)
+
+# Section headings: PART headers only count inside listening (the speaking
+# section has parts 1-3 too) and TASK headers never inside speaking
+SECTION_HEADING_PATTERN = re.compile(r'(?:^|\n)\s*(LISTENING|READING|WRITING|SPEAKING)\b')
+LISTENING_PART_PATTERN = re.compile(r'(?:^|\n)\s*PART\s+([1-4])\b', re.IGNORECASE)
+WRITING_TASK_PATTERN = re.compile(r'(?:(?:^|\n)\s*|WRITING\s+)TASK\s+([12])\b', re.IGNORECASE)
+
+
+class ImageExtractor:
+    """Extracts and stores embedded raster images for visual question slots"""
+
+    def __init__(self, pdf_path: str, output_dir: Optional[str] = None,
+                 url_prefix: str = DEFAULT_URL_PREFIX):
+        self.pdf_path = pdf_path
+        self.output_dir = Path(output_dir) if output_dir else DEFAULT_OUTPUT_DIR
+        self.url_prefix = url_prefix.rstrip("/")
+        self.stats = {"images_seen": 0, "xref_duplicates": 0, "content_duplicates": 0,
+                      "written": 0, "reused": 0, "skipped": 0}
+
+    def extract(self, text_by_page: Optional[List[Dict[str, Any]]] = None) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Extract images for every visual slot.
+
+        Args:
+            text_by_page: Page texts already produced by the converter
+                          (avoids a second text pass when available)
+
+        Returns:
+            Mapping placeholder_key -> stored image records (largest first)
+        """
+        import fitz  # PyMuPDF
+
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        doc = fitz.open(self.pdf_path)
+        try:
+            if text_by_page is None:
+                text_by_page = [{"page": i + 1, "content": page.get_text()} for i, page in enumerate(doc)]
+
+            visual_pages = self._locate_visual_pages(text_by_page)
+            if not visual_pages:
+                return {}
+
+            repeated_xrefs = self._find_repeated_xrefs(doc)
+            stored_by_xref: Dict[int, Optional[Dict[str, Any]]] = {}
+            images_by_key: Dict[str, List[Dict[str, Any]]] = {}
+
+            for placeholder_key, page_numbers in visual_pages.items():
+                records = []
+                seen_hashes = set()
+                for page_number in page_numbers:
+                    for image_info in doc[page_number - 1].get_images(full=True):
+                        xref, smask = image_info[0], image_info[1]
+                        self.stats["images_seen"] += 1
+
+                        if xref in repeated_xrefs:
+                            self.stats["skipped"] += 1
+                            continue
+
+                        # The same xref is drawn on several pages: store it once
+                        if xref in stored_by_xref:
+                            self.stats["xref_duplicates"] += 1
+                            record = stored_by_xref[xref]
+                        else:
+                            record = self._store_image(doc, xref, smask)
+                            stored_by_xref[xref] = record
+
+                        if not record:
+                            continue
+                        if record["sha256"] in seen_hashes:
+                            # Another xref with the same pixels in this slot
+                            self.stats["content_duplicates"] += 1
+                            continue
+                        seen_hashes.add(record["sha256"])
+                        records.append(dict(record, page=page_number))
+
+                if records:
+                    records.sort(key=lambda r: r["width"] * r["height"], reverse=True)
+                    images_by_key[placeholder_key] = records
+
+            return images_by_key
+        finally:
+            doc.close()
+
+    def _locate_visual_pages(self, text_by_page: List[Dict[str, Any]]) -> Dict[str, List[int]]:
+        """
+        Map visual placeholder keys to the pages that belong to them.
+
+        Only pages of the listening and writing sections are scanned; a
+        document without section headings is treated as listening up to its
+        first writing task.
+        """
+        visual_pages: Dict[str, List[int]] = {}
+        section = None
+        current_key = None
+        current_is_visual = False
+
+        for page in text_by_page:
+            text = page.get("content", "")
+            markers = sorted(
+                [(m.start(1), "section", m.group(1).lower()) for m in SECTION_HEADING_PATTERN.finditer(text)]
+                + [(m.start(), "part", m.group(1)) for m in LISTENING_PART_PATTERN.finditer(text)]
+                + [(m.start(), "task", m.group(1)) for m in WRITING_TASK_PATTERN.finditer(text)]
+            )
+            headers = []
+            for position, kind, value in markers:
+                if kind == "section":
+                    # Pages after a heading belong to no slot until its first part or task
+                    section = value
+                    headers.append((position, None))
+                elif kind == "part" and section in (None, "listening"):
+                    section = "listening"
+                    headers.append((position, f"listening_part_{value}_visual"))
+                elif kind == "task" and section != "speaking":
+                    section = "writing"
+                    headers.append((position, f"writing_task_{value}_visual"))
+
+            for index, (position, key) in enumerate(headers):
+                current_key = key
+                if key is None:
+                    current_is_visual = False
+                    continue
+                # Stop at the next header so a later part's cues don't leak in
+                end = headers[index + 1][0] if index + 1 < len(headers) else len(text)
+                section_text = text[position:end]
+                if key.startswith("writing_task_"):
+                    # Only Task 1 describes a visual
+                    current_is_visual = key == "writing_task_1_visual"
+                else:
+                    current_is_visual = bool(LISTENING_VISUAL_PATTERN.search(section_text))
+                if current_is_visual:
+                    visual_pages.setdefault(current_key, []).append(page["page"])
+
+            if current_key and current_is_visual and not headers:
+                visual_pages.setdefault(current_key, []).append(page["page"])
+
+        return {key: sorted(set(pages)) for key, pages in visual_pages.items()}
+
+    def _find_repeated_xrefs(self, doc) -> set:
+        """Find images drawn on many pages (logos, watermarks, headers)"""
+        counts: Dict[int, int] = {}
+        for page in doc:
+            for xref in {info[0] for info in page.get_images(full=True)}:
+                counts[xref] = counts.get(xref, 0) + 1
+
+        threshold = max(2, int(len(doc) * REPEATED_IMAGE_RATIO))
+        return {xref for xref, count in counts.items() if count >= threshold}
+
+    def _store_image(self, doc, xref: int, smask: int) -> Optional[Dict[str, Any]]:
+        """Write one image and its thumbnail, reusing files already on disk"""
+        try:
+            raw = doc.extract_image(xref)
+        except Exception as e:
+            logger.warning(f"Could not read image xref {xref}: {e}")
+            self.stats["skipped"] += 1
+            return None
+
+        if not raw or min(raw.get("width", 0), raw.get("height", 0)) < MIN_IMAGE_SIDE:
+            self.stats["skipped"] += 1
+            return None
+
+        digest = hashlib.sha256(raw["image"]).hexdigest()
+        # JPEGs without a soft mask are kept byte-for-byte; everything else is
+        # normalized to PNG so the browser can render any PDF colorspace.
+        keep_original = raw.get("ext") in ("jpeg", "jpg") and not smask
+        ext = "jpg" if keep_original else "png"
+        file_name = f"{digest[:32]}.{ext}"
+        thumb_name = f"{digest[:32]}_thumb.png"
+        file_path = self.output_dir / file_name
+        thumb_path = self.output_dir / thumb_name
+
+        if file_path.exists() and thumb_path.exists():
+            # Same content was stored by an earlier conversion: no re-encode
+            self.stats["reused"] += 1
+        else:
+            pixmap = self._load_pixmap(doc, xref, smask)
+            if keep_original:
+                file_path.write_bytes(raw["image"])
+            else:
+                file_path.write_bytes(pixmap.tobytes("png"))
+            self._write_thumbnail(pixmap, thumb_path)
+            self.stats["written"] += 1
+
+        return {
+            "sha256": digest,
+            "xref": xref,
+            "width": raw["width"],
+            "height": raw["height"],
+            "file_name": file_name,
+            "file_path": str(file_path),
+            "file_url": f"{self.url_prefix}/{file_name}",
+            "thumbnail_url": f"{self.url_prefix}/{thumb_name}",
+            "file_size": file_path.stat().st_size,
+            "mime_type": "image/jpeg" if keep_original else "image/png",
+        }
+
+    def _load_pixmap(self, doc, xref: int, smask: int):
+        """Decode an image to RGB(A), applying its soft mask if present"""
+        import fitz  # PyMuPDF
+
+        pixmap = fitz.Pixmap(doc, xref)
+        if smask:
+            pixmap = fitz.Pixmap(pixmap, fitz.Pixmap(doc, smask))
+        if pixmap.colorspace and pixmap.colorspace.n not in (1, 3):
+            pixmap = fitz.Pixmap(fitz.csRGB, pixmap)
+        return pixmap
+
+    def _write_thumbnail(self, pixmap, thumb_path: Path) -> None:
+        import fitz  # PyMuPDF
+
+        thumb = fitz.Pixmap(pixmap, 0) if pixmap.alpha else fitz.Pixmap(pixmap)
+        factor = 0
+        while (thumb.width >> factor) > THUMBNAIL_MAX_WIDTH:
+            factor += 1
+        if factor:
+            thumb.shrink(factor)
+        thumb_path.write_bytes(thumb.tobytes("png"))
+
+
+def attach_images_to_test_data(test_data: Dict[str, Any],
+                               images_by_key: Dict[str, List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """
+    Fill image_placeholder_key slots in converter output.
+
+    The largest image of each slot becomes the node's image_url; all images
+    are returned for the result's "images" list.
+    """
+    assets = []
+
+    for section in test_data.get("sections", []):
+        if section.get("type") == "writing":
+            nodes = [(f"writing_task_{t.get('task_number')}_visual", t) for t in section.get("tasks", [])]
+        elif section.get("type") == "listening":
+            nodes = [(f"listening_part_{p.get('part_number')}_visual", p) for p in section.get("parts", [])]
+        else:
+            continue
+
+        for placeholder_key, node in nodes:
+            images = images_by_key.get(placeholder_key)
+            if not images:
+                continue
+            node["image_placeholder_key"] = placeholder_key
+            node["image_url"] = images[0]["file_url"]
+            node["thumbnail_url"] = images[0]["thumbnail_url"]
+            for index, image in enumerate(images):
+                assets.append(dict(image, placeholder_key=placeholder_key if index == 0 else f"{placeholder_key}_{index + 1}"))
+
+    return assets
+
+
+def extract_images_for_test(pdf_path: str, test_data: Dict[str, Any],
+                            text_by_page: Optional[List[Dict[str, Any]]] = None,
+                            output_dir: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Dict[str, int]]:
+    """
+    Main function to extract visuals for a converted test
+
+    Returns:
+        (image assets, extraction stats)
+    """
+    extractor = ImageExtractor(pdf_path, output_dir)
+    images_by_key = extractor.extract(text_by_page)
+    return attach_images_to_test_data(test_data, images_by_key), extractor.stats
@@ -0,0 +1,129 @@
+"""
+Import-Time Budget Check for the Node Entry Point
+Node spawns node_interface.py once per upload, so every module imported at
+startup is paid on every conversion. This check runs `python -X importtime`
+in fresh interpreters and fails when:
+
+- importing node_interface pulls in a module that should stay lazy
+  (PyMuPDF, either converter, the validator, the inserter, the process pool)
+- importing node_interface, or loading the selected converter, takes longer
+  than its budget (PyMuPDF's own import time is excluded; it is not ours)
+
+Usage:
+    python import_budget.py                # exit 1 when over budget
+    python import_budget.py --runs 10 --startup-budget-ms 30 --converter-budget-ms 120
+"""
+
+import argparse
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Any, Tuple
+
+PACKAGE_DIR = Path(__file__).resolve().parent
+
+# Budgets in milliseconds (best of several runs)
+DEFAULT_STARTUP_BUDGET_MS = 40
+DEFAULT_CONVERTER_BUDGET_MS = 120
+DEFAULT_RUNS = 5
+
+STARTUP_CODE = "import node_interface"
+CONVERTER_CODE = "import node_interface; node_interface.load_converter()"
+
+# Modules that must not be imported before a conversion starts
+LAZY_MODULES = (
+    "fitz",
+    "ielts_pdf_converter",
+    "ielts_pdf_converter_v4",
+    "json_validator",
+    "database_inserter",
+    "concurrent.futures",
+    "multiprocessing",
+    "sqlite3",
+)
+EXCLUDED_SUBTREES = ("fitz", "pymupdf")
+
+
+def parse_importtime(stderr: str) -> List[Tuple[int, str, int, int]]:
+    """(depth, module, self_us, cumulative_us) for every importtime line"""
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        # "import time:       516 |      82628 |   json.decoder"
+        head, cumulative_us, name = line.split("|", 2)
+        self_us = head[len("import time:"):]
+        depth = (len(name) - len(name.lstrip(" ")) - 1) // 2
+        entries.append((depth, name.strip(), int(self_us), int(cumulative_us)))
+    return entries
+
+
+def measure(code: str) -> Dict[str, Any]:
+    """Import time of one statement in a fresh interpreter"""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=str(PACKAGE_DIR), capture_output=True, text=True,
+    )
+    entries = parse_importtime(completed.stderr)
+    # Interpreter startup (encodings, site, ...) is listed first; count from node_interface on
+    first = next((index for index, entry in enumerate(entries) if entry[1] == "node_interface"), len(entries))
+    entries = entries[first:]
+    total_us = sum(cumulative for depth, _, _, cumulative in entries if depth == 0)
+    excluded_us = sum(
+        cumulative for _, name, _, cumulative in entries
+        if name in EXCLUDED_SUBTREES
+    )
+    return {
+        "ok": completed.returncode == 0,
+        "error": completed.stderr.strip().splitlines()[-1] if completed.returncode else None,
+        "modules": {name for _, name, _, _ in entries},
+        "own_ms": (total_us - excluded_us) / 1000,
+        "total_ms": total_us / 1000,
+    }
+
+
+def best_of(code: str, runs: int) -> Dict[str, Any]:
+    results = [measure(code) for _ in range(runs)]
+    return min(results, key=lambda result: result["own_ms"])
+
+
+def check(runs: int, startup_budget_ms: float, converter_budget_ms: float) -> List[str]:
+    """Return the budget violations (empty when everything is within budget)"""
+    problems = []
+
+    startup = best_of(STARTUP_CODE, runs)
+    eager = sorted(
+        module for module in startup["modules"]
+        if any(module == lazy or module.startswith(lazy + ".") for lazy in LAZY_MODULES)
+    )
+    print(f"startup:   {startup['own_ms']:.1f} ms (budget {startup_budget_ms:g} ms)")
+    if eager:
+        problems.append(f"node_interface imports lazy modules at startup: {', '.join(eager)}")
+    if startup["own_ms"] > startup_budget_ms:
+        problems.append(f"node_interface import takes {startup['own_ms']:.1f} ms > {startup_budget_ms:g} ms")
+
+    converter = best_of(CONVERTER_CODE, runs)
+    if not converter["ok"]:
+        # PyMuPDF missing: the converter cannot be loaded here, nothing to time
+        print(f"converter: not measured ({converter['error']})")
+        return problems
+    print(f"converter: {converter['own_ms']:.1f} ms without PyMuPDF, "
+          f"{converter['total_ms']:.1f} ms total (budget {converter_budget_ms:g} ms)")
+    if "ielts_pdf_converter" in converter["modules"] and "ielts_pdf_converter_v4" in converter["modules"]:
+        problems.append("v3 converter imported although v4 is available")
+    if converter["own_ms"] > converter_budget_ms:
+        problems.append(f"converter load takes {converter['own_ms']:.1f} ms > {converter_budget_ms:g} ms")
+    return problems
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check the import-time budget of node_interface.py")
+    parser.add_argument("--runs", type=int, default=DEFAULT_RUNS)
+    parser.add_argument("--startup-budget-ms", type=float, default=DEFAULT_STARTUP_BUDGET_MS)
+    parser.add_argument("--converter-budget-ms", type=float, default=DEFAULT_CONVERTER_BUDGET_MS)
+    args = parser.parse_args()
+
+    problems = check(args.runs, args.startup_budget_ms, args.converter_budget_ms)
+    for problem in problems:
+        print(f"FAIL: {problem}")
+    sys.exit(1 if problems else 0)
@@ -0,0 +1,287 @@
+"""
+Incremental Re-conversion for IELTS PDFs
+Persists per-page text hashes and per-section page ranges alongside each
+conversion result. When the same document is uploaded again, only the
+section extractors whose page ranges contain a changed page are re-run;
+their output is spliced into the previous result.
+
+Pages are compared by their extracted text, read through the same span
+table (and layout fingerprint) as a full conversion, so changes that only
+live in page resources (Form XObjects, fonts) are still seen.
+
+Section ranges come from section header positions. Extractors also read
+indexes built over the whole text (the instruction blocks and passage ranges,
+the numbered question blocks, the layout profile), so each section's inputs
+from those indexes are hashed too, and a section is re-run when they change
+even if none of its pages did. A change in page count or in where a section
+starts falls back to a full parse.
+"""
+
+import copy
+import hashlib
+import json
+import os
+import re
+from pathlib import Path
+from typing import Dict, List, Any, Tuple, Optional
+import logging
+
+from conversion_budget import ConversionBudget
+from ielts_pdf_converter_v4 import IELTSPDFConverter, SECTION_EXTRACTORS
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = Path(__file__).resolve().parent.parent / "data" / "conversions"
+# Raised when the result layout changes (2: option pools, 3: passage
+# paragraphs, 4: page hashes over extracted text, 5: paragraph_spans,
+# 6: section input hashes), so older results are converted afresh instead of
+# being reused or spliced into
+MANIFEST_VERSION = 6
+
+# Where each section starts in the text. A section spans from its start to the
+# start of the next section found in the document.
+SECTION_START_PATTERNS = {
+    "listening": r'(?:^|\n)\s*PART\s+1(?:\s|:|\.)',
+    "reading": r'(?:^|\n)\s*READING\b',
+    "writing": r'(?:WRITING\s+)?TASK\s+1\b',
+    "speaking": r'SPEAKING',
+}
+
+# Multer stores uploads as "<timestamp>_<uuid>_<original name>"
+UPLOAD_PREFIX_PATTERN = re.compile(r'^\d+_[0-9a-fA-F-]{36}_')
+
+
+def section_type_for(method_name: str) -> str:
+    """'_extract_reading_section' -> 'reading'"""
+    return method_name.split("_")[2]
+
+
+def default_document_key(pdf_path: str) -> str:
+    """Identify re-uploads of the same document by their original file name"""
+    return UPLOAD_PREFIX_PATTERN.sub("", os.path.basename(pdf_path))
+
+
+class IncrementalConverter:
+    """Re-converts a document by reusing the previous conversion where possible"""
+
+    def __init__(self, pdf_path: str, document_key: Optional[str] = None,
+                 cache_dir: Optional[str] = None, budget: Optional[ConversionBudget] = None):
+        self.pdf_path = pdf_path
+        self.document_key = document_key or default_document_key(pdf_path)
+        self.cache_dir = Path(cache_dir) if cache_dir else DEFAULT_CACHE_DIR
+        self.converter = IELTSPDFConverter(pdf_path, budget=budget)
+        self.stats = {"changed_pages": [], "reextracted_sections": [], "mode": "full"}
+
+    @property
+    def text_by_page(self) -> List[Dict[str, Any]]:
+        return self.converter.text_by_page
+
+    @property
+    def manifest_path(self) -> Path:
+        digest = hashlib.sha1(self.document_key.encode("utf-8")).hexdigest()[:16]
+        return self.cache_dir / f"{digest}.json"
+
+    def convert(self) -> Tuple[Dict[str, Any], float]:
+        """Convert PDF to structured test JSON, reusing unchanged work"""
+        previous = self._load_manifest()
+        page_hashes, changed_pages = self._read_pages(previous)
+
+        converter = self.converter
+        section_spans = self._compute_section_spans()
+        section_ranges = self._compute_section_ranges(section_spans)
+
+        reusable = (
+            previous is not None
+            and len(previous["page_hashes"]) == len(page_hashes)
+            and previous["section_ranges"] == section_ranges
+        )
+
+        if not reusable:
+            test_data = converter._parse_ielts_structure()
+            section_inputs = self._compute_section_inputs(section_spans)
+        elif not changed_pages:
+            self.stats["mode"] = "unchanged"
+            test_data = copy.deepcopy(previous["test_data"])
+            section_inputs = previous["section_inputs"]
+        else:
+            self.stats["mode"] = "incremental"
+            section_inputs = self._compute_section_inputs(section_spans)
+            test_data = self._splice_sections(previous["test_data"], section_ranges, changed_pages,
+                                              previous["section_inputs"], section_inputs)
+
+        test_data["metadata"]["source"] = self.pdf_path
+        test_data["metadata"]["instruction_blocks"] = converter._ensure_instruction_index().to_list()
+        test_data["test_info"]["title"] = converter._extract_test_title()
+        converter._update_test_info(test_data)
+        confidence = converter._calculate_confidence(test_data)
+
+        self.stats["changed_pages"] = changed_pages
+        if converter.incomplete_sections:
+            # Never cache a result cut off by the budget
+            converter._record_budget(test_data)
+        else:
+            self._save_manifest(page_hashes, section_ranges, section_inputs, test_data)
+
+        result = copy.deepcopy(test_data)
+        result["metadata"]["incremental"] = self.stats
+        return result, confidence
+
+    def _read_pages(self, previous: Optional[Dict[str, Any]]) -> Tuple[List[str], List[int]]:
+        """
+        Extract the text as a full conversion does and hash every page's text.
+
+        The span table is cached per file, so a re-run on the same PDF does
+        not go through PyMuPDF again.
+        """
+        self.converter._extract_text()
+        previous_hashes = previous["page_hashes"] if previous else []
+        page_hashes = []
+        changed_pages = []
+
+        for page in self.converter.text_by_page:
+            digest = hashlib.sha1(page["content"].encode("utf-8")).hexdigest()
+            page_hashes.append(digest)
+            index = page["page"] - 1
+            if index >= len(previous_hashes) or previous_hashes[index] != digest:
+                changed_pages.append(page["page"])
+
+        return page_hashes, changed_pages
+
+    def _compute_section_spans(self) -> Dict[str, Optional[Tuple[int, int]]]:
+        """Map each section type to its (start, end) character span in text_full"""
+        text_full = self.converter.text_full
+        starts = []
+        for section_type, pattern in SECTION_START_PATTERNS.items():
+            match = re.search(pattern, text_full, re.IGNORECASE)
+            if match:
+                starts.append((match.start(), section_type))
+        starts.sort()
+
+        spans: Dict[str, Optional[Tuple[int, int]]] = {section_type: None for section_type in SECTION_START_PATTERNS}
+        for index, (start, section_type) in enumerate(starts):
+            end = starts[index + 1][0] if index + 1 < len(starts) else len(text_full)
+            spans[section_type] = (start, end)
+        return spans
+
+    def _compute_section_inputs(self, section_spans: Dict[str, Optional[Tuple[int, int]]]) -> Dict[str, str]:
+        """
+        Hash what each section's extractor reads from the whole-text indexes:
+        the layout profile, the instruction blocks inside the section and, for
+        reading, the passage ranges and every numbered question block (reading
+        picks among the blocks of each question number across the document).
+        Block offsets are left out; they move with any edit before them.
+        """
+        converter = self.converter
+        instruction_index = converter._ensure_instruction_index()
+        profile = converter._ensure_profile().name
+        inputs = {}
+        for section_type, span in section_spans.items():
+            parts: Dict[str, Any] = {
+                "profile": profile,
+                "instruction_blocks": instruction_index.within(*span).to_list() if span else [],
+            }
+            if section_type == "reading":
+                parts["passage_ranges"] = sorted(instruction_index.passage_ranges.items())
+                parts["numbered_blocks"] = sorted(converter._numbered_block_index().items())
+            encoded = json.dumps(parts, ensure_ascii=False, sort_keys=True).encode("utf-8")
+            inputs[section_type] = hashlib.sha1(encoded).hexdigest()
+        return inputs
+
+    def _compute_section_ranges(self, section_spans: Dict[str, Optional[Tuple[int, int]]]
+                                ) -> Dict[str, Optional[List[int]]]:
+        """Map each section type to its [first_page, last_page] range"""
+        # Character offset where each page starts in text_full ("\n" joined)
+        page_starts = []
+        offset = 0
+        for page in self.converter.text_by_page:
+            page_starts.append(offset)
+            offset += len(page["content"]) + 1
+
+        def page_at(char_offset: int) -> int:
+            page = 1
+            for index, start in enumerate(page_starts):
+                if start > char_offset:
+                    break
+                page = index + 1
+            return page
+
+        total_pages = len(self.converter.text_by_page)
+        ranges: Dict[str, Optional[List[int]]] = {}
+        for section_type, span in section_spans.items():
+            if span is None:
+                ranges[section_type] = None
+            else:
+                last_page = page_at(span[1]) if span[1] < len(self.converter.text_full) else total_pages
+                ranges[section_type] = [page_at(span[0]), last_page]
+        return ranges
+
+    def _splice_sections(self, previous_data: Dict[str, Any],
+                         section_ranges: Dict[str, Optional[List[int]]],
+                         changed_pages: List[int], previous_inputs: Dict[str, str],
+                         section_inputs: Dict[str, str]) -> Dict[str, Any]:
+        """Re-run only the affected extractors and splice them into the old result"""
+        test_data = copy.deepcopy(previous_data)
+        previous_sections = {section.get("type"): section for section in test_data["sections"]}
+        sections = []
+
+        for method_name in SECTION_EXTRACTORS:
+            section_type = section_type_for(method_name)
+            page_range = section_ranges.get(section_type)
+            # A section without a detected range is re-run to stay safe
+            affected = (
+                page_range is None
+                or any(page_range[0] <= page <= page_range[1] for page in changed_pages)
+                or previous_inputs.get(section_type) != section_inputs.get(section_type)
+            )
+
+            if affected:
+                section = self.converter._run_section(method_name)
+                self.stats["reextracted_sections"].append(section_type)
+            else:
+                section = previous_sections.get(section_type)
+
+            if section:
+                sections.append(section)
+
+        test_data["sections"] = sections
+        return test_data
+
+    def _load_manifest(self) -> Optional[Dict[str, Any]]:
+        if not self.manifest_path.exists():
+            return None
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable conversion manifest: {e}")
+            return None
+        if manifest.get("version") != MANIFEST_VERSION:
+            return None
+        return manifest
+
+    def _save_manifest(self, page_hashes: List[str], section_ranges: Dict[str, Optional[List[int]]],
+                       section_inputs: Dict[str, str], test_data: Dict[str, Any]) -> None:
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        manifest = {
+            "version": MANIFEST_VERSION,
+            "document_key": self.document_key,
+            "page_hashes": page_hashes,
+            "section_ranges": section_ranges,
+            "section_inputs": section_inputs,
+            "test_data": test_data,
+        }
+        tmp_path = self.manifest_path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, self.manifest_path)
+
+
+def convert_incrementally(pdf_path: str, document_key: Optional[str] = None,
+                          cache_dir: Optional[str] = None) -> Tuple[Dict[str, Any], float]:
+    """
+    Main function for incremental conversion
+
+    Returns:
+        (test_data, confidence) - test_data.metadata.incremental describes what was reused
+    """
+    return IncrementalConverter(pdf_path, document_key, cache_dir).convert()
@@ -0,0 +1,216 @@
+"""
+Instruction-Block Index for IELTS Question Pages
+Every group of questions is introduced by an instruction block:
+
+    Questions 14-20
+    Complete the notes below.
+    Write NO MORE THAN TWO WORDS AND/OR A NUMBER for each answer.
+
+One pass over the document text finds every block and records its question
+range, task kind, word limit and option set. The extractors look questions
+up here instead of assuming fixed ranges (1-13, 14-26, 27-40) and guessing
+word limits, so books that split their questions differently still parse.
+"""
+
+import re
+from typing import Dict, List, Any, Tuple, Optional
+
+# One pass over the whole text; every alternative is anchored on a keyword, so
+# the regex engine skips ordinary text in C. Word limits and judgement answers
+# are upper case in every IELTS paper; the other cues are case-insensitive.
+TOKEN_PATTERN = re.compile(
+    r'\b(?i:questions?)\s+(?P<q_start>\d{1,2})(?:\s*(?:[-–—]|to|and)\s*(?P<q_end>\d{1,2}))?\b'
+    r'|(?:NO\s+MORE\s+THAN\s+|ONLY\s+)?(?P<limit>ONE|TWO|THREE|FOUR)\s+WORDS?'
+    r'(?P<with_number>\s+AND\/OR\s+A\s+NUMBER)?'
+    r'|\b(?P<judgement>TRUE|YES)\b'
+    r'|(?P<letter_range>\b[A-L]\s*[-–]\s*[A-L])\b'
+    r'|(?P<letter_list>\bA,\s*B(?:,\s*[C-K])*,?\s+(?:or|and)\s+[C-L])\b'
+    r'|(?P<roman_range>\bi\s*[-–]\s*[ivx]{1,5})\b'
+    r'|(?P<task>(?i:complete\s+the\s+(?:summary|notes|table|form|sentences|flow[- ]?chart|diagram|timetable)'
+    r'|label\s+the\s+(?:map|plan|diagram)|choose\s+the\s+correct\s+letter|choose\s+(?:two|three)\s+letters'
+    r'|list\s+of\s+headings|correct\s+heading|from\s+the\s+box|which\s+paragraph|match\s+each|classify'
+    r'|answer\s+the\s+questions?))\b'
+)
+# "Questions 1-13, which are based on Reading Passage 1"
+PASSAGE_SUFFIX = re.compile(
+    r'\s*,?\s*which\s+(?:are|is)\s+based\s+on\s+Reading\s+Passage\s+(\d)', re.IGNORECASE
+)
+
+# A section or part heading between two equal headers means the second one
+# starts a new block (listening Part 1 and Reading Passage 1 both have
+# "Questions 1-5"); without one it is the same header repeated on a new page
+SECTION_HEADING = re.compile(
+    r'^[ \t]*(?:PART\s+[1-4]|SECTION\s+[1-4]|READING(?:\s+PASSAGE\s+\d)?|LISTENING|WRITING)\b',
+    re.IGNORECASE | re.MULTILINE
+)
+
+# Cues only count this close to their header, so passage or question text
+# further down ("a number of ...", "two words") never rewrites the block.
+INSTRUCTION_WINDOW = 400
+
+WORD_NUMBERS = {"ONE": 1, "TWO": 2, "THREE": 3, "FOUR": 4}
+ROMAN_NUMERALS = ["i", "ii", "iii", "iv", "v", "vi", "vii", "viii", "ix", "x",
+                  "xi", "xii", "xiii", "xiv", "xv"]
+JUDGEMENT_OPTIONS = {
+    "TRUE": ["TRUE", "FALSE", "NOT GIVEN"],
+    "YES": ["YES", "NO", "NOT GIVEN"],
+}
+
+# Task phrase (lower case, first words) -> task kind, in the question type
+# vocabulary of question_classifier
+TASK_KINDS = (
+    ("complete the summary", "summary_completion"),
+    ("complete the notes", "summary_completion"),
+    ("complete the", "gap_fill"),
+    ("label the", "gap_fill"),
+    ("choose the correct letter", "multiple_choice"),
+    ("choose two", "multiple_choice"),
+    ("choose three", "multiple_choice"),
+    ("list of headings", "heading_matching"),
+    ("correct heading", "heading_matching"),
+    ("from the box", "matching"),
+    ("which paragraph", "matching"),
+    ("match each", "matching"),
+    ("classify", "matching"),
+    ("answer the question", "short_answer"),
+)
+# When one block carries several task cues, the most specific wins
+TASK_PRIORITY = ["true_false_ng", "heading_matching", "matching", "multiple_choice",
+                 "summary_completion", "gap_fill", "short_answer"]
+
+
+def _letters(first: str, last: str) -> List[str]:
+    return [chr(code) for code in range(ord(first), ord(last) + 1)]
+
+
+def _task_kind(phrase: str) -> str:
+    phrase = " ".join(phrase.lower().split())
+    return next(kind for prefix, kind in TASK_KINDS if phrase.startswith(prefix))
+
+
+class InstructionIndex:
+    """Instruction blocks of one document, looked up by question number"""
+
+    def __init__(self, blocks: List[Dict[str, Any]], passage_ranges: Dict[int, Tuple[int, int]]):
+        # [{'q_start', 'q_end', 'task', 'max_words', 'numbers_allowed', 'options',
+        #   'choose', 'offsets'}, ...] sorted by q_start. One block per header
+        # occurrence: listening and reading both have a "Questions 1-5".
+        self.blocks = blocks
+        # Reading passage number -> (q_start, q_end) from "... based on Reading Passage n"
+        self.passage_ranges = passage_ranges
+        self._by_question: Dict[int, Dict[str, Any]] = {}
+        # Narrow blocks win over wide ones ("Questions 1-10" overview vs "Questions 8-10"),
+        # and of two equal ranges the first one, which carries the instructions
+        for block in sorted(blocks, key=lambda b: (b["q_end"] - b["q_start"], b["offsets"][0]), reverse=True):
+            for q_num in range(block["q_start"], block["q_end"] + 1):
+                self._by_question[q_num] = block
+
+    def for_question(self, q_num: int) -> Optional[Dict[str, Any]]:
+        return self._by_question.get(q_num)
+
+    def max_words(self, q_num: int) -> Optional[int]:
+        block = self._by_question.get(q_num)
+        return block["max_words"] if block else None
+
+    def within(self, start: int, end: int) -> "InstructionIndex":
+        """Blocks whose header lies in text[start:end] (one section or part)
+
+        Listening and reading both number their questions from 1, so lookups
+        are made on the blocks of the section being extracted.
+        """
+        inside = [block for block in self.blocks if start <= block["offsets"][0] < end]
+        return InstructionIndex(inside, self.passage_ranges)
+
+    def question_range(self) -> Optional[Tuple[int, int]]:
+        """Lowest and highest question number covered by the blocks"""
+        if not self.blocks:
+            return None
+        return min(b["q_start"] for b in self.blocks), max(b["q_end"] for b in self.blocks)
+
+    def to_list(self) -> List[Dict[str, Any]]:
+        """Blocks for result metadata (without text offsets)"""
+        return [
+            {key: value for key, value in block.items() if key != "offsets"}
+            for block in self.blocks
+        ]
+
+
+def build_index(text: str) -> InstructionIndex:
+    """Index every instruction block in the text with one scan"""
+    text = text or ""
+    blocks: List[Dict[str, Any]] = []
+    passage_ranges: Dict[int, Tuple[int, int]] = {}
+    current = None
+    window_end = 0
+
+    for token in TOKEN_PATTERN.finditer(text):
+        kind = token.lastgroup
+        start, end = token.span()
+
+        if kind in ("q_start", "q_end"):
+            q_start = int(token.group("q_start"))
+            q_end = int(token.group("q_end") or q_start)
+            suffix = PASSAGE_SUFFIX.match(text, end)
+            if suffix:
+                passage_ranges.setdefault(int(suffix.group(1)), (q_start, q_end))
+                continue
+            # A header starts its line; "next to questions 15-20" is a reference
+            line_start = text.rfind("\n", 0, start) + 1
+            if text[line_start:start].strip() or not 0 < q_start <= q_end <= 40:
+                continue
+            # A header repeated right after its block (on a new page) continues
+            # it; the same range after another header or a section heading is
+            # a new block
+            if current is None or (current["q_start"], current["q_end"]) != (q_start, q_end) \
+                    or SECTION_HEADING.search(text, current["offsets"][-1] + 1, start):
+                current = {
+                    "q_start": q_start,
+                    "q_end": q_end,
+                    "task": None,
+                    "max_words": None,
+                    "numbers_allowed": False,
+                    "options": None,
+                    "choose": 1,
+                    "offsets": [],
+                }
+                blocks.append(current)
+            current["offsets"].append(start)
+            window_end = end + INSTRUCTION_WINDOW
+            continue
+
+        if current is None or start > window_end:
+            continue
+
+        if kind in ("limit", "with_number"):
+            if current["max_words"] is None:
+                current["max_words"] = WORD_NUMBERS[token.group("limit")]
+                current["numbers_allowed"] = bool(token.group("with_number"))
+        elif kind == "judgement":
+            current["task"] = "true_false_ng"
+            current["options"] = JUDGEMENT_OPTIONS[token.group(kind)]
+        elif kind == "letter_range" and current["options"] is None:
+            letters = re.findall(r'[A-L]', token.group(kind))
+            current["options"] = _letters(letters[0], letters[-1])
+        elif kind == "letter_list" and current["options"] is None:
+            current["options"] = _letters("A", token.group(kind)[-1])
+        elif kind == "roman_range" and current["options"] is None:
+            last = re.split(r'\s*[-–]\s*', token.group(kind))[-1]
+            if last in ROMAN_NUMERALS:
+                current["options"] = ROMAN_NUMERALS[:ROMAN_NUMERALS.index(last) + 1]
+        elif kind == "task":
+            phrase = token.group(kind)
+            task = _task_kind(phrase)
+            if current["task"] is None or TASK_PRIORITY.index(task) < TASK_PRIORITY.index(current["task"]):
+                current["task"] = task
+            words = phrase.lower().split()
+            if words[0] == "choose" and words[1] in ("two", "three"):
+                current["choose"] = WORD_NUMBERS[words[1].upper()]
+
+    # Labelled maps and plans with letter options are matching tasks
+    for block in blocks:
+        if block["task"] == "gap_fill" and block["options"] and block["max_words"] is None:
+            block["task"] = "matching"
+
+    ordered = sorted(blocks, key=lambda b: (b["q_start"], b["q_end"], b["offsets"][0]))
+    return InstructionIndex(ordered, passage_ranges)
+
@@ -0,0 +1,400 @@
+"""
+Item Statistics Engine for IELTS Listening/Reading Questions
+Keeps running per-question aggregates (facility, discrimination, distractor
+frequency) for every (material set, section, question) and updates them
+incrementally from participant_answers rows changed since the last run.
+
+Answers are upserted (a corrected or resubmitted answer keeps its row id), so
+the engine follows participant_answers.updated_at rather than the id, and it
+remembers each participant's answers: applying a row again is a no-op, and a
+changed answer replaces the old one in every aggregate. Node feeds it with
+scripts/updateItemStatistics.js.
+"""
+
+import json
+import math
+import os
+import re
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Iterable
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STATE_PATH = Path(__file__).resolve().parent.parent / "data" / "item_statistics.json"
+
+# Rows are read in (updated_at, id) order from a cursor. Each run starts this
+# far before the stored watermark, so rows whose transaction committed after
+# a later row was read are still seen; re-reading a row changes nothing.
+REREAD_SECONDS = 60
+WATERMARK_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
+
+# Distinct answers tracked per question before the rest fall into "other".
+# Gap-fill questions can produce hundreds of unique spellings.
+MAX_DISTRACTORS = 24
+OTHER_BUCKET = "__other__"
+BLANK_BUCKET = ""
+
+# Thresholds used to flag questions that look broken after an exam
+FLAG_RULES = {
+    "min_responses": 10,
+    "low_facility": 0.10,
+    "high_facility": 0.98,
+    "min_discrimination": 0.0,
+}
+
+# Mirrors normalizeAnswer() in utils/scoreCalculator.js
+ANSWER_ALIASES = {
+    "TRUE": "T",
+    "FALSE": "F",
+    "NOT GIVEN": "NG",
+    "YES": "Y",
+    "NO": "N",
+}
+
+
+def normalize_answer(answer: Any) -> str:
+    """Normalize a user answer the same way the scorer does"""
+    if answer is None:
+        return ""
+    normalized = re.sub(r'\s+', ' ', str(answer).strip().upper())
+    return ANSWER_ALIASES.get(normalized, normalized)
+
+
+class ItemStatisticsEngine:
+    """Maintains incremental item statistics across sessions"""
+
+    # 2: updated_at watermark and per-participant answers (version 1 state is rebuilt)
+    STATE_VERSION = 2
+
+    def __init__(self, state_path: Optional[str] = None):
+        self.state_path = Path(state_path) if state_path else DEFAULT_STATE_PATH
+        # Latest (updated_at, id) applied
+        self.watermark = {"updated_at": "", "id": 0}
+        # "set|section|question" -> running aggregates
+        self.items: Dict[str, Dict[str, Any]] = {}
+        # "set|section|participant" -> score contribution and normalized answers of that participant
+        self.participants: Dict[str, Dict[str, Any]] = {}
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def load(self) -> "ItemStatisticsEngine":
+        """Load persisted aggregates if a state file exists"""
+        if not self.state_path.exists():
+            return self
+
+        with open(self.state_path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+
+        if state.get("version") != self.STATE_VERSION:
+            logger.warning("Ignoring item statistics state with unknown version")
+            return self
+
+        self.watermark = state.get("watermark") or self.watermark
+        self.items = state.get("items", {})
+        self.participants = {
+            key: {"answered": int(p["answered"], 16), "correct": int(p["correct"], 16), "total": p["total"],
+                  "answers": p.get("answers", {})}
+            for key, p in state.get("participants", {}).items()
+        }
+        return self
+
+    def save(self) -> None:
+        """Persist aggregates atomically (write temp file, then rename)"""
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        state = {
+            "version": self.STATE_VERSION,
+            "watermark": self.watermark,
+            "items": self.items,
+            # Bitmasks are stored as hex so the file stays compact
+            "participants": {
+                key: {"answered": format(p["answered"], "x"), "correct": format(p["correct"], "x"), "total": p["total"],
+                      "answers": p["answers"]}
+                for key, p in self.participants.items()
+            },
+        }
+        tmp_path = self.state_path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f, separators=(",", ":"))
+        os.replace(tmp_path, self.state_path)
+
+    # ------------------------------------------------------------------
+    # Incremental update
+    # ------------------------------------------------------------------
+
+    def resume_cursor(self) -> Dict[str, Any]:
+        """Where the next run starts reading: REREAD_SECONDS before the watermark"""
+        if not self.watermark["updated_at"]:
+            return {"updated_at": "1970-01-01 00:00:00.000000", "id": 0}
+        resume = datetime.strptime(self.watermark["updated_at"], WATERMARK_FORMAT) - timedelta(seconds=REREAD_SECONDS)
+        return {"updated_at": resume.strftime(WATERMARK_FORMAT), "id": 0}
+
+    def update(self, rows: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Fold participant_answers rows into the aggregates.
+
+        Rows carry updated_at (WATERMARK_FORMAT). A row equal to what was
+        already applied for that participant and question changes nothing,
+        so overlapping batches are harmless.
+
+        Returns:
+            Summary with the number of answers changed and the new watermark
+        """
+        # Group rows by participant so each participant's section total
+        # is adjusted once per batch rather than once per answer.
+        grouped: Dict[str, List[Dict[str, Any]]] = {}
+        watermark = (self.watermark["updated_at"], self.watermark["id"])
+
+        for row in rows:
+            position = (str(row.get("updated_at") or ""), int(row.get("id") or 0))
+            watermark = max(watermark, position)
+            section = str(row.get("section_type") or "").lower()
+            if section not in ("listening", "reading"):
+                continue
+
+            set_id = int(row.get("material_set_id") or 0)
+            participant_key = f"{set_id}|{section}|{row.get('participant_id')}"
+            grouped.setdefault(participant_key, []).append(row)
+
+        applied = 0
+        touched = 0
+        for participant_key, participant_rows in grouped.items():
+            changed = self._apply_participant_rows(participant_key, participant_rows)
+            applied += changed
+            touched += bool(changed)
+
+        self.watermark = {"updated_at": watermark[0], "id": watermark[1]}
+        return {
+            "rows_applied": applied,
+            "participants_touched": touched,
+            "watermark": self.watermark,
+        }
+
+    def _apply_participant_rows(self, participant_key: str, rows: List[Dict[str, Any]]) -> int:
+        """Apply one participant's answers for one section; returns how many changed"""
+        set_id, section, _ = participant_key.split("|", 2)
+        previous = self.participants.get(
+            participant_key, {"answered": 0, "correct": 0, "total": 0, "answers": {}}
+        )
+        answered = previous["answered"]
+        correct = previous["correct"]
+        answers = dict(previous["answers"])
+        changes = []
+
+        for row in rows:
+            q_num = int(row.get("question_number") or 0)
+            if q_num <= 0:
+                continue
+            bit = 1 << q_num
+            answer = normalize_answer(row.get("user_answer"))
+            is_correct = bool(int(row.get("is_correct") or 0))
+            if answered & bit and answers.get(str(q_num)) == answer and bool(correct & bit) == is_correct:
+                continue
+            changes.append((q_num, bit, answer, is_correct))
+            answers[str(q_num)] = answer
+            answered |= bit
+            correct = correct | bit if is_correct else correct & ~bit
+
+        if not changes:
+            return 0
+
+        # Retract the participant's earlier contribution: their section total
+        # changes, which shifts the score moments of every item they answered.
+        self._apply_score_moments(set_id, section, previous, sign=-1)
+
+        for q_num, bit, answer, is_correct in changes:
+            item = self._get_item(set_id, section, q_num)
+            if previous["answered"] & bit:
+                # Corrected or resubmitted answer: replace the counted one
+                old_answer = previous["answers"].get(str(q_num))
+                if old_answer is not None:
+                    self._count_answer(item, old_answer, -1)
+                if previous["correct"] & bit:
+                    item["n_correct"] -= 1
+            else:
+                item["n"] += 1
+            self._count_answer(item, answer)
+            if is_correct:
+                item["n_correct"] += 1
+
+        current = {"answered": answered, "correct": correct, "total": bin(correct).count("1"), "answers": answers}
+        self._apply_score_moments(set_id, section, current, sign=1)
+        self.participants[participant_key] = current
+        return len(changes)
+
+    def _apply_score_moments(self, set_id: str, section: str, participant: Dict[str, int], sign: int) -> None:
+        """Add or remove a participant's total-score moments on each answered item"""
+        answered = participant["answered"]
+        if not answered:
+            return
+
+        total = participant["total"]
+        q_num = 0
+        while answered:
+            if answered & 1:
+                item = self._get_item(set_id, section, q_num)
+                item["sum_total"] += sign * total
+                item["sum_total_sq"] += sign * total * total
+                if participant["correct"] >> q_num & 1:
+                    item["sum_total_correct"] += sign * total
+            answered >>= 1
+            q_num += 1
+
+    def _get_item(self, set_id: str, section: str, q_num: int) -> Dict[str, Any]:
+        key = f"{set_id}|{section}|{q_num}"
+        item = self.items.get(key)
+        if item is None:
+            item = {
+                "n": 0,
+                "n_correct": 0,
+                "sum_total": 0,
+                "sum_total_sq": 0,
+                "sum_total_correct": 0,
+                "answers": {},
+            }
+            self.items[key] = item
+        return item
+
+    def _count_answer(self, item: Dict[str, Any], answer: str, amount: int = 1) -> None:
+        # Tracked answers are never dropped, so an answer is either always
+        # counted under its own key or always under OTHER_BUCKET
+        answers = item["answers"]
+        if answer in answers or (amount > 0 and len(answers) < MAX_DISTRACTORS):
+            answers[answer] = answers.get(answer, 0) + amount
+        else:
+            answers[OTHER_BUCKET] = answers.get(OTHER_BUCKET, 0) + amount
+
+    # ------------------------------------------------------------------
+    # Derived statistics
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def facility(item: Dict[str, Any]) -> Optional[float]:
+        """Proportion of candidates answering correctly"""
+        if item["n"] == 0:
+            return None
+        return item["n_correct"] / item["n"]
+
+    @staticmethod
+    def discrimination(item: Dict[str, Any]) -> Optional[float]:
+        """
+        Point-biserial correlation between item correctness and section total.
+
+        Uses the uncorrected total (the item itself is included), which is
+        slightly optimistic but needs nothing beyond the running sums.
+        """
+        n = item["n"]
+        n_correct = item["n_correct"]
+        if n < 2 or n_correct == 0 or n_correct == n:
+            return None
+
+        mean = item["sum_total"] / n
+        variance = item["sum_total_sq"] / n - mean * mean
+        if variance <= 0:
+            return None
+
+        n_wrong = n - n_correct
+        mean_correct = item["sum_total_correct"] / n_correct
+        mean_wrong = (item["sum_total"] - item["sum_total_correct"]) / n_wrong
+        p = n_correct / n
+        return (mean_correct - mean_wrong) / math.sqrt(variance) * math.sqrt(p * (1 - p))
+
+    def _flags_for(self, item: Dict[str, Any], facility: Optional[float], discrimination: Optional[float]) -> List[str]:
+        flags = []
+        if item["n"] < FLAG_RULES["min_responses"]:
+            return flags
+        if facility is not None and facility <= FLAG_RULES["low_facility"]:
+            flags.append("low_facility")
+        if facility is not None and facility >= FLAG_RULES["high_facility"]:
+            flags.append("high_facility")
+        if discrimination is not None and discrimination < FLAG_RULES["min_discrimination"]:
+            flags.append("negative_discrimination")
+        answers = item["answers"]
+        if answers.get(BLANK_BUCKET, 0) > item["n"] / 2:
+            flags.append("mostly_blank")
+        return flags
+
+    def export(self, material_set_id: int, top_distractors: int = 3) -> Dict[str, Any]:
+        """
+        Export compact, column-oriented statistics for one material set.
+
+        Every array has one entry per question, in (section, question) order,
+        so the dashboard can zip them without per-question objects.
+        """
+        prefix = f"{int(material_set_id)}|"
+        keys = []
+        for key in self.items:
+            if key.startswith(prefix):
+                _, section, q_num = key.split("|")
+                keys.append((section, int(q_num), key))
+        keys.sort()
+
+        result = {
+            "material_set_id": int(material_set_id),
+            "watermark": self.watermark,
+            "section": [],
+            "question": [],
+            "responses": [],
+            "facility": [],
+            "discrimination": [],
+            "distractors": [],
+            "flags": [],
+        }
+
+        for section, q_num, key in keys:
+            item = self.items[key]
+            facility = self.facility(item)
+            discrimination = self.discrimination(item)
+
+            distractors = sorted(
+                ((answer, count) for answer, count in item["answers"].items()
+                 if answer != OTHER_BUCKET and count > 0),
+                key=lambda entry: (-entry[1], entry[0]),
+            )[:top_distractors]
+
+            result["section"].append(section)
+            result["question"].append(q_num)
+            result["responses"].append(item["n"])
+            result["facility"].append(round(facility, 4) if facility is not None else None)
+            result["discrimination"].append(round(discrimination, 4) if discrimination is not None else None)
+            result["distractors"].append([[answer, count] for answer, count in distractors])
+            result["flags"].append(self._flags_for(item, facility, discrimination))
+
+        return result
+
+
+def update_item_statistics(rows: Iterable[Dict[str, Any]], state_path: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Load persisted aggregates, fold in rows and save
+
+    Returns:
+        Update summary including the new watermark
+    """
+    engine = ItemStatisticsEngine(state_path).load()
+    summary = engine.update(rows)
+    engine.save()
+    return summary
+
+
+if __name__ == "__main__":
+    # Called from Node.js:
+    #   python item_statistics.py cursor               (where the next read starts)
+    #   python item_statistics.py update < rows.json   (JSON array of rows)
+    #   python item_statistics.py export <material_set_id>
+    command = sys.argv[1] if len(sys.argv) > 1 else ""
+    state_path = os.environ.get("ITEM_STATS_STATE_PATH")
+
+    if command == "cursor":
+        output = ItemStatisticsEngine(state_path).load().resume_cursor()
+    elif command == "update":
+        output = update_item_statistics(json.load(sys.stdin), state_path)
+    elif command == "export" and len(sys.argv) > 2:
+        output = ItemStatisticsEngine(state_path).load().export(int(sys.argv[2]))
+    else:
+        output = {"success": False, "errors": ["Usage: item_statistics.py cursor|update|export <set_id>"]}
+
+    print(json.dumps(output, ensure_ascii=False, separators=(",", ":")))
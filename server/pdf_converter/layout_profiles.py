@@ -0,0 +1,172 @@
+"""
+Layout Profiles for IELTS PDF Families
+Each profile bundles the artifact patterns, heading rules and question-range
+conventions of one family of PDFs. A cheap fingerprint of the first few pages
+(producer metadata, fonts, watermark hits) picks the profile before the full
+parse, so the parser only runs the rules that apply to the input.
+"""
+
+import re
+from typing import Dict, List, Any, Tuple, Optional
+
+# Only the first pages are inspected; covers and the listening intro carry
+# every watermark and font the fingerprint needs.
+FINGERPRINT_PAGES = 3
+
+
+class LayoutProfile:
+    """Parsing rules for one family of IELTS PDFs"""
+
+    def __init__(self, name: str, description: str,
+                 artifact_patterns: List[str],
+                 reading_passages: List[Dict[str, Any]],
+                 listening_ranges: List[Tuple[int, int]],
+                 part_header_patterns: List[str],
+                 watermark_patterns: Optional[List[str]] = None,
+                 producer_patterns: Optional[List[str]] = None,
+                 font_patterns: Optional[List[str]] = None):
+        self.name = name
+        self.description = description
+        self.artifact_patterns = artifact_patterns
+        # [{'passage_num', 'title_marker', 'q_start', 'q_end'}, ...]
+        self.reading_passages = reading_passages
+        # Question number window for each listening part
+        self.listening_ranges = listening_ranges
+        # Templates formatted with part_num
+        self.part_header_patterns = part_header_patterns
+        self.watermark_patterns = watermark_patterns or []
+        self.producer_patterns = producer_patterns or []
+        self.font_patterns = font_patterns or []
+
+    def score(self, fingerprint: Dict[str, Any]) -> int:
+        """Score how well a fingerprint matches this profile (0 = no evidence)"""
+        score = 0
+        producer = fingerprint.get("producer", "")
+        for pattern in self.producer_patterns:
+            if re.search(pattern, producer, re.IGNORECASE):
+                score += 2
+        fonts = " ".join(fingerprint.get("fonts", []))
+        for pattern in self.font_patterns:
+            if re.search(pattern, fonts, re.IGNORECASE):
+                score += 1
+        text = fingerprint.get("text", "")
+        for pattern in self.watermark_patterns:
+            if re.search(pattern, text, re.IGNORECASE):
+                score += 3
+        return score
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"name": self.name, "description": self.description}
+
+
+STANDARD_READING_RANGES = [(1, 13), (14, 26), (27, 40)]
+STANDARD_LISTENING_RANGES = [(1, 10), (11, 20), (21, 30), (31, 40)]
+
+
+def _passages_from_headers() -> List[Dict[str, Any]]:
+    """Reading passages located by their 'READING PASSAGE n' headers"""
+    return [
+        {
+            'passage_num': index + 1,
+            'title_marker': rf'READING\s+PASSAGE\s+{index + 1}\b',
+            'q_start': q_start,
+            'q_end': q_end,
+        }
+        for index, (q_start, q_end) in enumerate(STANDARD_READING_RANGES)
+    ]
+
+
+_PROFILES: Dict[str, LayoutProfile] = {}
+
+
+def register_profile(profile: LayoutProfile) -> LayoutProfile:
+    """Add a profile to the registry (replaces one with the same name)"""
+    _PROFILES[profile.name] = profile
+    return profile
+
+
+def get_profile(name: str) -> LayoutProfile:
+    """Look up a profile by name, falling back to the generic profile"""
+    return _PROFILES.get(name) or _PROFILES["generic"]
+
+
+register_profile(LayoutProfile(
+    name="generic",
+    description="Any IELTS PDF with 'READING PASSAGE n' and 'PART n' headers",
+    artifact_patterns=[
+        r'Page\s+\d+',
+    ],
+    reading_passages=_passages_from_headers(),
+    listening_ranges=STANDARD_LISTENING_RANGES,
+    part_header_patterns=[r'(?:^|\n)\s*PART\s+{part_num}(?:\s|:|\.)'],
+))
+
+register_profile(LayoutProfile(
+    name="cambridge_ucles",
+    description="Official Cambridge IELTS books with UCLES footers",
+    artifact_patterns=[
+        r'©\s*UCLES\s*\d{4}',
+        r'©\s*British\s+Council',
+        r'Page\s+\d+',
+    ],
+    reading_passages=_passages_from_headers(),
+    listening_ranges=STANDARD_LISTENING_RANGES,
+    part_header_patterns=[r'(?:^|\n)\s*(?:PART|SECTION)\s+{part_num}(?:\s|:|\.)'],
+    watermark_patterns=[r'©\s*UCLES', r'Cambridge\s+(?:University\s+Press|Assessment)'],
+    producer_patterns=[r'Cambridge', r'InDesign'],
+))
+
+register_profile(LayoutProfile(
+    name="english_school_rm",
+    description="Authentic test scans shared by @EnglishSchoolbyRM",
+    artifact_patterns=[
+        r'@EnglishSchoolbyRM\s*\d+',  # Remove artifact watermarks
+        r'@EnglishSchoolbyRM',
+        r'©\s*British\s+Council',
+        r'Page\s+\d+',
+    ],
+    reading_passages=[
+        {
+            'passage_num': 1,
+            'title_marker': r'Tunnelling\s+under\s+the\s+Thames',
+            'q_start': 1,
+            'q_end': 13,
+        },
+        {
+            'passage_num': 2,
+            # Bounded gap: an unbounded DOTALL .*? rescans the rest of the text per "Children"
+            'title_marker': r"Children.{0,120}?comprehension\s+of\s+television",
+            'q_start': 14,
+            'q_end': 26,
+        },
+        {
+            'passage_num': 3,
+            'title_marker': r'BUSINESS\s+INNOVATION',
+            'q_start': 27,
+            'q_end': 40,
+        },
+    ],
+    listening_ranges=STANDARD_LISTENING_RANGES,
+    part_header_patterns=[r'(?:^|\n)\s*PART\s+{part_num}(?:\s|:|\.)'],
+    watermark_patterns=[r'@EnglishSchoolbyRM'],
+))
+
+
+def fingerprint_text(text_by_page: List[Dict[str, Any]], pages: int = FINGERPRINT_PAGES) -> Dict[str, Any]:
+    """Fingerprint from already extracted page texts (no metadata or fonts)"""
+    return {
+        "producer": "",
+        "fonts": [],
+        "text": "\n".join(page.get("content", "") for page in text_by_page[:pages]),
+    }
+
+
+def select_profile(fingerprint: Dict[str, Any]) -> LayoutProfile:
+    """Pick the best-scoring profile; generic when nothing matches"""
+    best = _PROFILES["generic"]
+    best_score = 0
+    for profile in _PROFILES.values():
+        score = profile.score(fingerprint)
+        if score > best_score:
+            best, best_score = profile, score
+    return best
@@ -0,0 +1,338 @@
+"""
+Near-Duplicate Detection for Converted Material
+The same Cambridge test arrives in differently stamped PDFs (with or without
+"@EnglishSchoolbyRM" watermarks, page numbers, channel links) and ended up as
+several material sets. Each reading passage, listening part and writing task
+(its own text, and its questions taken together) is reduced to a MinHash
+signature of its character shingles, after the stamps are normalized away.
+
+Shingles are taken over the letters only: text extraction joins or splits
+words differently from one PDF to the next ("RiverThames"), which would
+change every word shingle around the join. The signature uses one hash per
+shingle (one-permutation MinHash: the hash picks a bin and the bin keeps its
+smallest value), so a signature costs one pass over the text.
+
+Signatures of saved sets are kept in server/data/near_duplicates.sqlite with
+a banded LSH index: a signature is cut into BANDS bands, and two units are
+only compared when they agree on a whole band. A lookup costs one indexed
+query per band, however many sets there are; units sharing a band are then
+compared on the full signature.
+
+With 16 bands of 8 rows, units with Jaccard similarity 0.8 collide in at
+least one band 95% of the time, units at 0.5 only 6%.
+
+Usage:
+    python near_duplicates.py update < changes.jsonl   # same lines as search_index.py
+    python near_duplicates.py check converted.json
+"""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import struct
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Any, Tuple, Optional, Iterable
+
+from search_index import extract_documents
+
+DEFAULT_INDEX_PATH = Path(__file__).resolve().parent.parent / "data" / "near_duplicates.sqlite"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS units (
+    unit_id INTEGER PRIMARY KEY,
+    set_id INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    signature BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS units_set ON units (set_id);
+CREATE TABLE IF NOT EXISTS bands (
+    band INTEGER NOT NULL,
+    hash INTEGER NOT NULL,
+    unit_id INTEGER NOT NULL,
+    PRIMARY KEY (band, hash, unit_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS bands_unit ON bands (unit_id);
+CREATE TABLE IF NOT EXISTS indexed_sets (
+    set_id INTEGER PRIMARY KEY,
+    content_hash TEXT NOT NULL
+);
+"""
+
+NUM_BINS = 128
+BANDS = 16
+ROWS_PER_BAND = NUM_BINS // BANDS
+SHINGLE_CHARS = 9
+# Units with fewer letters than this (a one-line task, a lone question) say
+# nothing about the set they came from
+MIN_UNIT_CHARS = 120
+
+# Estimated Jaccard similarity at which two units count as the same
+DUPLICATE_SIMILARITY = 0.8
+# Share of a conversion's text matching one set that makes it a likely duplicate
+LIKELY_DUPLICATE_COVERAGE = 0.5
+
+QUESTIONS_SUFFIX = " questions"
+SIGNATURE = struct.Struct(f">{NUM_BINS}Q")
+# Filled into a bin no shingle hashed to, before densification
+EMPTY_BIN = (1 << 64) - 1
+
+# Stamps that differ between copies of the same test
+STAMP_PATTERNS = [
+    re.compile(r'@\w+'),                                    # @EnglishSchoolbyRM
+    re.compile(r'(?:https?://|www\.|t\.me/)\S+', re.IGNORECASE),
+    re.compile(r'\bpage\s+\d+(?:\s+of\s+\d+)?\b', re.IGNORECASE),
+]
+NON_LETTERS = re.compile(r"[\W\d_]+")
+
+
+# ----------------------------------------------------------------------
+# Signatures
+# ----------------------------------------------------------------------
+
+def normalize_text(text: str) -> str:
+    """Lowercase letters of a text, without stamps, numbers, spaces or dot leaders"""
+    for pattern in STAMP_PATTERNS:
+        text = pattern.sub(" ", text)
+    return NON_LETTERS.sub("", text.lower())
+
+
+def shingles(letters: str) -> set:
+    """64-bit hashes of the text's SHINGLE_CHARS-letter runs"""
+    return {
+        int.from_bytes(hashlib.blake2b(letters[i:i + SHINGLE_CHARS].encode("utf-8"), digest_size=8).digest(), "big")
+        for i in range(max(len(letters) - SHINGLE_CHARS + 1, 1))
+    }
+
+
+def minhash(shingle_hashes: set) -> Tuple[int, ...]:
+    """
+    One-permutation MinHash: each hash goes to bin hash % NUM_BINS, which
+    keeps the smallest hash // NUM_BINS. Empty bins take the value of the
+    next filled bin (with its distance mixed in), so short texts still get
+    comparable signatures.
+    """
+    bins = [EMPTY_BIN] * NUM_BINS
+    for value in shingle_hashes:
+        index, rest = value % NUM_BINS, value // NUM_BINS
+        if rest < bins[index]:
+            bins[index] = rest
+    if EMPTY_BIN in bins and len(set(bins)) > 1:
+        filled = bins[:]
+        for index in range(NUM_BINS):
+            distance = 1
+            while filled[index] == EMPTY_BIN:
+                source = bins[(index + distance) % NUM_BINS]
+                if source != EMPTY_BIN:
+                    filled[index] = (source + distance * 0x9E3779B97F4A7C15) % EMPTY_BIN
+                distance += 1
+        bins = filled
+    return tuple(bins)
+
+
+def band_hashes(signature: Tuple[int, ...]) -> List[int]:
+    """One signed 64-bit hash per band (SQLite INTEGER)"""
+    hashes = []
+    for band in range(BANDS):
+        rows = signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND]
+        digest = hashlib.blake2b(struct.pack(f">{ROWS_PER_BAND}Q", *rows), digest_size=8).digest()
+        hashes.append(int.from_bytes(digest, "big", signed=True))
+    return hashes
+
+
+def similarity(first: Tuple[int, ...], second: Tuple[int, ...]) -> float:
+    """Estimated Jaccard similarity: share of agreeing signature slots"""
+    return sum(1 for a, b in zip(first, second) if a == b) / NUM_BINS
+
+
+def unit_signatures(content: Dict[str, Any]) -> Dict[str, Tuple[Tuple[int, ...], int]]:
+    """
+    "reading passage 1" / "reading passage 1 questions" -> (MinHash
+    signature, number of letters), for every unit of a content JSON long
+    enough to compare
+    """
+    texts: Dict[str, List[str]] = {}
+    for (section, container, question), text in extract_documents(content).items():
+        name = f"{section} {container}" + (QUESTIONS_SUFFIX if question else "")
+        texts.setdefault(name, []).append(text)
+
+    signatures = {}
+    for name, parts in texts.items():
+        letters = normalize_text("\n".join(parts))
+        if len(letters) >= MIN_UNIT_CHARS:
+            signatures[name] = (minhash(shingles(letters)), len(letters))
+    return signatures
+
+
+# ----------------------------------------------------------------------
+# LSH index
+# ----------------------------------------------------------------------
+
+class NearDuplicateIndex:
+    """MinHash signatures of saved sets, banded for sublinear lookups"""
+
+    def __init__(self, index_path: Optional[str] = None):
+        self.index_path = Path(index_path) if index_path else DEFAULT_INDEX_PATH
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(str(self.index_path), timeout=30)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self.db.close()
+
+    def index_set(self, set_id: int, content: Optional[Dict[str, Any]]) -> Dict[str, int]:
+        """Replace a set's signatures (None removes the set); unchanged content is skipped"""
+        set_id = int(set_id)
+        content_hash = hashlib.sha256(
+            json.dumps(content, sort_keys=True, ensure_ascii=False).encode("utf-8")
+        ).hexdigest()[:16] if content else None
+        stored = self.db.execute("SELECT content_hash FROM indexed_sets WHERE set_id = ?", (set_id,)).fetchone()
+        if (stored[0] if stored else None) == content_hash:
+            return {"written": 0, "removed": 0}
+
+        signatures = unit_signatures(content) if content else {}
+        with self.db:
+            unit_ids = [row[0] for row in self.db.execute("SELECT unit_id FROM units WHERE set_id = ?", (set_id,))]
+            self.db.executemany("DELETE FROM bands WHERE unit_id = ?", ((unit_id,) for unit_id in unit_ids))
+            self.db.execute("DELETE FROM units WHERE set_id = ?", (set_id,))
+
+            for name, (signature, _) in signatures.items():
+                cursor = self.db.execute(
+                    "INSERT INTO units (set_id, name, signature) VALUES (?, ?, ?)",
+                    (set_id, name, SIGNATURE.pack(*signature)),
+                )
+                self.db.executemany(
+                    "INSERT OR IGNORE INTO bands (band, hash, unit_id) VALUES (?, ?, ?)",
+                    ((band, value, cursor.lastrowid) for band, value in enumerate(band_hashes(signature))),
+                )
+
+            if content_hash:
+                self.db.execute(
+                    "INSERT OR REPLACE INTO indexed_sets (set_id, content_hash) VALUES (?, ?)",
+                    (set_id, content_hash),
+                )
+            else:
+                self.db.execute("DELETE FROM indexed_sets WHERE set_id = ?", (set_id,))
+        return {"written": len(signatures), "removed": len(unit_ids)}
+
+    def similar_units(self, signature: Tuple[int, ...]) -> List[Tuple[int, str, float]]:
+        """(set_id, unit name, similarity) of stored units at DUPLICATE_SIMILARITY or above"""
+        candidates = set()
+        for band, value in enumerate(band_hashes(signature)):
+            candidates.update(
+                row[0] for row in self.db.execute(
+                    "SELECT unit_id FROM bands WHERE band = ? AND hash = ?", (band, value)
+                )
+            )
+
+        matches = []
+        for unit_id in candidates:
+            set_id, name, stored = self.db.execute(
+                "SELECT set_id, name, signature FROM units WHERE unit_id = ?", (unit_id,)
+            ).fetchone()
+            score = similarity(signature, SIGNATURE.unpack(stored))
+            if score >= DUPLICATE_SIMILARITY:
+                matches.append((set_id, name, score))
+        return matches
+
+    def find_duplicates(self, content: Dict[str, Any], exclude_set: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Saved sets sharing units with a content JSON, most covered first:
+
+            {"set_id": 12, "coverage": 0.83, "likely_duplicate": true,
+             "matches": [{"unit": "reading passage 1", "existing": "reading passage 1",
+                          "similarity": 0.95}, ...]}
+
+        coverage is the share of the content's passage, part and task text
+        (by letters) in units that match the set. Question units are listed
+        but not counted: their wording is where two conversions of the same
+        test differ most.
+        """
+        signatures = unit_signatures(content)
+        weights = {name: letters for name, (_, letters) in signatures.items() if not name.endswith(QUESTIONS_SUFFIX)}
+        if not weights:
+            weights = {name: letters for name, (_, letters) in signatures.items()}
+        total_letters = sum(weights.values())
+        by_set: Dict[int, Dict[str, Dict[str, Any]]] = {}
+        for name, (signature, _) in signatures.items():
+            for set_id, existing, score in self.similar_units(signature):
+                if set_id == exclude_set:
+                    continue
+                best = by_set.setdefault(set_id, {}).get(name)
+                if best is None or score > best["similarity"]:
+                    by_set[set_id][name] = {"unit": name, "existing": existing, "similarity": round(score, 3)}
+
+        duplicates = []
+        for set_id, matches in by_set.items():
+            coverage = sum(weights.get(name, 0) for name in matches) / total_letters
+            duplicates.append({
+                "set_id": set_id,
+                "coverage": round(coverage, 3),
+                "likely_duplicate": coverage >= LIKELY_DUPLICATE_COVERAGE,
+                "matches": sorted(matches.values(), key=lambda match: match["unit"]),
+            })
+        duplicates.sort(key=lambda duplicate: (-duplicate["coverage"], duplicate["set_id"]))
+        return duplicates
+
+
+def find_duplicate_sets(content: Dict[str, Any], index_path: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Duplicates of a converted test among saved sets (see find_duplicates);
+    empty until a set has been indexed.
+    """
+    index_path = index_path or os.environ.get("NEAR_DUPLICATES_PATH") or str(DEFAULT_INDEX_PATH)
+    if not os.path.exists(index_path):
+        return []
+    index = NearDuplicateIndex(index_path)
+    try:
+        return index.find_duplicates(content)
+    finally:
+        index.close()
+
+
+def apply_changes(lines: Iterable[str], index_path: Optional[str] = None) -> Dict[str, Any]:
+    """Apply JSON-lines set changes ({"set_id": 3, "content": {...} or null})"""
+    summary = {"sets_indexed": 0, "sets_removed": 0, "units_written": 0}
+    index = NearDuplicateIndex(index_path)
+    try:
+        for line in lines:
+            if not line.strip():
+                continue
+            change = json.loads(line)
+            content = change.get("content")
+            if isinstance(content, str):
+                content = json.loads(content) if content.strip() else None
+            result = index.index_set(change["set_id"], content)
+            if content is None:
+                summary["sets_removed"] += 1
+            elif result["written"] or result["removed"]:
+                summary["sets_indexed"] += 1
+            summary["units_written"] += result["written"]
+    finally:
+        index.close()
+    return summary
+
+
+
+if __name__ == "__main__":
+    # Called from Node.js:
+    #   python near_duplicates.py update < changes.jsonl
+    #   python near_duplicates.py check <converted.json>
+    command = sys.argv[1] if len(sys.argv) > 1 else ""
+    index_path = os.environ.get("NEAR_DUPLICATES_PATH")
+
+    if command == "update":
+        output = apply_changes(sys.stdin, index_path)
+    elif command == "check" and len(sys.argv) > 2:
+        with open(sys.argv[2], "r", encoding="utf-8") as f:
+            started = time.perf_counter()
+            output = {"duplicates": find_duplicate_sets(json.load(f), index_path),
+                      "took_ms": round((time.perf_counter() - started) * 1000, 2)}
+    else:
+        output = {"success": False, "errors": ["Usage: near_duplicates.py update|check <file>"]}
+
+    print(json.dumps(output, ensure_ascii=False, separators=(",", ":")))
@@ -2,6 +2,14 @@
 Node.js Interface Module for PDF Conversion
 This module is called by Node.js using python-shell
 Handles conversion and returns JSON suitable for database insertion
+
+Node spawns one process per upload, so startup is kept small: only the
+selected converter is imported, and only once a conversion actually runs.
+Everything else (validator, budget, incremental cache, image extraction) is
+imported at the stage that needs it. See import_budget.py.
+
+Each run times its stages and adds them to the converter metrics
+(converter_metrics.py) after the result has been handed to Node.
 """
 
 import json
@@ -13,18 +21,28 @@ from typing import Dict, Any, Tuple
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent))
 
-# Try v4 first (new improved version), fall back to v3
-try:
-    from ielts_pdf_converter_v4 import IELTSPDFConverter
-except ImportError:
-    from ielts_pdf_converter import IELTSPDFConverter
 
-from json_validator import IELTSJSONValidator
+def load_converter() -> Tuple[type, str]:
+    """
+    Import the converter class for this run.
 
+    v4 (new improved version) is preferred; v3 is only imported when v4
+    cannot be imported.
+    """
+    try:
+        from ielts_pdf_converter_v4 import IELTSPDFConverter
+        return IELTSPDFConverter, "v4"
+    except ImportError:
+        from ielts_pdf_converter import IELTSPDFConverter
+        return IELTSPDFConverter, "v3"
 
-def convert_pdf(pdf_path: str) -> Dict[str, Any]:
+
+def convert_pdf(pdf_path: str, document_key: str = None, metrics=None) -> Dict[str, Any]:
     """
     Convert PDF to JSON and validate
+
+    metrics (converter_metrics.ConversionMetrics) collects stage timings,
+    page count and cache use when given.
     
     Returns JSON with structure:
     {
@@ -34,7 +52,10 @@ def convert_pdf(pdf_path: str) -> Dict[str, Any]:
         "message": str,
         "validation": {...validation results...},
         "errors": [...],
-        "warnings": [...]
+        "warnings": [...],
+        "images": [...],
+        "duplicates": [...] (saved material sets this test likely duplicates),
+        "incomplete": bool (true if the time/memory budget cut sections off)
     }
     """
     result = {
@@ -44,7 +65,10 @@ def convert_pdf(pdf_path: str) -> Dict[str, Any]:
         "message": "Conversion pending",
         "validation": {},
         "errors": [],
-        "warnings": []
+        "warnings": [],
+        "images": [],
+        "duplicates": [],
+        "incomplete": False
     }
     
     try:
@@ -54,13 +78,80 @@ def convert_pdf(pdf_path: str) -> Dict[str, Any]:
             result["message"] = "File not found"
             return result
 
+        if metrics is None:
+            from converter_metrics import ConversionMetrics
+            metrics = ConversionMetrics()
+
+        IELTSPDFConverter, converter_version = load_converter()
+        metrics.converter = converter_version
+
         # Stage 1: Convert PDF to JSON
-        converter = IELTSPDFConverter(pdf_path)
-        test_data, confidence = converter.convert()
+        # PDF_PARALLEL_SECTIONS=1 runs the v4 section extractors in a process pool
+        # PDF_INCREMENTAL=1 reuses the previous conversion of the same document
+        # PDF_TIME_BUDGET_SECONDS / PDF_MEMORY_LIMIT_MB bound a v4 conversion; sections
+        # finished within the budget are returned and the result is marked incomplete
+        if converter_version == "v4":
+            from conversion_budget import ConversionBudget
+            budget = ConversionBudget.from_env()
+            if os.environ.get("PDF_INCREMENTAL") == "1":
+                from incremental_conversion import IncrementalConverter
+                converter = IncrementalConverter(pdf_path, document_key, budget=budget)
+            else:
+                converter = IELTSPDFConverter(
+                    pdf_path,
+                    parallel_sections=os.environ.get("PDF_PARALLEL_SECTIONS") == "1",
+                    budget=budget,
+                )
+        else:
+            converter = IELTSPDFConverter(pdf_path)
+        with metrics.stage("convert"):
+            test_data, confidence = converter.convert()
+        metrics.pages = len(converter.text_by_page or [])
+        if hasattr(converter, "stats"):
+            from converter_metrics import CACHE_RESULTS
+            metrics.cache_result = CACHE_RESULTS.get(converter.stats.get("mode"))
+
+        metadata = test_data.get("metadata", {})
+        if metadata.get("incomplete"):
+            exceeded = metadata.get("budget", {}).get("exceeded") or {}
+            result["incomplete"] = True
+            result["warnings"].append(
+                f"Conversion stopped at the {exceeded.get('reason', 'conversion')} budget; "
+                f"incomplete sections: {', '.join(metadata.get('incomplete_sections', []))}"
+            )
+
+        # Stage 1b: Pull Writing Task 1 charts and listening maps into material-images
+        # (skipped once the budget is spent)
+        if os.environ.get("PDF_EXTRACT_IMAGES", "1") != "0" and not result["incomplete"]:
+            try:
+                from image_extractor import extract_images_for_test
+                with metrics.stage("images"):
+                    images, image_stats = extract_images_for_test(pdf_path, test_data, converter.text_by_page)
+                result["images"] = images
+                test_data.setdefault("metadata", {})["image_extraction"] = image_stats
+            except Exception as e:
+                result["warnings"].append(f"Image extraction skipped: {str(e)}")
+
+        # Stage 1c: Look the passages and questions up among saved material sets
+        if os.environ.get("PDF_DUPLICATE_CHECK", "1") != "0":
+            try:
+                from near_duplicates import find_duplicate_sets
+                with metrics.stage("duplicates"):
+                    result["duplicates"] = find_duplicate_sets(test_data)
+                for duplicate in result["duplicates"]:
+                    if duplicate["likely_duplicate"]:
+                        result["warnings"].append(
+                            f"Likely duplicate of material set {duplicate['set_id']} "
+                            f"({duplicate['coverage']:.0%} of the text matches)"
+                        )
+            except Exception as e:
+                result["warnings"].append(f"Duplicate check skipped: {str(e)}")
         
         # Stage 2: Validate with the converted data
-        validator = IELTSJSONValidator(test_data)
-        is_valid, errors, warnings = validator.validate()
+        from json_validator import IELTSJSONValidator
+        with metrics.stage("validate"):
+            validator = IELTSJSONValidator(test_data)
+            is_valid, errors, warnings = validator.validate()
         
         if errors:
             result["errors"].extend(errors)
@@ -68,7 +159,8 @@ def convert_pdf(pdf_path: str) -> Dict[str, Any]:
             result["warnings"].extend(warnings)
         
         # Normalize data
-        normalized_data = validator.normalize()
+        with metrics.stage("validate"):
+            normalized_data = validator.normalize()
         
         result["testData"] = normalized_data
         result["confidence"] = confidence
@@ -90,8 +182,96 @@ def convert_pdf(pdf_path: str) -> Dict[str, Any]:
     
     return result
 
+def stage_output(output: Dict[str, Any], pdf_path: str = None) -> Dict[str, Any]:
+    """
+    Stage a successful result under a conversion id (conversion_staging.py)
+    and return the envelope Node passes on to the browser:
+
+        {"transport": "staging", "conversionId": ..., "expiresAt": ..., "success": ...,
+         "message": ..., "preview": {...}, "validation": {...}, "errors": [...],
+         "warnings": [...], "duplicates": [...], "incomplete": ...}
+
+    Failed conversions are not staged (conversionId is None); their errors are
+    in the envelope. The staged entry owns the uploaded PDF at pdf_path;
+    PDF_STAGING_OWNER is the uploading user's id.
+    """
+    from conversion_staging import build_preview, stage_result
+
+    envelope = {
+        "transport": "staging",
+        "conversionId": None,
+        "expiresAt": None,
+        "success": output.get("success", False),
+        "message": output.get("message"),
+        "preview": build_preview(output.get("testData")),
+        "validation": output.get("validation", {}),
+        "errors": output.get("errors", []),
+        "warnings": output.get("warnings", []),
+        "duplicates": output.get("duplicates", []),
+        "incomplete": output.get("incomplete", False),
+    }
+    if envelope["success"]:
+        header = stage_result(
+            output,
+            pdf_path=os.path.abspath(pdf_path) if pdf_path else None,
+            owner=os.environ.get("PDF_STAGING_OWNER"),
+        )
+        envelope["conversionId"] = header["id"]
+        envelope["expiresAt"] = header["expires_at"]
+    return envelope
+
+
+def write_result(output: Dict[str, Any], pdf_path: str = None) -> None:
+    """
+    Hand the result to Node.js
+
+    The result is serialized once as compact JSON. With PDF_RESULT_TRANSPORT=file
+    it is written to a temp file and stdout only carries a one-line envelope:
+
+        {"transport": "file", "path": ..., "format": "json", "size": ..., "sha256": ...,
+         "success": ..., "message": ...}
+
+    Node reads the file, checks size and hash, and deletes it, so the payload
+    never goes through python-shell's line splitting. Otherwise the compact
+    JSON is printed on a single line.
+
+    With PDF_RESULT_TRANSPORT=staging the result is kept in the staging store
+    instead (see stage_output).
+    """
+    if os.environ.get("PDF_RESULT_TRANSPORT") == "staging":
+        # Keep the result server-side until /confirm; Node only gets the preview
+        print(json.dumps(stage_output(output, pdf_path), ensure_ascii=False))
+        return
+
+    payload = json.dumps(output, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    if os.environ.get("PDF_RESULT_TRANSPORT") == "file":
+        import hashlib
+        import tempfile
+
+        fd, result_path = tempfile.mkstemp(prefix="ielts_result_", suffix=".json")
+        with os.fdopen(fd, "wb") as f:
+            f.write(payload)
+        envelope = {
+            "transport": "file",
+            "path": result_path,
+            "format": "json",
+            "size": len(payload),
+            "sha256": hashlib.sha256(payload).hexdigest(),
+            "success": output.get("success", False),
+            "message": output.get("message"),
+        }
+        print(json.dumps(envelope, ensure_ascii=False))
+        return
+
+    sys.stdout.buffer.write(payload + b"\n")
+    sys.stdout.flush()
+
+
 if __name__ == "__main__":
     # Called from Node.js with pdf_path as argument
+    pdf_path = None
+    metrics = None
     if len(sys.argv) < 2:
         output = {
             "success": False,
@@ -100,7 +280,19 @@ if __name__ == "__main__":
         }
     else:
         pdf_path = sys.argv[1]
-        output = convert_pdf(pdf_path)
+        document_key = sys.argv[2] if len(sys.argv) > 2 else None
+        from converter_metrics import ConversionMetrics
+        metrics = ConversionMetrics()
+        output = convert_pdf(pdf_path, document_key, metrics)
     
-    # Output as JSON for Node.js to parse
-    print(json.dumps(output, indent=2, ensure_ascii=False))
+    # Output for Node.js to parse (see write_result)
+    if metrics is None:
+        write_result(output, pdf_path)
+    else:
+        with metrics.stage("output"):
+            write_result(output, pdf_path)
+        # The result is already with Node; a metrics failure must not fail the upload
+        try:
+            metrics.record(output)
+        except Exception as e:
+            print(f"Converter metrics not recorded: {e}", file=sys.stderr)
@@ -0,0 +1,86 @@
+"""
+Shared Option Pools for Grouped Questions
+Matching and heading questions draw on one option list for the whole group
+("List of Headings i-x", people A-H), and every TRUE/FALSE/NOT GIVEN question
+has the same three answers. Stored per question, that list is repeated up to
+13 times in content_json, which is parsed on every content request.
+
+A passage (reading) or part (listening) keeps each shared list once:
+
+    "option_pools": {
+        "tfng": [{"label": "A", "text": "TRUE"}, ...],
+        "q14-19": [{"label": "i", "text": "The origins of the project"}, ...]
+    }
+
+and its questions name the pool instead of carrying the list:
+
+    {"id": 14, "type": "heading_matching", "options": null, "option_pool": "q14-19"}
+
+Only lists that are already identical are pooled, so every question keeps
+exactly the options it was extracted with; options that belong to one
+question (a multiple choice A-D) stay inline. The client expands pools when
+it normalizes content (client/src/utils/testContentNormalizer.js).
+"""
+
+from typing import Dict, List, Any, Optional
+
+# Judgement triples have fixed pool ids, whichever group uses them
+JUDGEMENT_POOL_IDS = {"TRUE": "tfng", "YES": "ynng"}
+
+
+def judgement_options(answers: List[str]) -> List[Dict[str, str]]:
+    """TRUE/FALSE/NOT GIVEN (or YES/NO/NOT GIVEN) as lettered options"""
+    return [
+        {"label": chr(ord("A") + index), "text": answer}
+        for index, answer in enumerate(answers)
+    ]
+
+
+def _pool_id(options: List[Dict[str, Any]], question_ids: List[int]) -> str:
+    answers = tuple(option.get("text") for option in options)
+    for first, pool_id in JUDGEMENT_POOL_IDS.items():
+        if answers == (first, "FALSE" if first == "TRUE" else "NO", "NOT GIVEN"):
+            return pool_id
+    return f"q{min(question_ids)}-{max(question_ids)}"
+
+
+def share_option_pools(questions: List[Dict[str, Any]],
+                       pools: Optional[Dict[str, List[Dict[str, Any]]]] = None) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Move identical option lists used by more than one question into pools.
+
+    Questions are updated in place ("options": None, "option_pool": id).
+    Returns the pools (the given dict, extended), keyed by pool id.
+    """
+    pools = {} if pools is None else pools
+    groups: Dict[tuple, List[Dict[str, Any]]] = {}
+    for question in questions:
+        options = question.get("options")
+        if not options or not all(isinstance(option, dict) for option in options):
+            continue
+        key = tuple((option.get("label"), option.get("text")) for option in options)
+        groups.setdefault(key, []).append(question)
+
+    for key, members in groups.items():
+        options = members[0]["options"]
+        pool_id = _pool_id(options, [question["id"] for question in members])
+        is_judgement = pool_id in JUDGEMENT_POOL_IDS.values()
+        if len(members) < 2 and not is_judgement:
+            continue
+        # Two different lists over the same question span keep distinct ids
+        if pool_id in pools and pools[pool_id] != options:
+            pool_id = f"{pool_id}-{len(pools) + 1}"
+        pools[pool_id] = options
+        for question in members:
+            question["options"] = None
+            question["option_pool"] = pool_id
+    return pools
+
+
+def resolve_options(question: Dict[str, Any],
+                    pools: Optional[Dict[str, List[Dict[str, Any]]]]) -> Optional[List[Dict[str, Any]]]:
+    """A question's options, inline or from its group's pool"""
+    if question.get("options"):
+        return question["options"]
+    return (pools or {}).get(question.get("option_pool"))
+
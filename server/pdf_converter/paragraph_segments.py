@@ -0,0 +1,131 @@
+"""
+Paragraph Segmentation for Reading Passages
+A passage used to be cleaned into one string with every newline turned into
+a space, which lost its paragraphs and the labels (A-H) that heading and
+"which paragraph" questions refer to. The client then re-split the text on
+every render.
+
+The passage is split once, during extraction, from the line layout of the
+extracted text:
+
+- a blank line ends a paragraph
+- a label, alone on its line ("B") or leading it ("B  The first ..."), starts
+  one; labels only count when they run A, B, C, ... in order, so a sentence
+  starting with "A" or "I" is not taken for one
+- in unlabelled passages, a short line ending a sentence ends a paragraph
+  (the last line of a paragraph rarely fills the column)
+
+The passage content is the paragraphs joined by blank lines, each labelled
+one prefixed by its label, and every paragraph is described by its span in
+that content, under the passage's "paragraph_spans" ("paragraphs" stays the
+plain text list some sets carry and the client joins):
+
+    {"label": "B", "start": 412, "end": 1190, "word_count": 131}
+"""
+
+import re
+from typing import Dict, List, Any, Tuple, Optional, Callable
+
+PARAGRAPH_LABELS = "ABCDEFGHIJ"
+LABEL_LINE = re.compile(r'^\s*([A-J])\.?\s*$')
+LABEL_PREFIX = re.compile(r'^\s*([A-J])\.?[ \t]+(?=["“‘\'(0-9A-Z])')
+SENTENCE_END = re.compile(r'[.!?]["”’)]?$')
+# A sentence-final line shorter than this share of a full line ends its paragraph
+SHORT_LINE_RATIO = 0.75
+# Lines shorter than this are titles or labels, not column width samples
+MIN_MEASURED_LINE = 30
+PARAGRAPH_SEPARATOR = "\n\n"
+
+# "Paragraph C", "Section B" in heading questions
+PARAGRAPH_REFERENCE = re.compile(r'^\s*(?:Paragraph|Section)\s+([A-J])\b')
+
+
+def _label_lines(lines: List[str]) -> Dict[int, str]:
+    """Line index -> label, for the label candidates that run A, B, C, ..."""
+    labels: Dict[int, str] = {}
+    expected = 0
+    for index, line in enumerate(lines):
+        match = LABEL_LINE.match(line) or LABEL_PREFIX.match(line)
+        if match and match.group(1) == PARAGRAPH_LABELS[expected]:
+            labels[index] = match.group(1)
+            expected += 1
+            if expected == len(PARAGRAPH_LABELS):
+                break
+    return labels if len(labels) >= 2 else {}
+
+
+def split_paragraphs(raw_text: str) -> List[Tuple[Optional[str], List[str]]]:
+    """Raw passage text -> [(label, lines), ...]"""
+    lines = raw_text.split("\n")
+    labels = _label_lines(lines)
+
+    widths = sorted(len(line.strip()) for line in lines if len(line.strip()) >= MIN_MEASURED_LINE)
+    full_width = widths[len(widths) // 2] if widths else 0
+
+    paragraphs: List[Tuple[Optional[str], List[str]]] = []
+    label, current = None, []
+
+    def close():
+        nonlocal label, current
+        if current:
+            paragraphs.append((label, current))
+        label, current = None, []
+
+    for index, line in enumerate(lines):
+        stripped = line.strip()
+        if not stripped:
+            # A blank line right after a lone label keeps the label
+            if current:
+                close()
+            continue
+        if index in labels:
+            close()
+            label = labels[index]
+            match = LABEL_PREFIX.match(line)
+            stripped = line[match.end():].strip() if match else ""
+            if not stripped:
+                continue
+        current.append(stripped)
+        if (not labels and full_width and SENTENCE_END.search(stripped)
+                and len(stripped) < SHORT_LINE_RATIO * full_width):
+            close()
+    close()
+    return paragraphs
+
+
+def segment_passage(raw_text: str, clean: Callable[[str], str]) -> Tuple[str, List[Dict[str, Any]]]:
+    """
+    Split a passage into paragraphs.
+
+    clean turns a paragraph's lines into its text (the converter's
+    _clean_text). Returns the passage content and its paragraph spans.
+    """
+    chunks: List[str] = []
+    spans: List[Dict[str, Any]] = []
+    offset = 0
+    for label, lines in split_paragraphs(raw_text):
+        text = clean("\n".join(lines))
+        if not text:
+            continue
+        chunk = f"{label} {text}" if label else text
+        if chunks:
+            offset += len(PARAGRAPH_SEPARATOR)
+        spans.append({
+            "label": label,
+            "start": offset,
+            "end": offset + len(chunk),
+            "word_count": len(text.split()),
+        })
+        chunks.append(chunk)
+        offset += len(chunk)
+    return PARAGRAPH_SEPARATOR.join(chunks), spans
+
+
+def paragraph_reference(question_text: str, spans: List[Dict[str, Any]]) -> Optional[str]:
+    """Label of the paragraph a question names ("Paragraph C"), if the passage has it"""
+    match = PARAGRAPH_REFERENCE.match(question_text or "")
+    if not match:
+        return None
+    label = match.group(1)
+    return label if any(span["label"] == label for span in spans) else None
+
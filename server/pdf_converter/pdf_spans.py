@@ -0,0 +1,552 @@
+"""
+Span Tables: Columnar Intermediate Representation of a PDF
+Both converters parse the flat page text (get_text()), and every other
+analysis - layout fingerprints, headings, tables - used to re-open the PDF.
+A span table is extracted once per PDF and holds everything they need: the
+page text exactly as get_text() returns it, plus one row per text span with
+its page, block and line, bounding box, font size, flags, font, colour and
+the character range of the span in that text.
+
+Tables are cached in server/data/spans/<sha256 of the PDF>.spans (override
+with PDF_SPAN_CACHE_DIR; PDF_SPAN_CACHE=0 builds them in memory only), so a
+second parse of the same file reads the text back without PyMuPDF. The cache
+is capped at PDF_SPAN_CACHE_MAX_MB (256 MB); the least recently read tables
+are removed first.
+
+File layout (little-endian, every section starts on an 8-byte boundary):
+
+    offset  size
+    0       4     magic b"IESP"
+    4       2     format version (1)
+    6       2     reserved
+    8       4     page count (P)
+    12      4     span count (N)
+    16      4     metadata length in bytes
+    20      4     text length in bytes
+    24      8     reserved
+    32            page_text_starts  uint32[P + 1]
+                  page_span_starts  uint32[P + 1]
+                  one array per column of SPAN_COLUMNS, N values each
+                  metadata (UTF-8 JSON: producer, creator, fonts, page sizes, ...)
+                  text (UTF-8)
+
+Pages are joined with one newline, as the converters build text_full: page
+i is text[page_text_starts[i]:page_text_starts[i + 1] - 1]. Spans of page i
+are rows page_span_starts[i] .. page_span_starts[i + 1] - 1. text_start and
+text_end are character offsets into the decoded text; a span whose text
+could not be located in the page text has text_start == text_end.
+
+Usage:
+    python pdf_spans.py build test.pdf [output.spans]
+    python pdf_spans.py info test.spans
+    python pdf_spans.py text test.spans [--page 3]
+    python pdf_spans.py headings test.spans
+"""
+
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+from array import array
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Any, Optional, Tuple
+
+MAGIC = b"IESP"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<4sHxxIIII8x")
+ALIGNMENT = 8
+
+# (name, array typecode); all columns have one value per span
+SPAN_COLUMNS = (
+    ("page", "H"),
+    ("block", "I"),
+    ("line", "I"),
+    ("x0", "f"),
+    ("y0", "f"),
+    ("x1", "f"),
+    ("y1", "f"),
+    ("size", "f"),
+    ("flags", "H"),
+    ("font", "H"),
+    ("color", "I"),
+    ("text_start", "I"),
+    ("text_end", "I"),
+)
+
+# PyMuPDF span flags
+FLAG_ITALIC = 2
+FLAG_BOLD = 16
+
+DEFAULT_CACHE_DIR = Path(__file__).resolve().parent.parent / "data" / "spans"
+DEFAULT_CACHE_MAX_MB = 256
+# Pages whose fonts go into the layout fingerprint (layout_profiles.FINGERPRINT_PAGES)
+FINGERPRINT_PAGES = 3
+
+
+class SpanTableError(ValueError):
+    """A span table that cannot be read: bad header, truncated or wrong version"""
+
+
+def _aligned(offset: int) -> int:
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def _column_bytes(typecode: str, values) -> bytes:
+    column = array(typecode, values)
+    if sys.byteorder != "little":
+        column.byteswap()
+    return column.tobytes()
+
+
+class SpanTableBuilder:
+    """Collects pages and spans, then packs them into the file layout"""
+
+    def __init__(self):
+        self.pages: List[str] = []
+        self.page_span_starts: List[int] = [0]
+        self.columns: Dict[str, List[Any]] = {name: [] for name, _ in SPAN_COLUMNS}
+        self.fonts: List[str] = []
+        self._font_ids: Dict[str, int] = {}
+        self.meta: Dict[str, Any] = {}
+        self._text_length = 0
+        self._block = 0
+        self._line = 0
+
+    def add_page(self, text: str, blocks: List[Dict[str, Any]]):
+        """
+        Add a page: its get_text() output and its get_text("dict") blocks.
+        Spans are located in the page text in reading order.
+        """
+        page_index = len(self.pages)
+        page_start = self._text_length
+        cursor = 0
+
+        for block in blocks:
+            if block.get("type", 0) != 0:
+                continue
+            for line in block.get("lines", []):
+                for span in line.get("spans", []):
+                    span_text = span.get("text", "")
+                    found = text.find(span_text, cursor) if span_text.strip() else -1
+                    if found == -1:
+                        start = end = cursor
+                    else:
+                        start, end = found, found + len(span_text)
+                        cursor = end
+
+                    font = span.get("font", "")
+                    if font not in self._font_ids:
+                        self._font_ids[font] = len(self.fonts)
+                        self.fonts.append(font)
+                    x0, y0, x1, y1 = span.get("bbox", (0, 0, 0, 0))
+                    row = {
+                        "page": page_index, "block": self._block, "line": self._line,
+                        "x0": x0, "y0": y0, "x1": x1, "y1": y1,
+                        "size": span.get("size", 0), "flags": span.get("flags", 0) & 0xFFFF,
+                        "font": self._font_ids[font], "color": span.get("color", 0) & 0xFFFFFFFF,
+                        "text_start": page_start + start, "text_end": page_start + end,
+                    }
+                    for name, _ in SPAN_COLUMNS:
+                        self.columns[name].append(row[name])
+                self._line += 1
+            self._block += 1
+
+        self.pages.append(text)
+        self.page_span_starts.append(len(self.columns["page"]))
+        self._text_length += len(text) + 1
+
+    def pack(self) -> bytes:
+        text = "\n".join(self.pages)
+        text_bytes = text.encode("utf-8")
+        page_text_starts = []
+        offset = 0
+        for page in self.pages:
+            page_text_starts.append(offset)
+            offset += len(page) + 1
+        page_text_starts.append(offset)
+
+        meta = dict(self.meta, fonts=self.fonts)
+        meta_bytes = json.dumps(meta, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        span_count = len(self.columns["page"])
+
+        sections = [_column_bytes("I", page_text_starts), _column_bytes("I", self.page_span_starts)]
+        sections += [_column_bytes(code, self.columns[name]) for name, code in SPAN_COLUMNS]
+        sections += [meta_bytes, text_bytes]
+
+        out = bytearray(HEADER.pack(MAGIC, FORMAT_VERSION, len(self.pages), span_count,
+                                    len(meta_bytes), len(text_bytes)))
+        for section in sections:
+            out += b"\0" * (_aligned(len(out)) - len(out))
+            out += section
+        return bytes(out)
+
+
+def build_span_table(doc, keep_going: Optional[Callable[[], bool]] = None) -> bytes:
+    """
+    Extract a span table from an open PyMuPDF document. keep_going is asked
+    before every page; when it returns False the table stops there and is
+    marked incomplete.
+    """
+    builder = SpanTableBuilder()
+    metadata = doc.metadata or {}
+    fingerprint_fonts = set()
+    page_sizes = []
+    complete = True
+
+    for page_num, page in enumerate(doc):
+        if keep_going is not None and not keep_going():
+            complete = False
+            break
+        if page_num < FINGERPRINT_PAGES:
+            # (xref, ext, type, basefont, name, encoding)
+            fingerprint_fonts.update(font[3] for font in page.get_fonts())
+        rect = page.rect
+        page_sizes.append([round(rect[2] - rect[0], 2), round(rect[3] - rect[1], 2)])
+        builder.add_page(page.get_text(), page.get_text("dict").get("blocks", []))
+
+    builder.meta = {
+        "producer": metadata.get("producer", ""),
+        "creator": metadata.get("creator", ""),
+        "fingerprint_fonts": sorted(fingerprint_fonts),
+        "page_sizes": page_sizes,
+        "complete": complete,
+    }
+    return builder.pack()
+
+
+def _rounded(line: Dict[str, Any]) -> Dict[str, Any]:
+    """Columns are float32; report boxes and sizes to 0.01 pt"""
+    line["bbox"] = [round(value, 2) for value in line["bbox"]]
+    line["size"] = round(line["size"], 2)
+    return line
+
+
+class SpanTable:
+    """
+    Read-only view of a span table. Files are memory-mapped; columns are
+    memoryviews of the mapping and the text is decoded on first use.
+    """
+
+    def __init__(self, path: Optional[str] = None, data: Optional[bytes] = None):
+        self._file = None
+        self._map = None
+        if path is not None:
+            self._file = open(path, "rb")
+            try:
+                self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                self._file.close()
+                raise SpanTableError("Span table file is empty")
+            self._view = memoryview(self._map)
+        else:
+            self._view = memoryview(data or b"")
+        self._text = None
+        self._columns: Dict[str, Any] = {}
+        try:
+            self._read_layout()
+        except SpanTableError:
+            self.close()
+            raise
+
+    def _read_layout(self):
+        if len(self._view) < HEADER.size:
+            raise SpanTableError("Span table header is truncated")
+        magic, version, self.page_count, self.span_count, meta_length, text_length = \
+            HEADER.unpack_from(self._view, 0)
+        if magic != MAGIC:
+            raise SpanTableError("Not a span table")
+        if version != FORMAT_VERSION:
+            raise SpanTableError(f"Unsupported span table version {version}")
+
+        offset = HEADER.size
+        sections = [("page_text_starts", "I", self.page_count + 1),
+                    ("page_span_starts", "I", self.page_count + 1)]
+        sections += [(name, code, self.span_count) for name, code in SPAN_COLUMNS]
+        self._sections: Dict[str, Tuple[int, int, str]] = {}
+        for name, code, count in sections:
+            offset = _aligned(offset)
+            self._sections[name] = (offset, count, code)
+            offset += count * array(code).itemsize
+
+        offset = _aligned(offset)
+        self._meta_range = (offset, offset + meta_length)
+        offset = _aligned(offset + meta_length)
+        self._text_range = (offset, offset + text_length)
+        if self._text_range[1] > len(self._view):
+            raise SpanTableError("Span table is truncated")
+        self.meta = json.loads(bytes(self._view[self._meta_range[0]:self._meta_range[1]]))
+
+    def column(self, name: str):
+        """One column as a sequence of numbers (a memoryview when possible)"""
+        if name not in self._columns:
+            offset, count, code = self._sections[name]
+            raw = self._view[offset:offset + count * array(code).itemsize]
+            if sys.byteorder == "little":
+                self._columns[name] = raw.cast(code)
+            else:
+                values = array(code, bytes(raw))
+                values.byteswap()
+                self._columns[name] = values
+        return self._columns[name]
+
+    @property
+    def text(self) -> str:
+        """All pages joined with newlines: the converters' text_full"""
+        if self._text is None:
+            self._text = bytes(self._view[self._text_range[0]:self._text_range[1]]).decode("utf-8")
+        return self._text
+
+    @property
+    def fonts(self) -> List[str]:
+        return self.meta.get("fonts", [])
+
+    @property
+    def complete(self) -> bool:
+        return bool(self.meta.get("complete", True))
+
+    def page_text(self, page_index: int) -> str:
+        starts = self.column("page_text_starts")
+        return self.text[starts[page_index]:starts[page_index + 1] - 1]
+
+    @property
+    def text_by_page(self) -> List[Dict[str, Any]]:
+        """Pages in the converters' text_by_page shape"""
+        return [{"page": index + 1, "content": self.page_text(index)} for index in range(self.page_count)]
+
+    def span_range(self, page_index: int) -> range:
+        starts = self.column("page_span_starts")
+        return range(starts[page_index], starts[page_index + 1])
+
+    def span_text(self, row: int) -> str:
+        return self.text[self.column("text_start")[row]:self.column("text_end")[row]]
+
+    def span(self, row: int) -> Dict[str, Any]:
+        span = {name: self.column(name)[row] for name, _ in SPAN_COLUMNS}
+        span["font"] = self.fonts[span["font"]] if span["font"] < len(self.fonts) else ""
+        span["text"] = self.span_text(row)
+        return span
+
+    def lines(self, page_index: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """Spans grouped into text lines, with the line's box, largest size and flags"""
+        rows = self.span_range(page_index) if page_index is not None else range(self.span_count)
+        line_ids = self.column("line")
+        sizes = self.column("size")
+        flags = self.column("flags")
+        x0s, y0s, x1s, y1s = (self.column(name) for name in ("x0", "y0", "x1", "y1"))
+        pages = self.column("page")
+
+        current = None
+        for row in rows:
+            if current is None or line_ids[row] != current["line"]:
+                if current is not None:
+                    yield _rounded(current)
+                current = {"page": pages[row] + 1, "line": line_ids[row], "text": "",
+                           "bbox": [x0s[row], y0s[row], x1s[row], y1s[row]],
+                           "size": sizes[row], "flags": flags[row]}
+            else:
+                box = current["bbox"]
+                current["bbox"] = [min(box[0], x0s[row]), min(box[1], y0s[row]),
+                                   max(box[2], x1s[row]), max(box[3], y1s[row])]
+                current["size"] = max(current["size"], sizes[row])
+                current["flags"] |= flags[row]
+            current["text"] += self.span_text(row)
+        if current is not None:
+            yield _rounded(current)
+
+    def body_size(self) -> float:
+        """Font size (to 0.5 pt) that carries the most characters"""
+        weights: Dict[float, int] = {}
+        sizes = self.column("size")
+        starts, ends = self.column("text_start"), self.column("text_end")
+        for row in range(self.span_count):
+            size = round(sizes[row] * 2) / 2
+            weights[size] = weights.get(size, 0) + ends[row] - starts[row]
+        return max(weights, key=weights.get) if weights else 0.0
+
+    def headings(self, ratio: float = 1.2, max_words: int = 14) -> List[Dict[str, Any]]:
+        """Short lines set noticeably larger than the body text"""
+        threshold = self.body_size() * ratio
+        return [
+            line for line in self.lines()
+            if line["size"] >= threshold and line["text"].strip()
+            and len(line["text"].split()) <= max_words
+        ]
+
+    def fingerprint(self, pages: int = FINGERPRINT_PAGES) -> Dict[str, Any]:
+        """Layout fingerprint of the first pages, for layout_profiles.select_profile"""
+        return {
+            "producer": f"{self.meta.get('producer', '')} {self.meta.get('creator', '')}".strip(),
+            "fonts": self.meta.get("fingerprint_fonts", []),
+            "text": "\n".join(self.page_text(index) for index in range(min(pages, self.page_count))),
+        }
+
+    def close(self):
+        """Close the mapping; columns returned by column() must be released first"""
+        for column in self._columns.values():
+            if isinstance(column, memoryview):
+                column.release()
+        self._columns = {}
+        self._view.release()
+        if self._map is not None:
+            self._map.close()
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def pdf_digest(pdf_path: str) -> str:
+    digest = hashlib.sha256()
+    with open(pdf_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def cache_path_for(pdf_path: str, cache_dir: Optional[str] = None) -> Path:
+    directory = Path(cache_dir or os.environ.get("PDF_SPAN_CACHE_DIR") or DEFAULT_CACHE_DIR)
+    return directory / f"{pdf_digest(pdf_path)}.spans"
+
+
+def prune_cache(directory: str, max_bytes: Optional[int] = None) -> int:
+    """Remove the least recently read tables until the cache fits; returns how many went"""
+    if max_bytes is None:
+        max_bytes = int(float(os.environ.get("PDF_SPAN_CACHE_MAX_MB", DEFAULT_CACHE_MAX_MB)) * 1024 * 1024)
+    entries = []
+    for path in Path(directory).glob("*.spans"):
+        try:
+            stat = path.stat()
+        except OSError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+
+    total = sum(size for _, size, _ in entries)
+    removed = 0
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            path.unlink()
+        except OSError:
+            continue
+        total -= size
+        removed += 1
+    return removed
+
+
+def write_span_table(path: str, data: bytes):
+    """Write a table so that readers never see a partly written file"""
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    temp_path = f"{path}.tmp{os.getpid()}"
+    with open(temp_path, "wb") as f:
+        f.write(data)
+    os.replace(temp_path, path)
+
+
+def load_span_table(pdf_path: str, keep_going: Optional[Callable[[], bool]] = None,
+                    cache_dir: Optional[str] = None) -> SpanTable:
+    """
+    The span table of a PDF: read from the cache when this exact file was
+    extracted before, otherwise extracted with PyMuPDF and cached. Tables
+    cut short by keep_going are returned but not cached. A cache hit
+    refreshes the file's mtime, which is what prune_cache() orders by.
+    """
+    use_cache = os.environ.get("PDF_SPAN_CACHE", "1") != "0"
+    cached = cache_path_for(pdf_path, cache_dir) if use_cache else None
+    if cached is not None and cached.exists():
+        try:
+            table = SpanTable(str(cached))
+        except SpanTableError:
+            pass
+        else:
+            try:
+                os.utime(cached)
+            except OSError:
+                pass
+            return table
+
+    import fitz  # PyMuPDF
+
+    doc = fitz.open(pdf_path)
+    try:
+        data = build_span_table(doc, keep_going)
+    finally:
+        doc.close()
+
+    table = SpanTable(data=data)
+    if cached is not None and table.complete:
+        write_span_table(str(cached), data)
+        prune_cache(str(cached.parent))
+    return table
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Build and read PDF span tables")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = commands.add_parser("build", help="extract a PDF (cached unless an output is given)")
+    build_parser.add_argument("pdf")
+    build_parser.add_argument("output", nargs="?")
+
+    for command in ("info", "headings"):
+        commands.add_parser(command).add_argument("table")
+    text_parser = commands.add_parser("text", help="write the text to stdout")
+    text_parser.add_argument("table")
+    text_parser.add_argument("--page", type=int, help="1-based page number")
+
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == "build":
+            started = time.perf_counter()
+            if args.output:
+                import fitz  # PyMuPDF
+
+                doc = fitz.open(args.pdf)
+                try:
+                    write_span_table(args.output, build_span_table(doc))
+                finally:
+                    doc.close()
+                path = args.output
+            else:
+                load_span_table(args.pdf).close()
+                path = str(cache_path_for(args.pdf))
+            output = {"path": path, "size": os.path.getsize(path),
+                      "took_ms": round((time.perf_counter() - started) * 1000, 1)}
+        else:
+            started = time.perf_counter()
+            with SpanTable(args.table) as table:
+                if args.command == "text":
+                    text = table.page_text(args.page - 1) if args.page else table.text
+                    sys.stdout.write(text)
+                    return 0
+                if args.command == "headings":
+                    output = table.headings()
+                else:
+                    pages = len(table.text_by_page)
+                    output = {
+                        "pages": pages,
+                        "spans": table.span_count,
+                        "characters": len(table.text),
+                        "fonts": len(table.fonts),
+                        "body_size": table.body_size(),
+                        "complete": table.complete,
+                        "read_ms": round((time.perf_counter() - started) * 1000, 2),
+                    }
+    except (SpanTableError, OSError, ImportError, json.JSONDecodeError) as e:
+        print(json.dumps({"success": False, "errors": [str(e)]}))
+        return 1
+
+    print(json.dumps(output, ensure_ascii=False, separators=(",", ":")))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,213 @@
+"""
+Single-Scan Question Type Classifier
+Replaces the cascaded re.search probes in the v4 converter. Each question is
+tokenized once by a combined pattern with named groups; a small state machine
+turns the tokens into cues (word positions), and the question type is decided
+from the cues in the same priority order the probes used.
+"""
+
+import re
+from typing import Dict, List, Tuple
+
+# One pass over the original text. Every alternative starts at a word boundary
+# (or a dot), so the regex engine skips ordinary text in C and the Python loop
+# only sees cue tokens. Word cues are case-insensitive; option letters and
+# Roman numerals are not.
+TOKEN_PATTERN = re.compile(
+    r'\b(?:(?P<letter>[A-H])\b|(?P<roman>[IVX]{2,})\b'
+    r'|(?P<word>(?i:not\s+given|roman\s+numerals?|short\s+answers?|true|false|headings?'
+    r'|sentences?|fill|blanks?|gaps?|incomplete|notes?|forms?|answers?|questions?|words?'
+    r'|match\w*|correspond\w*|complet\w*|summar\w*))\b)'
+    r'|(?P<ellipsis>\.{3,}|…+)'
+    r'|(?P<dot>\.)'
+)
+# Checked right after a letter token: "A) ..." / "A. ..." and "A has ..."
+OPTION_SUFFIX = re.compile(r'\s*[\)\.](?=\s)')
+CLAIM_SUFFIX = re.compile(r'\s+(?:has|is|was|provides|shows|supports)\b')
+# "A-E" / "A–H": the range of option letters a matching task draws from
+RANGE_SUFFIX = re.compile(r'\s*[-–]\s*[A-Z]\b')
+
+# Lower-cased cue word -> cue. Prefix cues are checked when no exact cue applies.
+WORD_CUES = {
+    "true": "TRUE",
+    "false": "FALSE",
+    "heading": "HEADING",
+    "headings": "HEADING",
+    "sentence": "SENTENCE",
+    "sentences": "SENTENCE",
+    "fill": "FILL",
+    "blank": "BLANK",
+    "blanks": "BLANK",
+    "gap": "BLANK",
+    "gaps": "BLANK",
+    "incomplete": "BLANK",
+    "note": "NOTE",
+    "notes": "NOTE",
+    "form": "FORM",
+    "forms": "FORM",
+    "answer": "ANSWER",
+    "answers": "ANSWER",
+    "question": "QUESTION",
+    "questions": "QUESTION",
+    "word": "WORD",
+    "words": "WORD",
+}
+PREFIX_CUES = (
+    ("not", "NOT_GIVEN"),
+    ("roman", "ROMAN"),
+    ("short", "SHORT_ANSWER"),
+    ("match", "MATCH"),
+    ("correspond", "HEADING"),
+    ("complet", "COMPLETE"),
+    ("summar", "SUMMARY"),
+)
+
+# Maximum gap in characters for "near" cue pairs (note ... form, answer ... word)
+NEAR_DISTANCE = 30
+
+
+class QuestionCues:
+    """Positions of every cue found in one question text"""
+
+    def __init__(self):
+        self.positions: Dict[str, List[Tuple[int, int]]] = {}
+        self.option_letters = set()
+        self.bare_letters = set()
+        self.ranges = 0
+
+    def add(self, cue: str, start: int, end: int) -> None:
+        self.positions.setdefault(cue, []).append((start, end))
+
+    def has(self, cue: str) -> bool:
+        return cue in self.positions
+
+    def before(self, first: str, second: str) -> bool:
+        """True if some `first` cue ends before some `second` cue starts"""
+        if first not in self.positions or second not in self.positions:
+            return False
+        return self.positions[first][0][1] <= self.positions[second][-1][0]
+
+    def near(self, first: str, second: str, distance: int = NEAR_DISTANCE) -> bool:
+        """True if a `second` cue starts within `distance` chars after a `first` cue"""
+        for _, first_end in self.positions.get(first, []):
+            for second_start, _ in self.positions.get(second, []):
+                if 0 <= second_start - first_end <= distance:
+                    return True
+        return False
+
+    def in_order(self, *cues: str) -> bool:
+        """True if the cues occur in this order (each after the previous one)"""
+        position = -1
+        for cue in cues:
+            following = [start for start, _ in self.positions.get(cue, []) if start > position]
+            if not following:
+                return False
+            position = following[0]
+        return True
+
+
+def scan(text: str) -> QuestionCues:
+    """Tokenize the text once and collect cues"""
+    cues = QuestionCues()
+    text = text or ""
+    skip_until = 0
+
+    for token in TOKEN_PATTERN.finditer(text):
+        kind = token.lastgroup
+        start, end = token.span()
+        if start < skip_until:
+            # The closing letter of a range
+            continue
+
+        if kind == "word":
+            lower = token.group(kind).lower()
+            cue = WORD_CUES.get(lower)
+            if cue is None:
+                cue = next(prefix_cue for prefix, prefix_cue in PREFIX_CUES if lower.startswith(prefix))
+            cues.add(cue, start, end)
+        elif kind == "letter":
+            letter = token.group(kind)
+            suffix = RANGE_SUFFIX.match(text, end)
+            if suffix:
+                cues.ranges += 1
+                skip_until = suffix.end()
+                continue
+            suffix = OPTION_SUFFIX.match(text, end)
+            if suffix:
+                cues.add("OPTION", start, suffix.end())
+                cues.option_letters.add(letter)
+                continue
+            suffix = CLAIM_SUFFIX.match(text, end)
+            cues.add("LETTER_CLAIM" if suffix else "LETTER", start, suffix.end() if suffix else end)
+            cues.bare_letters.add(letter)
+        elif kind == "roman":
+            cues.add("ROMAN", start, end)
+        elif kind == "ellipsis":
+            cues.add("BLANK", start, end)
+            cues.add("DOT", start, end)
+        else:
+            cues.add("DOT", start, end)
+
+    return cues
+
+
+def classify_reading_question(text: str) -> str:
+    """Determine the type of a reading question"""
+    cues = scan(text)
+
+    # TRUE/FALSE/NOT GIVEN - highest priority
+    if cues.in_order("TRUE", "FALSE", "NOT_GIVEN"):
+        return "true_false_ng"
+
+    # MATCHING - "match" with letter options or a letter range, Roman numerals,
+    # or "A has ..." statements
+    if (cues.has("MATCH") and (cues.option_letters or cues.bare_letters or cues.ranges)) \
+            or cues.has("ROMAN") or cues.has("LETTER_CLAIM"):
+        return "matching"
+
+    # MULTIPLE CHOICE - A) B) C) or A. B. C.
+    if cues.option_letters & set("ABCD"):
+        return "multiple_choice"
+
+    # HEADING MATCHING
+    if cues.has("HEADING"):
+        return "heading_matching"
+
+    # SENTENCE COMPLETION / GAP FILL
+    if cues.before("COMPLETE", "SENTENCE") or cues.has("BLANK"):
+        return "gap_fill"
+
+    # SUMMARY/NOTE COMPLETION
+    if cues.before("COMPLETE", "SUMMARY") or cues.before("COMPLETE", "NOTE") \
+            or cues.near("NOTE", "FORM"):
+        return "summary_completion"
+
+    # SHORT ANSWER
+    if cues.before("ANSWER", "QUESTION") or cues.has("SHORT_ANSWER") \
+            or cues.near("ANSWER", "WORD"):
+        return "short_answer"
+
+    return "open_question"
+
+
+def classify_listening_question(text: str) -> str:
+    """Determine the type of a listening question"""
+    cues = scan(text)
+
+    # MATCHING - "match" wins unless the question also lists real options
+    # ("A) ... B) ..."); a letter range ("person, A-E") is not an option
+    if cues.has("MATCH"):
+        if len(cues.option_letters & set("ABCD")) >= 2:
+            return "multiple_choice"
+        return "matching"
+
+    # MULTIPLE CHOICE - a letter A-D standing on its own (not a range)
+    if (cues.option_letters | cues.bare_letters) & set("ABCD"):
+        return "multiple_choice"
+
+    # GAP FILL - dots/ellipses or completion wording
+    if cues.has("DOT") or cues.has("BLANK") or cues.has("FILL") or cues.has("COMPLETE"):
+        return "gap_fill"
+
+    return "open_question"
+
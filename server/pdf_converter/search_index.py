@@ -0,0 +1,504 @@
+"""
+Search Index for Material Sets
+Finding the set that contains a passage or question meant opening every set,
+or parsing every stored content JSON. This module keeps an inverted index of
+all material set content on disk (SQLite, so nothing is loaded into memory
+beyond the postings of the terms being queried):
+
+    documents   one row per searchable unit: a part/passage/task's own text
+                (title, instructions, passage content, shared options) or
+                one question (text and options)
+    terms       term -> number of sets containing it
+    postings    (term, set) -> the set's documents containing the term and
+                the word positions in each, delta/varint encoded
+
+Postings are kept per set rather than per document, which keeps the index
+to a few rows per term and set, and lets a saved set be re-indexed by
+replacing its own rows; sets whose content did not change are skipped.
+
+Queries are words, "quoted phrases" and prefixes (tunn*). Every clause must
+match; documents are ranked by the number of matches.
+
+Usage:
+    python search_index.py update < changes.jsonl   # {"set_id": 3, "content": {...}}, content null removes
+    python search_index.py search "thames tunn*" --limit 20
+    python search_index.py stats
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Any, Tuple, Optional, Iterable, Iterator
+
+DEFAULT_INDEX_PATH = Path(__file__).resolve().parent.parent / "data" / "search_index.sqlite"
+
+SCHEMA_VERSION = 1
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    doc_id INTEGER PRIMARY KEY,
+    set_id INTEGER NOT NULL,
+    section TEXT NOT NULL,
+    container TEXT NOT NULL,
+    question TEXT NOT NULL,
+    preview TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS documents_set ON documents (set_id);
+CREATE TABLE IF NOT EXISTS terms (
+    term TEXT PRIMARY KEY,
+    set_count INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS postings (
+    term TEXT NOT NULL,
+    set_id INTEGER NOT NULL,
+    data BLOB NOT NULL,
+    PRIMARY KEY (term, set_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS postings_set ON postings (set_id);
+CREATE TABLE IF NOT EXISTS indexed_sets (
+    set_id INTEGER PRIMARY KEY,
+    content_hash TEXT NOT NULL,
+    indexed_at REAL NOT NULL
+);
+"""
+
+TOKEN = re.compile(r"\w+")
+# Lists under a section that hold its parts, passages or tasks
+CONTAINER_KEYS = {"parts": "part", "passages": "passage", "tasks": "task"}
+NUMBER_KEYS = ("part_number", "passage_number", "task_number", "number")
+QUESTION_TEXT_KEYS = ("text", "prompt", "statement", "question")
+# Values that are identifiers, layout or limits rather than text
+SKIPPED_KEYS = {
+    "id", "type", "label", "word_limit", "time_limit", "option_pool",
+    "image_url", "thumbnail_url", "image_placeholder_key", "visual_context",
+    "visual_structure", "paragraph_spans",
+}
+
+PREVIEW_CHARS = 160
+# A prefix must be this long, and expands to at most this many terms
+MIN_PREFIX_CHARS = 2
+MAX_PREFIX_TERMS = 200
+# Below this many candidate sets, postings are fetched per set
+CANDIDATE_LOOKUP_LIMIT = 500
+
+
+class SearchIndexError(ValueError):
+    """An index file this version cannot use"""
+
+
+# ----------------------------------------------------------------------
+# Text extraction
+# ----------------------------------------------------------------------
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN.findall(text.lower())
+
+
+def _strings(node: Any, skip: Iterable[str] = ()) -> Iterator[str]:
+    """String leaves of a JSON node, skipping non-text keys"""
+    if isinstance(node, str):
+        if node.strip():
+            yield node
+    elif isinstance(node, dict):
+        for key, value in node.items():
+            if key not in SKIPPED_KEYS and key not in skip:
+                yield from _strings(value)
+    elif isinstance(node, list):
+        for item in node:
+            yield from _strings(item)
+
+
+def _container_number(container: Dict[str, Any], index: int) -> Any:
+    for key in NUMBER_KEYS:
+        if container.get(key) is not None:
+            return container[key]
+    return index + 1
+
+
+def _question_text(question: Dict[str, Any]) -> str:
+    # The question's own wording first, so it leads the preview
+    lead = [question[key] for key in QUESTION_TEXT_KEYS if isinstance(question.get(key), str)]
+    rest = _strings(question, skip=QUESTION_TEXT_KEYS)
+    return "\n".join([*lead, *rest])
+
+
+def extract_documents(content: Dict[str, Any]) -> Dict[Tuple[str, str, str], str]:
+    """
+    Searchable units of a set's content JSON (stored or converter output).
+
+    Returns (section, container, question) -> text; question is "" for the
+    container's own text.
+    """
+    documents: Dict[Tuple[str, str, str], str] = {}
+    for section in content.get("sections") or []:
+        if not isinstance(section, dict):
+            continue
+        section_type = str(section.get("type") or "").lower()
+        for list_key, kind in CONTAINER_KEYS.items():
+            for index, container in enumerate(section.get(list_key) or []):
+                if not isinstance(container, dict):
+                    continue
+                name = f"{kind} {_container_number(container, index)}"
+                own_text = "\n".join(_strings(container, skip=("questions",)))
+                if own_text:
+                    documents[(section_type, name, "")] = own_text
+                for question in container.get("questions") or []:
+                    if not isinstance(question, dict):
+                        continue
+                    text = _question_text(question)
+                    if text:
+                        documents[(section_type, name, str(question.get("id", "")))] = text
+    return documents
+
+
+# ----------------------------------------------------------------------
+# Posting lists
+# ----------------------------------------------------------------------
+
+def _write_varint(out: bytearray, value: int) -> None:
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varints(data: bytes) -> Iterator[int]:
+    value = shift = 0
+    for byte in data:
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+            continue
+        yield value
+        value = shift = 0
+
+
+def encode_postings(postings: Dict[int, List[int]]) -> bytes:
+    """
+    doc_id -> ascending positions, as varints:
+    doc id gap, position count, position gaps, ... for each document
+    """
+    out = bytearray()
+    previous_doc = 0
+    for doc_id in sorted(postings):
+        positions = postings[doc_id]
+        _write_varint(out, doc_id - previous_doc)
+        _write_varint(out, len(positions))
+        previous_doc, previous = doc_id, 0
+        for position in positions:
+            _write_varint(out, position - previous)
+            previous = position
+    return bytes(out)
+
+
+def decode_postings(data: bytes) -> Dict[int, List[int]]:
+    postings: Dict[int, List[int]] = {}
+    values = _read_varints(data)
+    doc_id = 0
+    for gap in values:
+        doc_id += gap
+        position = 0
+        positions = []
+        for _ in range(next(values)):
+            position += next(values)
+            positions.append(position)
+        postings[doc_id] = positions
+    return postings
+
+
+# ----------------------------------------------------------------------
+# Index
+# ----------------------------------------------------------------------
+
+def _hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+def _prefix_end(prefix: str) -> str:
+    """Smallest string greater than every string starting with prefix"""
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+class SearchIndex:
+    """Inverted index over material set content, stored in one SQLite file"""
+
+    def __init__(self, index_path: Optional[str] = None):
+        self.index_path = Path(index_path) if index_path else DEFAULT_INDEX_PATH
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        # Node may run an update and a search at once; writers wait their turn
+        self.db = sqlite3.connect(str(self.index_path), timeout=30)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        version = self.db.execute("PRAGMA user_version").fetchone()[0]
+        if version not in (0, SCHEMA_VERSION):
+            raise SearchIndexError(f"Search index schema {version} is not supported, delete {self.index_path}")
+        self.db.executescript(SCHEMA)
+        self.db.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def close(self) -> None:
+        self.db.close()
+
+    # ------------------------------------------------------------------
+    # Updates
+    # ------------------------------------------------------------------
+
+    def index_set(self, set_id: int, content: Optional[Dict[str, Any]]) -> Dict[str, int]:
+        """
+        Bring one set's entries in line with its content (None removes the set).
+
+        Returns the number of documents written and removed (both 0 when
+        the content is unchanged).
+        """
+        set_id = int(set_id)
+        content_hash = _hash(json.dumps(content, sort_keys=True, ensure_ascii=False)) if content else None
+        stored = self.db.execute("SELECT content_hash FROM indexed_sets WHERE set_id = ?", (set_id,)).fetchone()
+        if (stored[0] if stored else None) == content_hash:
+            return {"written": 0, "removed": 0}
+
+        with self.db:
+            removed = self._remove_set(set_id)
+            written = 0
+            if content_hash:
+                written = self._add_set(set_id, extract_documents(content))
+                self.db.execute(
+                    "INSERT OR REPLACE INTO indexed_sets (set_id, content_hash, indexed_at) VALUES (?, ?, ?)",
+                    (set_id, content_hash, time.time()),
+                )
+            else:
+                self.db.execute("DELETE FROM indexed_sets WHERE set_id = ?", (set_id,))
+        return {"written": written, "removed": removed}
+
+    def _add_set(self, set_id: int, documents: Dict[Tuple[str, str, str], str]) -> int:
+        postings: Dict[str, Dict[int, List[int]]] = {}
+        for (section, container, question), text in documents.items():
+            cursor = self.db.execute(
+                "INSERT INTO documents (set_id, section, container, question, preview) VALUES (?, ?, ?, ?, ?)",
+                (set_id, section, container, question, " ".join(text.split())[:PREVIEW_CHARS]),
+            )
+            for position, term in enumerate(tokenize(text)):
+                postings.setdefault(term, {}).setdefault(cursor.lastrowid, []).append(position)
+
+        # Sorted by term, the inserts walk both B-trees in order
+        terms = sorted(postings)
+        self.db.executemany(
+            "INSERT INTO postings (term, set_id, data) VALUES (?, ?, ?)",
+            ((term, set_id, encode_postings(postings[term])) for term in terms),
+        )
+        self.db.executemany(
+            "INSERT INTO terms (term, set_count) VALUES (?, 1) "
+            "ON CONFLICT (term) DO UPDATE SET set_count = set_count + 1",
+            ((term,) for term in terms),
+        )
+        return len(documents)
+
+    def _remove_set(self, set_id: int) -> int:
+        terms = [row[0] for row in self.db.execute("SELECT term FROM postings WHERE set_id = ?", (set_id,))]
+        self.db.executemany("UPDATE terms SET set_count = set_count - 1 WHERE term = ?", ((term,) for term in terms))
+        self.db.execute("DELETE FROM terms WHERE set_count <= 0")
+        self.db.execute("DELETE FROM postings WHERE set_id = ?", (set_id,))
+        return self.db.execute("DELETE FROM documents WHERE set_id = ?", (set_id,)).rowcount
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def parse_query(query: str) -> List[List[Tuple[str, bool]]]:
+        """
+        Query -> clauses; a clause is a run of (token, is_prefix) that must
+        appear in order. A bare word is a one-token clause.
+        """
+        clauses = []
+        for phrase, word in re.findall(r'"([^"]*)"|(\S+)', query or ""):
+            clause = []
+            for part in (phrase or word).split():
+                tokens = tokenize(part)
+                if not tokens:
+                    continue
+                prefix = part.endswith("*") and len(tokens[-1]) >= MIN_PREFIX_CHARS
+                clause.extend((token, False) for token in tokens[:-1])
+                clause.append((tokens[-1], prefix))
+            if clause:
+                clauses.append(clause)
+        return clauses
+
+    def _expand(self, token: str, prefix: bool) -> List[Tuple[str, int]]:
+        """Indexed terms (with document counts) a query token stands for"""
+        if not prefix:
+            return self.db.execute("SELECT term, set_count FROM terms WHERE term = ?", (token,)).fetchall()
+        return self.db.execute(
+            "SELECT term, set_count FROM terms WHERE term >= ? AND term < ? ORDER BY set_count DESC LIMIT ?",
+            (token, _prefix_end(token), MAX_PREFIX_TERMS),
+        ).fetchall()
+
+    def _positions(self, terms: List[str], candidates: Optional[Dict[int, int]]) -> Dict[int, Tuple[int, set]]:
+        """
+        doc_id -> (set_id, positions of any of the terms), limited to
+        candidate documents (doc_id -> set_id)
+        """
+        candidate_sets = set(candidates.values()) if candidates is not None else None
+        found: Dict[int, Tuple[int, set]] = {}
+        for term in terms:
+            if candidate_sets is not None and len(candidate_sets) <= CANDIDATE_LOOKUP_LIMIT:
+                marks = ",".join("?" * len(candidate_sets))
+                rows = self.db.execute(
+                    f"SELECT set_id, data FROM postings WHERE term = ? AND set_id IN ({marks})",
+                    (term, *candidate_sets),
+                )
+            else:
+                rows = self.db.execute("SELECT set_id, data FROM postings WHERE term = ?", (term,))
+            for set_id, data in rows:
+                if candidate_sets is not None and set_id not in candidate_sets:
+                    continue
+                for doc_id, positions in decode_postings(data).items():
+                    if candidates is None or doc_id in candidates:
+                        found.setdefault(doc_id, (set_id, set()))[1].update(positions)
+        return found
+
+    def _match_clause(self, clause: List[Tuple[str, bool]], candidates: Optional[Dict[int, int]]) -> Dict[int, Tuple[int, int]]:
+        """doc_id -> (set_id, number of occurrences of the clause)"""
+        expanded = [self._expand(token, prefix) for token, prefix in clause]
+        if any(not terms for terms in expanded):
+            return {}
+
+        # Fetch the rarest token first: its sets bound every other lookup
+        order = sorted(range(len(clause)), key=lambda i: sum(count for _, count in expanded[i]))
+        per_token: Dict[int, Dict[int, Tuple[int, set]]] = {}
+        for i in order:
+            per_token[i] = self._positions([term for term, _ in expanded[i]], candidates)
+            candidates = {doc_id: set_id for doc_id, (set_id, _) in per_token[i].items()}
+            if not candidates:
+                return {}
+
+        matches = {}
+        for doc_id, set_id in candidates.items():
+            starts = per_token[0][doc_id][1]
+            for offset in range(1, len(clause)):
+                following = per_token[offset][doc_id][1]
+                starts = {start for start in starts if start + offset in following}
+                if not starts:
+                    break
+            if starts:
+                matches[doc_id] = (set_id, len(starts))
+        return matches
+
+    def search(self, query: str, limit: int = 20) -> Dict[str, Any]:
+        """Documents matching every clause of the query, best first"""
+        started = time.perf_counter()
+        clauses = self.parse_query(query)
+
+        # doc_id -> (set_id, matches so far); a query without words matches nothing
+        scores: Optional[Dict[int, Tuple[int, int]]] = None if clauses else {}
+        for clause in clauses:
+            candidates = {doc_id: set_id for doc_id, (set_id, _) in scores.items()} if scores is not None else None
+            matches = self._match_clause(clause, candidates)
+            scores = {
+                doc_id: (set_id, count + (scores[doc_id][1] if scores is not None else 0))
+                for doc_id, (set_id, count) in matches.items()
+            }
+            if not scores:
+                break
+
+        ranked = sorted(((doc_id, count) for doc_id, (_, count) in scores.items()),
+                        key=lambda item: (-item[1], item[0]))
+        results = []
+        for doc_id, count in ranked[:limit]:
+            set_id, section, container, question, preview = self.db.execute(
+                "SELECT set_id, section, container, question, preview FROM documents WHERE doc_id = ?",
+                (doc_id,),
+            ).fetchone()
+            results.append({
+                "set_id": set_id,
+                "section": section,
+                "container": container,
+                "question": question or None,
+                "matches": count,
+                "preview": preview,
+            })
+        return {
+            "query": query,
+            "total": len(ranked),
+            "results": results,
+            "took_ms": round((time.perf_counter() - started) * 1000, 2),
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        count = lambda table: self.db.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        return {
+            "sets": count("indexed_sets"),
+            "documents": count("documents"),
+            "terms": count("terms"),
+            "postings": count("postings"),
+            "bytes": self.index_path.stat().st_size,
+        }
+
+
+def apply_changes(lines: Iterable[str], index_path: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Apply JSON-lines changes ({"set_id": 3, "content": {...} or null}).
+
+    Returns counts of sets indexed, unchanged and removed and of documents
+    written and removed.
+    """
+    summary = {"sets_indexed": 0, "sets_unchanged": 0, "sets_removed": 0,
+               "documents_written": 0, "documents_removed": 0}
+    index = SearchIndex(index_path)
+    try:
+        for line in lines:
+            if not line.strip():
+                continue
+            change = json.loads(line)
+            content = change.get("content")
+            if isinstance(content, str):
+                content = json.loads(content) if content.strip() else None
+            result = index.index_set(change["set_id"], content)
+            if content is None:
+                summary["sets_removed"] += 1
+            elif result["written"] or result["removed"]:
+                summary["sets_indexed"] += 1
+            else:
+                summary["sets_unchanged"] += 1
+            summary["documents_written"] += result["written"]
+            summary["documents_removed"] += result["removed"]
+    finally:
+        index.close()
+    return summary
+
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Inverted index over material set content")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("update", help="Apply JSON-lines set changes from stdin")
+    search = commands.add_parser("search")
+    search.add_argument("query")
+    search.add_argument("--limit", type=int, default=20)
+    commands.add_parser("stats")
+    args = parser.parse_args(argv)
+
+    index_path = os.environ.get("SEARCH_INDEX_PATH")
+    try:
+        if args.command == "update":
+            output = apply_changes(sys.stdin, index_path)
+        else:
+            index = SearchIndex(index_path)
+            try:
+                output = index.search(args.query, args.limit) if args.command == "search" else index.stats()
+            finally:
+                index.close()
+    except (SearchIndexError, sqlite3.Error, ValueError, KeyError) as e:
+        output = {"success": False, "errors": [str(e)]}
+        print(json.dumps(output, ensure_ascii=False, separators=(",", ":")))
+        return 1
+
+    print(json.dumps(output, ensure_ascii=False, separators=(",", ":")))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,9 @@
+"""
+The converter modules import each other by bare name (Node runs them from
+this directory), so the tests put the same directory on sys.path.
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
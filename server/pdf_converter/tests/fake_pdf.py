@@ -0,0 +1,47 @@
+"""PyMuPDF stand-ins for building span tables in tests"""
+
+import json
+
+from pdf_spans import build_span_table, cache_path_for, write_span_table
+
+
+class FakePage:
+    """Stands in for a PyMuPDF page: get_text() and get_text("dict")"""
+
+    rect = (0, 0, 595, 842)
+
+    def __init__(self, lines):
+        self.lines = lines
+
+    def get_fonts(self):
+        return [(1, "ttf", "TrueType", "ABCDEF+Arial", "F1", "")]
+
+    def get_text(self, mode="text"):
+        if mode == "text":
+            return "".join("".join(text for text, _, _ in line) + "\n" for line in self.lines)
+        blocks = [{"type": 0, "lines": []}]
+        for y, line in enumerate(self.lines):
+            spans = []
+            x = 50.0
+            for text, size, flags in line:
+                spans.append({"text": text, "size": size, "flags": flags, "font": "Arial",
+                              "color": 0, "bbox": (x, 50.0 + y * 20, x + len(text) * size / 2, 50.0 + y * 20 + size)})
+                x += len(text) * size / 2
+            blocks[0]["lines"].append({"spans": spans})
+        return {"blocks": blocks}
+
+
+class FakeDoc(list):
+    metadata = {"producer": "Fixture", "creator": ""}
+
+
+def write_fake_pdf(pdf_path, pages, cache_dir):
+    """
+    Write a stand-in PDF whose span table is already cached, so converters
+    read pages of plain text lines without PyMuPDF. Each edit of the pages
+    gives a new file and so a new cache entry.
+    """
+    with open(pdf_path, "w", encoding="utf-8") as f:
+        json.dump(pages, f)
+    doc = FakeDoc(FakePage([[(line, 11.0, 0)] for line in page]) for page in pages)
+    write_span_table(str(cache_path_for(str(pdf_path), str(cache_dir))), build_span_table(doc))
@@ -0,0 +1,48 @@
+"""Spelling-tolerance cases for answer_matching"""
+
+import pytest
+
+from answer_matching import BLANK, EXACT, NEAR, WRONG, AnswerKeyIndex
+from item_statistics import normalize_answer
+
+ANSWER_KEY = {"answers": {
+    "listening": [
+        {"question": 1, "answer": "Freezer"},
+        {"question": 3, "answer": "1200"},
+        {"question": 4, "answer": "DELAWARR"},
+        {"question": 11, "answer": "A"},
+        {"question": 33, "answer": "Tunnels"},
+    ],
+    "reading": [
+        {"question": 1, "answer": "NG"},
+        {"question": 22, "answer": "CROSS-DOCKING"},
+        {"question": 24, "answer": "DEMAND INNOVATIONS"},
+    ],
+}}
+
+# (section, question, user answer, expected status)
+CASES = [
+    ("listening", 1, "freezer ", EXACT),
+    ("listening", 1, "freezr", NEAR),
+    ("listening", 1, "freeser", NEAR),
+    ("listening", 1, "fridge", WRONG),
+    ("listening", 3, "1220", WRONG),
+    ("listening", 4, "Delaware", NEAR),
+    ("listening", 11, "B", WRONG),
+    ("listening", 33, "tunels", NEAR),
+    ("listening", 33, "tunnnels", NEAR),
+    ("listening", 33, "channels", WRONG),
+    ("listening", 33, "", BLANK),
+    ("reading", 1, "not given", EXACT),
+    ("reading", 22, "cross docking", NEAR),
+    ("reading", 22, "crossdocking", NEAR),
+    ("reading", 24, "demand  innovation", NEAR),
+    ("reading", 24, "demand innovations", EXACT),
+    ("reading", 40, "anything", WRONG),
+]
+
+
+@pytest.mark.parametrize("section, question, answer, expected", CASES)
+def test_classifies_answer(section, question, answer, expected):
+    status, _ = AnswerKeyIndex(ANSWER_KEY).classify(section, question, normalize_answer(answer))
+    assert status == expected
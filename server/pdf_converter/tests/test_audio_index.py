@@ -0,0 +1,75 @@
+"""Duration and seek table cases for audio_index"""
+
+import struct
+from typing import Optional, Tuple
+
+import pytest
+
+from audio_index import OGG_PAGE_HEADER, index_audio_bytes
+
+
+def mp3_file(frames: int, gapless: Optional[Tuple[int, int]] = None, junk: bytes = b"") -> bytes:
+    """MPEG-1 Layer III, 128 kbit/s, 44.1 kHz stereo frames with silent payloads"""
+    def frame(padding: int) -> bytes:
+        length = 144 * 128000 // 44100 + padding
+        return bytes([0xFF, 0xFB, 0x90 | (padding << 1), 0x00]) + bytes(length - 4)
+
+    id3 = b"ID3\x03\x00\x00\x00\x00\x00\x0a" + bytes(10)
+    out = bytearray(id3)
+    if gapless:
+        tag = bytearray(frame(0))
+        tag[36:44] = b"Info" + struct.pack(">I", 0)
+        tag[44:48] = b"LAME"
+        tag[44 + 21:44 + 24] = ((gapless[0] << 12) | gapless[1]).to_bytes(3, "big")
+        out += tag
+    for number in range(frames):
+        out += frame(number % 3 == 1)
+        if number == frames // 2:
+            out += junk
+    return bytes(out + b"TAG" + bytes(125))
+
+
+def wav_file(seconds: float, rate: int = 16000) -> bytes:
+    frames = int(seconds * rate)
+    fmt = struct.pack("<HHIIHH", 1, 1, rate, rate * 2, 2, 16)
+    body = b"fmt " + struct.pack("<I", len(fmt)) + fmt + b"LIST" + struct.pack("<I", 3) + b"abc\x00"
+    body += b"data" + struct.pack("<I", frames * 2) + bytes(frames * 2)
+    return b"RIFF" + struct.pack("<I", 4 + len(body)) + b"WAVE" + body
+
+
+def ogg_opus_file(seconds: int) -> bytes:
+    def page(granule: int, sequence: int, payload: bytes) -> bytes:
+        lacing = bytes([255] * (len(payload) // 255) + [len(payload) % 255])
+        return OGG_PAGE_HEADER.pack(b"OggS", 0, 0, granule, 7, sequence, 0, len(lacing)) + lacing + payload
+
+    head = b"OpusHead" + bytes([1, 2]) + struct.pack("<HIhB", 312, 48000, 0, 0)
+    out = page(0, 0, head) + page(0, 1, b"OpusTags" + bytes(8))
+    for second in range(seconds):
+        out += page(312 + (second + 1) * 48000, second + 2, bytes(300))
+    return out
+
+
+# (description, file bytes, expected duration, expected seek entries)
+CASES = [
+    ("mp3 cbr", mp3_file(1000), round(1000 * 1152 / 44100, 3), 3),
+    ("mp3 lame gapless", mp3_file(1000, (576, 1000)), round((1000 * 1152 - 1576) / 44100, 3), 3),
+    ("mp3 junk between frames", mp3_file(1000, junk=b"\xff\xfb\x00garbage"), round(1000 * 1152 / 44100, 3), 3),
+    ("wav", wav_file(25), 25.0, 3),
+    ("ogg opus", ogg_opus_file(40), 40.0, 4),
+]
+
+
+@pytest.mark.parametrize("description, data, duration, entries", CASES, ids=[case[0] for case in CASES])
+def test_index_audio_bytes(description, data, duration, entries):
+    index = index_audio_bytes(data)
+    offsets = index["seek_offsets"]
+    assert index["duration"] == duration
+    assert len(offsets) == entries
+    assert offsets == sorted(offsets)
+    assert offsets[0] >= index["audio_start"]
+
+
+def test_seek_entries_are_seek_interval_apart():
+    index = index_audio_bytes(wav_file(25))
+    step = index["seek_interval"] * index["sample_rate"] * 2
+    assert index["seek_offsets"] == [index["audio_start"] + point * step for point in range(3)]
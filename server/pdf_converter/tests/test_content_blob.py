@@ -0,0 +1,87 @@
+"""Cross-language round trips between content_blob and utils/contentBlob.js"""
+
+import base64
+import json
+import shutil
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from content_blob import HEADER, ContentBlobError, dictionary_id, pack, train_dictionary, unpack
+
+CONTENT_BLOB_JS = Path(__file__).resolve().parents[2] / "utils" / "contentBlob.js"
+
+# Loads contentBlob.js with an empty ../db module: the codec never queries it
+NODE_SCRIPT = """
+const path = require("path");
+const Module = require("module");
+const blobPath = process.argv[1];
+const dbPath = require.resolve(path.join(path.dirname(blobPath), "../db"));
+const dbModule = new Module(dbPath);
+dbModule.filename = dbPath;
+dbModule.loaded = true;
+require.cache[dbPath] = dbModule;
+const blobs = require(blobPath);
+
+let input = "";
+process.stdin.on("data", (chunk) => { input += chunk; });
+process.stdin.on("end", () => {
+  const request = JSON.parse(input);
+  const dictionary = Buffer.from(request.dictionary, "base64");
+  const output = { dictionaryId: blobs.dictionaryId(dictionary) };
+  if (request.blob) {
+    output.json = blobs.unpackContentBlob(Buffer.from(request.blob, "base64"), dictionary);
+  } else {
+    output.blob = blobs.packContentBlob(request.json, dictionary).toString("base64");
+  }
+  process.stdout.write(JSON.stringify(output));
+});
+"""
+
+SETS = [
+    {"sections": [{"type": "reading", "passages": [{"passage_number": n, "title": f"Passage {n}",
+                   "questions": [{"id": q, "type": "true_false_ng", "options": ["TRUE", "FALSE", "NOT GIVEN"],
+                                  "statement": f"Statement {q} about caf\u00e9s"} for q in range(1, 14)]}]}]}
+    for n in range(1, 4)
+]
+
+pytestmark = pytest.mark.skipif(shutil.which("node") is None, reason="node is not installed")
+
+
+def run_node(request):
+    completed = subprocess.run(["node", "-e", NODE_SCRIPT, str(CONTENT_BLOB_JS)],
+                               input=json.dumps(request), capture_output=True, text=True, encoding="utf-8")
+    assert completed.returncode == 0, completed.stderr
+    return json.loads(completed.stdout)
+
+
+@pytest.fixture(scope="module")
+def dictionary():
+    return train_dictionary([json.dumps(content) for content in SETS])
+
+
+def test_python_blob_reads_in_node(dictionary):
+    content = json.dumps(SETS[1], ensure_ascii=False, separators=(",", ":"))
+    blob = pack(content, dictionary)
+    output = run_node({"dictionary": base64.b64encode(dictionary).decode(),
+                       "blob": base64.b64encode(blob).decode()})
+    assert output["dictionaryId"] == dictionary_id(dictionary)
+    assert output["json"] == content
+
+
+def test_node_blob_reads_in_python(dictionary):
+    content = json.dumps(SETS[2], ensure_ascii=False, separators=(",", ":"))
+    output = run_node({"dictionary": base64.b64encode(dictionary).decode(), "json": content})
+    blob = base64.b64decode(output["blob"])
+
+    magic, version, codec, dict_id, length, _ = HEADER.unpack_from(blob)
+    assert (magic, version, codec, dict_id.hex()) == (b"IELC", 1, 1, dictionary_id(dictionary))
+    assert length == len(content.encode("utf-8"))
+    assert unpack(blob, {dictionary_id(dictionary): dictionary}).decode("utf-8") == content
+    # Compressed bytes may differ between zlib builds; the header may not
+    assert blob[:HEADER.size] == pack(content, dictionary)[:HEADER.size]
+
+    corrupt = blob[:HEADER.size - 1] + bytes([blob[HEADER.size - 1] ^ 1]) + blob[HEADER.size:]
+    with pytest.raises(ContentBlobError, match="checksum"):
+        unpack(corrupt, {dictionary_id(dictionary): dictionary})
@@ -0,0 +1,29 @@
+"""Preview cases for conversion_staging"""
+
+from conversion_staging import build_preview
+
+TEST_DATA = {
+    "test_info": {"title": "IELTS Reading Test 1", "test_type": "reading", "total_questions": 40},
+    "sections": [{"type": "reading"}, {"type": "reading"}, {"type": "reading"}],
+    "metadata": {
+        "source": "/srv/app/server/uploads/pdfs/upload-1.pdf",
+        "instruction_blocks": [{"range": [1, 13]}],
+        "validation": {"overall_score": 0.92},
+    },
+}
+
+
+def test_preview_summarises_the_test():
+    preview = build_preview(TEST_DATA)
+    assert preview["testName"] == "IELTS Reading Test 1"
+    assert preview["sections"] == 3
+    assert preview["sectionTypes"] == ["reading", "reading", "reading"]
+    assert preview["questions"] == 40
+
+
+def test_preview_keeps_only_validation_metadata():
+    assert build_preview(TEST_DATA)["metadata"] == {"validation": {"overall_score": 0.92}}
+
+
+def test_preview_of_empty_result():
+    assert build_preview(None)["metadata"] == {"validation": None}
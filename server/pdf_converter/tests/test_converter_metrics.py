@@ -0,0 +1,67 @@
+"""Prometheus rendering cases for converter_metrics"""
+
+import pytest
+
+from converter_metrics import ConversionMetrics, MetricsStore, main, record_crash
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    # Recording is skipped when PDF_METRICS=0 is set in the environment
+    monkeypatch.delenv("PDF_METRICS", raising=False)
+    monkeypatch.delenv("PDF_METRICS_TEXTFILE", raising=False)
+    store = MetricsStore(str(tmp_path / "metrics.sqlite"))
+    yield store
+    store.close()
+
+
+def two_conversions(store):
+    first = ConversionMetrics()
+    first.converter, first.pages, first.cache_result = "v4", 12, "miss"
+    first.stages = {"convert": 2.0, "validate": 0.04}
+    first.record({"success": True}, store)
+    second = ConversionMetrics()
+    second.converter = "v4"
+    second.record({"success": False}, store)
+    record_crash("timeout", store)
+    return store.render()
+
+
+# (description, expected lines)
+CASES = [
+    ("outcomes are counted per label set", [
+        'ielts_converter_conversions_total{converter="v4",outcome="success"} 1',
+        'ielts_converter_conversions_total{converter="v4",outcome="failed"} 1',
+        'ielts_converter_conversions_total{converter="unknown",outcome="crashed"} 1',
+        'ielts_converter_crashes_total{reason="timeout"} 1',
+    ]),
+    ("histogram buckets are cumulative", [
+        'ielts_converter_stage_seconds_bucket{stage="convert",le="1"} 0',
+        'ielts_converter_stage_seconds_bucket{stage="convert",le="2.5"} 1',
+        'ielts_converter_stage_seconds_bucket{stage="convert",le="+Inf"} 1',
+        'ielts_converter_stage_seconds_sum{stage="convert"} 2',
+        'ielts_converter_pages_per_second_bucket{le="10"} 1',
+        'ielts_converter_pages_total 12',
+        'ielts_converter_cache_requests_total{cache="incremental",result="miss"} 1',
+        '# TYPE ielts_converter_stage_seconds histogram',
+    ]),
+]
+
+
+@pytest.mark.parametrize("description, expected", CASES, ids=[case[0] for case in CASES])
+def test_render(store, description, expected):
+    lines = two_conversions(store).splitlines()
+    assert [line for line in expected if line not in lines] == []
+
+
+def test_record_crash_command(tmp_path, monkeypatch, capsys):
+    monkeypatch.delenv("PDF_METRICS_TEXTFILE", raising=False)
+    path = str(tmp_path / "metrics.sqlite")
+    assert main(["--store", path, "record-crash", "timeout"]) == 0
+    assert capsys.readouterr().out.strip() == '{"success":true}'
+
+    store = MetricsStore(path)
+    try:
+        assert 'ielts_converter_crashes_total{reason="timeout"} 1' in store.render().splitlines()
+    finally:
+        store.close()
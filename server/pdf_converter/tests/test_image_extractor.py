@@ -0,0 +1,63 @@
+"""Visual slot location cases for image_extractor"""
+
+import pytest
+
+from image_extractor import ImageExtractor, attach_images_to_test_data
+
+
+def pages(*texts):
+    return [{"page": number, "content": text} for number, text in enumerate(texts, 1)]
+
+
+# (description, page texts, expected placeholder key -> pages)
+CASES = [
+    ("listening map part",
+     pages("LISTENING\nPART 1\nQuestions 1-10\nComplete the form below.",
+           "PART 2\nQuestions 11-15\nLabel the map below.",
+           "Write the correct letter, A-H.",
+           "PART 3\nQuestions 21-30\nChoose the correct letter."),
+     {"listening_part_2_visual": [2, 3]}),
+    ("listening cue stops at the next part",
+     pages("PART 1\nQuestions 1-10\nComplete the notes.\nPART 2\nLook at the floor plan of the museum."),
+     {"listening_part_2_visual": [1]}),
+    ("generic plan wording is not a visual cue",
+     pages("PART 3\nQuestions 21-30\nWhat is the plan for the students' project?"),
+     {}),
+    ("speaking parts are not listening parts",
+     pages("PART 1\nComplete the table below.",
+           "SPEAKING\nPART 2\nDescribe a map you have used. Look at the map below.",
+           "PART 3\nDiscussion topics"),
+     {}),
+    ("writing task 1 only",
+     pages("READING\nREADING PASSAGE 1\nA plan for the city",
+           "WRITING\nWRITING TASK 1\nThe diagram below shows a process.",
+           "WRITING TASK 2\nSome people believe..."),
+     {"writing_task_1_visual": [2]}),
+    ("reading pages after a listening map belong to no slot",
+     pages("PART 4\nLabel the diagram below.",
+           "READING\nREADING PASSAGE 1\nThe diagram below shows a bridge."),
+     {"listening_part_4_visual": [1]}),
+]
+
+
+@pytest.mark.parametrize("description, text_by_page, expected", CASES, ids=[case[0] for case in CASES])
+def test_locate_visual_pages(description, text_by_page, expected):
+    extractor = ImageExtractor("unused.pdf")
+    assert extractor._locate_visual_pages(text_by_page) == expected
+
+
+def test_attach_images_fills_slots_largest_first():
+    test_data = {"sections": [
+        {"type": "listening", "parts": [{"part_number": 1}, {"part_number": 2}]},
+        {"type": "writing", "tasks": [{"task_number": 1}]},
+    ]}
+    images = [{"file_url": f"/img/{name}.png", "thumbnail_url": f"/img/{name}_thumb.png"} for name in ("big", "small")]
+
+    assets = attach_images_to_test_data(test_data, {"listening_part_2_visual": images})
+
+    part = test_data["sections"][0]["parts"][1]
+    assert part["image_url"] == "/img/big.png"
+    assert part["thumbnail_url"] == "/img/big_thumb.png"
+    assert "image_url" not in test_data["sections"][0]["parts"][0]
+    assert "image_url" not in test_data["sections"][1]["tasks"][0]
+    assert [asset["placeholder_key"] for asset in assets] == ["listening_part_2_visual", "listening_part_2_visual_2"]
@@ -0,0 +1,15 @@
+"""Import-time budget of the Node entry point (import_budget)"""
+
+from import_budget import (DEFAULT_CONVERTER_BUDGET_MS, DEFAULT_RUNS, DEFAULT_STARTUP_BUDGET_MS,
+                           check, parse_importtime)
+
+
+def test_parse_importtime():
+    stderr = ("import time: self [us] | cumulative | imported package\n"
+              "import time:       516 |      82628 | node_interface\n"
+              "import time:        80 |        120 |   json.decoder\n")
+    assert parse_importtime(stderr) == [(0, "node_interface", 516, 82628), (1, "json.decoder", 80, 120)]
+
+
+def test_node_interface_within_budget():
+    assert check(DEFAULT_RUNS, DEFAULT_STARTUP_BUDGET_MS, DEFAULT_CONVERTER_BUDGET_MS) == []
@@ -0,0 +1,87 @@
+"""Reuse, splice and fallback cases for incremental_conversion"""
+
+import copy
+
+import pytest
+
+from fake_pdf import write_fake_pdf
+from incremental_conversion import IncrementalConverter
+
+PAGES = [
+    ["LISTENING", "PART 1", "Questions 1-3",
+     "Complete the notes below.", "Write NO MORE THAN TWO WORDS for each answer.",
+     "1 The garage has space for ........", "2 Rent is paid every ........", "3 The landlord lives in ........"],
+    ["PART 2", "Questions 4-6", "Choose the correct letter, A, B or C.",
+     "4 The tour starts at", "A the library", "B the museum", "C the station"],
+    ["READING", "READING PASSAGE 1", "The Thames Tunnel",
+     "The first tunnel ever to be built under a major river was the tunnel under the Thames.",
+     "Questions 1-3",
+     "Do the following statements agree with the information given in Reading Passage 1?",
+     "1 Brunel designed a tunnelling shield.", "2 The tunnel flooded several times.",
+     "3 The tunnel was first used by trains."],
+    ["WRITING", "WRITING TASK 1", "You should spend about 20 minutes on this task.",
+     "The chart below shows the number of visitors to three museums.", "Write at least 150 words."],
+    ["SPEAKING", "Part 1", "Let's talk about where you live."],
+]
+
+
+@pytest.fixture
+def convert(tmp_path, monkeypatch):
+    spans_dir = tmp_path / "spans"
+    monkeypatch.setenv("PDF_SPAN_CACHE_DIR", str(spans_dir))
+    monkeypatch.delenv("PDF_SPAN_CACHE", raising=False)
+
+    def convert(pages, cache="conversions"):
+        pdf_path = tmp_path / "mock.pdf"
+        write_fake_pdf(pdf_path, pages, spans_dir)
+        result, _ = IncrementalConverter(str(pdf_path), "mock.pdf", str(tmp_path / cache)).convert()
+        return result
+    return convert
+
+
+def edited(page, line, text):
+    pages = copy.deepcopy(PAGES)
+    pages[page][line] = text
+    return pages
+
+
+def test_unchanged_document_reuses_the_result(convert):
+    first = convert(PAGES)
+    second = convert(PAGES)
+    assert first["metadata"]["incremental"]["mode"] == "full"
+    assert second["metadata"]["incremental"]["mode"] == "unchanged"
+    assert second["sections"] == first["sections"]
+
+
+def test_edit_reextracts_only_its_section(convert):
+    convert(PAGES)
+    pages = edited(4, 2, "Let's talk about your home town.")
+    result = convert(pages)
+    stats = result["metadata"]["incremental"]
+    assert stats["mode"] == "incremental"
+    assert stats["changed_pages"] == [5]
+    assert "speaking" in stats["reextracted_sections"]
+    assert "listening" not in stats["reextracted_sections"]
+    assert "reading" not in stats["reextracted_sections"]
+    assert result["sections"] == convert(pages, cache="fresh")["sections"]
+
+
+def test_edit_reextracts_sections_reading_its_indexes(convert):
+    # Reading picks question 1 among the numbered blocks of the whole document,
+    # so an edit to listening question 1 re-runs reading as well
+    convert(PAGES)
+    pages = edited(0, 5, "1 The garage has room for ........")
+    result = convert(pages)
+    stats = result["metadata"]["incremental"]
+    assert stats["mode"] == "incremental"
+    assert stats["changed_pages"] == [1]
+    assert "listening" in stats["reextracted_sections"]
+    assert "reading" in stats["reextracted_sections"]
+    assert "writing" not in stats["reextracted_sections"]
+    assert result["sections"] == convert(pages, cache="fresh")["sections"]
+
+
+def test_page_count_change_falls_back_to_full(convert):
+    convert(PAGES)
+    result = convert(PAGES + [["Answer sheet"]])
+    assert result["metadata"]["incremental"]["mode"] == "full"
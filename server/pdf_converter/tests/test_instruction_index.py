@@ -0,0 +1,60 @@
+"""Instruction block cases for instruction_index"""
+
+import pytest
+
+from instruction_index import ROMAN_NUMERALS, build_index
+
+# (text, question number, expected (task, max_words, numbers_allowed, options))
+CASES = [
+    ("Questions 1-7: Complete the table below.\nWrite NO MORE THAN ONE WORD AND/OR A NUMBER for each answer.",
+     3, ("gap_fill", 1, True, None)),
+    ("Questions 8–10\nComplete the notes below.\nWrite ONE WORD ONLY for each answer.\n8 June ......",
+     9, ("summary_completion", 1, False, None)),
+    ("Questions 11-14\nChoose the correct letter, A, B or C.\n11 How did the company begin?",
+     12, ("multiple_choice", None, False, ["A", "B", "C"])),
+    ("Questions 15-20\nWhat aspect will be covered by each person? Choose SIX answers from the box and "
+     "write the correct letter, A-G, next to questions 15-20.",
+     15, ("matching", None, False, ["A", "B", "C", "D", "E", "F", "G"])),
+    ("Questions 21 and 22\nChoose TWO letters, A-E.", 22, ("multiple_choice", None, False, ["A", "B", "C", "D", "E"])),
+    ("Questions 1-6\nDo the following statements agree with the information given in Reading Passage 1?\n"
+     "TRUE if the statement agrees with the information", 4, ("true_false_ng", None, False, ["TRUE", "FALSE", "NOT GIVEN"])),
+    ("Questions 30-34\nDo the following statements agree with the claims of the writer? Write YES, NO or NOT GIVEN",
+     30, ("true_false_ng", None, False, ["YES", "NO", "NOT GIVEN"])),
+    ("Questions 14-19\nChoose the correct heading for each paragraph from the list of headings below.\n"
+     "Write the correct number, i-viii.", 16, ("heading_matching", None, False, ROMAN_NUMERALS[:8])),
+    ("Questions 35-40\nComplete the summary below.\nChoose NO MORE THAN TWO WORDS from the passage.",
+     40, ("summary_completion", 2, False, None)),
+    ("Questions 24-26\nAnswer the questions below.\nWrite NO MORE THAN THREE WORDS for each answer.",
+     25, ("short_answer", 3, False, None)),
+    ("Questions 11-16\nLabel the map below.\nWrite the correct letter, A-I, next to Questions 11-16.",
+     11, ("matching", None, False, ["A", "B", "C", "D", "E", "F", "G", "H", "I"])),
+    ("Match each statement with the correct person. Look at questions 5-9 below.", 6, None),
+]
+
+
+@pytest.mark.parametrize("text, q_num, expected", CASES)
+def test_indexes_block(text, q_num, expected):
+    block = build_index(text).for_question(q_num)
+    actual = (block["task"], block["max_words"], block["numbers_allowed"], block["options"]) if block else None
+    assert actual == expected
+
+
+def test_sections_with_the_same_range_keep_separate_blocks():
+    listening = "PART 1\nQuestions 1-5\nComplete the form below.\nWrite ONE WORD AND/OR A NUMBER for each answer.\n"
+    reading = ("READING PASSAGE 1\nQuestions 1-5\nDo the following statements agree with the information?\n"
+               "Write TRUE if the statement agrees with the information\n")
+    text = listening + reading
+    index = build_index(text)
+    assert len(index.blocks) == 2
+
+    listening_block = index.within(0, len(listening)).for_question(3)
+    reading_block = index.within(len(listening), len(text)).for_question(3)
+    assert (listening_block["task"], listening_block["max_words"], listening_block["options"]) == ("gap_fill", 1, None)
+    assert (reading_block["task"], reading_block["max_words"]) == ("true_false_ng", None)
+
+
+def test_repeated_header_continues_its_block():
+    text = "Questions 6-9\nComplete the notes below.\n6 ......\n\nQuestions 6-9\n8 ......"
+    index = build_index(text)
+    assert len(index.blocks) == 1
+    assert len(index.blocks[0]["offsets"]) == 2
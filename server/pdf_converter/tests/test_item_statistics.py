@@ -0,0 +1,94 @@
+"""Watermark, resubmission and empty cohort cases for item_statistics"""
+
+from item_statistics import ItemStatisticsEngine, update_item_statistics
+
+
+def answer(row_id, participant, q_num, user_answer, is_correct, updated_at, section="reading"):
+    return {
+        "id": row_id,
+        "participant_id": participant,
+        "material_set_id": 7,
+        "section_type": section,
+        "question_number": q_num,
+        "user_answer": user_answer,
+        "is_correct": int(is_correct),
+        "updated_at": updated_at,
+    }
+
+
+FIRST_BATCH = [
+    answer(1, 101, 1, "true", True, "2026-03-01 09:00:00.000000"),
+    answer(2, 101, 2, "A", False, "2026-03-01 09:00:00.000000"),
+    answer(3, 102, 1, "false", False, "2026-03-01 09:00:05.000000"),
+    answer(4, 102, 2, "B", True, "2026-03-01 09:00:05.000000"),
+    answer(5, 103, 1, "TRUE", True, "2026-03-01 09:00:10.000000"),
+    answer(6, 103, 2, "B", True, "2026-03-01 09:00:10.000000"),
+]
+
+
+def test_watermark_survives_save_and_resume_rereads_safely(tmp_path):
+    state_path = str(tmp_path / "item_statistics.json")
+    summary = update_item_statistics(FIRST_BATCH, state_path)
+    assert summary["rows_applied"] == 6
+    assert summary["watermark"] == {"updated_at": "2026-03-01 09:00:10.000000", "id": 6}
+
+    engine = ItemStatisticsEngine(state_path).load()
+    assert engine.resume_cursor() == {"updated_at": "2026-03-01 08:59:10.000000", "id": 0}
+    before = engine.export(7)
+
+    # The resume window reads the last rows again: nothing changes
+    summary = engine.update(FIRST_BATCH[2:])
+    assert summary["rows_applied"] == 0
+    assert summary["participants_touched"] == 0
+    assert engine.export(7) == before
+
+
+def test_fresh_state_resumes_from_the_start(tmp_path):
+    engine = ItemStatisticsEngine(str(tmp_path / "missing.json")).load()
+    assert engine.resume_cursor() == {"updated_at": "1970-01-01 00:00:00.000000", "id": 0}
+
+
+def test_changed_answer_after_watermark_replaces_the_old_one(tmp_path):
+    state_path = str(tmp_path / "item_statistics.json")
+    update_item_statistics(FIRST_BATCH, state_path)
+
+    # Participant 102 corrects question 1; the upsert keeps row id 3
+    corrected = answer(3, 102, 1, "TRUE", True, "2026-03-01 09:05:00.000000")
+    summary = update_item_statistics([corrected], state_path)
+    assert summary["rows_applied"] == 1
+    assert summary["watermark"] == {"updated_at": "2026-03-01 09:05:00.000000", "id": 3}
+
+    incremental = ItemStatisticsEngine(state_path).load()
+    rebuilt = ItemStatisticsEngine(str(tmp_path / "rebuilt.json"))
+    rebuilt.update([corrected if row["id"] == 3 else row for row in FIRST_BATCH])
+
+    item = incremental.items["7|reading|1"]
+    assert (item["n"], item["n_correct"]) == (3, 3)
+    assert item["answers"]["F"] == 0
+    assert incremental.export(7)["facility"] == [1.0, round(2 / 3, 4)]
+    assert incremental.export(7)["distractors"] == rebuilt.export(7)["distractors"]
+    for key, rebuilt_item in rebuilt.items.items():
+        moments = ("n", "n_correct", "sum_total", "sum_total_sq", "sum_total_correct")
+        assert [incremental.items[key][name] for name in moments] == [rebuilt_item[name] for name in moments]
+
+
+def test_empty_cohort(tmp_path):
+    engine = ItemStatisticsEngine(str(tmp_path / "item_statistics.json"))
+    summary = engine.update([])
+    assert summary == {"rows_applied": 0, "participants_touched": 0, "watermark": {"updated_at": "", "id": 0}}
+
+    # Writing answers advance the watermark but are not items
+    summary = engine.update([answer(9, 101, 1, "essay", False, "2026-03-01 10:00:00.000000", section="writing")])
+    assert summary["rows_applied"] == 0
+    assert summary["watermark"]["id"] == 9
+
+    export = engine.export(7)
+    assert export["question"] == [] and export["facility"] == [] and export["flags"] == []
+
+
+def test_single_response_has_no_discrimination(tmp_path):
+    engine = ItemStatisticsEngine(str(tmp_path / "item_statistics.json"))
+    engine.update(FIRST_BATCH[:1])
+    export = engine.export(7)
+    assert export["facility"] == [1.0]
+    assert export["discrimination"] == [None]
@@ -0,0 +1,64 @@
+"""Profile selection cases for layout_profiles"""
+
+import pytest
+
+from fake_pdf import write_fake_pdf
+from ielts_pdf_converter_v4 import IELTSPDFConverter
+from layout_profiles import fingerprint_text, get_profile, select_profile
+
+
+def fingerprint_of(producer="", fonts=(), text=""):
+    return {"producer": producer, "fonts": list(fonts), "text": text}
+
+
+# (description, fingerprint, expected profile)
+CASES = [
+    ("nothing matches", fingerprint_of("Microsoft Word", ["Arial"], "LISTENING\nPART 1"), "generic"),
+    ("rm watermark", fingerprint_of(text="Test 1 @EnglishSchoolbyRM 3"), "english_school_rm"),
+    ("ucles footer", fingerprint_of(text="\u00a9 UCLES 2019"), "cambridge_ucles"),
+    ("cambridge producer", fingerprint_of(producer="Adobe InDesign CC (Cambridge University Press)"), "cambridge_ucles"),
+    ("watermark outweighs producer", fingerprint_of("Adobe InDesign", text="@EnglishSchoolbyRM"), "english_school_rm"),
+]
+
+
+@pytest.mark.parametrize("description, fingerprint, expected", CASES, ids=[case[0] for case in CASES])
+def test_select_profile(description, fingerprint, expected):
+    assert select_profile(fingerprint).name == expected
+
+
+def test_get_profile_falls_back_to_generic():
+    assert get_profile("cambridge_ucles").name == "cambridge_ucles"
+    assert get_profile("unknown").name == "generic"
+
+
+def test_fingerprint_text_reads_only_the_first_pages():
+    pages = [{"page": number, "content": f"page {number}"} for number in range(1, 6)]
+    pages[4]["content"] = "@EnglishSchoolbyRM"
+    assert fingerprint_text(pages)["text"] == "page 1\npage 2\npage 3"
+    assert select_profile(fingerprint_text(pages)).name == "generic"
+
+
+@pytest.fixture
+def extract(tmp_path, monkeypatch):
+    spans_dir = tmp_path / "spans"
+    monkeypatch.setenv("PDF_SPAN_CACHE_DIR", str(spans_dir))
+    monkeypatch.delenv("PDF_SPAN_CACHE", raising=False)
+
+    def extract(pages, profile=None):
+        pdf_path = tmp_path / "mock.pdf"
+        write_fake_pdf(pdf_path, pages, spans_dir)
+        converter = IELTSPDFConverter(str(pdf_path), profile=profile)
+        converter._extract_text()
+        return converter
+    return extract
+
+
+def test_converter_picks_profile_from_span_table(extract):
+    converter = extract([["LISTENING", "PART 1"], ["\u00a9 UCLES 2019", "READING PASSAGE 1"]])
+    assert converter.profile.name == "cambridge_ucles"
+    assert converter.artifact_patterns == get_profile("cambridge_ucles").artifact_patterns
+
+
+def test_converter_keeps_a_forced_profile(extract):
+    converter = extract([["\u00a9 UCLES 2019"]], profile=get_profile("english_school_rm"))
+    assert converter.profile.name == "english_school_rm"
@@ -0,0 +1,37 @@
+"""Duplicate detection cases for near_duplicates"""
+
+import json
+from typing import Dict, Any
+
+import pytest
+
+from near_duplicates import apply_changes, find_duplicate_sets
+
+PASSAGE = (
+    "The first tunnel ever to be built under a major river was the tunnel under London's River "
+    "Thames. At the beginning of the 19th century, the port of London was the busiest in the world, "
+    "and the roads on both sides of the river were crowded with carts carrying cargo to the docks."
+)
+
+
+def material_set(passage: str) -> Dict[str, Any]:
+    return {"sections": [{"type": "reading", "passages": [{"passage_number": 1, "content": passage}]}]}
+
+
+# (content checked against a set holding PASSAGE, expected likely duplicate)
+CASES = [
+    (material_set(PASSAGE), True),
+    (material_set(PASSAGE.replace("River Thames.", "River Thames. @EnglishSchoolbyRM Page 3")
+                  .replace("busiest", "busiest\nt.me/ieltsbooks")), True),
+    (material_set("Bricks are one of the oldest known building materials dating back to 7000 BCE. "
+                  "The oldest found were sun-dried mud bricks, and fired bricks came much later "
+                  "when kilns made it possible to reach the temperatures needed."), False),
+]
+
+
+@pytest.mark.parametrize("content, expected", CASES)
+def test_flags_likely_duplicates(tmp_path, content, expected):
+    index_path = str(tmp_path / "near_duplicates.sqlite")
+    apply_changes([json.dumps({"set_id": 1, "content": material_set(PASSAGE)})], index_path)
+    duplicates = find_duplicate_sets(content, index_path)
+    assert any(duplicate["likely_duplicate"] for duplicate in duplicates) == expected
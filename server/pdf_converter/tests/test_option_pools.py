@@ -0,0 +1,28 @@
+"""Pooling cases for option_pools"""
+
+from option_pools import resolve_options, share_option_pools
+
+TFNG = [{"label": "A", "text": "TRUE"}, {"label": "B", "text": "FALSE"}, {"label": "C", "text": "NOT GIVEN"}]
+PEOPLE = [{"label": "A", "text": "Kunkel"}, {"label": "B", "text": "McNeal"}]
+
+
+def test_identical_lists_are_pooled():
+    questions = [{"id": 14, "options": list(PEOPLE)}, {"id": 15, "options": list(PEOPLE)}, {"id": 16, "options": TFNG}]
+    pools = share_option_pools(questions)
+    assert pools == {"q14-15": PEOPLE, "tfng": TFNG}
+    assert [question["option_pool"] for question in questions] == ["q14-15", "q14-15", "tfng"]
+
+
+def test_questions_keep_exactly_their_own_options():
+    own = [{"label": "A", "text": "a bridge"}, {"label": "B", "text": "a tunnel"}]
+    questions = [
+        {"id": 1, "options": list(PEOPLE)},
+        {"id": 2, "options": list(PEOPLE)},
+        {"id": 3, "options": own},
+        {"id": 4, "options": None},
+    ]
+    before = [question["options"] for question in questions]
+    pools = share_option_pools(questions)
+    assert [resolve_options(question, pools) for question in questions] == before
+    assert questions[2]["options"] == own
+    assert "option_pool" not in questions[3]
@@ -0,0 +1,38 @@
+"""Segmentation cases for paragraph_segments"""
+
+import pytest
+
+from paragraph_segments import segment_passage
+
+_PARAGRAPH_BODY = ("The tunnel was begun in 1825 by Marc Brunel and his son, who used a new "
+                   "tunnelling shield to protect the men\ndigging at the face from the river "
+                   "water that kept breaking through the clay above them.\n")
+
+# (raw passage text, expected [(label, first words), ...])
+CASES = [
+    ("A\n" + _PARAGRAPH_BODY + "B\n" + _PARAGRAPH_BODY,
+     [("A", "The tunnel"), ("B", "The tunnel")]),
+    ("A  " + _PARAGRAPH_BODY + "B  " + _PARAGRAPH_BODY + "C  " + _PARAGRAPH_BODY,
+     [("A", "The tunnel"), ("B", "The tunnel"), ("C", "The tunnel")]),
+    ("A new shield was designed for the work that was expected to take three years\n"
+     "to complete under the river.\n" + _PARAGRAPH_BODY,
+     [(None, "A new"), (None, "The tunnel")]),
+    ("First paragraph line that runs the full width of the column of text here\n"
+     "and ends early.\nSecond paragraph starts here and also runs the full width of the\n"
+     "column of text.\n",
+     [(None, "First paragraph"), (None, "Second paragraph")]),
+    ("Intro one\n\nIntro two\n", [(None, "Intro one"), (None, "Intro two")]),
+    ("The Thames Tunnel\nA\n" + _PARAGRAPH_BODY + "\nB\n\n" + _PARAGRAPH_BODY,
+     [(None, "The Thames"), ("A", "The tunnel"), ("B", "The tunnel")]),
+    ("I think the work was slow.\n" + _PARAGRAPH_BODY, [(None, "I think"), (None, "The tunnel")]),
+]
+
+
+@pytest.mark.parametrize("raw_text, expected", CASES)
+def test_segments_passage(raw_text, expected):
+    content, spans = segment_passage(raw_text, lambda text: " ".join(text.split()))
+    actual = [
+        (span["label"], " ".join(content[span["start"]:span["end"]].split()[(1 if span["label"] else 0):][:2]))
+        for span in spans
+    ]
+    assert actual == expected
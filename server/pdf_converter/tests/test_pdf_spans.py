@@ -0,0 +1,82 @@
+"""Span table cases for pdf_spans"""
+
+import os
+
+import pytest
+
+from fake_pdf import FakeDoc, FakePage
+from pdf_spans import FLAG_BOLD, FLAG_ITALIC, SpanTable, build_span_table, prune_cache, write_span_table
+
+
+PAGES = [
+    [[("READING PASSAGE 1", 16.0, FLAG_BOLD)],
+     [("You should spend about 20 minutes on ", 11.0, 0), ("Questions 1-13", 11.0, FLAG_BOLD)],
+     [("The history of the tunnel begins in 1802.", 11.0, 0)]],
+    [[("Questions 1-5", 11.0, FLAG_BOLD)],
+     [("Write ", 11.0, 0), ("NO MORE THAN TWO WORDS", 11.0, FLAG_BOLD), (" for each answer.", 11.0, 0)],
+     [("Café owners", 11.0, FLAG_ITALIC)]],
+    [],
+]
+
+
+def fake_doc():
+    return FakeDoc(FakePage(page) for page in PAGES)
+
+
+# (description, check of the table built from PAGES)
+CASES = [
+    ("text matches get_text() joined by page",
+     lambda table: table.text == "\n".join(FakePage(page).get_text() for page in PAGES)),
+    ("text_by_page round-trips", lambda table: [page["content"] for page in table.text_by_page]
+     == [FakePage(page).get_text() for page in PAGES]),
+    ("span offsets point at span text", lambda table: [table.span_text(row) for row in table.span_range(1)]
+     == ["Questions 1-5", "Write ", "NO MORE THAN TWO WORDS", " for each answer.", "Café owners"]),
+    ("columns keep geometry and flags", lambda table: (table.span(0)["size"], table.span(0)["flags"],
+                                                       table.span(0)["font"], table.span(0)["page"])
+     == (16.0, FLAG_BOLD, "Arial", 0)),
+    ("spans are grouped into lines", lambda table: [line["text"] for line in table.lines(1)]
+     == ["Questions 1-5", "Write NO MORE THAN TWO WORDS for each answer.", "Café owners"]),
+    ("headings are larger than body text", lambda table: [line["text"] for line in table.headings()]
+     == ["READING PASSAGE 1"]),
+    ("empty page keeps its place", lambda table: table.page_count == 3 and table.page_text(2) == ""
+     and len(table.span_range(2)) == 0),
+    ("fingerprint has fonts and producer", lambda table: table.fingerprint()["fonts"] == ["ABCDEF+Arial"]
+     and table.fingerprint()["producer"] == "Fixture"),
+]
+
+
+@pytest.fixture(params=["bytes", "file"])
+def table(request, tmp_path):
+    data = build_span_table(fake_doc())
+    if request.param == "bytes":
+        table = SpanTable(data=data)
+    else:
+        path = str(tmp_path / "fixture.spans")
+        write_span_table(path, data)
+        table = SpanTable(path)
+    yield table
+    table.close()
+
+
+@pytest.mark.parametrize("description, check", CASES, ids=[case[0] for case in CASES])
+def test_span_table(table, description, check):
+    assert check(table)
+
+
+def test_keep_going_marks_table_incomplete():
+    partial = build_span_table(fake_doc(), keep_going=iter([True, False]).__next__)
+    with SpanTable(data=partial) as table:
+        assert not table.complete
+        assert table.page_count == 1
+
+
+def test_prune_cache_removes_least_recently_read(tmp_path):
+    for age, name in enumerate(["newest", "middle", "oldest"]):
+        path = tmp_path / f"{name}.spans"
+        path.write_bytes(bytes(100))
+        os.utime(path, (1000 - age, 1000 - age))
+    (tmp_path / "other.txt").write_bytes(bytes(500))
+
+    assert prune_cache(str(tmp_path), max_bytes=200) == 1
+    assert sorted(path.name for path in tmp_path.glob("*.spans")) == ["middle.spans", "newest.spans"]
+    assert prune_cache(str(tmp_path), max_bytes=200) == 0
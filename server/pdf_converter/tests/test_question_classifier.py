@@ -0,0 +1,49 @@
+"""Question type cases for question_classifier"""
+
+import pytest
+
+from question_classifier import classify_listening_question, classify_reading_question
+
+CLASSIFIERS = {"reading": classify_reading_question, "listening": classify_listening_question}
+
+# (classifier, question text, expected type)
+CASES = [
+    ("reading", "TRUE FALSE NOT GIVEN The tunnel was finished early", "true_false_ng"),
+    ("reading", "Write TRUE/FALSE/NOT GIVEN if the statement agrees", "true_false_ng"),
+    ("reading", "Match each statement with the correct person, A-H", "matching"),
+    ("reading", "Match each point with the correct person, A-E", "matching"),
+    ("reading", "Match each finding with the correct researcher(s), A-H", "matching"),
+    ("reading", "Choose the correct heading from the list of Roman numerals", "matching"),
+    ("reading", "Paragraph C vii", "open_question"),
+    ("reading", "Paragraph D iv", "open_question"),
+    ("reading", "Section IV describes the results", "matching"),
+    ("reading", "B shows how children respond to adverts", "matching"),
+    ("reading", "What did Brunel propose? A) a bridge B) a tunnel C) a ferry D) a canal", "multiple_choice"),
+    ("reading", "Choose the most suitable heading for paragraph B", "heading_matching"),
+    ("reading", "which paragraph corresponds to the claim", "heading_matching"),
+    ("reading", "Complete each sentence with the correct ending", "gap_fill"),
+    ("reading", "The shield was moved forward ..........", "gap_fill"),
+    ("reading", "Fill in the blank with one word", "gap_fill"),
+    ("reading", "Complete the summary below", "summary_completion"),
+    ("reading", "Complete the notes using words from the passage", "summary_completion"),
+    ("reading", "Answer the questions below", "short_answer"),
+    ("reading", "Answer using no more than two words", "short_answer"),
+    ("reading", "Why did the project stall", "open_question"),
+    ("reading", "", "open_question"),
+    ("listening", "Which facility is free? A) gym B) pool C) sauna", "multiple_choice"),
+    ("listening", "What does the speaker say about A the food", "multiple_choice"),
+    ("listening", "Match the speakers with their opinions", "matching"),
+    ("listening", "Match each point with the correct person, A-E", "matching"),
+    ("listening", "Match each finding with the correct researcher(s), A-H", "matching"),
+    ("listening", "Which statement matches the speaker? A) cost B) time C) size", "multiple_choice"),
+    ("listening", "Which paragraph contains the following information? Write the correct letter, A-G.", "gap_fill"),
+    ("listening", "Complete the summary using the list of words, A–I, below", "gap_fill"),
+    ("listening", "garage has 1 …….", "gap_fill"),
+    ("listening", "Complete the table below", "gap_fill"),
+    ("listening", "Name of the hotel", "open_question"),
+]
+
+
+@pytest.mark.parametrize("kind, text, expected", CASES)
+def test_classifies(kind, text, expected):
+    assert CLASSIFIERS[kind](text) == expected
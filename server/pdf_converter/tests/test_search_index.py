@@ -0,0 +1,66 @@
+"""Query and maintenance cases for search_index"""
+
+import json
+
+import pytest
+
+from search_index import SearchIndex, apply_changes, extract_documents
+
+SET_CONTENT = {"sections": [
+    {"type": "reading", "passages": [{
+        "passage_number": 1, "title": "Tunnelling under the Thames",
+        "content": "The first tunnel ever to be built under a major river was the tunnel under London's River Thames.",
+        "questions": [{"id": 1, "type": "true_false_ng", "statement": "Brunel designed a tunnelling shield.",
+                       "options": ["TRUE", "FALSE", "NOT GIVEN"]}],
+    }]},
+    {"type": "listening", "parts": [{
+        "part_number": 1, "context": "Accommodation from Stamford Properties",
+        "questions": [{"id": 5, "type": "gap_fill", "prompt": "garage has 1........."}],
+    }]},
+]}
+
+# (query, expected [(set_id, container, question), ...] in rank order)
+CASES = [
+    ('"river thames"', [(1, "passage 1", None)]),
+    ('"under the thames"', [(1, "passage 1", None)]),
+    ("tunnel*", [(1, "passage 1", None), (1, "passage 1", "1")]),
+    ("stamford garage", []),
+    ('"stamford properties"', [(1, "part 1", None)]),
+    ('"thames river"', []),
+    ("sh*", [(1, "passage 1", "1")]),
+]
+
+
+@pytest.fixture
+def index(tmp_path):
+    index_path = str(tmp_path / "index.sqlite")
+    apply_changes([json.dumps({"set_id": 1, "content": SET_CONTENT})], index_path)
+    index = SearchIndex(index_path)
+    yield index
+    index.close()
+
+
+@pytest.mark.parametrize("query, expected", CASES)
+def test_search(index, query, expected):
+    actual = [(hit["set_id"], hit["container"], hit["question"]) for hit in index.search(query)["results"]]
+    assert actual == expected
+
+
+def test_unchanged_content_is_not_rewritten(index):
+    assert index.index_set(1, SET_CONTENT)["written"] == 0
+
+
+def test_removing_the_set_empties_the_index(index):
+    index.index_set(1, None)
+    assert not index.stats()["terms"]
+    assert not index.stats()["sets"]
+
+
+def test_paragraph_text_is_indexed_but_not_spans():
+    passage = {"passage_number": 1, "title": "Bees",
+               "paragraphs": ["Honey bees dance.", "Wasps do not."],
+               "paragraph_spans": [{"label": "A", "start": 0, "end": 17, "word_count": 3}]}
+    documents = extract_documents({"sections": [{"type": "reading", "passages": [passage]}]})
+    text = documents[("reading", "passage 1", "")]
+    assert "Wasps do not." in text
+    assert "word_count" not in text and "17" not in text
@@ -0,0 +1,64 @@
+"""Metric and cache cases for writing_analytics"""
+
+import pytest
+
+from writing_analytics import analyze_submissions, analyze_task, task_prompts
+
+PROMPT = "The chart below shows the number of visitors to three museums in London."
+CONTENT = {"sections": [{"type": "writing", "tasks": [
+    {"task_number": 1, "prompt": PROMPT},
+    {"task_number": 2, "prompt": "Some people think that museums should be free."},
+]}]}
+ESSAY = ("The chart below shows the number of visitors. Visitors rose sharply.\n\n"
+         "In conclusion the number of visitors rose.")
+REPETITIVE = "Cats sleep. Cats sleep. Cats sleep a lot."
+
+
+@pytest.fixture
+def metrics():
+    return analyze_task([ESSAY, REPETITIVE], PROMPT, 1)
+
+
+def test_counts(metrics):
+    essay, repetitive = metrics
+    assert (essay["word_count"], essay["meets_minimum"]) == (18, False)
+    assert (essay["paragraph_count"], essay["paragraph_word_counts"]) == (2, [11, 7])
+    assert (repetitive["sentence_count"], repetitive["mean_sentence_length"],
+            repetitive["sentence_length_sd"]) == (3, 2.7, 0.9)
+
+
+def test_lexical_diversity_and_repetition(metrics):
+    repetitive = metrics[1]
+    assert repetitive["type_token_ratio"] == 0.5
+    # 4 of the 6 three-word runs repeat, sentence breaks aside
+    assert repetitive["repeated_trigram_share"] == 0.667
+    assert sorted(trigram for trigram, _ in repetitive["repeated_trigrams"]) == ["cats sleep cats", "sleep cats sleep"]
+
+
+def test_prompt_overlap(metrics):
+    essay, repetitive = metrics
+    assert essay["copied_prompt_share"] > 0
+    assert essay["prompt_coverage"] > 0
+    assert (repetitive["prompt_word_share"], repetitive["prompt_coverage"],
+            repetitive["copied_prompt_share"]) == (0.0, 0.0, 0.0)
+
+
+def test_task_prompts():
+    assert task_prompts(CONTENT) == {1: PROMPT, 2: "Some people think that museums should be free."}
+
+
+def test_submissions_are_cached(tmp_path):
+    cache_path = str(tmp_path / "writing_analytics.sqlite")
+    submissions = [{"id": 7, "task_1_content": ESSAY, "task_2_content": ""},
+                   {"id": 8, "task_1_content": REPETITIVE, "task_2_content": REPETITIVE}]
+
+    first = analyze_submissions(submissions, CONTENT, cache_path)
+    assert (first["computed"], first["cached"]) == (3, 0)
+    assert first["results"][0]["task_2"] is None
+    assert first["results"][1]["task_1"]["word_count"] == 8
+
+    submissions[0]["task_1_content"] = ESSAY + " It fell later."
+    second = analyze_submissions(submissions, CONTENT, cache_path)
+    assert (second["computed"], second["cached"]) == (1, 2)
+    assert second["results"][1] == first["results"][1]
+    assert second["results"][0]["task_1"]["word_count"] == 21
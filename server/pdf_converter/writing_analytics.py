@@ -0,0 +1,378 @@
+"""
+Writing Submission Analytics
+Quantitative aids for examiners grading writing_submissions. A whole
+session's essays are analyzed in one batch: every essay is tokenized once
+into a shared vocabulary, the batch becomes a few flat numpy arrays (token
+ids, essay of each token), and each measure is computed for all essays at
+once with bincount/unique over those arrays instead of per-essay loops.
+
+Per task answer:
+
+- word_count (counted like scoreCalculator.js), meets_minimum
+- sentence_count, mean_sentence_length, sentence_length_sd
+- paragraph_count, paragraph_word_counts
+- type_token_ratio, mattr (type/token ratio averaged over 50-word windows,
+  which unlike the plain ratio does not fall as essays get longer)
+- repeated_trigram_share, repeated_trigrams (most repeated three-word runs)
+- prompt_word_share (essay content words taken from the prompt),
+  prompt_coverage (prompt content words the essay uses),
+  copied_prompt_share (essay four-word runs copied from the prompt)
+
+Results are cached by a hash of the essay, its task and prompt, so
+re-analyzing a session only computes new or edited essays.
+
+Usage (called from Node.js):
+    python writing_analytics.py analyze < batch.json
+    batch: {"content": {material set content JSON}, "submissions":
+            [{"id": 7, "task_1_content": "...", "task_2_content": "..."}, ...]}
+"""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Any, Tuple, Optional
+
+import numpy as np
+
+from search_index import extract_documents
+
+DEFAULT_CACHE_PATH = Path(__file__).resolve().parent.parent / "data" / "writing_analytics.sqlite"
+
+# Bump when a measure changes, so cached results are recomputed
+ANALYTICS_VERSION = 1
+
+TASKS = (1, 2)
+# Mirrors calculateWritingScore() in utils/scoreCalculator.js
+TASK_MINIMUM_WORDS = {1: 150, 2: 250}
+
+TOKEN = re.compile(r"[a-z]+(?:'[a-z]+)?|[.!?]+")
+PARAGRAPH_BREAK = re.compile(r"\n\s*\n|\n")
+MATTR_WINDOW = 50
+TOP_REPEATED_TRIGRAMS = 5
+COPY_NGRAM = 4
+
+STOPWORDS = frozenset("""
+a an the and or but if then than so as of at by for from in into on onto to with without
+about above after before between during over under up down out off again further
+is am are was were be been being have has had having do does did doing will would
+shall should can could may might must i me my we our you your he him his she her it
+its they them their this that these those there here what which who whom whose when
+where why how all any both each few more most other some such no nor not only own
+same too very just also s t
+""".split())
+
+_MIX = np.uint64(0x9E3779B97F4A7C15)
+
+
+# ----------------------------------------------------------------------
+# Batch encoding
+# ----------------------------------------------------------------------
+
+class Batch:
+    """Essays tokenized into one flat array of vocabulary ids"""
+
+    def __init__(self, texts: List[str], vocabulary: Dict[str, int]):
+        self.vocabulary = vocabulary
+        ids: List[int] = []
+        lengths = []
+        for text in texts:
+            tokens = TOKEN.findall(text.lower())
+            ids.extend(vocabulary.setdefault(token, len(vocabulary)) for token in tokens)
+            lengths.append(len(tokens))
+
+        self.size = len(texts)
+        self.ids = np.array(ids, dtype=np.int64)
+        self.essay = np.repeat(np.arange(self.size), lengths)
+        # Vocabulary ids are assigned in insertion order, so this lines up with ids
+        word_types = np.array([token[0].isalpha() for token in vocabulary], dtype=bool)
+        self.is_word = word_types[self.ids] if len(self.ids) else np.zeros(0, dtype=bool)
+
+        self.words = self.ids[self.is_word]
+        self.word_essay = self.essay[self.is_word]
+
+    def per_essay(self, essay_index: np.ndarray, weights: Optional[np.ndarray] = None) -> np.ndarray:
+        return np.bincount(essay_index, weights=weights, minlength=self.size)
+
+
+def _ngram_keys(ids: np.ndarray, essay: np.ndarray, n: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Hash keys of every n-word run that stays within one essay, with its essay and start"""
+    if len(ids) < n:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty.astype(np.uint64), empty, empty
+    count = len(ids) - n + 1
+    keys = np.zeros(count, dtype=np.uint64)
+    with np.errstate(over="ignore"):
+        for offset in range(n):
+            keys = keys * _MIX + ids[offset:offset + count].astype(np.uint64) + np.uint64(1)
+    starts = np.flatnonzero(essay[:count] == essay[n - 1:])
+    return keys[starts], essay[starts], starts
+
+
+# ----------------------------------------------------------------------
+# Measures (each returns one value per essay)
+# ----------------------------------------------------------------------
+
+def sentence_stats(batch: Batch) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Sentence count, mean and standard deviation of sentence length in words"""
+    n = len(batch.ids)
+    if n == 0:
+        zeros = np.zeros(batch.size)
+        return zeros, zeros, zeros
+    # A sentence starts at an essay's first token and after end punctuation
+    starts = np.ones(n, dtype=bool)
+    starts[1:] = (batch.essay[1:] != batch.essay[:-1]) | ~batch.is_word[:-1]
+    sentence = np.cumsum(starts) - 1
+    lengths = np.bincount(sentence[batch.is_word], minlength=sentence[-1] + 1).astype(float)
+    sentence_essay = batch.essay[starts]
+
+    real = lengths > 0
+    counts = batch.per_essay(sentence_essay[real])
+    totals = batch.per_essay(sentence_essay[real], lengths[real])
+    squares = batch.per_essay(sentence_essay[real], lengths[real] ** 2)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.where(counts > 0, totals / counts, 0.0)
+        variance = np.where(counts > 0, squares / counts - mean ** 2, 0.0)
+    return counts, mean, np.sqrt(np.maximum(variance, 0.0))
+
+
+def lexical_diversity(batch: Batch) -> Tuple[np.ndarray, np.ndarray]:
+    """Type/token ratio and moving-average type/token ratio"""
+    words, essay = batch.words, batch.word_essay
+    word_counts = batch.per_essay(essay)
+    types = batch.per_essay(np.unique(essay * len(batch.vocabulary) + words) // len(batch.vocabulary)) \
+        if len(words) else np.zeros(batch.size)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        ttr = np.where(word_counts > 0, types / word_counts, 0.0)
+
+    mattr = ttr.copy()
+    if len(words) >= MATTR_WINDOW:
+        # previous[i]: index of the last earlier use of word i's type in its essay
+        order = np.lexsort((np.arange(len(words)), words, essay))
+        previous = np.full(len(words), -1)
+        same = (words[order][1:] == words[order][:-1]) & (essay[order][1:] == essay[order][:-1])
+        previous[order[1:][same]] = order[:-1][same]
+
+        # A window's types are its words whose previous use lies before the window
+        windows = np.lib.stride_tricks.sliding_window_view(previous, MATTR_WINDOW)
+        starts = np.arange(len(windows))
+        within = essay[:len(windows)] == essay[MATTR_WINDOW - 1:]
+        distinct = (windows[within] < starts[within, None]).sum(axis=1)
+        window_essay = essay[:len(windows)][within]
+        window_counts = batch.per_essay(window_essay)
+        window_ttr = batch.per_essay(window_essay, distinct / MATTR_WINDOW)
+        long_enough = window_counts > 0
+        mattr[long_enough] = window_ttr[long_enough] / window_counts[long_enough]
+    return ttr, mattr
+
+
+def repeated_trigrams(batch: Batch) -> Tuple[np.ndarray, List[List[Tuple[str, int]]]]:
+    """Share of each essay's trigrams that repeat, and its most repeated ones"""
+    keys, essay, starts = _ngram_keys(batch.words, batch.word_essay, 3)
+    shares = np.zeros(batch.size)
+    top: List[List[Tuple[str, int]]] = [[] for _ in range(batch.size)]
+    if len(keys) == 0:
+        return shares, top
+
+    pairs = np.stack([essay.astype(np.uint64), keys], axis=1)
+    unique, first, counts = np.unique(pairs, axis=0, return_index=True, return_counts=True)
+    repeated = counts >= 2
+    totals = batch.per_essay(essay)
+    repeated_totals = batch.per_essay(unique[repeated, 0].astype(np.int64), counts[repeated].astype(float))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        shares = np.where(totals > 0, repeated_totals / totals, 0.0)
+
+    by_id = {index: token for token, index in batch.vocabulary.items()}
+    for row in np.flatnonzero(repeated)[np.argsort(-counts[repeated], kind="stable")]:
+        essay_index = int(unique[row, 0])
+        if len(top[essay_index]) >= TOP_REPEATED_TRIGRAMS:
+            continue
+        position = starts[first[row]]
+        words = [by_id[int(i)] for i in batch.words[position:position + 3]]
+        if all(word in STOPWORDS for word in words):
+            continue
+        top[essay_index].append((" ".join(words), int(counts[row])))
+    return shares, top
+
+
+def prompt_overlap(batch: Batch, prompt: Batch) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Share of essay content words from the prompt, share of the prompt used, copied 4-gram share"""
+    stop_ids = np.array([index for token, index in batch.vocabulary.items() if token in STOPWORDS], dtype=np.int64)
+    content = ~np.isin(batch.words, stop_ids)
+    prompt_words = np.unique(prompt.words[~np.isin(prompt.words, stop_ids)])
+
+    content_counts = batch.per_essay(batch.word_essay[content])
+    from_prompt = np.isin(batch.words, prompt_words) & content
+    from_prompt_counts = batch.per_essay(batch.word_essay[from_prompt])
+
+    used = np.unique(batch.word_essay[from_prompt] * len(batch.vocabulary) + batch.words[from_prompt])
+    used_counts = batch.per_essay(used // len(batch.vocabulary)) if len(used) else np.zeros(batch.size)
+
+    keys, essay, _ = _ngram_keys(batch.words, batch.word_essay, COPY_NGRAM)
+    prompt_keys, _, _ = _ngram_keys(prompt.words, prompt.word_essay, COPY_NGRAM)
+    copied = batch.per_essay(essay[np.isin(keys, prompt_keys)])
+    ngram_counts = batch.per_essay(essay)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        word_share = np.where(content_counts > 0, from_prompt_counts / content_counts, 0.0)
+        coverage = used_counts / len(prompt_words) if len(prompt_words) else np.zeros(batch.size)
+        copied_share = np.where(ngram_counts > 0, copied / ngram_counts, 0.0)
+    return word_share, coverage, copied_share
+
+
+def paragraph_word_counts(text: str) -> List[int]:
+    return [len(part.split()) for part in PARAGRAPH_BREAK.split(text.strip()) if part.strip()]
+
+
+def analyze_task(texts: List[str], prompt_text: str, task: int) -> List[Dict[str, Any]]:
+    """Metrics for a batch of answers to one task"""
+    vocabulary: Dict[str, int] = {}
+    batch = Batch(texts, vocabulary)
+    prompt = Batch([prompt_text], vocabulary)
+
+    sentences, sentence_mean, sentence_sd = sentence_stats(batch)
+    ttr, mattr = lexical_diversity(batch)
+    repeated_share, top_repeated = repeated_trigrams(batch)
+    word_share, coverage, copied_share = prompt_overlap(batch, prompt)
+
+    results = []
+    for index, text in enumerate(texts):
+        word_count = len(text.split())
+        paragraphs = paragraph_word_counts(text)
+        results.append({
+            "word_count": word_count,
+            "meets_minimum": word_count >= TASK_MINIMUM_WORDS[task],
+            "sentence_count": int(sentences[index]),
+            "mean_sentence_length": round(float(sentence_mean[index]), 1),
+            "sentence_length_sd": round(float(sentence_sd[index]), 1),
+            "paragraph_count": len(paragraphs),
+            "paragraph_word_counts": paragraphs,
+            "type_token_ratio": round(float(ttr[index]), 3),
+            "mattr": round(float(mattr[index]), 3),
+            "repeated_trigram_share": round(float(repeated_share[index]), 3),
+            "repeated_trigrams": [[trigram, count] for trigram, count in top_repeated[index]],
+            "prompt_word_share": round(float(word_share[index]), 3),
+            "prompt_coverage": round(float(coverage[index]), 3),
+            "copied_prompt_share": round(float(copied_share[index]), 3),
+        })
+    return results
+
+
+# ----------------------------------------------------------------------
+# Session batches with a result cache
+# ----------------------------------------------------------------------
+
+def task_prompts(content: Optional[Dict[str, Any]]) -> Dict[int, str]:
+    """Task number -> prompt text (instructions, questions, requirements) of a material set"""
+    prompts: Dict[int, str] = {}
+    for (section, container, question), text in extract_documents(content or {}).items():
+        if section == "writing" and not question:
+            number = container.rsplit(" ", 1)[-1]
+            if number.isdigit() and int(number) in TASKS:
+                prompts[int(number)] = text
+    return prompts
+
+
+def _cache_key(task: int, prompt: str, text: str) -> str:
+    payload = json.dumps([ANALYTICS_VERSION, task, prompt, text], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+
+class AnalyticsCache:
+    """Metrics by essay hash, in one SQLite file"""
+
+    # Keys looked up per query
+    CHUNK = 500
+
+    def __init__(self, cache_path: Optional[str] = None):
+        self.cache_path = Path(cache_path) if cache_path else DEFAULT_CACHE_PATH
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(str(self.cache_path), timeout=30)
+        self.db.execute("CREATE TABLE IF NOT EXISTS metrics (key TEXT PRIMARY KEY, metrics TEXT NOT NULL) WITHOUT ROWID")
+
+    def get_many(self, keys: List[str]) -> Dict[str, Dict[str, Any]]:
+        found = {}
+        for start in range(0, len(keys), self.CHUNK):
+            chunk = keys[start:start + self.CHUNK]
+            rows = self.db.execute(
+                f"SELECT key, metrics FROM metrics WHERE key IN ({','.join('?' * len(chunk))})", chunk
+            )
+            found.update((key, json.loads(metrics)) for key, metrics in rows)
+        return found
+
+    def put_many(self, entries: Dict[str, Dict[str, Any]]) -> None:
+        with self.db:
+            self.db.executemany(
+                "INSERT OR REPLACE INTO metrics (key, metrics) VALUES (?, ?)",
+                ((key, json.dumps(metrics, separators=(",", ":"))) for key, metrics in entries.items()),
+            )
+
+    def close(self) -> None:
+        self.db.close()
+
+
+def analyze_submissions(submissions: List[Dict[str, Any]], content: Optional[Dict[str, Any]] = None,
+                        cache_path: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Analyze a session's submissions.
+
+    Returns {"results": [{"submission_id", "task_1", "task_2"}], "computed",
+    "cached", "took_ms"}; a task left blank has null metrics.
+    """
+    started = time.perf_counter()
+    prompts = task_prompts(content)
+    cache = AnalyticsCache(cache_path)
+    results = [{"submission_id": submission.get("id"), "task_1": None, "task_2": None} for submission in submissions]
+    computed = cached = 0
+
+    try:
+        for task in TASKS:
+            field = f"task_{task}"
+            prompt = prompts.get(task, "")
+            pending = [
+                (index, str(submission.get(f"{field}_content") or ""))
+                for index, submission in enumerate(submissions)
+                if str(submission.get(f"{field}_content") or "").strip()
+            ]
+            keys = [_cache_key(task, prompt, text) for _, text in pending]
+            known = cache.get_many(keys)
+            missing = [(index, text, key) for (index, text), key in zip(pending, keys) if key not in known]
+
+            if missing:
+                fresh = analyze_task([text for _, text, _ in missing], prompt, task)
+                new_entries = {key: metrics for (_, _, key), metrics in zip(missing, fresh)}
+                cache.put_many(new_entries)
+                known.update(new_entries)
+
+            for (index, _), key in zip(pending, keys):
+                results[index][field] = known[key]
+            computed += len(missing)
+            cached += len(pending) - len(missing)
+    finally:
+        cache.close()
+
+    return {
+        "results": results,
+        "computed": computed,
+        "cached": cached,
+        "took_ms": round((time.perf_counter() - started) * 1000, 1),
+    }
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else ""
+    if command == "analyze":
+        batch = json.load(sys.stdin)
+        output = analyze_submissions(
+            batch.get("submissions") or [],
+            batch.get("content"),
+            os.environ.get("WRITING_ANALYTICS_CACHE"),
+        )
+    else:
+        output = {"success": False, "errors": ["Usage: writing_analytics.py analyze < batch.json"]}
+
+    print(json.dumps(output, ensure_ascii=False, separators=(",", ":")))
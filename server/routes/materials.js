@@ -8,7 +8,19 @@ const db = require("../db");
 const { uploadAudioToR2, deleteFromR2, isR2Key } = require("../utils/r2");
 const authMiddleware = require("../middleware/auth");
 const { resolveSessionMaterialSetId } = require("../utils/testMaterialSets");
-const { PythonShell } = require("python-shell");
+const { conversionQueue } = require("../utils/conversionQueue");
+const { readContentJson, storeContentJson } = require("../utils/contentBlob");
+const { queueSearchIndexUpdate, searchMaterials } = require("../utils/searchIndex");
+const {
+  indexAudioBuffer,
+  parsePartStarts,
+  withPartBoundaries,
+} = require("../utils/audioIndex");
+const {
+  sendBundleEntry,
+  invalidateExamBundle,
+  queueExamBundleBuild,
+} = require("../utils/examBundle");
 // Store last conversion result for debugging
 let lastConversionResult = null;
 
@@ -383,6 +395,54 @@ const injectImageAssetsIntoContent = (content, imageAssets) => {
   return clonedContent;
 };
 
+// Material PDFs are converted in the shared queue. The job keeps the summary
+// that used to be returned by /upload; the full result goes to the debug endpoint.
+conversionQueue.registerHandler("materials", {
+  completed: (conversionResult, job) => {
+    console.log(
+      `\nPDF conversion completed for ${job.meta.fileName} - Confidence: ${(
+        (conversionResult.confidence || 0) * 100
+      ).toFixed(1)}%`
+    );
+
+    // Store the conversion result for debugging
+    lastConversionResult = conversionResult;
+
+    // Note: Full test structure insertion (sections, questions, etc.)
+    // would be done here using the database_inserter module
+    // For now, the material reference stored by /upload is all we keep
+
+    return {
+      success: conversionResult.success,
+      confidence: conversionResult.confidence || 0,
+      message: conversionResult.message,
+      testData: conversionResult.testData
+        ? {
+            title: conversionResult.testData.test_info?.title,
+            test_type: conversionResult.testData.test_info?.test_type,
+            num_sections: conversionResult.testData.test_info?.num_sections,
+            total_questions:
+              conversionResult.testData.test_info?.total_questions,
+            sections:
+              conversionResult.testData.sections?.map((s) => ({
+                type: s.type,
+                section_number: s.section_number,
+                title: s.title,
+                total_questions: s.total_questions,
+              })) || [],
+          }
+        : null,
+      validation: conversionResult.validation,
+      images: conversionResult.images || [],
+    };
+  },
+  failed: (job) => {
+    console.warn(
+      `PDF conversion failed for ${job.meta.fileName} after ${job.attempts} attempt(s): ${job.error}`
+    );
+  },
+});
+
 // POST /api/materials/upload - Upload material file
 router.post(
   "/upload",
@@ -451,105 +511,6 @@ router.post(
         return res.status(404).json({ error: "Test not found" });
       }
 
-      // For PDF files (passages/answers), automatically convert to JSON and insert test data
-      let conversionResult = null;
-      if (type === "passages" || type === "answers") {
-        try {
-          // Call Python conversion via python-shell
-          const pythonScript = path.join(
-            __dirname,
-            "../pdf_converter/node_interface.py"
-          );
-
-          console.log("Starting PDF conversion for:", req.file.filename);
-
-          conversionResult = await new Promise((resolve, reject) => {
-            const pyshell = new PythonShell(pythonScript, {
-              args: [req.file.path],
-              pythonOptions: ["-u"],
-              timeout: 120000, // 2 minutes
-              env: { PYTHONIOENCODING: "utf-8" }, // Ensure Python uses UTF-8
-            });
-
-            let output = "";
-
-            pyshell.on("message", (message) => {
-              // Don't log messages directly to avoid encoding issues - just accumulate
-              output += message;
-            });
-
-            pyshell.on("error", (error) => {
-              console.error("Python process error:", error.toString());
-              reject(error);
-            });
-
-            pyshell.end((err) => {
-              if (err) {
-                reject(err);
-              } else {
-                try {
-                  const result = JSON.parse(output);
-                  console.log(
-                    `\nPDF conversion completed - Confidence: ${(
-                      result.confidence * 100
-                    ).toFixed(1)}%`
-                  );
-
-                  // Log the complete converted test data as formatted JSON
-                  if (result.testData) {
-                    console.log("\n" + "=".repeat(100));
-                    console.log("COMPLETE CONVERTED TEST DATA (JSON)");
-                    console.log("=".repeat(100));
-                    console.log(JSON.stringify(result.testData, null, 2));
-                    console.log("=".repeat(100) + "\n");
-                  }
-
-                  resolve(result);
-                } catch (parseErr) {
-                  console.error("Failed to parse Python output");
-                  reject(parseErr);
-                }
-              }
-            });
-          });
-
-          // Store the conversion result for debugging
-          lastConversionResult = conversionResult;
-
-          // If conversion successful, try to insert test data
-          if (
-            conversionResult.success &&
-            conversionResult.testData &&
-            type === "passages"
-          ) {
-            try {
-              // Insert converted test data into database
-              const testData = conversionResult.testData;
-
-              // Get test name from document or use uploaded file name
-              const testName = testData.test_info?.title || name;
-
-              // Note: We store the material reference, not duplicate test insertion
-              // The test already exists (user selected it), we just store the material
-              // Skipping duplicate test creation to avoid conflicts
-
-              // Note: Full test structure insertion (sections, questions, etc.)
-              // would be done here using the database_inserter module
-              // For now, we're just storing the material reference
-            } catch (dbErr) {
-              console.warn("Failed to auto-insert test data:", dbErr.message);
-              // Continue with material upload even if insertion fails
-            }
-          }
-        } catch (convErr) {
-          console.warn("PDF conversion error (conversion will continue)");
-          conversionResult = {
-            success: false,
-            message: "PDF conversion attempted but incomplete",
-          };
-        }
-      }
-
       // Insert material record
       const fileUrl = `/uploads/materials/${req.file.filename}`;
       const [result] = await db.execute(
@@ -568,13 +529,30 @@ router.post(
         ]
       );
 
+      // For PDF files (passages/answers), queue the conversion to JSON; the
+      // result is available from /conversions/:jobId once a worker is free
+      let conversionJob = null;
+      if (type === "passages" || type === "answers") {
+        conversionJob = await conversionQueue.enqueue({
+          kind: "materials",
+          pdfPath: req.file.path,
+          // Converter stops before the job timeout and returns finished sections
+          env: { PDF_TIME_BUDGET_SECONDS: "90" },
+          meta: {
+            userId: req.user.id,
+            materialId: result.insertId,
+            testId: test_id,
+            type,
+            fileName: req.file.filename,
+          },
+        });
+      }
+
       res.json({
         success: true,
         message:
           "Material uploaded successfully" +
-          (conversionResult?.success
-            ? " and PDF converted to test format"
-            : ""),
+          (conversionJob ? ", PDF conversion queued" : ""),
         material: {
           id: result.insertId,
           test_id,
@@ -584,30 +562,8 @@ router.post(
           file_size: req.file.size,
           uploaded_at: new Date(),
         },
-        conversion: conversionResult
-          ? {
-              success: conversionResult.success,
-              confidence: conversionResult.confidence || 0,
-              message: conversionResult.message,
-              testData: conversionResult.testData
-                ? {
-                    title: conversionResult.testData.test_info?.title,
-                    test_type: conversionResult.testData.test_info?.test_type,
-                    num_sections:
-                      conversionResult.testData.test_info?.num_sections,
-                    total_questions:
-                      conversionResult.testData.test_info?.total_questions,
-                    sections:
-                      conversionResult.testData.sections?.map((s) => ({
-                        type: s.type,
-                        section_number: s.section_number,
-                        title: s.title,
-                        total_questions: s.total_questions,
-                      })) || [],
-                  }
-                : null,
-              validation: conversionResult.validation,
-            }
+        conversion: conversionJob
+          ? { jobId: conversionJob.id, status: conversionJob.status }
           : null,
       });
     } catch (err) {
@@ -638,7 +594,7 @@ router.get("/sets", authMiddleware, ensureAdmin, async (req, res) => {
         ms.content_html_type,
         ms.updated_at,
         (SELECT COUNT(*) FROM test_material_set_images mi WHERE mi.set_id = ms.id) AS image_count,
-        ((ms.content_json IS NOT NULL AND ms.content_json <> '') OR (ms.content_html IS NOT NULL AND ms.content_html <> '') OR (ms.content_html_listening IS NOT NULL AND ms.content_html_listening <> '') OR (ms.content_html_reading IS NOT NULL AND ms.content_html_reading <> '') OR (ms.content_html_writing IS NOT NULL AND ms.content_html_writing <> '')) AS has_content,
+        ((ms.content_json IS NOT NULL AND ms.content_json <> '') OR ms.content_blob IS NOT NULL OR (ms.content_html IS NOT NULL AND ms.content_html <> '') OR (ms.content_html_listening IS NOT NULL AND ms.content_html_listening <> '') OR (ms.content_html_reading IS NOT NULL AND ms.content_html_reading <> '') OR (ms.content_html_writing IS NOT NULL AND ms.content_html_writing <> '')) AS has_content,
         ((ms.content_html IS NOT NULL AND ms.content_html <> '') OR (ms.content_html_listening IS NOT NULL AND ms.content_html_listening <> '') OR (ms.content_html_reading IS NOT NULL AND ms.content_html_reading <> '') OR (ms.content_html_writing IS NOT NULL AND ms.content_html_writing <> '')) AS has_html,
         (ms.content_html_listening IS NOT NULL AND ms.content_html_listening <> '') AS has_listening_html,
         (ms.content_html_reading IS NOT NULL AND ms.content_html_reading <> '') AS has_reading_html,
@@ -664,6 +620,48 @@ router.get("/sets", authMiddleware, ensureAdmin, async (req, res) => {
   }
 });
 
+// GET /api/materials/sets/search?q=... - Find sets, sections and questions by text (admin)
+router.get("/sets/search", authMiddleware, ensureAdmin, async (req, res) => {
+  const query = String(req.query.q || "").trim();
+  const limit = Math.min(Math.max(parseInt(req.query.limit, 10) || 20, 1), 100);
+
+  if (!query) {
+    return res.status(400).json({ error: "q is required" });
+  }
+
+  try {
+    const result = await searchMaterials(query, limit);
+    const setIds = [...new Set(result.results.map((hit) => hit.set_id))];
+    const names = new Map();
+    if (setIds.length > 0) {
+      const [rows] = await db.execute(
+        `SELECT id, name, test_id FROM test_material_sets WHERE id IN (${setIds
+          .map(() => "?")
+          .join(", ")})`,
+        setIds
+      );
+      rows.forEach((row) => names.set(row.id, row));
+    }
+
+    res.json({
+      query,
+      total: result.total,
+      took_ms: result.took_ms,
+      // Hits of sets deleted since they were indexed are dropped
+      results: result.results
+        .filter((hit) => names.has(hit.set_id))
+        .map((hit) => ({
+          ...hit,
+          set_name: names.get(hit.set_id).name,
+          test_id: names.get(hit.set_id).test_id,
+        })),
+    });
+  } catch (err) {
+    console.error("Error searching material sets:", err);
+    res.status(500).json({ error: "Search failed", details: err.message });
+  }
+});
+
 // GET /api/materials/sets/:setId - Get material set details (admin)
 router.get("/sets/:setId", authMiddleware, ensureAdmin, async (req, res) => {
   const { setId } = req.params;
@@ -676,6 +674,7 @@ router.get("/sets/:setId", authMiddleware, ensureAdmin, async (req, res) => {
         t.name AS test_name,
         ms.name,
         ms.content_json,
+        ms.content_blob,
         ms.content_html,
         ms.content_html_type,
         ms.content_html_listening,
@@ -696,7 +695,8 @@ router.get("/sets/:setId", authMiddleware, ensureAdmin, async (req, res) => {
       return res.status(404).json({ error: "Material set not found" });
     }
 
-    const materialSet = rows[0];
+    const { content_blob, ...materialSet } = rows[0];
+    materialSet.content_json = await readContentJson(rows[0]);
     const imageAssets = await listImageAssets(setId);
     let imageSlots = [];
 
@@ -719,210 +719,274 @@ router.get("/sets/:setId", authMiddleware, ensureAdmin, async (req, res) => {
   }
 });
 
-// GET /api/materials/sets/:setId/content - Get content JSON
-router.get("/sets/:setId/content", allowParticipantMaterialRead, async (req, res) => {
-  const { setId } = req.params;
-
-  try {
-    const requestedSectionType = normalizeHtmlType(req.query.section_type);
-    const [rows] = await db.execute(
-      "SELECT content_json, content_html, content_html_type, content_html_listening, content_html_reading, content_html_writing FROM test_material_sets WHERE id = ?",
-      [setId]
-    );
+// Body and status of GET /sets/:setId/content for one section type (or all)
+const buildContentResponse = async (setId, requestedSectionType) => {
+  const [rows] = await db.execute(
+    "SELECT content_json, content_blob, content_html, content_html_type, content_html_listening, content_html_reading, content_html_writing FROM test_material_sets WHERE id = ?",
+    [setId]
+  );
 
-    if (
-      rows.length === 0 ||
-      (!rows[0].content_json &&
-        !rows[0].content_html &&
-        !rows[0].content_html_listening &&
-        !rows[0].content_html_reading &&
-        !rows[0].content_html_writing)
-    ) {
-      return res.status(404).json({ error: "Content not found" });
-    }
+  if (
+    rows.length === 0 ||
+    (!rows[0].content_json &&
+      !rows[0].content_blob &&
+      !rows[0].content_html &&
+      !rows[0].content_html_listening &&
+      !rows[0].content_html_reading &&
+      !rows[0].content_html_writing)
+  ) {
+    return { status: 404, body: { error: "Content not found" } };
+  }
 
-      const htmlContent = getHtmlContentForType(rows[0], requestedSectionType);
-      if (
-        requestedSectionType &&
-        htmlContent
-      ) {
-        return res.json({
-          content_format: "html",
-          content_html: htmlContent,
-          content_html_type: requestedSectionType,
-          content: null,
-          image_assets: [],
-        });
-      }
+  const htmlContent = getHtmlContentForType(rows[0], requestedSectionType);
+  if (
+    requestedSectionType &&
+    htmlContent
+  ) {
+    return {
+      status: 200,
+      body: {
+        content_format: "html",
+        content_html: htmlContent,
+        content_html_type: requestedSectionType,
+        content: null,
+        image_assets: [],
+      },
+    };
+  }
 
-      if (!rows[0].content_json) {
-        return res.status(404).json({
-          error: requestedSectionType
-            ? `No ${requestedSectionType} content found`
-            : "Content not found",
-        });
-      }
+  const contentJson = await readContentJson(rows[0]);
+  if (!contentJson) {
+    return {
+      status: 404,
+      body: {
+        error: requestedSectionType
+          ? `No ${requestedSectionType} content found`
+          : "Content not found",
+      },
+    };
+  }
 
-      const imageAssets = await listImageAssets(setId);
-      let content = injectImageAssetsIntoContent(
-        JSON.parse(rows[0].content_json),
-        imageAssets
-      );
+  const imageAssets = await listImageAssets(setId);
+  let content = injectImageAssetsIntoContent(
+    JSON.parse(contentJson),
+    imageAssets
+  );
 
-      // Auto-normalize db formats to client expectations
-      if (content && content.sections) {
-        const normalizedSections = [];
-        
-        // 1. Listening
-        const listeningSections = content.sections.filter(s => s.type === 'listening');
-        if (listeningSections.length > 0) {
-          const combinedParts = [];
-          listeningSections.forEach(ls => {
-            if (ls.parts) {
-              ls.parts.forEach(p => combinedParts.push(p));
-            }
-          });
-          normalizedSections.push({
-            type: 'listening',
-            title: 'Listening',
-            section_number: 1,
-            total_questions: combinedParts.reduce((sum, p) => sum + (p.questions ? p.questions.length : 0), 0),
-            parts: combinedParts
-          });
+  // Auto-normalize db formats to client expectations
+  if (content && content.sections) {
+    const normalizedSections = [];
+      
+    // 1. Listening
+    const listeningSections = content.sections.filter(s => s.type === 'listening');
+    if (listeningSections.length > 0) {
+      const combinedParts = [];
+      listeningSections.forEach(ls => {
+        if (ls.parts) {
+          ls.parts.forEach(p => combinedParts.push(p));
         }
+      });
+      normalizedSections.push({
+        type: 'listening',
+        title: 'Listening',
+        section_number: 1,
+        total_questions: combinedParts.reduce((sum, p) => sum + (p.questions ? p.questions.length : 0), 0),
+        parts: combinedParts
+      });
+    }
 
-        // 2. Reading
-        const readingSections = content.sections.filter(s => s.type === 'reading');
-        if (readingSections.length > 0) {
-          const combinedPassages = [];
-          readingSections.forEach(rs => {
-            if (rs.passages) {
-              rs.passages.forEach(p => combinedPassages.push(p));
-            }
-          });
-          normalizedSections.push({
-              type: 'reading',
-              title: 'Reading',
-              section_number: 2,
-              total_questions: combinedPassages.reduce((sum, p) => sum + (p.questions ? p.questions.length : 0), 0),
-              passages: combinedPassages
-          });
+    // 2. Reading
+    const readingSections = content.sections.filter(s => s.type === 'reading');
+    if (readingSections.length > 0) {
+      const combinedPassages = [];
+      readingSections.forEach(rs => {
+        if (rs.passages) {
+          rs.passages.forEach(p => combinedPassages.push(p));
         }
-        
-        // 3. Writing
-        const writingSections = content.sections.filter(s => s.type === 'writing');
-        if (writingSections.length > 0) {
-          const combinedTasks = [];
-          writingSections.forEach(ws => {
-            if (ws.tasks) {
-              ws.tasks.forEach(t => combinedTasks.push(t));
-            } else if (ws.parts) {
-              ws.parts.forEach(t => combinedTasks.push(t));
-            }
-          });
-          normalizedSections.push({
-              type: 'writing',
-              title: 'Writing',
-              section_number: 3,
-              tasks: combinedTasks
-          });
+      });
+      normalizedSections.push({
+          type: 'reading',
+          title: 'Reading',
+          section_number: 2,
+          total_questions: combinedPassages.reduce((sum, p) => sum + (p.questions ? p.questions.length : 0), 0),
+          passages: combinedPassages
+      });
+    }
+      
+    // 3. Writing
+    const writingSections = content.sections.filter(s => s.type === 'writing');
+    if (writingSections.length > 0) {
+      const combinedTasks = [];
+      writingSections.forEach(ws => {
+        if (ws.tasks) {
+          ws.tasks.forEach(t => combinedTasks.push(t));
+        } else if (ws.parts) {
+          ws.parts.forEach(t => combinedTasks.push(t));
         }
+      });
+      normalizedSections.push({
+          type: 'writing',
+          title: 'Writing',
+          section_number: 3,
+          tasks: combinedTasks
+      });
+    }
 
-        // Recursive type normalization
-        const typeMap = {
-          'true_false_not_given': 'true_false_ng',
-          'yes_no_not_given': 'yes_no_ng',
-          'note_completion': 'gap_fill',
-          'sentence_completion': 'gap_fill',
-          'summary_completion': 'gap_fill',
-          'form_completion': 'gap_fill',
-          'table_completion': 'gap_fill',
-          'map_labelling': 'matching',
-          'matching_features': 'matching',
-          'matching_information': 'matching',
-          'matching_headings': 'paragraph_matching',
-          'multiple_choice_single': 'multiple_choice'
-        };
-
-        const normalizeQuestions = (obj) => {
-          if (Array.isArray(obj)) {
-            obj.forEach(item => normalizeQuestions(item));
-          } else if (obj !== null && typeof obj === 'object') {
-            if (obj.type && typeMap[obj.type]) {
-              obj.type = typeMap[obj.type];
-            }
-            if (obj.type === 'matching' && obj.options && (!obj.statement && !obj.prompt) && obj.question) {
-               obj.statement = obj.question;
-            }
-            if (obj.type === 'gap_fill' && !obj.prompt && obj.question) {
-               obj.prompt = obj.question;
-            }
-            
-            // Special fix for visual structures that encapsulate question group level types
-            if (obj.visual_structure) {
-               const vs = obj.visual_structure;
-               if (vs.question_groups) {
-                   vs.question_groups.forEach(group => {
-                       if (group.type && typeMap[group.type]) {
-                           group.type = typeMap[group.type];
-                       }
-                   });
-               }
-               
-               // Let's normalize the new extraction structure to the legacy frontend structure
-               // The frontend supports: "structured_notes", "form", "mixed"
-               
-               if (vs.type === 'note_completion' || vs.type === 'summary_completion' || vs.type === 'table_completion' || vs.layout === 'form' || vs.layout === 'structured_notes') {
-                   // Convert to structured_notes
-                   vs.type = 'structured_notes';
-                   
-                   if (!vs.sections || vs.sections.length === 0) {
-                       if (vs.items && vs.items.length > 0) {
-                           // Try to parse items and extract question IDs if it's just strings
-                           const convertedItems = vs.items.map(itemStr => {
-                               if (typeof itemStr === 'string') {
-                                   const match = itemStr.match(/(\d+)\s*(?:\.{2,}|…+|_{2,})/);
-                                   const qId = match ? parseInt(match[1]) : null;
-                                   return {
-                                       type: qId ? "question" : "text",
-                                       question_id: qId,
-                                       content: itemStr
-                                   };
-                               }
-                               return itemStr;
-                           });
-                           
-                           vs.sections = [{
-                               title: "",
-                               items: convertedItems
-                           }];
-                       }
+    // Recursive type normalization
+    const typeMap = {
+      'true_false_not_given': 'true_false_ng',
+      'yes_no_not_given': 'yes_no_ng',
+      'note_completion': 'gap_fill',
+      'sentence_completion': 'gap_fill',
+      'summary_completion': 'gap_fill',
+      'form_completion': 'gap_fill',
+      'table_completion': 'gap_fill',
+      'map_labelling': 'matching',
+      'matching_features': 'matching',
+      'matching_information': 'matching',
+      'matching_headings': 'paragraph_matching',
+      'multiple_choice_single': 'multiple_choice'
+    };
+
+    const normalizeQuestions = (obj) => {
+      if (Array.isArray(obj)) {
+        obj.forEach(item => normalizeQuestions(item));
+      } else if (obj !== null && typeof obj === 'object') {
+        if (obj.type && typeMap[obj.type]) {
+          obj.type = typeMap[obj.type];
+        }
+        if (obj.type === 'matching' && obj.options && (!obj.statement && !obj.prompt) && obj.question) {
+           obj.statement = obj.question;
+        }
+        if (obj.type === 'gap_fill' && !obj.prompt && obj.question) {
+           obj.prompt = obj.question;
+        }
+          
+        // Special fix for visual structures that encapsulate question group level types
+        if (obj.visual_structure) {
+           const vs = obj.visual_structure;
+           if (vs.question_groups) {
+               vs.question_groups.forEach(group => {
+                   if (group.type && typeMap[group.type]) {
+                       group.type = typeMap[group.type];
+                   }
+               });
+           }
+             
+           // Let's normalize the new extraction structure to the legacy frontend structure
+           // The frontend supports: "structured_notes", "form", "mixed"
+             
+           if (vs.type === 'note_completion' || vs.type === 'summary_completion' || vs.type === 'table_completion' || vs.layout === 'form' || vs.layout === 'structured_notes') {
+               // Convert to structured_notes
+               vs.type = 'structured_notes';
+                 
+               if (!vs.sections || vs.sections.length === 0) {
+                   if (vs.items && vs.items.length > 0) {
+                       // Try to parse items and extract question IDs if it's just strings
+                       const convertedItems = vs.items.map(itemStr => {
+                           if (typeof itemStr === 'string') {
+                               const match = itemStr.match(/(\d+)\s*(?:\.{2,}|…+|_{2,})/);
+                               const qId = match ? parseInt(match[1]) : null;
+                               return {
+                                   type: qId ? "question" : "text",
+                                   question_id: qId,
+                                   content: itemStr
+                               };
+                           }
+                           return itemStr;
+                       });
+                         
+                       vs.sections = [{
+                           title: "",
+                           items: convertedItems
+                       }];
                    }
                }
-               
-               if (vs.type && typeMap[vs.type]) {
-                   // If there's a different mapping
-                   vs.type = typeMap[vs.type];
-               }
-            }
-            
-            Object.keys(obj).forEach(k => {
-               // Don't recurse into infinite loops or unnecessary properties if not needed, but here it's simple JSON
-               normalizeQuestions(obj[k]);
-            });
-          }
-        };
-
-        normalizeQuestions(normalizedSections);
-        content.sections = normalizedSections;
+           }
+             
+           if (vs.type && typeMap[vs.type]) {
+               // If there's a different mapping
+               vs.type = typeMap[vs.type];
+           }
+        }
+          
+        Object.keys(obj).forEach(k => {
+           // Don't recurse into infinite loops or unnecessary properties if not needed, but here it's simple JSON
+           normalizeQuestions(obj[k]);
+        });
       }
+    };
 
-      res.json({
-        content_format: "json",
-        content,
-        image_assets: imageAssets,
-        content_html_type: rows[0].content_html_type,
+    normalizeQuestions(normalizedSections);
+    content.sections = normalizedSections;
+  }
+
+  return {
+    status: 200,
+    body: {
+      content_format: "json",
+      content,
+      image_assets: imageAssets,
+      content_html_type: rows[0].content_html_type,
+    },
+  };
+};
+
+// Response bodies of a set's read routes, packed into its exam bundle
+const collectBundleEntries = async (setId) => {
+  const entries = [
+    { name: "meta", media_type: "application/json", text: JSON.stringify({ set_id: Number(setId), built_at: new Date().toISOString() }) },
+  ];
+
+  for (const sectionType of [null, "listening", "reading", "writing"]) {
+    const { status, body } = await buildContentResponse(setId, sectionType);
+    if (status === 200) {
+      entries.push({
+        name: sectionType ? `content/${sectionType}` : "content",
+        media_type: "application/json",
+        text: JSON.stringify(body),
       });
+    }
+  }
+
+  const [rows] = await db.execute(
+    "SELECT answer_key_json, audio_file_name, audio_file_url, audio_file_size, audio_index_json FROM test_material_sets WHERE id = ?",
+    [setId]
+  );
+  if (rows.length > 0 && rows[0].answer_key_json) {
+    entries.push({
+      name: "answers",
+      media_type: "application/json",
+      text: JSON.stringify({ answers: JSON.parse(rows[0].answer_key_json) }),
+    });
+  }
+  if (rows.length > 0 && rows[0].audio_file_url) {
+    entries.push({
+      name: "audio",
+      media_type: "application/json",
+      text: JSON.stringify(buildAudioResponse(rows[0])),
+    });
+  }
+
+  return entries;
+};
+
+// GET /api/materials/sets/:setId/content - Get test content (served from the set's exam bundle when built)
+router.get("/sets/:setId/content", allowParticipantMaterialRead, async (req, res) => {
+  const { setId } = req.params;
+
+  try {
+    const requestedSectionType = normalizeHtmlType(req.query.section_type);
+    const bundleEntry = requestedSectionType ? `content/${requestedSectionType}` : "content";
+    if (await sendBundleEntry(res, setId, bundleEntry)) {
+      return;
+    }
+
+    const { status, body } = await buildContentResponse(setId, requestedSectionType);
+    if (status === 200) {
+      queueExamBundleBuild(setId, collectBundleEntries);
+    }
+    res.status(status).json(body);
   } catch (err) {
     console.error("Error fetching content JSON:", err);
     if (err.message === "Invalid HTML section type") {
@@ -932,11 +996,25 @@ router.get("/sets/:setId/content", allowParticipantMaterialRead, async (req, res
   }
 });
 
+
+// Audio metadata with the duration, seek table and part offsets for
+// range-request playback
+const buildAudioResponse = (row) => ({
+  audio_file_name: row.audio_file_name,
+  audio_file_url: row.audio_file_url,
+  audio_file_size: row.audio_file_size,
+  audio_index: row.audio_index_json ? JSON.parse(row.audio_index_json) : null,
+});
+
 // GET /api/materials/sets/:setId/answers - Get answer key JSON (auth)
 router.get("/sets/:setId/answers", authMiddleware, async (req, res) => {
   const { setId } = req.params;
 
   try {
+    if (await sendBundleEntry(res, setId, "answers")) {
+      return;
+    }
+
     const [rows] = await db.execute(
       "SELECT answer_key_json FROM test_material_sets WHERE id = ?",
       [setId]
@@ -959,8 +1037,12 @@ router.get("/sets/:setId/audio", allowParticipantMaterialRead, async (req, res)
   const { setId } = req.params;
 
   try {
+    if (await sendBundleEntry(res, setId, "audio")) {
+      return;
+    }
+
     const [rows] = await db.execute(
-      `SELECT audio_file_name, audio_file_url, audio_file_size 
+      `SELECT audio_file_name, audio_file_url, audio_file_size, audio_index_json
        FROM test_material_sets 
        WHERE id = ?`,
       [setId]
@@ -970,7 +1052,7 @@ router.get("/sets/:setId/audio", allowParticipantMaterialRead, async (req, res)
       return res.status(404).json({ error: "Audio not found" });
     }
 
-    res.json(rows[0]);
+    res.json(buildAudioResponse(rows[0]));
   } catch (err) {
     console.error("Error fetching audio metadata:", err);
     res.status(500).json({ error: "Internal server error" });
@@ -1012,14 +1094,16 @@ router.post("/sets", authMiddleware, ensureAdmin, async (req, res) => {
       return res.status(404).json({ error: "Test not found" });
     }
 
+    const storedContent = await storeContentJson(contentJsonValue);
     const [result] = await db.execute(
       `INSERT INTO test_material_sets
-       (test_id, name, content_json, content_html, content_html_type, content_html_listening, content_html_reading, content_html_writing, answer_key_json, uploaded_by, created_at, updated_at)
-       VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, NOW(), NOW())`,
+       (test_id, name, content_json, content_blob, content_html, content_html_type, content_html_listening, content_html_reading, content_html_writing, answer_key_json, uploaded_by, created_at, updated_at)
+       VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, NOW(), NOW())`,
       [
         test_id,
         name,
-        contentJsonValue,
+        storedContent.content_json,
+        storedContent.content_blob,
         contentHtmlValue,
         contentHtmlValue ? contentHtmlTypeValue : null,
         contentHtmlValue && contentHtmlTypeValue === "listening"
@@ -1035,6 +1119,9 @@ router.post("/sets", authMiddleware, ensureAdmin, async (req, res) => {
         req.user.id,
       ]
     );
+    if (contentJsonValue) {
+      queueSearchIndexUpdate(result.insertId, contentJsonValue);
+    }
 
     res.json({
       id: result.insertId,
@@ -1061,6 +1148,7 @@ router.put("/sets/:setId", authMiddleware, ensureAdmin, async (req, res) => {
 
   const updates = [];
   const params = [];
+  let contentJsonValue;
 
   try {
     if (name !== undefined) {
@@ -1069,12 +1157,7 @@ router.put("/sets/:setId", authMiddleware, ensureAdmin, async (req, res) => {
     }
 
     if (content_json !== undefined) {
-      if (content_json === "" || content_json === null) {
-        updates.push("content_json = NULL");
-      } else {
-        updates.push("content_json = ?");
-        params.push(normalizeJsonInput(content_json));
-      }
+      contentJsonValue = normalizeJsonInput(content_json);
     }
 
     if (content_html !== undefined) {
@@ -1113,11 +1196,17 @@ router.put("/sets/:setId", authMiddleware, ensureAdmin, async (req, res) => {
     return res.status(400).json({ error: err.message || "Invalid material format" });
   }
 
-  if (updates.length === 0) {
+  if (updates.length === 0 && contentJsonValue === undefined) {
     return res.status(400).json({ error: "No updates provided" });
   }
 
   try {
+    if (contentJsonValue !== undefined) {
+      const storedContent = await storeContentJson(contentJsonValue);
+      updates.push("content_json = ?", "content_blob = ?");
+      params.push(storedContent.content_json, storedContent.content_blob);
+    }
+
     const query = `UPDATE test_material_sets SET ${updates.join(
       ", "
     )}, updated_at = NOW() WHERE id = ?`;
@@ -1127,17 +1216,22 @@ router.put("/sets/:setId", authMiddleware, ensureAdmin, async (req, res) => {
     if (result.affectedRows === 0) {
       return res.status(404).json({ error: "Material set not found" });
     }
+    invalidateExamBundle(setId);
+    if (contentJsonValue !== undefined) {
+      queueSearchIndexUpdate(setId, contentJsonValue);
+    }
 
     let imageSlots = [];
-    if (content_json !== undefined && content_json !== "" && content_json !== null) {
-      imageSlots = extractImageSlots(JSON.parse(normalizeJsonInput(content_json)));
-    } else {
+    if (contentJsonValue) {
+      imageSlots = extractImageSlots(JSON.parse(contentJsonValue));
+    } else if (contentJsonValue === undefined) {
       const [rows] = await db.execute(
-        "SELECT content_json FROM test_material_sets WHERE id = ?",
+        "SELECT content_json, content_blob FROM test_material_sets WHERE id = ?",
         [setId]
       );
-      if (rows[0]?.content_json) {
-        imageSlots = extractImageSlots(JSON.parse(rows[0].content_json));
+      const storedJson = rows[0] ? await readContentJson(rows[0]) : null;
+      if (storedJson) {
+        imageSlots = extractImageSlots(JSON.parse(storedJson));
       }
     }
 
@@ -1178,7 +1272,7 @@ router.post(
 
     try {
       const [setRows] = await db.execute(
-        "SELECT id, content_json FROM test_material_sets WHERE id = ?",
+        "SELECT id, content_json, content_blob FROM test_material_sets WHERE id = ?",
         [setId]
       );
 
@@ -1187,8 +1281,9 @@ router.post(
         return res.status(404).json({ error: "Material set not found" });
       }
 
-      const availableSlots = setRows[0].content_json
-        ? extractImageSlots(JSON.parse(setRows[0].content_json)).map(
+      const storedJson = await readContentJson(setRows[0]);
+      const availableSlots = storedJson
+        ? extractImageSlots(JSON.parse(storedJson)).map(
             (slot) => slot.placeholder_key
           )
         : [];
@@ -1249,6 +1344,7 @@ router.post(
           ]
         );
       }
+      invalidateExamBundle(setId);
 
       const imageAssets = await listImageAssets(setId);
 
@@ -1320,18 +1416,39 @@ router.post(
       // Upload the new file to R2
       const { key, publicUrl, fileName } = await uploadAudioToR2(req.file, setId);
 
+      // Index from the upload buffer; playback still works without an index
+      let audioIndex = null;
+      try {
+        audioIndex = withPartBoundaries(
+          await indexAudioBuffer(req.file.buffer, req.file.originalname),
+          parsePartStarts(req.body.part_starts)
+        );
+      } catch (indexErr) {
+        console.warn(`Audio index failed for set ${setId}:`, indexErr.message);
+      }
+
       await db.execute(
         `UPDATE test_material_sets
-         SET audio_file_name = ?, audio_file_path = ?, audio_file_url = ?, audio_file_size = ?, updated_at = NOW()
+         SET audio_file_name = ?, audio_file_path = ?, audio_file_url = ?, audio_file_size = ?,
+             audio_index_json = ?, updated_at = NOW()
          WHERE id = ?`,
-        [fileName, key, publicUrl, req.file.size, setId]
+        [
+          fileName,
+          key,
+          publicUrl,
+          req.file.size,
+          audioIndex ? JSON.stringify(audioIndex) : null,
+          setId,
+        ]
       );
+      invalidateExamBundle(setId);
 
       res.json({
         success: true,
         audio_file_url: publicUrl,
         audio_file_name: fileName,
         audio_file_size: req.file.size,
+        audio_duration: audioIndex ? audioIndex.duration : null,
       });
     } catch (err) {
       console.error("Audio upload error:", err);
@@ -1340,6 +1457,41 @@ router.post(
   }
 );
 
+// PUT /api/materials/sets/:setId/audio/parts - Set part start times of the audio (admin)
+router.put("/sets/:setId/audio/parts", authMiddleware, ensureAdmin, async (req, res) => {
+  const { setId } = req.params;
+  const partStarts = parsePartStarts(req.body.part_starts);
+
+  if (!partStarts) {
+    return res.status(400).json({
+      error: "part_starts must be increasing start times in seconds",
+    });
+  }
+
+  try {
+    const [rows] = await db.execute(
+      "SELECT audio_index_json FROM test_material_sets WHERE id = ?",
+      [setId]
+    );
+
+    if (rows.length === 0 || !rows[0].audio_index_json) {
+      return res.status(404).json({ error: "Audio index not found" });
+    }
+
+    const audioIndex = withPartBoundaries(JSON.parse(rows[0].audio_index_json), partStarts);
+    await db.execute(
+      "UPDATE test_material_sets SET audio_index_json = ?, updated_at = NOW() WHERE id = ?",
+      [JSON.stringify(audioIndex), setId]
+    );
+    invalidateExamBundle(setId);
+
+    res.json({ success: true, parts: audioIndex.parts });
+  } catch (err) {
+    console.error("Error updating audio parts:", err);
+    res.status(500).json({ error: "Internal server error" });
+  }
+});
+
 // DELETE /api/materials/sets/:setId - Delete material set and audio (admin)
 router.delete("/sets/:setId", authMiddleware, ensureAdmin, async (req, res) => {
   const { setId } = req.params;
@@ -1391,6 +1543,8 @@ router.delete("/sets/:setId", authMiddleware, ensureAdmin, async (req, res) => {
     }
 
     await db.execute("DELETE FROM test_material_sets WHERE id = ?", [setId]);
+    queueSearchIndexUpdate(setId, null);
+    invalidateExamBundle(setId);
 
     res.json({
       success: true,
@@ -1492,6 +1646,34 @@ router.delete("/:materialId", authMiddleware, async (req, res) => {
   }
 });
 
+// GET /api/materials/conversions/:jobId - Status of a queued material conversion
+router.get(
+  "/conversions/:jobId",
+  authMiddleware,
+  ensureAdmin,
+  async (req, res) => {
+    try {
+      const job = await conversionQueue.getJob(req.params.jobId);
+      if (!job || job.kind !== "materials") {
+        return res.status(404).json({ error: "Conversion job not found" });
+      }
+
+      res.json({
+        jobId: job.id,
+        materialId: job.meta.materialId,
+        status: job.status,
+        queuePosition: job.queuePosition,
+        attempts: job.attempts,
+        error: job.status === "failed" ? job.error : null,
+        conversion: job.result,
+      });
+    } catch (err) {
+      console.error("Conversion status error:", err);
+      res.status(500).json({ error: "Internal server error" });
+    }
+  }
+);
+
 // DEBUG ENDPOINT - GET /api/materials/debug/last-conversion - View last PDF conversion result
 router.get("/debug/last-conversion", authMiddleware, async (req, res) => {
   if (!lastConversionResult) {
@@ -1,12 +1,17 @@
 const express = require("express");
 const router = express.Router();
 const multer = require("multer");
-const { PythonShell } = require("python-shell");
 const path = require("path");
 const fs = require("fs");
 const { v4: uuidv4 } = require("uuid");
 const db = require("../db");
 const authMiddleware = require("../middleware/auth");
+const { conversionQueue } = require("../utils/conversionQueue");
+const { expandOptionPools } = require("../utils/optionPools");
+const {
+  loadStagedConversion,
+  discardStagedConversion,
+} = require("../utils/conversionStaging");
 
 // Configure multer for PDF uploads
 const storage = multer.diskStorage({
@@ -37,7 +42,39 @@ const upload = multer({
   limits: { fileSize: 50 * 1024 * 1024 }, // 50MB limit
 });
 
-// POST /api/pdf-upload - Upload and convert PDF
+// Conversions run in the shared queue; the result stays in the staging store
+// and the job keeps only the preview that /status hands back
+conversionQueue.registerHandler("pdf-upload", {
+  completed: async (conversionResult, job) => {
+    if (!conversionResult.success) {
+      await fs.promises.unlink(job.pdfPath).catch(() => {});
+      return {
+        success: false,
+        error: "PDF conversion validation failed",
+        validation: conversionResult.validation,
+        errors: conversionResult.errors,
+        warnings: conversionResult.warnings,
+      };
+    }
+
+    return {
+      success: true,
+      message: "PDF converted successfully",
+      fileName: job.meta.fileName,
+      preview: conversionResult.preview,
+      validation: conversionResult.validation,
+      conversionId: conversionResult.conversionId,
+      expiresAt: new Date(conversionResult.expiresAt * 1000),
+      warnings: conversionResult.warnings,
+      duplicates: conversionResult.duplicates,
+    };
+  },
+  failed: async (job) => {
+    await fs.promises.unlink(job.pdfPath).catch(() => {});
+  },
+});
+
+// POST /api/pdf-upload - Upload and queue PDF for conversion
 router.post(
   "/upload",
   authMiddleware,
@@ -61,84 +98,24 @@ router.post(
         return res.status(403).json({ error: "Only admins can upload tests" });
       }
 
-      // Call Python converter
-      const pythonScriptPath = path.join(
-        __dirname,
-        "../pdf_converter/node_interface.py"
-      );
-
-      let conversionOutput = "";
-      let conversionError = "";
-
-      const pyshell = new PythonShell(pythonScriptPath, {
-        args: [pdfPath],
-        pythonOptions: ["-u"],
-        scriptPath: path.dirname(pythonScriptPath),
-      });
-
-      // Collect output
-      pyshell.on("message", (message) => {
-        conversionOutput += message;
-      });
-
-      pyshell.on("error", (error) => {
-        conversionError += error.message + "\n";
+      // Queue the conversion; the client polls /status/:jobId for the preview
+      const job = await conversionQueue.enqueue({
+        kind: "pdf-upload",
+        pdfPath,
+        env: {
+          PDF_RESULT_TRANSPORT: "staging",
+          PDF_STAGING_OWNER: String(req.user.id),
+          // Converter stops before the job timeout and returns finished sections
+          PDF_TIME_BUDGET_SECONDS: "90",
+        },
+        meta: { userId: req.user.id, fileName },
       });
 
-      pyshell.end((err) => {
-        if (err) {
-          fs.unlinkSync(pdfPath);
-          return res.status(500).json({
-            error: "PDF conversion failed",
-            details: conversionError || err.message,
-          });
-        }
-
-        try {
-          const conversionResult = JSON.parse(conversionOutput);
-
-          if (!conversionResult.success) {
-            fs.unlinkSync(pdfPath);
-            return res.status(400).json({
-              error: "PDF conversion validation failed",
-              validation: conversionResult.validation,
-              errors: conversionResult.errors,
-              warnings: conversionResult.warnings,
-            });
-          }
-
-          // Store conversion result for preview/confirmation before database insertion
-          const conversionData = {
-            fileName,
-            pdfPath,
-            originalFile: req.file.originalname,
-            timestamp: new Date(),
-            uploadedBy: req.user.id,
-            conversionResult: conversionResult,
-          };
-
-          // Return success with conversion preview
-          res.json({
-            success: true,
-            message: "PDF converted successfully",
-            preview: {
-              testName: conversionResult.data.test.name,
-              testType: conversionResult.data.test.type,
-              sections: conversionResult.data.test.sections?.length || 0,
-              questions: conversionResult.data.test.questions?.length || 0,
-              metadata: conversionResult.data.test.metadata,
-            },
-            conversionId: uuidv4(),
-            conversionData, // Send full data for next step (database insertion)
-            warnings: conversionResult.warnings,
-          });
-        } catch (parseErr) {
-          fs.unlinkSync(pdfPath);
-          res.status(500).json({
-            error: "Failed to parse conversion output",
-            details: parseErr.message,
-          });
-        }
+      res.status(202).json({
+        success: true,
+        message: "PDF queued for conversion",
+        jobId: job.id,
+        status: job.status,
       });
     } catch (err) {
       console.error("Upload error:", err);
@@ -155,16 +132,29 @@ router.post(
 
 // POST /api/pdf-upload/confirm - Confirm and insert converted test into database
 router.post("/confirm", authMiddleware, async (req, res) => {
-  const { conversionData } = req.body;
+  const { conversionId } = req.body;
 
-  if (!conversionData || !conversionData.conversionResult) {
-    return res.status(400).json({ error: "Invalid conversion data" });
+  if (!conversionId) {
+    return res.status(400).json({ error: "conversionId is required" });
   }
 
-  const pdfPath = conversionData.pdfPath;
-
   try {
-    const testJson = conversionData.conversionResult.data;
+    const staged = await loadStagedConversion(conversionId);
+    if (!staged) {
+      return res.status(404).json({
+        error: "Conversion not found or expired, please upload the PDF again",
+      });
+    }
+    if (String(staged.owner) !== String(req.user.id)) {
+      return res.status(403).json({ error: "Conversion belongs to another user" });
+    }
+
+    // Converter output: { test_info, sections: [{ type, passages | parts | tasks }] }
+    const testData = staged.result.testData;
+    if (!testData || !Array.isArray(testData.sections)) {
+      return res.status(422).json({ error: "Staged conversion has no test content" });
+    }
+    const testInfo = testData.test_info || {};
 
     // Start database transaction
     const connection = await db.getConnection();
@@ -172,12 +162,9 @@ router.post("/confirm", authMiddleware, async (req, res) => {
 
     try {
       // Insert test
-      const testName = testJson.test.name;
-      const testDescription = testJson.test.type;
-
       const [testResult] = await connection.execute(
-        "INSERT INTO tests (name, description, created_at) VALUES (?, ?, ?)",
-        [testName, testDescription, new Date()]
+        "INSERT INTO tests (name, description) VALUES (?, ?)",
+        [testInfo.title || "Imported test", testInfo.test_type || null]
       );
 
       const testId = testResult.insertId;
@@ -185,44 +172,37 @@ router.post("/confirm", authMiddleware, async (req, res) => {
       let questionsInserted = 0;
       let answersInserted = 0;
 
-      // Insert sections and questions
-      for (const section of testJson.test.sections || []) {
+      // Insert sections and the questions of their passages, parts or tasks
+      for (const section of testData.sections) {
         const [sectionResult] = await connection.execute(
-          "INSERT INTO sections (test_id, type, content, ordering) VALUES (?, ?, ?, ?)",
-          [
-            testId,
-            section.type || "Unknown",
-            (section.content || "").substring(0, 5000),
-            section.order || 1,
-          ]
+          "INSERT INTO sections (test_id, type) VALUES (?, ?)",
+          [testId, section.type || "unknown"]
         );
 
         const sectionId = sectionResult.insertId;
+        const groups = section.passages || section.parts || section.tasks || [];
 
-        // Insert questions for this section
-        const sectionQuestions = (testJson.test.questions || []).filter(
-          (q) => String(q.section_id) === String(section.id)
-        );
+        for (const group of groups) {
+          // Questions name a shared option list; give each its options
+          expandOptionPools(group);
 
-        for (const question of sectionQuestions) {
-          const [questionResult] = await connection.execute(
-            "INSERT INTO questions (section_id, question_text, question_type) VALUES (?, ?, ?)",
-            [sectionId, question.prompt || "", question.type || "unknown"]
-          );
+          for (const question of group.questions || []) {
+            const [questionResult] = await connection.execute(
+              "INSERT INTO questions (section_id, question_text, question_type) VALUES (?, ?, ?)",
+              [sectionId, question.text || "", question.type || "unknown"]
+            );
 
-          const questionId = questionResult.insertId;
-          questionsInserted++;
+            const questionId = questionResult.insertId;
+            questionsInserted++;
 
-          // Insert answer options
-          if (question.options && Array.isArray(question.options)) {
-            for (const option of question.options) {
+            // Insert answer options (the converter does not know the key)
+            for (const option of question.options || []) {
               await connection.execute(
-                "INSERT INTO answers (question_id, answer_text, is_correct, option_label) VALUES (?, ?, ?, ?)",
+                "INSERT INTO answers (question_id, answer_text, is_correct) VALUES (?, ?, ?)",
                 [
                   questionId,
-                  option.text || "",
-                  option.is_correct || false,
-                  option.id || "",
+                  option.label ? `${option.label}. ${option.text || ""}` : option.text || "",
+                  false,
                 ]
               );
               answersInserted++;
@@ -234,17 +214,15 @@ router.post("/confirm", authMiddleware, async (req, res) => {
       await connection.commit();
       connection.release();
 
-      // Clean up PDF file
-      if (fs.existsSync(pdfPath)) {
-        fs.unlinkSync(pdfPath);
-      }
+      // Clean up staged result and PDF file
+      await discardStagedConversion(conversionId, staged.pdfPath);
 
       res.json({
         success: true,
         message: "Test inserted into database successfully",
         testId,
         summary: {
-          sections: testJson.test.sections?.length || 0,
+          sections: testData.sections.length,
           questions: questionsInserted,
           answers: answersInserted,
         },
@@ -263,13 +241,29 @@ router.post("/confirm", authMiddleware, async (req, res) => {
   }
 });
 
-// GET /api/pdf-upload/status/:uploadId - Check conversion status
-router.get("/status/:uploadId", authMiddleware, (req, res) => {
-  // This could track conversion progress if needed
-  res.json({
-    status: "completed",
-    message: "Conversion status endpoint",
-  });
+// GET /api/pdf-upload/status/:jobId - Check conversion status
+router.get("/status/:jobId", authMiddleware, async (req, res) => {
+  try {
+    const job = await conversionQueue.getJob(req.params.jobId);
+    if (!job || job.kind !== "pdf-upload") {
+      return res.status(404).json({ error: "Conversion job not found" });
+    }
+    if (String(job.meta.userId) !== String(req.user.id)) {
+      return res.status(403).json({ error: "Conversion belongs to another user" });
+    }
+
+    res.json({
+      jobId: job.id,
+      status: job.status,
+      queuePosition: job.queuePosition,
+      attempts: job.attempts,
+      error: job.status === "failed" ? job.error : null,
+      result: job.result,
+    });
+  } catch (err) {
+    console.error("Conversion status error:", err);
+    res.status(500).json({ error: "Internal server error" });
+  }
 });
 
 module.exports = router;
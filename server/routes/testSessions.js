@@ -6,6 +6,7 @@ const {
   processWritingScore,
   calculateListeningScore,
   calculateReadingScore,
+  loadAnswersKey,
 } = require("../utils/scoreCalculator");
 const {
   getValidatedMaterialSetIdForTest,
@@ -13,6 +14,9 @@ const {
   sanitizeSessionNotes,
 } = require("../utils/testMaterialSets");
 const { generateUniqueParticipantCode } = require("../utils/codeGenerator");
+const { readContentJson } = require("../utils/contentBlob");
+const { analyzeSessionWriting } = require("../utils/writingAnalytics");
+const { flagSessionAnswers } = require("../utils/answerMatching");
 
 /**
  * POST /api/test-sessions/register-students
@@ -1073,14 +1077,23 @@ router.get("/:session_id/writing-submissions", async (req, res) => {
         ws.reviewed_by,
         ws.reviewed_at,
         ws.submitted_at,
-        u.full_name as reviewed_by_name
+        u.full_name as reviewed_by_name,
+        wsa.analytics,
+        wsa.analyzed_at
        FROM writing_submissions ws
        LEFT JOIN users u ON ws.reviewed_by = u.id
+       LEFT JOIN writing_submission_analytics wsa ON wsa.submission_id = ws.id
        WHERE ws.session_id = ?
        ORDER BY ws.submitted_at DESC`,
       [session_id]
     );
 
+    submissions.forEach((submission) => {
+      submission.analytics = submission.analytics
+        ? JSON.parse(submission.analytics)
+        : null;
+    });
+
     res.json({
       session_id,
       total_submissions: submissions.length,
@@ -1092,6 +1105,72 @@ router.get("/:session_id/writing-submissions", async (req, res) => {
   }
 });
 
+/**
+ * POST /api/test-sessions/:session_id/writing-submissions/analytics
+ * Admin endpoint: Compute examiner aids for every writing submission of a
+ * session (sentence stats, lexical diversity, repeated phrases, prompt
+ * overlap). Results are stored and returned with the submissions list.
+ */
+router.post(
+  "/:session_id/writing-submissions/analytics",
+  authMiddleware,
+  async (req, res) => {
+    const { session_id } = req.params;
+
+    // Check if user is admin
+    const [userRows] = await db.execute("SELECT role FROM users WHERE id = ?", [
+      req.user.id,
+    ]);
+    if (userRows.length === 0 || userRows[0].role !== "admin") {
+      return res
+        .status(403)
+        .json({ error: "Only admins can analyze submissions" });
+    }
+
+    try {
+      const [sessionRows] = await db.execute(
+        "SELECT test_id, test_materials_id, admin_notes FROM test_sessions WHERE id = ?",
+        [session_id]
+      );
+      if (sessionRows.length === 0) {
+        return res.status(404).json({ error: "Session not found" });
+      }
+
+      // Task prompts come from the session's material set; without one the
+      // prompt overlap is simply left out
+      const testMaterialsId = await resolveSessionMaterialSetId({
+        testId: sessionRows[0].test_id,
+        testMaterialsId: sessionRows[0].test_materials_id,
+        adminNotes: sessionRows[0].admin_notes,
+      });
+      let contentJson = null;
+      if (testMaterialsId) {
+        const [setRows] = await db.execute(
+          "SELECT content_json, content_blob FROM test_material_sets WHERE id = ?",
+          [testMaterialsId]
+        );
+        if (setRows.length > 0) {
+          contentJson = await readContentJson(setRows[0]);
+        }
+      }
+
+      const result = await analyzeSessionWriting(session_id, contentJson);
+
+      res.json({
+        message: "Writing analytics updated",
+        session_id,
+        analyzed: result.results.length,
+        computed: result.computed,
+        cached: result.cached,
+        results: result.results,
+      });
+    } catch (err) {
+      console.error("Error analyzing writing submissions:", err);
+      res.status(500).json({ error: "Internal server error" });
+    }
+  }
+);
+
 /**
  * POST /api/test-sessions/:session_id/writing-submissions/:submission_id/review
  * Admin endpoint: Update writing submission with score and admin notes
@@ -1164,6 +1243,160 @@ router.post(
   }
 );
 
+/**
+ * POST /api/test-sessions/:session_id/answer-flags
+ * Admin endpoint: Flag incorrect gap-fill answers that are within one edit
+ * of the answer key (misspellings) for examiner review. Scores are not
+ * changed; flags already reviewed are kept as they are.
+ */
+router.post("/:session_id/answer-flags", authMiddleware, async (req, res) => {
+  const { session_id } = req.params;
+
+  // Check if user is admin
+  const [userRows] = await db.execute("SELECT role FROM users WHERE id = ?", [
+    req.user.id,
+  ]);
+  if (userRows.length === 0 || userRows[0].role !== "admin") {
+    return res.status(403).json({ error: "Only admins can flag answers" });
+  }
+
+  try {
+    const [sessionRows] = await db.execute(
+      "SELECT test_id, test_materials_id, admin_notes FROM test_sessions WHERE id = ?",
+      [session_id]
+    );
+    if (sessionRows.length === 0) {
+      return res.status(404).json({ error: "Session not found" });
+    }
+
+    const testMaterialsId = await resolveSessionMaterialSetId({
+      testId: sessionRows[0].test_id,
+      testMaterialsId: sessionRows[0].test_materials_id,
+      adminNotes: sessionRows[0].admin_notes,
+    });
+    if (!testMaterialsId) {
+      return res
+        .status(409)
+        .json({ error: "This session does not have test content attached" });
+    }
+
+    const answersKey = await loadAnswersKey(testMaterialsId);
+    const result = await flagSessionAnswers(session_id, answersKey);
+
+    res.json({
+      message: "Answer flags updated",
+      session_id,
+      flagged: result.flags.length,
+      added: result.added,
+      counts: result.counts,
+      questions: result.questions,
+    });
+  } catch (err) {
+    console.error("Error flagging answers:", err);
+    res.status(500).json({ error: "Internal server error" });
+  }
+});
+
+/**
+ * GET /api/test-sessions/:session_id/answer-flags
+ * Admin endpoint: List the flagged answers of a session with participant
+ * details (?status=pending|accepted|rejected)
+ */
+router.get("/:session_id/answer-flags", authMiddleware, async (req, res) => {
+  const { session_id } = req.params;
+  const { status } = req.query;
+
+  // Check if user is admin
+  const [userRows] = await db.execute("SELECT role FROM users WHERE id = ?", [
+    req.user.id,
+  ]);
+  if (userRows.length === 0 || userRows[0].role !== "admin") {
+    return res.status(403).json({ error: "Only admins can view answer flags" });
+  }
+
+  try {
+    const params = [session_id];
+    let statusFilter = "";
+    if (status) {
+      statusFilter = "AND arf.status = ?";
+      params.push(status);
+    }
+
+    const [flags] = await db.execute(
+      `SELECT
+        arf.id,
+        arf.participant_answer_id,
+        arf.participant_id,
+        tp.participant_id_code,
+        tp.full_name,
+        arf.section_type,
+        arf.question_number,
+        arf.user_answer,
+        arf.correct_answer,
+        arf.edit_distance,
+        arf.status,
+        arf.reviewed_at,
+        u.full_name as reviewed_by_name
+       FROM answer_review_flags arf
+       JOIN test_participants tp ON arf.participant_id = tp.id
+       LEFT JOIN users u ON arf.reviewed_by = u.id
+       WHERE arf.session_id = ? ${statusFilter}
+       ORDER BY arf.section_type, arf.question_number, tp.full_name`,
+      params
+    );
+
+    res.json({ session_id, total_flags: flags.length, flags });
+  } catch (err) {
+    console.error("Error fetching answer flags:", err);
+    res.status(500).json({ error: "Internal server error" });
+  }
+});
+
+/**
+ * POST /api/test-sessions/:session_id/answer-flags/:flag_id/review
+ * Admin endpoint: Record the examiner's decision on a flagged answer
+ * ({ status: "accepted" | "rejected" })
+ */
+router.post(
+  "/:session_id/answer-flags/:flag_id/review",
+  authMiddleware,
+  async (req, res) => {
+    const { session_id, flag_id } = req.params;
+    const { status } = req.body;
+
+    // Check if user is admin
+    const [userRows] = await db.execute("SELECT role FROM users WHERE id = ?", [
+      req.user.id,
+    ]);
+    if (userRows.length === 0 || userRows[0].role !== "admin") {
+      return res.status(403).json({ error: "Only admins can review answer flags" });
+    }
+
+    if (!["accepted", "rejected"].includes(status)) {
+      return res
+        .status(400)
+        .json({ error: "Status must be 'accepted' or 'rejected'" });
+    }
+
+    try {
+      const [result] = await db.execute(
+        `UPDATE answer_review_flags
+         SET status = ?, reviewed_by = ?, reviewed_at = NOW()
+         WHERE id = ? AND session_id = ?`,
+        [status, req.user.id, flag_id, session_id]
+      );
+      if (result.affectedRows === 0) {
+        return res.status(404).json({ error: "Flag not found" });
+      }
+
+      res.json({ message: "Answer flag reviewed", flag_id, status });
+    } catch (err) {
+      console.error("Error reviewing answer flag:", err);
+      res.status(500).json({ error: "Internal server error" });
+    }
+  }
+);
+
 /**
  * GET /api/test-sessions/participant/:id/scores
  * Get calculated/final scores for a participant
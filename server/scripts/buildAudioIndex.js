@@ -0,0 +1,69 @@
+/**
+ * Indexes the listening audio of material sets uploaded before audio
+ * indexing existed (duration and seek table, see utils/audioIndex.js).
+ *
+ * New uploads are indexed as they are stored; this downloads each
+ * unindexed file once from its public URL. Part start times already
+ * stored in an index are kept when --all re-indexes it. A set's exam
+ * bundle is removed once its index changes; the next read rebuilds it.
+ *
+ * Usage:
+ *   node scripts/buildAudioIndex.js          # sets without an index
+ *   node scripts/buildAudioIndex.js --all    # every set with audio
+ */
+
+const fs = require("fs");
+const pool = require("../db");
+const { indexAudioBuffer, withPartBoundaries } = require("../utils/audioIndex");
+const { bundlePath } = require("../utils/examBundle");
+
+const buildAudioIndex = async () => {
+  const all = process.argv.includes("--all");
+  let indexed = 0;
+  let failed = 0;
+
+  try {
+    const [rows] = await pool.execute(
+      `SELECT id, audio_file_name, audio_file_url, audio_index_json
+       FROM test_material_sets
+       WHERE audio_file_url IS NOT NULL ${all ? "" : "AND audio_index_json IS NULL"}
+       ORDER BY id ASC`
+    );
+
+    for (const row of rows) {
+      try {
+        const response = await fetch(row.audio_file_url);
+        if (!response.ok) {
+          throw new Error(`HTTP ${response.status}`);
+        }
+        const buffer = Buffer.from(await response.arrayBuffer());
+        const previous = row.audio_index_json ? JSON.parse(row.audio_index_json) : null;
+        const audioIndex = withPartBoundaries(
+          await indexAudioBuffer(buffer, row.audio_file_name),
+          previous ? (previous.parts || []).map((part) => part.start) : null
+        );
+
+        await pool.execute(
+          "UPDATE test_material_sets SET audio_index_json = ? WHERE id = ?",
+          [JSON.stringify(audioIndex), row.id]
+        );
+        // The set's exam bundle still holds the old audio response
+        await fs.promises.unlink(bundlePath(row.id)).catch(() => {});
+        indexed++;
+        console.log(`Set ${row.id}: ${audioIndex.duration}s (${audioIndex.format})`);
+      } catch (err) {
+        failed++;
+        console.warn(`Set ${row.id}: not indexed –`, err.message);
+      }
+    }
+
+    console.log(`Indexed ${indexed} audio file(s), ${failed} failed`);
+  } catch (err) {
+    console.error("Error building audio index:", err.message);
+    process.exitCode = 1;
+  } finally {
+    await pool.end();
+  }
+};
+
+buildAudioIndex();
@@ -0,0 +1,58 @@
+/**
+ * Indexes every material set for /api/materials/sets/search and for the
+ * near-duplicate check of new conversions.
+ *
+ * Sets are saved into the index as they are created, updated or deleted;
+ * run this once to index the sets that existed before, or after the index
+ * file was lost. Sets whose content did not change since they were indexed
+ * are skipped, so it is safe to re-run.
+ *
+ * Usage:
+ *   node scripts/buildSearchIndex.js
+ */
+
+const pool = require("../db");
+const { readContentJson } = require("../utils/contentBlob");
+const { updateSearchIndex } = require("../utils/searchIndex");
+
+// Sets read and sent to the indexer at a time
+const BATCH_SIZE = 50;
+
+const buildSearchIndex = async () => {
+  const totals = { sets_indexed: 0, sets_unchanged: 0, documents_written: 0 };
+
+  try {
+    let lastId = 0;
+    for (;;) {
+      const [rows] = await pool.execute(
+        `SELECT id, content_json, content_blob FROM test_material_sets
+         WHERE id > ? AND (content_json IS NOT NULL OR content_blob IS NOT NULL)
+         ORDER BY id ASC LIMIT ${BATCH_SIZE}`,
+        [lastId]
+      );
+      if (rows.length === 0) break;
+
+      const changes = [];
+      for (const row of rows) {
+        changes.push({ setId: row.id, contentJson: await readContentJson(row) });
+      }
+      const summary = await updateSearchIndex(changes);
+      Object.keys(totals).forEach((key) => {
+        totals[key] += summary[key];
+      });
+      lastId = rows[rows.length - 1].id;
+    }
+
+    console.log(
+      `Indexed ${totals.sets_indexed} set(s) (${totals.documents_written} documents), ` +
+        `${totals.sets_unchanged} unchanged`
+    );
+  } catch (err) {
+    console.error("Error building search index:", err.message);
+    process.exitCode = 1;
+  } finally {
+    await pool.end();
+  }
+};
+
+buildSearchIndex();
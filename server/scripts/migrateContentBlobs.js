@@ -0,0 +1,129 @@
+/**
+ * Moves test_material_sets.content_json into compressed content_blob.
+ *
+ * 1. Trains a dictionary on the stored sets (pdf_converter/content_blob.py)
+ *    unless one exists, and saves it in content_dictionaries.
+ * 2. Packs every set that is not yet a blob of that dictionary, checks that
+ *    it unpacks to the same JSON, and clears content_json.
+ *
+ * Usage:
+ *   node scripts/migrateContentBlobs.js [--dry-run] [--retrain]
+ *
+ *   --dry-run  report sizes without writing anything
+ *   --retrain  train a new dictionary (after many new sets) and repack all
+ *              sets with it; blobs of older dictionaries stay readable
+ */
+
+const fs = require("fs");
+const os = require("os");
+const path = require("path");
+const { PythonShell } = require("python-shell");
+const pool = require("../db");
+const {
+  dictionaryId,
+  packContentBlob,
+  unpackContentBlob,
+  readContentJson,
+} = require("../utils/contentBlob");
+
+const CONTENT_BLOB_SCRIPT = path.join(__dirname, "../pdf_converter/content_blob.py");
+
+const trainDictionary = async (samples) => {
+  const sampleDir = await fs.promises.mkdtemp(path.join(os.tmpdir(), "content-dict-"));
+  try {
+    const samplePaths = [];
+    for (const [index, sample] of samples.entries()) {
+      const samplePath = path.join(sampleDir, `${index}.json`);
+      await fs.promises.writeFile(samplePath, sample);
+      samplePaths.push(samplePath);
+    }
+    const dictionaryPath = path.join(sampleDir, "content.dict");
+    await PythonShell.run(path.basename(CONTENT_BLOB_SCRIPT), {
+      scriptPath: path.dirname(CONTENT_BLOB_SCRIPT),
+      args: ["train", "--output", dictionaryPath, ...samplePaths],
+    });
+    return await fs.promises.readFile(dictionaryPath);
+  } finally {
+    await fs.promises.rm(sampleDir, { recursive: true, force: true });
+  }
+};
+
+const migrateContentBlobs = async () => {
+  const dryRun = process.argv.includes("--dry-run");
+  const retrain = process.argv.includes("--retrain");
+
+  try {
+    const [rows] = await pool.execute(
+      "SELECT id, content_json, content_blob FROM test_material_sets WHERE content_json IS NOT NULL OR content_blob IS NOT NULL"
+    );
+    const sets = [];
+    for (const row of rows) {
+      const json = await readContentJson(row);
+      if (json) sets.push({ row, json });
+    }
+    if (sets.length === 0) {
+      console.log("No material set content to migrate.");
+      return;
+    }
+
+    const [existing] = await pool.execute(
+      "SELECT id, dictionary FROM content_dictionaries ORDER BY created_at DESC, id DESC LIMIT 1"
+    );
+    let dictionary;
+    if (existing.length > 0 && !retrain) {
+      dictionary = existing[0].dictionary;
+      console.log(`Using dictionary ${existing[0].id}`);
+    } else {
+      dictionary = await trainDictionary(sets.map((set) => set.json));
+      console.log(
+        `Trained dictionary ${dictionaryId(dictionary)} (${dictionary.length} bytes) on ${sets.length} set(s)`
+      );
+      if (!dryRun) {
+        await pool.execute(
+          "INSERT IGNORE INTO content_dictionaries (id, dictionary, sample_count) VALUES (?, ?, ?)",
+          [dictionaryId(dictionary), dictionary, sets.length]
+        );
+      }
+    }
+
+    const id = dictionaryId(dictionary);
+    let bytesBefore = 0;
+    let bytesAfter = 0;
+    let packed = 0;
+
+    for (const { row, json } of sets) {
+      const blob = packContentBlob(json, dictionary);
+      bytesBefore += Buffer.byteLength(json, "utf8");
+      bytesAfter += blob.length;
+
+      if (row.content_blob && row.content_blob.toString("hex", 6, 14) === id) {
+        continue;
+      }
+      if (unpackContentBlob(blob, dictionary) !== json) {
+        throw new Error(`Set ${row.id} does not survive a round trip`);
+      }
+      if (!dryRun) {
+        // Keep updated_at: it orders a test's material sets
+        await pool.execute(
+          "UPDATE test_material_sets SET content_blob = ?, content_json = NULL, updated_at = updated_at WHERE id = ?",
+          [blob, row.id]
+        );
+      }
+      packed++;
+    }
+
+    console.log(
+      `${dryRun ? "Would pack" : "Packed"} ${packed} of ${sets.length} set(s): ` +
+        `${bytesBefore} -> ${bytesAfter} bytes ` +
+        `(${(bytesBefore / Math.max(bytesAfter, 1)).toFixed(1)}x smaller)`
+    );
+  } catch (err) {
+    console.error("Error migrating content blobs:", err.message);
+    // Set rather than exit, so the pool below is closed first
+    process.exitCode = 1;
+  } finally {
+    await pool.end();
+  }
+};
+
+migrateContentBlobs();
@@ -0,0 +1,95 @@
+/**
+ * Folds changed participant answers into the item statistics kept by
+ * pdf_converter/item_statistics.py (facility, discrimination, distractors).
+ *
+ * Rows are read in (updated_at, id) order from the engine's cursor, so
+ * corrected and resubmitted answers are picked up as well as new ones.
+ * Safe to run repeatedly, e.g. from cron after exam sessions.
+ *
+ * Usage:
+ *   node scripts/updateItemStatistics.js
+ */
+
+const path = require("path");
+const { PythonShell } = require("python-shell");
+const pool = require("../db");
+
+const ITEM_STATISTICS_SCRIPT = path.join(__dirname, "../pdf_converter/item_statistics.py");
+// Rows per update call
+const BATCH_SIZE = 5000;
+
+const runItemStatistics = (args, input) =>
+  new Promise((resolve, reject) => {
+    const pyshell = new PythonShell(path.basename(ITEM_STATISTICS_SCRIPT), {
+      args,
+      scriptPath: path.dirname(ITEM_STATISTICS_SCRIPT),
+      env: { ...process.env, PYTHONIOENCODING: "utf-8" },
+    });
+
+    let output = "";
+    pyshell.on("message", (message) => {
+      output += message;
+    });
+
+    if (input !== undefined) {
+      pyshell.send(JSON.stringify(input));
+    }
+    pyshell.end((err) => {
+      let result = null;
+      try {
+        result = JSON.parse(output);
+      } catch (parseErr) {
+        // Reported below with the process error, if any
+      }
+      if (result && result.success === false) {
+        reject(new Error(result.errors.join("; ")));
+      } else if (err || !result) {
+        reject(err || new Error("item_statistics.py returned no result"));
+      } else {
+        resolve(result);
+      }
+    });
+  });
+
+const updateItemStatistics = async () => {
+  let applied = 0;
+
+  try {
+    let cursor = await runItemStatistics(["cursor"]);
+
+    for (;;) {
+      const [rows] = await pool.execute(
+        `SELECT pa.id, pa.participant_id, pa.section_type, pa.question_number,
+                pa.user_answer, pa.is_correct,
+                COALESCE(ts.test_materials_id, 0) AS material_set_id,
+                DATE_FORMAT(pa.updated_at, '%Y-%m-%d %H:%i:%s.%f') AS updated_at
+         FROM participant_answers pa
+         JOIN test_sessions ts ON pa.session_id = ts.id
+         WHERE pa.updated_at > ? OR (pa.updated_at = ? AND pa.id > ?)
+         ORDER BY pa.updated_at ASC, pa.id ASC
+         LIMIT ${BATCH_SIZE}`,
+        [cursor.updated_at, cursor.updated_at, cursor.id]
+      );
+      if (rows.length === 0) {
+        break;
+      }
+
+      const summary = await runItemStatistics(["update"], rows);
+      applied += summary.rows_applied;
+      const last = rows[rows.length - 1];
+      cursor = { updated_at: last.updated_at, id: last.id };
+      if (rows.length < BATCH_SIZE) {
+        break;
+      }
+    }
+
+    console.log(`Item statistics updated: ${applied} answer(s) changed`);
+  } catch (err) {
+    console.error("Error updating item statistics:", err.message);
+    process.exitCode = 1;
+  } finally {
+    await pool.end();
+  }
+};
+
+updateItemStatistics();
@@ -0,0 +1,100 @@
+/**
+ * Flags near-miss gap-fill answers for examiner review, using
+ * pdf_converter/answer_matching.py.
+ *
+ * A session's incorrect listening and reading answers go to Python in one
+ * batch; answers within one edit of the key ("Delaware" for "DELAWARR")
+ * are stored in answer_review_flags. Existing flags are kept, so re-running
+ * never resets an examiner's decision.
+ */
+
+const path = require("path");
+const { PythonShell } = require("python-shell");
+const db = require("../db");
+
+const ANSWER_MATCHING_SCRIPT = path.join(__dirname, "../pdf_converter/answer_matching.py");
+// Rows per INSERT when storing flags
+const STORE_BATCH_SIZE = 200;
+
+const runAnswerMatching = (answers, answerKey) =>
+  new Promise((resolve, reject) => {
+    const pyshell = new PythonShell(path.basename(ANSWER_MATCHING_SCRIPT), {
+      args: ["classify"],
+      scriptPath: path.dirname(ANSWER_MATCHING_SCRIPT),
+      env: { ...process.env, PYTHONIOENCODING: "utf-8" },
+    });
+
+    let output = "";
+    pyshell.on("message", (message) => {
+      output += message;
+    });
+
+    pyshell.send(JSON.stringify({ answer_key: answerKey, answers }));
+    pyshell.end((err) => {
+      let result = null;
+      try {
+        result = JSON.parse(output);
+      } catch (parseErr) {
+        // Reported below with the process error, if any
+      }
+      if (result && result.success === false) {
+        reject(new Error(result.errors.join("; ")));
+      } else if (err || !result) {
+        reject(err || new Error("answer_matching.py returned no result"));
+      } else {
+        resolve(result);
+      }
+    });
+  });
+
+const storeAnswerFlags = async (sessionId, flags) => {
+  let inserted = 0;
+  for (let start = 0; start < flags.length; start += STORE_BATCH_SIZE) {
+    const batch = flags.slice(start, start + STORE_BATCH_SIZE);
+    const [result] = await db.execute(
+      `INSERT IGNORE INTO answer_review_flags
+       (participant_answer_id, session_id, participant_id, section_type, question_number,
+        user_answer, correct_answer, edit_distance)
+       VALUES ${batch.map(() => "(?, ?, ?, ?, ?, ?, ?, ?)").join(", ")}`,
+      batch.flatMap((flag) => [
+        flag.answer_id,
+        sessionId,
+        flag.participant_id,
+        flag.section_type,
+        flag.question_number,
+        flag.user_answer,
+        flag.correct_answer,
+        flag.edit_distance,
+      ])
+    );
+    inserted += result.affectedRows || 0;
+  }
+  return inserted;
+};
+
+/**
+ * Classify every incorrect answer of a session against its answer key
+ * (as returned by loadAnswersKey) and store new flags. Resolves with the
+ * matcher summary plus the number of flags added.
+ */
+const flagSessionAnswers = async (sessionId, answerKey) => {
+  const [answers] = await db.execute(
+    `SELECT id, participant_id, section_type, question_number, user_answer
+     FROM participant_answers
+     WHERE session_id = ? AND is_correct = 0
+       AND user_answer IS NOT NULL AND user_answer <> ''`,
+    [sessionId]
+  );
+  if (answers.length === 0) {
+    return { flags: [], counts: {}, questions: [], added: 0 };
+  }
+
+  const result = await runAnswerMatching(answers, answerKey);
+  result.added = await storeAnswerFlags(sessionId, result.flags);
+  return result;
+};
+
+module.exports = {
+  runAnswerMatching,
+  flagSessionAnswers,
+};
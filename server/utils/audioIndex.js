@@ -0,0 +1,79 @@
+/**
+ * Listening audio index, built by pdf_converter/audio_index.py from frame
+ * and page headers only.
+ *
+ * The index (duration, a byte offset every `seek_interval` seconds of audio
+ * and the optional part start times) is stored in test_material_sets.audio_index_json
+ * so clients can start playback with an HTTP range request.
+ */
+
+const fs = require("fs");
+const os = require("os");
+const path = require("path");
+const crypto = require("crypto");
+const { PythonShell } = require("python-shell");
+
+const AUDIO_INDEX_SCRIPT = path.join(__dirname, "../pdf_converter/audio_index.py");
+
+const runAudioIndex = async (filePath) => {
+  const results = await PythonShell.run(path.basename(AUDIO_INDEX_SCRIPT), {
+    args: ["index", filePath],
+    scriptPath: path.dirname(AUDIO_INDEX_SCRIPT),
+  });
+  const result = JSON.parse(results.join(""));
+  if (result.success === false) {
+    throw new Error(result.errors.join("; "));
+  }
+  return result;
+};
+
+/**
+ * Index an uploaded audio buffer. The indexer memory-maps a file, so the
+ * buffer is written to a temporary file first.
+ */
+const indexAudioBuffer = async (buffer, originalName) => {
+  const ext = path.extname(originalName || "").toLowerCase() || ".mp3";
+  const tempPath = path.join(os.tmpdir(), `audio_index_${crypto.randomUUID()}${ext}`);
+  await fs.promises.writeFile(tempPath, buffer);
+  try {
+    return await runAudioIndex(tempPath);
+  } finally {
+    fs.promises.unlink(tempPath).catch(() => {});
+  }
+};
+
+/**
+ * Parse part start times ("0, 612.5, 1250" or an array of seconds).
+ * Returns null when none are given or they are not increasing times.
+ */
+const parsePartStarts = (value) => {
+  if (value === undefined || value === null || value === "") return null;
+  const list = Array.isArray(value) ? value : String(value).split(",");
+  const starts = list.map((start) => Number(start));
+  const valid = starts.every(
+    (start, i) => Number.isFinite(start) && start >= 0 && (i === 0 || start > starts[i - 1])
+  );
+  return valid && starts.length > 0 ? starts : null;
+};
+
+/**
+ * Add part boundaries to an index: each part starts at the seek table entry
+ * covering its start time, so playback from `offset` begins at most
+ * `seek_interval` seconds before the part and the player decodes forward.
+ */
+const withPartBoundaries = (index, partStarts) => {
+  const offsets = index.seek_offsets || [];
+  const parts = (partStarts || [])
+    .filter((start) => start < index.duration)
+    .map((start, i) => {
+      const entry = Math.min(Math.floor(start / index.seek_interval), offsets.length - 1);
+      return { part: i + 1, start, offset: offsets[entry] };
+    });
+  return { ...index, parts };
+};
+
+module.exports = {
+  indexAudioBuffer,
+  parsePartStarts,
+  withPartBoundaries,
+};
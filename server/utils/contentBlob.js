@@ -0,0 +1,188 @@
+/**
+ * Compressed content blobs for test_material_sets.
+ *
+ * Once a dictionary has been trained (scripts/migrateContentBlobs.js),
+ * content JSON is stored in content_blob instead of content_json: DEFLATE
+ * primed with a dictionary of the keys, instructions and option lists that
+ * every set repeats. The blob layout is described in
+ * pdf_converter/content_blob.py:
+ *
+ *   "IELC" | version | codec | dictionary id (8) | length (4) | CRC32 (4) | data
+ *
+ * Dictionaries live in content_dictionaries and are never changed once
+ * written, so they are cached for the life of the process.
+ */
+
+const crypto = require("crypto");
+const zlib = require("zlib");
+const db = require("../db");
+
+const MAGIC = Buffer.from("IELC");
+const FORMAT_VERSION = 1;
+const CODEC_DEFLATE_DICT = 1;
+const HEADER_SIZE = 22;
+// How long a newly trained dictionary may go unnoticed by a running server
+const CURRENT_DICTIONARY_TTL_MS = 60 * 1000;
+
+const CRC_TABLE = Array.from({ length: 256 }, (_, n) => {
+  let c = n;
+  for (let k = 0; k < 8; k++) {
+    c = c & 1 ? 0xedb88320 ^ (c >>> 1) : c >>> 1;
+  }
+  return c >>> 0;
+});
+
+const crc32 = (buffer) => {
+  let crc = 0xffffffff;
+  for (const byte of buffer) {
+    crc = CRC_TABLE[(crc ^ byte) & 0xff] ^ (crc >>> 8);
+  }
+  return (crc ^ 0xffffffff) >>> 0;
+};
+
+const dictionaryId = (dictionary) =>
+  crypto.createHash("sha256").update(dictionary).digest().subarray(0, 8).toString("hex");
+
+const isContentBlob = (value) =>
+  Buffer.isBuffer(value) &&
+  value.length >= HEADER_SIZE &&
+  value.subarray(0, MAGIC.length).equals(MAGIC);
+
+/**
+ * Compress a JSON string with a dictionary.
+ */
+const packContentBlob = (json, dictionary) => {
+  const raw = Buffer.from(json, "utf8");
+  const header = Buffer.alloc(HEADER_SIZE);
+  MAGIC.copy(header, 0);
+  header.writeUInt8(FORMAT_VERSION, 4);
+  header.writeUInt8(CODEC_DEFLATE_DICT, 5);
+  header.write(dictionaryId(dictionary), 6, 8, "hex");
+  header.writeUInt32BE(raw.length, 14);
+  header.writeUInt32BE(crc32(raw), 18);
+  return Buffer.concat([
+    header,
+    zlib.deflateRawSync(raw, { level: 9, dictionary }),
+  ]);
+};
+
+/**
+ * Header fields of a blob, or null if the value is not a blob.
+ */
+const readBlobHeader = (blob) => {
+  if (!isContentBlob(blob)) return null;
+  return {
+    version: blob.readUInt8(4),
+    codec: blob.readUInt8(5),
+    dictionaryId: blob.toString("hex", 6, 14),
+    length: blob.readUInt32BE(14),
+    checksum: blob.readUInt32BE(18),
+  };
+};
+
+/**
+ * JSON string of a blob. Throws if the blob is unreadable or corrupt.
+ */
+const unpackContentBlob = (blob, dictionary) => {
+  const header = readBlobHeader(blob);
+  if (!header) {
+    throw new Error("Not a content blob");
+  }
+  if (header.version !== FORMAT_VERSION || header.codec !== CODEC_DEFLATE_DICT) {
+    throw new Error(
+      `Unsupported content blob version ${header.version}, codec ${header.codec}`
+    );
+  }
+
+  let raw;
+  try {
+    raw = zlib.inflateRawSync(blob.subarray(HEADER_SIZE), { dictionary });
+  } catch (err) {
+    throw new Error(`Corrupt content blob: ${err.message}`);
+  }
+  if (raw.length !== header.length || crc32(raw) !== header.checksum) {
+    throw new Error("Content blob checksum mismatch");
+  }
+  return raw.toString("utf8");
+};
+
+const dictionaries = new Map();
+let currentDictionary = null;
+let currentDictionaryCheckedAt = 0;
+
+const loadDictionary = async (id) => {
+  if (!dictionaries.has(id)) {
+    const [rows] = await db.execute(
+      "SELECT dictionary FROM content_dictionaries WHERE id = ?",
+      [id]
+    );
+    if (rows.length === 0) {
+      throw new Error(`Unknown content dictionary ${id}`);
+    }
+    dictionaries.set(id, rows[0].dictionary);
+  }
+  return dictionaries.get(id);
+};
+
+/**
+ * Newest dictionary ({ id, dictionary }), or null before the migration ran.
+ */
+const getCurrentDictionary = async () => {
+  if (Date.now() - currentDictionaryCheckedAt > CURRENT_DICTIONARY_TTL_MS) {
+    const [rows] = await db.execute(
+      "SELECT id, dictionary FROM content_dictionaries ORDER BY created_at DESC, id DESC LIMIT 1"
+    );
+    currentDictionary = rows.length > 0 ? rows[0] : null;
+    if (currentDictionary) {
+      dictionaries.set(currentDictionary.id, currentDictionary.dictionary);
+    }
+    currentDictionaryCheckedAt = Date.now();
+  }
+  return currentDictionary;
+};
+
+/**
+ * Content JSON string of a test_material_sets row, from whichever column
+ * holds it (null when neither does).
+ */
+const readContentJson = async (row) => {
+  if (row.content_blob) {
+    const header = readBlobHeader(row.content_blob);
+    if (!header) {
+      throw new Error("Not a content blob");
+    }
+    return unpackContentBlob(
+      row.content_blob,
+      await loadDictionary(header.dictionaryId)
+    );
+  }
+  return row.content_json || null;
+};
+
+/**
+ * Column values for storing a content JSON string: a blob when a
+ * dictionary exists, plain JSON otherwise.
+ */
+const storeContentJson = async (json) => {
+  if (!json) {
+    return { content_json: null, content_blob: null };
+  }
+  const current = await getCurrentDictionary();
+  if (!current) {
+    return { content_json: json, content_blob: null };
+  }
+  return {
+    content_json: null,
+    content_blob: packContentBlob(json, current.dictionary),
+  };
+};
+
+module.exports = {
+  crc32,
+  dictionaryId,
+  isContentBlob,
+  packContentBlob,
+  unpackContentBlob,
+  readContentJson,
+  storeContentJson,
+};
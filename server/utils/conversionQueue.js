@@ -0,0 +1,302 @@
+/**
+ * Durable queue for PDF conversion jobs.
+ *
+ * Upload routes enqueue a job and return its id instead of running the
+ * converter inside the request. At most PDF_WORKER_CONCURRENCY converter
+ * processes run at once; the rest wait in the queue, so an upload spike
+ * turns into waiting time instead of CPU thrashing and request timeouts.
+ *
+ * Every job is a JSON file in data/conversion-jobs/ and is rewritten (tmp
+ * file + rename) on each state change:
+ *
+ *   queued -> running -> succeeded
+ *                     -> queued (retry, after a delay) -> ... -> failed
+ *
+ * A converter run that throws (crash, timeout, unreadable output) is retried
+ * up to maxAttempts times. A conversion that completes with success: false
+ * is a result, not a crash, and is not retried. On startup, jobs left
+ * "running" by a crashed or restarted server are put back in the queue.
+ *
+ * Routes register a handler per job kind:
+ *   completed(result, job) - return value is stored as the job's result
+ *   failed(job)            - called once a job has used up its attempts
+ */
+
+const fs = require("fs");
+const os = require("os");
+const path = require("path");
+const { v4: uuidv4 } = require("uuid");
+const { runPdfConversion, recordConversionCrash } = require("./pdfConversion");
+
+const JOBS_DIR = path.join(__dirname, "../data/conversion-jobs");
+const DEFAULT_CONCURRENCY = Math.max(1, Math.min(2, os.cpus().length - 1));
+const DEFAULT_MAX_ATTEMPTS = 3;
+const DEFAULT_TIMEOUT_MS = 120000; // 2 minutes per attempt
+const RETRY_DELAY_MS = 5000; // multiplied by the attempt number
+const FINISHED_JOB_RETENTION_MS = 24 * 60 * 60 * 1000;
+const JOB_ID_PATTERN =
+  /^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$/;
+
+const createConversionQueue = ({
+  jobsDir = JOBS_DIR,
+  concurrency = Number(process.env.PDF_WORKER_CONCURRENCY) ||
+    DEFAULT_CONCURRENCY,
+  maxAttempts = DEFAULT_MAX_ATTEMPTS,
+  run = runPdfConversion,
+  recordCrash = recordConversionCrash,
+} = {}) => {
+  const handlers = new Map();
+  const jobs = new Map(); // id -> job, for queued and running jobs
+  const pending = []; // queued job ids, oldest first
+  let running = 0;
+  let started = false;
+  let retryTimer = null;
+
+  const jobPath = (jobId) => path.join(jobsDir, `${jobId}.json`);
+
+  const saveJob = async (job) => {
+    job.updatedAt = new Date().toISOString();
+    const tmpPath = `${jobPath(job.id)}.tmp`;
+    await fs.promises.writeFile(tmpPath, JSON.stringify(job));
+    await fs.promises.rename(tmpPath, jobPath(job.id));
+  };
+
+  const readJob = async (jobId) => {
+    if (!JOB_ID_PATTERN.test(String(jobId))) return null;
+    try {
+      return JSON.parse(await fs.promises.readFile(jobPath(jobId), "utf8"));
+    } catch (err) {
+      if (err.code === "ENOENT") return null;
+      throw err;
+    }
+  };
+
+  const scheduleRetryPump = (delayMs) => {
+    if (retryTimer) return;
+    retryTimer = setTimeout(() => {
+      retryTimer = null;
+      pump();
+    }, delayMs);
+    retryTimer.unref();
+  };
+
+  const pump = () => {
+    if (!started) return;
+    const now = Date.now();
+    let nextRetryAt = Infinity;
+
+    for (let i = 0; i < pending.length && running < concurrency; ) {
+      const job = jobs.get(pending[i]);
+      const availableAt = Date.parse(job.availableAt);
+      if (availableAt > now) {
+        nextRetryAt = Math.min(nextRetryAt, availableAt);
+        i++;
+        continue;
+      }
+      pending.splice(i, 1);
+      running++;
+      runJob(job)
+        .catch((err) => console.error(`Conversion job ${job.id}:`, err))
+        .finally(() => {
+          running--;
+          pump();
+        });
+    }
+
+    if (nextRetryAt !== Infinity) {
+      scheduleRetryPump(nextRetryAt - now);
+    }
+  };
+
+  const finishJob = async (job, status) => {
+    job.status = status;
+    job.finishedAt = new Date().toISOString();
+    jobs.delete(job.id);
+    await saveJob(job);
+  };
+
+  const notifyFailed = async (job) => {
+    const handler = handlers.get(job.kind) || {};
+    if (!handler.failed) return;
+    try {
+      await handler.failed(job);
+    } catch (err) {
+      console.error(`Conversion job ${job.id} failure handler:`, err);
+    }
+  };
+
+  const runJob = async (job) => {
+    const handler = handlers.get(job.kind) || {};
+    job.status = "running";
+    job.attempts++;
+    job.startedAt = new Date().toISOString();
+    await saveJob(job);
+
+    let result;
+    try {
+      result = await run(job.pdfPath, {
+        args: job.args,
+        timeout: job.timeout,
+        // Time since the job became runnable, for the converter metrics
+        env: {
+          ...job.env,
+          PDF_QUEUE_WAIT_MS: String(Date.now() - Date.parse(job.availableAt)),
+        },
+      });
+    } catch (err) {
+      job.error = err.message;
+      recordCrash(err);
+      if (job.attempts < job.maxAttempts) {
+        job.status = "queued";
+        job.availableAt = new Date(
+          Date.now() + RETRY_DELAY_MS * job.attempts
+        ).toISOString();
+        await saveJob(job);
+        pending.push(job.id);
+        return;
+      }
+      await finishJob(job, "failed");
+      await notifyFailed(job);
+      return;
+    }
+
+    try {
+      job.result = handler.completed
+        ? await handler.completed(result, job)
+        : result;
+      job.error = null;
+      await finishJob(job, "succeeded");
+    } catch (err) {
+      console.error(`Conversion job ${job.id} completion handler:`, err);
+      job.error = err.message;
+      await finishJob(job, "failed");
+      await notifyFailed(job);
+    }
+  };
+
+  /**
+   * Load unfinished jobs from disk and start dispatching.
+   * Jobs found "running" were interrupted by a crash or restart.
+   */
+  const start = async () => {
+    if (started) return;
+    await fs.promises.mkdir(jobsDir, { recursive: true });
+
+    const recovered = [];
+    for (const fileName of await fs.promises.readdir(jobsDir)) {
+      if (!fileName.endsWith(".json")) continue;
+      const job = await readJob(path.basename(fileName, ".json"));
+      // Jobs enqueued before start() are already in memory
+      if (!job || jobs.has(job.id)) continue;
+
+      if (job.status === "succeeded" || job.status === "failed") {
+        if (Date.now() - Date.parse(job.updatedAt) > FINISHED_JOB_RETENTION_MS) {
+          await fs.promises.unlink(jobPath(job.id)).catch(() => {});
+        }
+        continue;
+      }
+
+      if (job.status === "running") {
+        job.error = "Interrupted by server restart";
+        if (job.attempts >= job.maxAttempts) {
+          await finishJob(job, "failed");
+          await notifyFailed(job);
+          continue;
+        }
+        job.status = "queued";
+        await saveJob(job);
+      }
+      recovered.push(job);
+    }
+
+    recovered.sort((a, b) => Date.parse(a.createdAt) - Date.parse(b.createdAt));
+    for (const job of recovered) {
+      jobs.set(job.id, job);
+      pending.push(job.id);
+    }
+    if (recovered.length > 0) {
+      console.log(`Recovered ${recovered.length} conversion job(s)`);
+    }
+
+    started = true;
+    pump();
+  };
+
+  /**
+   * Queue a conversion. Resolves once the job is on disk.
+   *
+   * @param {object} options
+   * @param {string} options.kind - Selects the registered handler
+   * @param {string} options.pdfPath - PDF to convert
+   * @param {string[]} [options.args] - Extra converter arguments
+   * @param {object} [options.env] - Extra converter environment
+   * @param {object} [options.meta] - Route data (user id, material id, ...)
+   */
+  const enqueue = async ({
+    kind,
+    pdfPath,
+    args = [],
+    env = {},
+    timeout = DEFAULT_TIMEOUT_MS,
+    meta = {},
+  }) => {
+    await fs.promises.mkdir(jobsDir, { recursive: true });
+    const now = new Date().toISOString();
+    const job = {
+      id: uuidv4(),
+      kind,
+      status: "queued",
+      pdfPath,
+      args,
+      env,
+      timeout,
+      meta,
+      attempts: 0,
+      maxAttempts,
+      createdAt: now,
+      availableAt: now,
+      startedAt: null,
+      finishedAt: null,
+      error: null,
+      result: null,
+    };
+    await saveJob(job);
+    jobs.set(job.id, job);
+    pending.push(job.id);
+    pump();
+    return job;
+  };
+
+  /**
+   * Current state of a job, with its place in the queue while it waits.
+   */
+  const getJob = async (jobId) => {
+    const job = jobs.get(jobId) || (await readJob(jobId));
+    if (!job) return null;
+    const position = pending.indexOf(job.id);
+    return {
+      ...job,
+      queuePosition: position === -1 ? null : position + 1,
+    };
+  };
+
+  const registerHandler = (kind, handler) => {
+    handlers.set(kind, handler);
+  };
+
+  const stats = () => ({
+    concurrency,
+    running,
+    queued: pending.length,
+  });
+
+  return { start, enqueue, getJob, registerHandler, stats };
+};
+
+const conversionQueue = createConversionQueue();
+
+module.exports = {
+  JOB_ID_PATTERN,
+  conversionQueue,
+  createConversionQueue,
+};
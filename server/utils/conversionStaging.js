@@ -0,0 +1,68 @@
+/**
+ * Reads conversion results staged by pdf_converter/conversion_staging.py.
+ *
+ * Each entry is data/conversion-staging/<conversionId>.json with two lines
+ * of JSON: a header ({ id, created_at, expires_at, owner, pdf_path }) and
+ * the node_interface result. Timestamps are Unix seconds.
+ */
+
+const fs = require("fs");
+const path = require("path");
+
+const STAGING_DIR = path.join(__dirname, "../data/conversion-staging");
+const CONVERSION_ID_PATTERN = /^[0-9a-f]{32}$/;
+
+const entryPath = (conversionId) =>
+  path.join(STAGING_DIR, `${conversionId}.json`);
+
+/**
+ * Remove a staged entry and the uploaded PDF it owns.
+ */
+const discardStagedConversion = async (conversionId, pdfPath) => {
+  if (!CONVERSION_ID_PATTERN.test(String(conversionId))) return;
+  await fs.promises.unlink(entryPath(conversionId)).catch(() => {});
+  if (pdfPath) {
+    await fs.promises.unlink(pdfPath).catch(() => {});
+  }
+};
+
+/**
+ * Load a staged conversion.
+ *
+ * Resolves with { id, createdAt, expiresAt, owner, pdfPath, result }, or null
+ * when the id is unknown or the entry has expired (expired entries are
+ * discarded on the spot).
+ */
+const loadStagedConversion = async (conversionId) => {
+  if (!CONVERSION_ID_PATTERN.test(String(conversionId))) return null;
+
+  let contents;
+  try {
+    contents = await fs.promises.readFile(entryPath(conversionId), "utf8");
+  } catch (err) {
+    if (err.code === "ENOENT") return null;
+    throw err;
+  }
+
+  const newline = contents.indexOf("\n");
+  const header = JSON.parse(contents.slice(0, newline));
+  if (header.expires_at * 1000 <= Date.now()) {
+    await discardStagedConversion(conversionId, header.pdf_path);
+    return null;
+  }
+
+  return {
+    id: header.id,
+    createdAt: new Date(header.created_at * 1000),
+    expiresAt: new Date(header.expires_at * 1000),
+    owner: header.owner,
+    pdfPath: header.pdf_path,
+    result: JSON.parse(contents.slice(newline + 1)),
+  };
+};
+
+module.exports = {
+  STAGING_DIR,
+  loadStagedConversion,
+  discardStagedConversion,
+};
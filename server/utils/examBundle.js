@@ -0,0 +1,227 @@
+/**
+ * Packed exam bundles: one file per material set holding the ready-to-send
+ * responses of its content, answers and audio routes.
+ * The layout is described in pdf_converter/exam_bundle.py:
+ *
+ *   "IELB" | version (2) | entry count (2) | reserved (8)
+ *   entry table: name (44) | media type (2) | reserved (2) | offset (8) | length (4) | CRC32 (4)
+ *
+ * Bundles live in server/data/bundles (override with EXAM_BUNDLE_DIR). Once
+ * a set's bundle exists its reads are answered from the file: the entry
+ * table is cached per set and each response is a byte range of the file
+ * streamed to the client, with no content query and no JSON rebuilt. The
+ * participant access check (allowParticipantMaterialRead) still queries the
+ * database on every read.
+ * Any change to a set removes its bundle; the next read rebuilds it.
+ */
+
+const fs = require("fs");
+const path = require("path");
+const crypto = require("crypto");
+const { PythonShell } = require("python-shell");
+
+const EXAM_BUNDLE_SCRIPT = path.join(__dirname, "../pdf_converter/exam_bundle.py");
+const BUNDLE_DIR =
+  process.env.EXAM_BUNDLE_DIR || path.join(__dirname, "../data/bundles");
+
+const MAGIC = "IELB";
+const FORMAT_VERSION = 1;
+const HEADER_SIZE = 16;
+const ENTRY_SIZE = 64;
+const NAME_SIZE = 44;
+const MEDIA_TYPES = [
+  "application/octet-stream",
+  "application/json",
+  "image/png",
+  "image/jpeg",
+  "image/webp",
+  "image/gif",
+  "image/svg+xml",
+];
+
+// setId -> { mtimeMs, size, entries: Map(name -> { mediaType, offset, length }) }
+const tableCache = new Map();
+// setId -> number of invalidations, so a build that raced a change is dropped
+const generations = new Map();
+const pendingBuilds = new Set();
+
+const bundlePath = (setId) => path.join(BUNDLE_DIR, `set-${Number(setId)}.bundle`);
+
+const readEntryTable = async (filePath) => {
+  const handle = await fs.promises.open(filePath, "r");
+  try {
+    const header = Buffer.alloc(HEADER_SIZE);
+    await handle.read(header, 0, HEADER_SIZE, 0);
+    if (header.toString("latin1", 0, 4) !== MAGIC || header.readUInt16BE(4) !== FORMAT_VERSION) {
+      throw new Error(`${filePath} is not a version ${FORMAT_VERSION} exam bundle`);
+    }
+
+    const count = header.readUInt16BE(6);
+    const table = Buffer.alloc(count * ENTRY_SIZE);
+    await handle.read(table, 0, table.length, HEADER_SIZE);
+
+    const entries = new Map();
+    for (let row = 0; row < count; row++) {
+      const base = row * ENTRY_SIZE;
+      const nameEnd = table.indexOf(0, base);
+      const name = table.toString(
+        "utf8",
+        base,
+        nameEnd === -1 || nameEnd > base + NAME_SIZE ? base + NAME_SIZE : nameEnd
+      );
+      entries.set(name, {
+        mediaType: MEDIA_TYPES[table.readUInt16BE(base + NAME_SIZE)] || MEDIA_TYPES[0],
+        offset: Number(table.readBigUInt64BE(base + NAME_SIZE + 4)),
+        length: table.readUInt32BE(base + NAME_SIZE + 12),
+      });
+    }
+    return entries;
+  } finally {
+    await handle.close();
+  }
+};
+
+/**
+ * Entry table of a set's bundle, or null when it has none. Re-read only
+ * when the file changed since it was cached.
+ */
+const getBundleEntries = async (setId) => {
+  const filePath = bundlePath(setId);
+  let stat;
+  try {
+    stat = await fs.promises.stat(filePath);
+  } catch (err) {
+    tableCache.delete(String(setId));
+    return null;
+  }
+
+  const cached = tableCache.get(String(setId));
+  if (cached && cached.mtimeMs === stat.mtimeMs && cached.size === stat.size) {
+    return cached.entries;
+  }
+  const entries = await readEntryTable(filePath);
+  tableCache.set(String(setId), { mtimeMs: stat.mtimeMs, size: stat.size, entries });
+  return entries;
+};
+
+/**
+ * Send one bundle entry as the response. Resolves false, without touching
+ * the response, when the set has no bundle or the bundle has no such entry.
+ */
+const sendBundleEntry = async (res, setId, name) => {
+  let entries;
+  try {
+    entries = await getBundleEntries(setId);
+  } catch (err) {
+    console.warn(`Exam bundle for set ${setId} unreadable:`, err.message);
+    return false;
+  }
+  const entry = entries && entries.get(name);
+  if (!entry) return false;
+
+  res.set({
+    "Content-Type": entry.mediaType === "application/json"
+      ? "application/json; charset=utf-8"
+      : entry.mediaType,
+    "Content-Length": String(entry.length),
+  });
+  if (entry.length === 0) {
+    res.end();
+    return true;
+  }
+  await new Promise((resolve, reject) => {
+    const stream = fs.createReadStream(bundlePath(setId), {
+      start: entry.offset,
+      end: entry.offset + entry.length - 1,
+    });
+    stream.on("error", reject);
+    res.on("finish", resolve);
+    res.on("close", resolve);
+    stream.pipe(res);
+  });
+  return true;
+};
+
+/**
+ * Remove a set's bundle after the set changed. A build already running
+ * for it will discard its result.
+ */
+const invalidateExamBundle = (setId) => {
+  const key = String(setId);
+  generations.set(key, (generations.get(key) || 0) + 1);
+  tableCache.delete(key);
+  fs.promises.unlink(bundlePath(setId)).catch(() => {});
+};
+
+/**
+ * Pack entries ({ name, media_type, text | path }) into the set's bundle.
+ * `generation` is the set's invalidation count when the entries were read.
+ */
+const writeExamBundle = async (setId, entries, generation = generations.get(String(setId)) || 0) => {
+  const key = String(setId);
+  await fs.promises.mkdir(BUNDLE_DIR, { recursive: true });
+  const tempPath = `${bundlePath(setId)}.${crypto.randomUUID()}.tmp`;
+
+  try {
+    const pyshell = new PythonShell(path.basename(EXAM_BUNDLE_SCRIPT), {
+      args: ["pack", tempPath],
+      scriptPath: path.dirname(EXAM_BUNDLE_SCRIPT),
+      env: { ...process.env, PYTHONIOENCODING: "utf-8" },
+    });
+    let output = "";
+    pyshell.on("message", (message) => {
+      output += message;
+    });
+    pyshell.send(JSON.stringify({ entries }));
+    await new Promise((resolve, reject) => {
+      pyshell.end((err) => (err ? reject(err) : resolve()));
+    });
+    const result = JSON.parse(output);
+    if (result.success === false) {
+      throw new Error(result.errors.join("; "));
+    }
+
+    // Drop the bundle if the set changed while it was being built
+    if ((generations.get(key) || 0) !== generation) {
+      return null;
+    }
+    await fs.promises.rename(tempPath, bundlePath(setId));
+    if ((generations.get(key) || 0) !== generation) {
+      await fs.promises.unlink(bundlePath(setId)).catch(() => {});
+      return null;
+    }
+    return result;
+  } finally {
+    fs.promises.unlink(tempPath).catch(() => {});
+  }
+};
+
+/**
+ * Build a set's bundle in the background with `collectEntries(setId)`,
+ * once at a time per set. Failures are only logged; reads keep using the
+ * database until a build succeeds.
+ */
+const queueExamBundleBuild = (setId, collectEntries) => {
+  const key = String(setId);
+  if (pendingBuilds.has(key)) return;
+  pendingBuilds.add(key);
+
+  const generation = generations.get(key) || 0;
+  collectEntries(setId)
+    .then((entries) => writeExamBundle(setId, entries, generation))
+    .catch((err) => {
+      console.error(`Exam bundle build failed for set ${setId}:`, err.message);
+    })
+    .finally(() => {
+      pendingBuilds.delete(key);
+    });
+};
+
+module.exports = {
+  bundlePath,
+  getBundleEntries,
+  sendBundleEntry,
+  invalidateExamBundle,
+  writeExamBundle,
+  queueExamBundleBuild,
+};
@@ -0,0 +1,32 @@
+/**
+ * Expands the shared option pools written by pdf_converter/option_pools.py.
+ *
+ * A passage or part lists each option list its questions share once, in
+ * option_pools ({ "tfng": [...], "q14-19": [...] }), and the questions name
+ * their list in option_pool instead of repeating it. Content is served with
+ * the pools (the client expands them in testContentNormalizer.js); this is
+ * for server code that needs options per question, such as inserting a
+ * confirmed PDF upload. A question only gets a pool when it names one and
+ * carries no options of its own, and all questions of a pool share the same
+ * array.
+ */
+
+const expandOptionPools = (container) => {
+  const pools = container.option_pools;
+  if (!pools || typeof pools !== "object") return container;
+
+  for (const question of container.questions || []) {
+    if (!question || !question.option_pool) continue;
+    const pool = pools[question.option_pool];
+    if (pool && !(question.options && question.options.length)) {
+      question.options = pool;
+    }
+    delete question.option_pool;
+  }
+  delete container.option_pools;
+  return container;
+};
+
+module.exports = {
+  expandOptionPools,
+};
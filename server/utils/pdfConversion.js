@@ -0,0 +1,120 @@
+/**
+ * Runs pdf_converter/node_interface.py and reads its result.
+ *
+ * The converter writes the result as compact JSON to a temp file
+ * (PDF_RESULT_TRANSPORT=file) and prints a one-line envelope with the file's
+ * path, size and sha256. Only the envelope goes through python-shell; the
+ * payload is read in one piece, verified and deleted.
+ */
+
+const { PythonShell } = require("python-shell");
+const crypto = require("crypto");
+const fs = require("fs");
+const path = require("path");
+
+const CONVERTER_SCRIPT = path.join(__dirname, "../pdf_converter/node_interface.py");
+const METRICS_SCRIPT = path.join(__dirname, "../pdf_converter/converter_metrics.py");
+
+const readResultEnvelope = async (envelope) => {
+  if (envelope.transport !== "file") {
+    // Converter printed the result itself (older converter / manual run)
+    return envelope;
+  }
+
+  const payload = await fs.promises.readFile(envelope.path);
+  try {
+    if (payload.length !== envelope.size) {
+      throw new Error(
+        `Conversion result truncated (${payload.length} of ${envelope.size} bytes)`
+      );
+    }
+    const digest = crypto.createHash("sha256").update(payload).digest("hex");
+    if (digest !== envelope.sha256) {
+      throw new Error("Conversion result checksum mismatch");
+    }
+    return JSON.parse(payload.toString("utf8"));
+  } finally {
+    fs.promises.unlink(envelope.path).catch(() => {});
+  }
+};
+
+/**
+ * Convert a PDF and resolve with the node_interface result object.
+ *
+ * @param {string} pdfPath - Uploaded PDF
+ * @param {object} [options]
+ * @param {string[]} [options.args] - Extra script arguments (e.g. document key)
+ * @param {number} [options.timeout] - Kill the converter after this many ms
+ * @param {object} [options.env] - Extra environment variables
+ */
+const runPdfConversion = (pdfPath, { args = [], timeout, env = {} } = {}) =>
+  new Promise((resolve, reject) => {
+    const pyshell = new PythonShell(CONVERTER_SCRIPT, {
+      args: [pdfPath, ...args],
+      pythonOptions: ["-u"],
+      scriptPath: path.dirname(CONVERTER_SCRIPT),
+      timeout,
+      env: {
+        ...process.env,
+        PYTHONIOENCODING: "utf-8", // Ensure Python uses UTF-8
+        PDF_RESULT_TRANSPORT: "file",
+        ...env,
+      },
+    });
+
+    let output = "";
+    let processError = null;
+
+    pyshell.on("message", (message) => {
+      output += message;
+    });
+
+    pyshell.on("error", (error) => {
+      processError = error;
+    });
+
+    pyshell.end((err) => {
+      if (err || processError) {
+        reject(err || processError);
+        return;
+      }
+
+      let envelope;
+      try {
+        envelope = JSON.parse(output);
+      } catch (parseErr) {
+        reject(parseErr);
+        return;
+      }
+
+      readResultEnvelope(envelope).then(resolve, reject);
+    });
+  });
+
+/**
+ * Count a converter run that ended without a result in the converter
+ * metrics (pdf_converter/converter_metrics.py). Never rejects.
+ */
+const recordConversionCrash = async (err) => {
+  let reason = "crash";
+  if (err && (err.signal === "SIGTERM" || /timed? ?out/i.test(err.message || ""))) {
+    reason = "timeout";
+  } else if (err instanceof SyntaxError) {
+    reason = "unreadable_output";
+  }
+  try {
+    await PythonShell.run(path.basename(METRICS_SCRIPT), {
+      args: ["record-crash", reason],
+      scriptPath: path.dirname(METRICS_SCRIPT),
+      env: { ...process.env, PYTHONIOENCODING: "utf-8" },
+    });
+  } catch (metricsErr) {
+    console.warn("Converter crash not recorded:", metricsErr.message);
+  }
+};
+
+module.exports = {
+  runPdfConversion,
+  readResultEnvelope,
+  recordConversionCrash,
+};
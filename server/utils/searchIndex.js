@@ -0,0 +1,97 @@
+/**
+ * Search across material sets, backed by pdf_converter/search_index.py.
+ *
+ * The index lives in server/data/search_index.sqlite and maps terms to the
+ * parts, passages, tasks and questions of every set. Saving or deleting a
+ * set sends the change to the index in the background; updates run one at
+ * a time so saves never wait on each other's writes.
+ *
+ * The same changes keep the near-duplicate signatures of
+ * pdf_converter/near_duplicates.py current, which new conversions are
+ * checked against.
+ */
+
+const path = require("path");
+const { PythonShell } = require("python-shell");
+
+const SEARCH_INDEX_SCRIPT = path.join(__dirname, "../pdf_converter/search_index.py");
+const NEAR_DUPLICATES_SCRIPT = path.join(__dirname, "../pdf_converter/near_duplicates.py");
+
+let pendingUpdate = Promise.resolve();
+
+const runIndexScript = (script, args, input) =>
+  new Promise((resolve, reject) => {
+    const pyshell = new PythonShell(path.basename(script), {
+      args,
+      scriptPath: path.dirname(script),
+      env: { ...process.env, PYTHONIOENCODING: "utf-8" },
+    });
+
+    let output = "";
+    pyshell.on("message", (message) => {
+      output += message;
+    });
+
+    for (const line of input || []) {
+      pyshell.send(line);
+    }
+    pyshell.end((err) => {
+      let result = null;
+      try {
+        result = JSON.parse(output);
+      } catch (parseErr) {
+        // Reported below with the process error, if any
+      }
+      if (result && result.success === false) {
+        reject(new Error(result.errors.join("; ")));
+      } else if (err || !result) {
+        reject(err || new Error(`${path.basename(script)} returned no result`));
+      } else {
+        resolve(result);
+      }
+    });
+  });
+
+/**
+ * Apply set changes to the search and near-duplicate indexes:
+ * [{ setId, contentJson }], where a null contentJson removes the set.
+ * Resolves with the search index summary.
+ */
+const updateSearchIndex = (changes) => {
+  const lines = changes.map(({ setId, contentJson }) =>
+    JSON.stringify({
+      set_id: Number(setId),
+      content: contentJson ? JSON.parse(contentJson) : null,
+    })
+  );
+  const run = pendingUpdate.then(async () => {
+    const summary = await runIndexScript(SEARCH_INDEX_SCRIPT, ["update"], lines);
+    await runIndexScript(NEAR_DUPLICATES_SCRIPT, ["update"], lines);
+    return summary;
+  });
+  pendingUpdate = run.catch(() => {});
+  return run;
+};
+
+/**
+ * Re-index one set after it was saved or deleted, without holding up the
+ * request; failures are only logged (rebuild with scripts/buildSearchIndex.js).
+ */
+const queueSearchIndexUpdate = (setId, contentJson) => {
+  updateSearchIndex([{ setId, contentJson }]).catch((err) => {
+    console.error(`Search index update failed for set ${setId}:`, err.message);
+  });
+};
+
+/**
+ * Sets, sections and questions matching a query: words, "quoted phrases"
+ * and prefixes (tunn*).
+ */
+const searchMaterials = (query, limit = 20) =>
+  runIndexScript(SEARCH_INDEX_SCRIPT, ["search", "--limit", String(limit), "--", query]);
+
+module.exports = {
+  updateSearchIndex,
+  queueSearchIndexUpdate,
+  searchMaterials,
+};
@@ -0,0 +1,95 @@
+/**
+ * Runs pdf_converter/writing_analytics.py over a session's writing
+ * submissions and stores the results in writing_submission_analytics.
+ *
+ * The whole session goes to Python in one batch; essays analyzed before
+ * (same text, task and prompt) come from its cache.
+ */
+
+const path = require("path");
+const { PythonShell } = require("python-shell");
+const db = require("../db");
+
+const WRITING_ANALYTICS_SCRIPT = path.join(__dirname, "../pdf_converter/writing_analytics.py");
+// Rows per INSERT when storing results
+const STORE_BATCH_SIZE = 200;
+
+const runWritingAnalytics = (submissions, content) =>
+  new Promise((resolve, reject) => {
+    const pyshell = new PythonShell(path.basename(WRITING_ANALYTICS_SCRIPT), {
+      args: ["analyze"],
+      scriptPath: path.dirname(WRITING_ANALYTICS_SCRIPT),
+      env: { ...process.env, PYTHONIOENCODING: "utf-8" },
+    });
+
+    let output = "";
+    pyshell.on("message", (message) => {
+      output += message;
+    });
+
+    pyshell.send(JSON.stringify({ content, submissions }));
+    pyshell.end((err) => {
+      let result = null;
+      try {
+        result = JSON.parse(output);
+      } catch (parseErr) {
+        // Reported below with the process error, if any
+      }
+      if (result && result.success === false) {
+        reject(new Error(result.errors.join("; ")));
+      } else if (err || !result) {
+        reject(err || new Error("writing_analytics.py returned no result"));
+      } else {
+        resolve(result);
+      }
+    });
+  });
+
+/**
+ * Upsert analytics rows ({ submission_id, task_1, task_2 }) in a few
+ * multi-row statements.
+ */
+const storeWritingAnalytics = async (results) => {
+  for (let start = 0; start < results.length; start += STORE_BATCH_SIZE) {
+    const batch = results.slice(start, start + STORE_BATCH_SIZE);
+    await db.execute(
+      `INSERT INTO writing_submission_analytics (submission_id, analytics, analyzed_at)
+       VALUES ${batch.map(() => "(?, ?, NOW())").join(", ")}
+       ON DUPLICATE KEY UPDATE analytics = VALUES(analytics), analyzed_at = VALUES(analyzed_at)`,
+      batch.flatMap(({ submission_id, task_1, task_2 }) => [
+        submission_id,
+        JSON.stringify({ task_1, task_2 }),
+      ])
+    );
+  }
+};
+
+/**
+ * Analyze every writing submission of a session against the prompts of
+ * its material set (content JSON string, may be null) and store the
+ * results. Resolves with the analyzer summary.
+ */
+const analyzeSessionWriting = async (sessionId, contentJson) => {
+  const [submissions] = await db.execute(
+    `SELECT id, task_1_content, task_2_content
+     FROM writing_submissions
+     WHERE session_id = ?`,
+    [sessionId]
+  );
+  if (submissions.length === 0) {
+    return { results: [], computed: 0, cached: 0 };
+  }
+
+  const result = await runWritingAnalytics(
+    submissions,
+    contentJson ? JSON.parse(contentJson) : null
+  );
+  await storeWritingAnalytics(result.results);
+  return result;
+};
+
+module.exports = {
+  runWritingAnalytics,
+  storeWritingAnalytics,
+  analyzeSessionWriting,
+};